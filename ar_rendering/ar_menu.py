@@ -1,19 +1,26 @@
 import cv2
 import numpy as np
+from utils.app_logging import get_logger
+from ui.hud_layers import HudLayerCache, HudText
+
+logger = get_logger(__name__)
 
 class ARMenu:
     def __init__(self):
         self.menu_items = []
         self.selected_index = 0
-        print(f"DEBUG_MENU: ARMenu inicializado con {len(self.menu_items)} elementos")
+        # Textos del menú rasterizados en coordenadas relativas al menú: al moverse
+        # el marcador solo cambia dónde se compone la capa, no hay que redibujarla
+        self.hud = HudLayerCache()
+        logger.info("ARMenu inicializado con %s elementos", len(self.menu_items))
         
     def draw_menu_overlay(self, frame, marker_corners):
         """Dibuja el menú con múltiples coches y botón volver"""
         if not self.menu_items or marker_corners is None or len(marker_corners) == 0:
-            print(f"DEBUG_MENU: No hay elementos ({len(self.menu_items)}) o marcador")
+            logger.debug("No hay elementos (%s) o marcador", len(self.menu_items))
             return frame
         
-        print(f"DEBUG_MENU: Dibujando menú con {len(self.menu_items)} coches")
+        logger.debug("Dibujando menú con %s coches", len(self.menu_items))
         
         # Obtener las esquinas del marcador
         corners = marker_corners[0].reshape(-1, 2)
@@ -38,18 +45,16 @@ class ARMenu:
         menu_x = max(10, min(menu_x, frame.shape[1] - menu_width - 10))
         menu_y = max(10, min(menu_y, frame.shape[0] - menu_height - 10))
         
-        # Crear overlay semitransparente
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (menu_x, menu_y), (menu_x + menu_width, menu_y + menu_height), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.8, frame, 0.2, 0, frame)
+        # Fondo semitransparente (80% negro): solo se toca el rectángulo del menú
+        roi = frame[max(menu_y, 0):menu_y + menu_height + 1, max(menu_x, 0):menu_x + menu_width + 1]
+        cv2.addWeighted(roi, 0.2, roi, 0.0, 0, dst=roi)
         
         # Borde del menú
         cv2.rectangle(frame, (menu_x, menu_y), (menu_x + menu_width, menu_y + menu_height), (255, 255, 255), 3)
         
-        # Título del menú
-        title_y = menu_y + 50
-        cv2.putText(frame, "=== CAR SHOWROOM ===", (menu_x + 50, title_y), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        # Título del menú (coordenadas relativas a la esquina del menú)
+        title_y = 50
+        items = [HudText("=== CAR SHOWROOM ===", (50, title_y), 0.8, (255, 255, 255), 2)]
         
         # Mostrar todas las opciones disponibles
         option_y_start = title_y + 80
@@ -60,35 +65,32 @@ class ARMenu:
             color = (0, 255, 0) if i == self.selected_index else (255, 255, 255)
             
             # Mostrar número y nombre del coche
-            cv2.putText(frame, f"{i+1}. {car['name']}", (menu_x + 60, option_y), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-            cv2.putText(frame, car['description'], (menu_x + 80, option_y + 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+            items.append(HudText(f"{i+1}. {car['name']}", (60, option_y), 0.7, color, 2))
+            items.append(HudText(car['description'], (80, option_y + 30), 0.5, (200, 200, 200), 1))
         
         # 🔧 AÑADIR BOTÓN VOLVER
-        volver_y = menu_y + menu_height - 120
-        cv2.putText(frame, "0. <- VOLVER AL LOGIN", (menu_x + 60, volver_y), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 100, 100), 2)
+        volver_y = menu_height - 120
+        items.append(HudText("0. <- VOLVER AL LOGIN", (60, volver_y), 0.6, (255, 100, 100), 2))
         
         # Instrucciones actualizadas
-        instructions_y = menu_y + menu_height - 60
-        cv2.putText(frame, "0: Volver | 1-2: Seleccionar | ESPACIO: Ver modelo 3D", (menu_x + 20, instructions_y), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 0), 1)
+        instructions_y = menu_height - 60
+        items.append(HudText("0: Volver | 1-2: Seleccionar | ESPACIO: Ver modelo 3D", (20, instructions_y),
+                             0.45, (255, 255, 0), 1))
         
-        return frame
+        return self.hud.draw(frame, tuple(items), origin=(menu_x, menu_y), canvas_size=(menu_width, menu_height))
 
     def handle_selection(self, key):
         """Maneja la selección de múltiples coches y opción volver"""
-        print(f"DEBUG_MENU: Tecla presionada: {chr(key) if 32 <= key <= 126 else key}")
+        logger.debug("Tecla presionada: %s", chr(key) if 32 <= key <= 126 else key)
 
         # Si no hay elementos en el menú, se ignora la tecla
         if not self.menu_items:
-            print("DEBUG_MENU: Menú vacío - se ignora la entrada")
+            logger.debug("Menú vacío - se ignora la entrada")
             return None
         
         # 🔧 OPCIÓN VOLVER CON TECLA "0"
         if key == ord('0'):
-            print("DEBUG_MENU: ✅ VOLVER AL LOGIN seleccionado")
+            logger.debug("✅ VOLVER AL LOGIN seleccionado")
             return "VOLVER"  # Valor especial para indicar volver
         
         # Selección numérica
@@ -96,17 +98,17 @@ class ARMenu:
             index = key - ord('1')  # Convertir '1' a índice 0
             if index < len(self.menu_items):
                 self.selected_index = index
-                print(f"DEBUG_MENU: Navegando a índice {index}: {self.menu_items[index]['name']}")
+                logger.debug("Navegando a índice %s: %s", index, self.menu_items[index]['name'])
             else:
-                print(f"DEBUG_MENU: Índice {index} fuera de rango (máximo {len(self.menu_items)-1})")
+                logger.debug("Índice %s fuera de rango (máximo %s)", index, len(self.menu_items)-1)
     
         # Confirmar selección con ESPACIO
         elif key == ord(' '):
             if 0 <= self.selected_index < len(self.menu_items):
                 selected_car = self.menu_items[self.selected_index]
-                print(f"DEBUG_MENU: ✅ CONFIRMADO: {selected_car['name']}")
+                logger.debug("✅ CONFIRMADO: %s", selected_car['name'])
                 return selected_car
             else:
-                print(f"DEBUG_MENU: Índice seleccionado inválido: {self.selected_index}")
+                logger.debug("Índice seleccionado inválido: %s", self.selected_index)
     
         return None
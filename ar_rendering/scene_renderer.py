@@ -10,6 +10,11 @@ import pyrender
 import trimesh
 from pyrender.constants import RenderFlags
 
+from utils.instrumentation import profiler
+from utils.app_logging import get_logger, every
+
+logger = get_logger(__name__)
+
 MARKER_SIZE_METERS = 0.05
 
 initialized = False
@@ -20,12 +25,12 @@ texture_id_test = None # Esta variable se llenará desde AppManager
 def check_gl_error(operation_name=""): # Mantener esta útil función
     err = glGetError()
     if err != GL_NO_ERROR:
-        print(f"OpenGL Error ({operation_name}): {gluErrorString(err)}")
+        logger.warning("OpenGL Error (%s): %s", operation_name, gluErrorString(err))
         return True
     return False
 
 def load_texture(image_path): # Usaremos tu versión que funcionaba
-    print(f"DEBUG_SR_TEX: Intentando cargar textura desde: {image_path}")
+    logger.info("Intentando cargar textura desde: %s", image_path)
     try:
         img = Image.open(image_path)
         img = img.convert("RGBA") # Asegurar formato RGBA para transparencia
@@ -44,13 +49,13 @@ def load_texture(image_path): # Usaremos tu versión que funcionaba
         glGenerateMipmap(GL_TEXTURE_2D); check_gl_error("glGenerateMipmap")
         
         glBindTexture(GL_TEXTURE_2D, 0); check_gl_error("glBindTexture(0)") # Desactivar
-        print(f"DEBUG_SR_TEX: Textura cargada OK ({image_path}), ID: {tex_id}, Modo: {img.mode}, Tamaño: {img.size}")
+        logger.info("Textura cargada OK (%s), ID: %s, Modo: %s, Tamaño: %s", image_path, tex_id, img.mode, img.size)
         return tex_id
     except FileNotFoundError:
-        print(f"Error: Archivo de textura no encontrado en {image_path}")
+        logger.warning("Error: Archivo de textura no encontrado en %s", image_path)
         return None
     except Exception as e:
-        print(f"Error cargando textura {image_path}: {e}")
+        logger.warning("Error cargando textura %s: %s", image_path, e)
         import traceback
         traceback.print_exc()
         return None
@@ -76,7 +81,7 @@ def init_opengl(width, height):
     check_gl_error("glClearColor")
     
     initialized = True
-    print("OpenGL inicializado (Texturizado Activado, sin iluminación, sin culling, con blending).")
+    logger.info("OpenGL inicializado (Texturizado Activado, sin iluminación, sin culling, con blending).")
 
 def draw_cube_with_texture_on_front(size=1.0): # Renombrada para claridad
     global texture_id_test
@@ -139,11 +144,11 @@ class PyrenderModelViewer:
         from trimesh.transformations import rotation_matrix, translation_matrix
 
         # Debug inicial...
-        print(f"DEBUG_MODEL: 🏎️ === CARGANDO MODELO ===")
-        print(f"DEBUG_MODEL: Coche recibido: {car_dict}")
-        print(f"DEBUG_MODEL: Nombre: {car_dict.get('name', 'DESCONOCIDO')}")
-        print(f"DEBUG_MODEL: Ruta: {car_dict.get('model_path', 'SIN RUTA')}")
-        print(f"DEBUG_MODEL: ================================")
+        logger.info("🏎️ === CARGANDO MODELO ===")
+        logger.debug("Coche recibido: %s", car_dict)
+        logger.debug("Nombre: %s", car_dict.get('name', 'DESCONOCIDO'))
+        logger.debug("Ruta: %s", car_dict.get('model_path', 'SIN RUTA'))
+        logger.debug("================================")
 
         model_path = f"assets/3d_models/{car_dict['model_path']}"
         scale = car_dict.get('scale', 0.05)
@@ -151,31 +156,31 @@ class PyrenderModelViewer:
         
         self._current_model_name = car_dict.get('name', 'Modelo desconocido')
 
-        print(f"DEBUG_MODEL: Ruta completa: {model_path}")
-        print(f"DEBUG_MODEL: Ruta absoluta: {os.path.abspath(model_path)}")
-        print(f"DEBUG_MODEL: ¿Existe archivo? {os.path.exists(model_path)}")
+        logger.debug("Ruta completa: %s", model_path)
+        logger.debug("Ruta absoluta: %s", os.path.abspath(model_path))
+        logger.debug("¿Existe archivo? %s", os.path.exists(model_path))
 
         if not os.path.exists(model_path):
-            print(f"DEBUG_MODEL: ❌ Modelo no encontrado: {model_path}")
+            logger.warning("❌ Modelo no encontrado: %s", model_path)
             return False
 
         _, ext = os.path.splitext(model_path)
         ext = ext.lower()
         self._current_file_ext = ext
-        print(f"DEBUG_MODEL: 📁 Tipo de archivo: {ext}")
+        logger.debug("📁 Tipo de archivo: %s", ext)
 
         if ext in ['.glb', '.gltf']:
-            print("DEBUG_MODEL: 🎨 Cargando GLB/GLTF con sanitización de texturas")
+            logger.info("🎨 Cargando GLB/GLTF con sanitización de texturas")
             model = trimesh.load(model_path, process=True)
         elif ext == '.obj':
-            print("DEBUG_MODEL: 🎨 Cargando OBJ con materiales MTL")
+            logger.info("🎨 Cargando OBJ con materiales MTL")
             model = trimesh.load(model_path, process=True)
         else:
-            print(f"DEBUG_MODEL: ❌ Formato {ext} no soportado")
+            logger.warning("❌ Formato %s no soportado", ext)
             return False
 
         if isinstance(model, trimesh.Scene):
-            print("DEBUG_MODEL: Escena detectada, creando meshes individuales")
+            logger.info("Escena detectada, creando meshes individuales")
             combined = model.dump(concatenate=True)
 
             from trimesh.transformations import scale_matrix
@@ -214,18 +219,18 @@ class PyrenderModelViewer:
 
             self.current_model = [pyrender.Mesh.from_trimesh(model, smooth=True)]
         
-        print(f"DEBUG_MODEL: ✅ Modelo {self._current_model_name} cargado correctamente")
-        print(f"DEBUG_MODEL: Creados {len(self.current_model)} meshes")
+        logger.info("✅ Modelo %s cargado correctamente", self._current_model_name)
+        logger.debug("Creados %s meshes", len(self.current_model))
         return True
 
     def _sanitize_glb_materials(self, geom):
         """Sanitizar materiales de GLB para evitar errores de texturas"""
-        print("DEBUG_MODEL: 🧹 Sanitizando materiales GLB...")
+        logger.info("🧹 Sanitizando materiales GLB...")
         
         if hasattr(geom, 'visual') and hasattr(geom.visual, 'material'):
             mat = geom.visual.material
             if mat is not None:
-                print(f"DEBUG_MODEL: Material encontrado: {type(mat)}")
+                logger.debug("Material encontrado: %s", type(mat))
                 
                 # 🔧 OPCIÓN 1: Reemplazar con material sólido simple
                 from trimesh.visual.material import PBRMaterial
@@ -235,7 +240,7 @@ class PyrenderModelViewer:
                 
                 if hasattr(mat, 'baseColorFactor') and mat.baseColorFactor is not None:
                     base_color = mat.baseColorFactor
-                    print(f"DEBUG_MODEL: Usando color base: {base_color}")
+                    logger.debug("Usando color base: %s", base_color)
                 
                 # Crear material simple sin texturas problemáticas
                 safe_material = PBRMaterial(
@@ -251,19 +256,19 @@ class PyrenderModelViewer:
                 )
                 
                 geom.visual.material = safe_material
-                print("DEBUG_MODEL: ✅ Material GLB sanitizado con colores sólidos")
+                logger.info("✅ Material GLB sanitizado con colores sólidos")
 
     def _sanitize_obj_materials(self, model):
         """Sanitizar materiales de OBJ para mantener compatibilidad"""
-        print("DEBUG_MODEL: 🧹 Verificando materiales OBJ...")
+        logger.info("🧹 Verificando materiales OBJ...")
         
         if hasattr(model, 'visual') and hasattr(model.visual, 'material'):
             if model.visual.material is not None:
-                print("DEBUG_MODEL: ✅ Material OBJ preservado (compatible)")
+                logger.info("✅ Material OBJ preservado (compatible)")
             else:
-                print("DEBUG_MODEL: ⚠️ OBJ sin material - se aplicará rojo por defecto")
+                logger.warning("⚠️ OBJ sin material - se aplicará rojo por defecto")
         else:
-            print("DEBUG_MODEL: ⚠️ OBJ sin visual.material - se aplicará rojo por defecto")
+            logger.warning("⚠️ OBJ sin visual.material - se aplicará rojo por defecto")
 
     # MODIFICAR render_model_on_marker() - Manejo de errores de texturas:
 
@@ -280,18 +285,19 @@ class PyrenderModelViewer:
             elif self._current_file_ext in ['.glb', '.gltf']:
                 model_name = "Porsche 911"
         
-        print(f"DEBUG_MODEL: 🎬 Renderizando {model_name}...")
+        logger.debug("🎬 Renderizando %s...", model_name)
         
         if not self.current_model:
-            print(f"DEBUG_MODEL: No hay modelo cargado")
+            logger.debug("No hay modelo cargado")
             return frame
         
         try:
             # Configurar escena solo la primera vez
-            self.setup_scene(camera_matrix, frame.shape[1], frame.shape[0])
+            with profiler.stage('scene_setup'):
+                self.setup_scene(camera_matrix, frame.shape[1], frame.shape[0])
             
             if not self.initialized:
-                print(f"DEBUG_MODEL: ❌ Escena no inicializada")
+                logger.warning("❌ Escena no inicializada")
                 return frame
             
             # Calcular pose
@@ -302,7 +308,7 @@ class PyrenderModelViewer:
             pose_cv[:3, :3] = R
             pose_cv[:3, 3] = T
             
-            print(f"DEBUG_MODEL: 📍 Posición marcador: {T}")
+            logger.debug("📍 Posición marcador: %s", T)
             
             # Convertir a sistema OpenGL
             cv_to_gl = np.array([[1, 0,  0, 0],
@@ -311,23 +317,24 @@ class PyrenderModelViewer:
                                  [0, 0,  0, 1]], dtype=np.float32)
             
             pose_gl = cv_to_gl @ pose_cv
-            print(f"DEBUG_MODEL: 🔄 Pose OpenGL calculada")
+            logger.debug("🔄 Pose OpenGL calculada")
             
             # Actualizar pose del modelo
             for node in self.mesh_nodes:
                 node.matrix = pose_gl
             
             # 🔧 RENDERIZAR CON MANEJO DE ERRORES DE TEXTURAS
-            print(f"DEBUG_MODEL: 🎨 Intentando renderizar {model_name}...")
+            logger.debug("🎨 Intentando renderizar %s...", model_name)
             try:
-                color, depth = self.renderer.render(self.scene, flags=RenderFlags.RGBA)
-                print(f"DEBUG_MODEL: ✅ Renderizado exitoso de {model_name}")
+                with profiler.stage('render'):
+                    color, depth = self.renderer.render(self.scene, flags=RenderFlags.RGBA)
+                logger.debug("✅ Renderizado exitoso de %s", model_name)
                 
             except Exception as texture_error:
-                print(f"DEBUG_MODEL: ⚠️ Error de texturas en {model_name}: {texture_error}")
+                logger.warning("⚠️ Error de texturas en %s: %s", model_name, texture_error)
                 
                 # 🔧 FALLBACK: Recrear escena con materiales limpios
-                print(f"DEBUG_MODEL: 🔄 Intentando fallback sin texturas...")
+                logger.debug("🔄 Intentando fallback sin texturas...")
                 
                 # Limpiar escena actual
                 self.cleanup()
@@ -355,23 +362,25 @@ class PyrenderModelViewer:
                 
                 # Renderizar con materiales limpios
                 color, depth = self.renderer.render(self.scene, flags=RenderFlags.RGBA)
-                print(f"DEBUG_MODEL: ✅ Fallback exitoso para {model_name}")
+                logger.debug("✅ Fallback exitoso para %s", model_name)
         
             # Procesar resultado del renderizado
-            print(f"DEBUG_MODEL: 🖼️ Color shape: {color.shape}")
-            print(f"DEBUG_MODEL: 🎨 Color range: {color.min()}-{color.max()}")
+            logger.debug("🖼️ Color shape: %s", color.shape)
+            logger.debug("🎨 Color range: %s-%s", color.min(), color.max())
             
             # Aplicar al frame
-            mask = color[:, :, 3] > 0
-            pixel_count = np.sum(mask)
-            print(f"DEBUG_MODEL: 🔢 Píxeles visibles: {pixel_count} de {color.shape[0]*color.shape[1]}")
+            with profiler.stage('composite'):
+                mask = color[:, :, 3] > 0
+                pixel_count = np.sum(mask)
+                if pixel_count > 0:
+                    color_bgr = cv2.cvtColor(color, cv2.COLOR_RGBA2BGR)
+                    frame[mask] = color_bgr[mask]
+            logger.debug("🔢 Píxeles visibles: %s de %s", pixel_count, color.shape[0]*color.shape[1])
             
             if pixel_count > 0:
-                color_bgr = cv2.cvtColor(color, cv2.COLOR_RGBA2BGR)
-                frame[mask] = color_bgr[mask]
-                print(f"DEBUG_MODEL: ✅ {model_name} renderizado con píxeles visibles!")
+                logger.debug("✅ %s renderizado con píxeles visibles!", model_name)
             else:
-                print(f"DEBUG_MODEL: ⚠️ {model_name} renderizado pero SIN píxeles visibles")
+                logger.warning("⚠️ %s renderizado pero SIN píxeles visibles", model_name, extra=every(2.0))
                 # Indicador visual
                 cv2.circle(frame, (320, 240), 30, (255, 0, 255), 3)
                 cv2.putText(frame, f"{model_name} (invisible)", (200, 240), 
@@ -380,7 +389,7 @@ class PyrenderModelViewer:
             return frame
             
         except Exception as e:
-            print(f"DEBUG_MODEL: 💥 Error crítico renderizando {model_name}: {e}")
+            logger.error("💥 Error crítico renderizando %s: %s", model_name, e)
             import traceback
             traceback.print_exc()
             
@@ -392,15 +401,15 @@ class PyrenderModelViewer:
         
     def setup_scene(self, camera_matrix, frame_width, frame_height):
         """Configurar escena detectando materiales en GLB y OBJ"""
-        print(f"DEBUG_MODEL: 🔧 === CONFIGURANDO ESCENA ===")
-        print(f"DEBUG_MODEL: initialized: {self.initialized}")
-        print(f"DEBUG_MODEL: current_model: {self.current_model is not None}")
+        logger.debug("🔧 === CONFIGURANDO ESCENA ===")
+        logger.debug("initialized: %s", self.initialized)
+        logger.debug("current_model: %s", self.current_model is not None)
         
         if self.initialized or not self.current_model:
-            print(f"DEBUG_MODEL: ⚠️ Saltando setup_scene - ya inicializado o sin modelo")
+            logger.debug("Saltando setup_scene - ya inicializado o sin modelo")
             return
         
-        print("DEBUG_MODEL: 🔧 Configurando escena...")
+        logger.debug("🔧 Configurando escena...")
         
         # Crear escena Pyrender
         self.scene = pyrender.Scene(bg_color=[0, 0, 0, 0])
@@ -419,36 +428,36 @@ class PyrenderModelViewer:
         meshes = self.current_model if isinstance(self.current_model, list) else [self.current_model]
         for mesh in meshes:
             if hasattr(mesh, 'primitives'):
-                print(f"DEBUG_MODEL: 🔍 Analizando {len(mesh.primitives)} primitivas...")
+                logger.debug("🔍 Analizando %s primitivas...", len(mesh.primitives))
                 for i, primitive in enumerate(mesh.primitives):
                     if primitive.material is not None:
                         has_materials = True
-                        print(f"DEBUG_MODEL: Primitiva {i} tiene material: {type(primitive.material).__name__}")
+                        logger.debug("Primitiva %s tiene material: %s", i, type(primitive.material).__name__)
 
                         # 🔍 DEBUG DETALLADO DEL MATERIAL
                         mat = primitive.material
-                        print(f"DEBUG_MODEL: --- Material {i} Detalles ---")
+                        logger.debug("--- Material %s Detalles ---", i)
                         if hasattr(mat, 'baseColorFactor'):
-                            print(f"DEBUG_MODEL: baseColorFactor: {mat.baseColorFactor}")
+                            logger.debug("baseColorFactor: %s", mat.baseColorFactor)
                         if hasattr(mat, 'baseColorTexture'):
-                            print(f"DEBUG_MODEL: baseColorTexture: {mat.baseColorTexture}")
+                            logger.debug("baseColorTexture: %s", mat.baseColorTexture)
                         if hasattr(mat, 'metallicFactor'):
-                            print(f"DEBUG_MODEL: metallicFactor: {mat.metallicFactor}")
+                            logger.debug("metallicFactor: %s", mat.metallicFactor)
                         if hasattr(mat, 'roughnessFactor'):
-                            print(f"DEBUG_MODEL: roughnessFactor: {mat.roughnessFactor}")
+                            logger.debug("roughnessFactor: %s", mat.roughnessFactor)
                         if hasattr(mat, 'name'):
-                            print(f"DEBUG_MODEL: Material name: {mat.name}")
-                        print(f"DEBUG_MODEL: --- Fin Material {i} ---")
+                            logger.debug("Material name: %s", mat.name)
+                        logger.debug("--- Fin Material %s ---", i)
                     else:
-                        print(f"DEBUG_MODEL: Primitiva {i} SIN material")
+                        logger.debug("Primitiva %s SIN material", i)
 
-        print(f"DEBUG_MODEL: ¿Tiene materiales? {has_materials}")
+        logger.debug("¿Tiene materiales? %s", has_materials)
 
         # 🔆 CONFIGURAR LUCES SEGÚN PRESENCIA DE MATERIALES
         if has_materials:
             # Modelo con materiales (GLB o OBJ+MTL): Luces moderadas
             model_type = "GLB" if hasattr(self, '_current_file_ext') and self._current_file_ext in ['.glb', '.gltf'] else "OBJ+MTL"
-            print(f"DEBUG_MODEL: 💡 Configurando luces MODERADAS para {model_type}")
+            logger.debug("💡 Configurando luces MODERADAS para %s", model_type)
             
             # Luces moderadas para preservar texturas/materiales
             light_intensity = 1.5   # Moderado
@@ -470,14 +479,14 @@ class PyrenderModelViewer:
             side_pose[:3, 3] = [0.1, 0.1, 0.05]
             self.scene.add(side_light, pose=side_pose)
             
-            print(f"DEBUG_MODEL: 💡 Luces {model_type} - Direccional: {light_intensity}, Ambiental: {ambient_intensity}, Lateral: 2.0")
+            logger.debug("💡 Luces %s - Direccional: %s, Ambiental: %s, Lateral: 2.0", model_type, light_intensity, ambient_intensity)
             
             # 🎨 NO APLICAR MATERIAL - Usar los materiales originales
-            print(f"DEBUG_MODEL: 🎨 Manteniendo materiales originales del {model_type}")
+            logger.debug("🎨 Manteniendo materiales originales del %s", model_type)
             
         else:
             # Modelo sin materiales: Aplicar material rojo por defecto
-            print("DEBUG_MODEL: 💡 Configurando luces INTENSAS para modelo sin materiales")
+            logger.debug("💡 Configurando luces INTENSAS para modelo sin materiales")
             light_intensity = 8.0
             point_intensity = 10.0
             
@@ -489,10 +498,10 @@ class PyrenderModelViewer:
             light_pose[:3, 3] = [0, 0, 0.1]
             self.scene.add(light2, pose=light_pose)
             
-            print(f"DEBUG_MODEL: 💡 Luces intensas - Direccional: {light_intensity}, Puntual: {point_intensity}")
+            logger.debug("💡 Luces intensas - Direccional: %s, Puntual: %s", light_intensity, point_intensity)
         
             # 🎨 APLICAR MATERIAL ROJO SOLO SI NO HAY MATERIALES
-            print("DEBUG_MODEL: 🎨 Aplicando material rojo por defecto")
+            logger.debug("🎨 Aplicando material rojo por defecto")
             material_rojo = pyrender.MetallicRoughnessMaterial(
                 baseColorFactor=[1.0, 0.0, 0.0, 1.0],
                 metallicFactor=0.8,
@@ -515,30 +524,43 @@ class PyrenderModelViewer:
         self.renderer = pyrender.OffscreenRenderer(frame_width, frame_height)
         
         self.initialized = True
-        print("DEBUG_MODEL: ✅ Escena configurada exitosamente")
+        logger.info("✅ Escena configurada exitosamente")
+
+    def reset_scene(self):
+        """Descartar escena y renderer (p. ej. al cambiar la resolución) conservando el modelo cargado"""
+        if self.renderer is not None:
+            try:
+                self.renderer.delete()
+            except Exception as e:
+                logger.warning("Error limpiando renderer: %s", e)
+            self.renderer = None
+        self.scene = None
+        self.camera_node = None
+        self.mesh_nodes = []
+        self.initialized = False
 
     def cleanup(self):
         """Limpiar recursos del renderer"""
-        print("DEBUG_MODEL: 🧹 Limpiando recursos...")
+        logger.info("🧹 Limpiando recursos...")
         
         # Limpiar renderer
         if hasattr(self, 'renderer') and self.renderer is not None:
             try:
                 self.renderer.delete()
-                print("DEBUG_MODEL: Renderer limpiado")
+                logger.debug("Renderer limpiado")
             except Exception as e:
-                print(f"DEBUG_MODEL: Error limpiando renderer: {e}")
+                logger.warning("Error limpiando renderer: %s", e)
             self.renderer = None
         
         # Limpiar escena
         if hasattr(self, 'scene') and self.scene is not None:
             self.scene = None
-            print("DEBUG_MODEL: Escena limpiada")
+            logger.debug("Escena limpiada")
         
         # Limpiar nodos
         if hasattr(self, 'mesh_nodes'):
             self.mesh_nodes = []
-            print("DEBUG_MODEL: Nodos de mesh limpiados")
+            logger.debug("Nodos de mesh limpiados")
         
         # Limpiar variables de estado
         self.camera_node = None
@@ -552,5 +574,5 @@ class PyrenderModelViewer:
         if hasattr(self, '_current_file_ext'):
             delattr(self, '_current_file_ext')
         
-        print("DEBUG_MODEL: ✅ Todos los recursos limpiados")
+        logger.info("✅ Todos los recursos limpiados")
 
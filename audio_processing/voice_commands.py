@@ -2,7 +2,9 @@ import speech_recognition as sr
 import threading
 import time
 from queue import Queue, Empty
-import logging
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
 
 # Si falta algún import, añadirlo al principio del archivo
 
@@ -26,9 +28,8 @@ class VoiceController:
             'logout': ['salir', 'logout', 'cerrar sesión', 'quit']
         }
         
-        # Configurar logging
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
+        # El logging se configura una sola vez en main.py (utils/app_logging.py)
+        self.logger = logger
         
         # Configurar micrófono
         self._setup_microphone()
@@ -37,7 +38,7 @@ class VoiceController:
         """Configurar y calibrar micrófono"""
         try:
             self.microphone = sr.Microphone()
-            print("DEBUG_VOICE: 🎤 Calibrando micrófono...")
+            logger.info("🎤 Calibrando micrófono...")
             
             with self.microphone as source:
                 # Ajustar para ruido ambiental (más tiempo para mejor calibración)
@@ -46,30 +47,30 @@ class VoiceController:
                 self.recognizer.energy_threshold = 300
                 self.recognizer.dynamic_energy_threshold = True
                 
-            print("DEBUG_VOICE: ✅ Micrófono configurado correctamente")
-            print(f"DEBUG_VOICE: Energy threshold: {self.recognizer.energy_threshold}")
+            logger.info("✅ Micrófono configurado correctamente")
+            logger.info("Energy threshold: %s", self.recognizer.energy_threshold)
             return True
             
         except Exception as e:
-            print(f"DEBUG_VOICE: ❌ Error configurando micrófono: {e}")
+            logger.warning("❌ Error configurando micrófono: %s", e)
             self.microphone = None
             return False
     
     def start_listening(self):
         """Iniciar escucha en segundo plano"""
         if not self.microphone:
-            print("DEBUG_VOICE: ❌ No hay micrófono disponible")
+            logger.warning("❌ No hay micrófono disponible")
             return False
             
         if self.listening:
-            print("DEBUG_VOICE: ⚠️ Ya está escuchando")
+            logger.warning("⚠️ Ya está escuchando")
             return True
             
         self.listening = True
         self.listen_thread = threading.Thread(target=self._listen_continuously, daemon=True)
         self.listen_thread.start()
-        print("DEBUG_VOICE: 🎤 Reconocimiento de voz INICIADO")
-        print("DEBUG_VOICE: 🗣️ Puedes decir: 'Ferrari', 'Porsche', 'Menú', 'Salir'")
+        logger.info("🎤 Reconocimiento de voz INICIADO")
+        logger.info("🗣️ Puedes decir: 'Ferrari', 'Porsche', 'Menú', 'Salir'")
         return True
     
     def stop_listening(self):
@@ -77,7 +78,7 @@ class VoiceController:
         self.listening = False
         if self.listen_thread:
             self.listen_thread.join(timeout=2)
-        print("DEBUG_VOICE: 🔇 Reconocimiento de voz DETENIDO")
+        logger.info("🔇 Reconocimiento de voz DETENIDO")
     
     def _listen_continuously(self):
         """Escuchar continuamente en segundo plano"""
@@ -95,13 +96,13 @@ class VoiceController:
                     text = self.recognizer.recognize_google(audio, language='es-ES')
                     text_lower = text.lower().strip()
                     
-                    print(f"DEBUG_VOICE: 🔊 Escuchado: '{text}'")
+                    logger.info("🔊 Escuchado: '%s'", text)
                     
                     # Detectar comandos
                     command = self._detect_command(text_lower)
                     if command:
                         self.voice_queue.put(command)
-                        print(f"DEBUG_VOICE: ✅ Comando detectado: {command}")
+                        logger.info("✅ Comando detectado: %s", command)
                     
                     # Reset contador de errores en éxito
                     consecutive_errors = 0
@@ -111,10 +112,10 @@ class VoiceController:
                     pass
                 except sr.RequestError as e:
                     consecutive_errors += 1
-                    print(f"DEBUG_VOICE: ❌ Error del servicio ({consecutive_errors}/{max_consecutive_errors}): {e}")
+                    logger.warning("❌ Error del servicio (%s/%s): %s", consecutive_errors, max_consecutive_errors, e)
                     
                     if consecutive_errors >= max_consecutive_errors:
-                        print("DEBUG_VOICE: 🚫 Demasiados errores consecutivos, pausando...")
+                        logger.warning("🚫 Demasiados errores consecutivos, pausando...")
                         time.sleep(5)
                         consecutive_errors = 0
                     
@@ -123,9 +124,9 @@ class VoiceController:
                 pass
             except Exception as e:
                 consecutive_errors += 1
-                print(f"DEBUG_VOICE: ❌ Error inesperado ({consecutive_errors}): {e}")
+                logger.warning("❌ Error inesperado (%s): %s", consecutive_errors, e)
                 if consecutive_errors >= max_consecutive_errors:
-                    print("DEBUG_VOICE: 🚫 Demasiados errores, pausando...")
+                    logger.warning("🚫 Demasiados errores, pausando...")
                     time.sleep(3)
                     consecutive_errors = 0
                 else:
@@ -138,24 +139,24 @@ class VoiceController:
         # Buscar palabras clave de Ferrari
         for keyword in self.car_keywords['ferrari']:
             if keyword in text:
-                print(f"DEBUG_VOICE: 🏎️ Ferrari detectado con palabra '{keyword}' en '{text}'")
+                logger.info("🏎️ Ferrari detectado con palabra '%s' en '%s'", keyword, text)
                 return {'type': 'car_selection', 'car': 'ferrari'}
         
         # Buscar palabras clave de Porsche
         for keyword in self.car_keywords['porsche']:
             if keyword in text:
-                print(f"DEBUG_VOICE: 🚗 Porsche detectado con palabra '{keyword}' en '{text}'")
+                logger.info("🚗 Porsche detectado con palabra '%s' en '%s'", keyword, text)
                 return {'type': 'car_selection', 'car': 'porsche'}
         
         # Buscar comandos de control
         for keyword in self.control_keywords['menu']:
             if keyword in text:
-                print(f"DEBUG_VOICE: 🔙 Comando menú detectado con palabra '{keyword}' en '{text}'")
+                logger.info("🔙 Comando menú detectado con palabra '%s' en '%s'", keyword, text)
                 return {'type': 'navigation', 'action': 'menu'}
         
         for keyword in self.control_keywords['logout']:
             if keyword in text:
-                print(f"DEBUG_VOICE: 🚪 Comando logout detectado con palabra '{keyword}' en '{text}'")
+                logger.info("🚪 Comando logout detectado con palabra '%s' en '%s'", keyword, text)
                 return {'type': 'navigation', 'action': 'logout'}
         
         return None
@@ -188,7 +189,7 @@ class VoiceController:
     def cleanup(self):
         """Limpiar recursos"""
         self.stop_listening()
-        print("DEBUG_VOICE: 🧹 Recursos de voz limpiados")
+        logger.info("🧹 Recursos de voz limpiados")
 
 # Función de utilidad para crear instancia global
 _voice_controller_instance = None
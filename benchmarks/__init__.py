@@ -0,0 +1,11 @@
+# ARCar_Showroom/benchmarks/__init__.py
+"""
+Benchmarks de los caminos calientes de visión y render.
+
+    python -m benchmarks.run                        # todo, resultados en benchmarks/results/latest.json
+    python -m benchmarks.run --suite vision --quick
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+Los fixtures son deterministas (semilla fija) para que dos ejecuciones en la
+misma máquina sean comparables.
+"""
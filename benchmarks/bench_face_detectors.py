@@ -0,0 +1,119 @@
+# ARCar_Showroom/benchmarks/bench_face_detectors.py
+"""
+Comparar los perfiles de detector de caras: ms/frame y recall sobre las caras
+registradas (cada una pegada en un frame 640x480, igual que el resto de la suite).
+
+    python -m benchmarks.bench_face_detectors [--min-recall 0.95] [--repeat 30]
+
+Imprime una tabla y recomienda el perfil más rápido que llega al recall
+mínimo. También forma parte de `python -m benchmarks.run --suite faces`.
+"""
+import argparse
+import itertools
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import cv2
+
+from benchmarks.fixtures import FRAME_SIZE, load_enrolled_faces, face_frame
+from benchmarks.harness import Case, run_case, skipped
+from core.config import FACE_DETECTOR_PROFILES, FACE_DETECTION_MIN_SIZE
+from vision_processing.face_detectors import create_face_detector
+
+FACE_PX = 200  # Tamaño de la cara pegada en el frame (como en bench_vision)
+MIN_RECALL = 0.95
+
+
+def _face_rect(frame_size=FRAME_SIZE, face_px=FACE_PX):
+    """Rectángulo donde face_frame pega la cara"""
+    width, height = frame_size
+    return ((width - face_px) // 2, (height - face_px) // 2, face_px, face_px)
+
+
+def _is_hit(box, truth):
+    """La detección corresponde a la cara: centro dentro y tamaño entre la mitad y el doble"""
+    x, y, w, h = box
+    tx, ty, tw, th = truth
+    cx, cy = x + w / 2.0, y + h / 2.0
+    return tx <= cx <= tx + tw and ty <= cy <= ty + th and 0.5 * tw <= w <= 2.0 * tw
+
+
+def evaluate(detector, grays, truth=None):
+    """Recall y falsos positivos por frame de `detector` sobre los frames en gris"""
+    truth = truth or _face_rect()
+    hits = false_positives = 0
+    for gray in grays:
+        boxes = detector.detect(gray, min_size=FACE_DETECTION_MIN_SIZE)
+        matched = [_is_hit(box, truth) for box in boxes]
+        hits += any(matched)
+        false_positives += len(matched) - sum(matched)
+    return {'recall': hits / float(len(grays)), 'false_positives_per_frame': false_positives / float(len(grays))}
+
+
+def collect(project_root_path, profiles=FACE_DETECTOR_PROFILES):
+    faces = load_enrolled_faces(project_root_path)
+    grays = [cv2.cvtColor(face_frame(face), cv2.COLOR_BGR2GRAY) for face in faces]
+
+    cases = []
+    for profile_name, profile in profiles.items():
+        name = f"face_detector.detect[{profile_name}]"
+        detector = create_face_detector(project_root_path, profile_name, profiles)
+        if detector is None:
+            cases.append(skipped(name, f"Modelo no disponible: {profile.get('model')}", {'profile': profile_name}))
+            continue
+        params = {'profile': profile_name, 'backend': profile['backend'], 'frames': len(grays)}
+        params.update(evaluate(detector, grays))
+        iterator = itertools.cycle(grays)
+        cases.append(Case(
+            name,
+            lambda detector=detector, iterator=iterator: detector.detect(next(iterator), min_size=FACE_DETECTION_MIN_SIZE),
+            params,
+        ))
+    return cases
+
+
+def recommend(results, min_recall=MIN_RECALL):
+    """Resultado más rápido (mediana) con recall >= min_recall, o None"""
+    candidates = [r for r in results if r['status'] == 'ok' and r['params']['recall'] >= min_recall]
+    return min(candidates, key=lambda r: r['median_ms']) if candidates else None
+
+
+def format_table(results):
+    lines = [f"{'perfil':<16} {'ms/frame':>10} {'p95':>10} {'recall':>8} {'FP/frame':>9}"]
+    for r in results:
+        profile = r['params'].get('profile', r['name'])
+        if r['status'] != 'ok':
+            lines.append(f"{profile:<16} {r['status'].upper():>10}  {r.get('error', '')}")
+            continue
+        lines.append(f"{profile:<16} {r['median_ms']:>10.2f} {r['p95_ms']:>10.2f} "
+                     f"{r['params']['recall']:>8.1%} {r['params']['false_positives_per_frame']:>9.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Velocidad y recall de los detectores de caras")
+    parser.add_argument('--min-recall', type=float, default=MIN_RECALL)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in collect(PROJECT_ROOT):
+        results.append(case if isinstance(case, dict) else run_case(case, warmup=args.warmup, repeat=args.repeat))
+    print(format_table(results))
+
+    best = recommend(results, args.min_recall)
+    if best is None:
+        print(f"⚠️ Ningún perfil llega a un recall de {args.min_recall:.0%}")
+        return 1
+    print(f"✅ Recomendado: FACE_DETECTOR_PROFILE = '{best['params']['profile']}' "
+          f"({best['median_ms']:.2f} ms/frame, recall {best['params']['recall']:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# ARCar_Showroom/benchmarks/bench_face_index.py
+"""
+Recall y latencia del índice IVF de la galería frente a la búsqueda exacta.
+
+La galería son usuarios sintéticos con todas las imágenes del registro; las
+consultas, otras variaciones de las mismas caras. recall = fracción de
+consultas cuyo vecino más cercano es el mismo que con la búsqueda exacta.
+
+    python -m benchmarks.bench_face_index [--users 60] [--min-recall 0.95]
+
+Imprime una tabla y recomienda el FACE_INDEX_NPROBE más rápido que llega al
+recall mínimo. También forma parte de `python -m benchmarks.run --suite faces`.
+"""
+import argparse
+import itertools
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import cv2
+import numpy as np
+
+from benchmarks.fixtures import FACE_SIZE, SEED, load_enrolled_faces, synthetic_users, augment_face
+from benchmarks.harness import Case, run_case
+from core.config import (
+    NUM_IMAGES_FOR_REGISTRATION, LBP_MAPPING, FACE_INDEX_NLIST, FACE_INDEX_COARSE_POOL, FACE_INDEX_KMEANS_ITERATIONS
+)
+from vision_processing.face_index import IvfIndex
+from vision_processing.lbp_features import LbpRecognizer
+
+NUM_USERS = 60
+NUM_USERS_QUICK = 20
+NUM_QUERIES = 100
+NPROBES = (1, 2, 4, 8, 16)
+MIN_RECALL = 0.95
+
+
+def build_gallery(faces, num_users, samples_per_user=NUM_IMAGES_FOR_REGISTRATION):
+    """LbpRecognizer con el índice IVF ya entrenado (sin mínimo de muestras)"""
+    index = IvfIndex(nlist=FACE_INDEX_NLIST, min_samples=0, iterations=FACE_INDEX_KMEANS_ITERATIONS)
+    recognizer = LbpRecognizer(mapping=LBP_MAPPING, index=index, index_pool=FACE_INDEX_COARSE_POOL)
+    users = synthetic_users(faces, num_users, samples_per_user)
+    recognizer.train([face for samples in users.values() for face in samples],
+                     [numeric_id for numeric_id, samples in users.items() for _ in samples])
+    return recognizer
+
+
+def make_queries(faces, count=NUM_QUERIES, seed=SEED + 1):
+    rng = np.random.default_rng(seed)
+    grays = [cv2.resize(cv2.cvtColor(face, cv2.COLOR_BGR2GRAY), FACE_SIZE) for face in faces]
+    return [augment_face(grays[i % len(grays)], rng) for i in range(count)]
+
+
+def evaluate(recognizer, queries, nprobe):
+    """Recall@1 del índice con `nprobe` listas frente a la búsqueda exacta"""
+    _, exact = recognizer.search(queries, exact=True)
+    _, approximate = recognizer.search(queries, nprobe=nprobe)
+    return {'recall': float(np.mean(np.isclose(approximate[:, 0], exact[:, 0])))}
+
+
+def collect(project_root_path, quick=False):
+    faces = load_enrolled_faces(project_root_path)
+    num_users = NUM_USERS_QUICK if quick else NUM_USERS
+    recognizer = build_gallery(faces, num_users)
+    queries = make_queries(faces)
+    samples = len(recognizer)
+
+    cases = []
+    iterator = itertools.cycle(queries)
+    cases.append(Case(
+        f"face_index.search[exact,samples={samples}]",
+        lambda: recognizer.search([next(iterator)], exact=True),
+        {'nprobe': None, 'samples': samples, 'recall': 1.0},
+    ))
+    for nprobe in NPROBES:
+        params = {'nprobe': nprobe, 'samples': samples, 'lists': len(recognizer.index.centroids)}
+        params.update(evaluate(recognizer, queries, nprobe))
+        iterator = itertools.cycle(queries)
+        cases.append(Case(
+            f"face_index.search[nprobe={nprobe},samples={samples}]",
+            lambda nprobe=nprobe, iterator=iterator: recognizer.search([next(iterator)], nprobe=nprobe),
+            params,
+        ))
+    return cases
+
+
+def recommend(results, min_recall=MIN_RECALL):
+    """Resultado del índice más rápido (mediana) con recall >= min_recall, o None"""
+    candidates = [r for r in results if r['status'] == 'ok' and r['params']['nprobe'] is not None
+                  and r['params']['recall'] >= min_recall]
+    return min(candidates, key=lambda r: r['median_ms']) if candidates else None
+
+
+def format_table(results):
+    lines = [f"{'búsqueda':<10} {'ms':>10} {'p95':>10} {'recall':>8}"]
+    for r in results:
+        nprobe = r['params'].get('nprobe')
+        label = 'exacta' if nprobe is None else f"nprobe={nprobe}"
+        if r['status'] != 'ok':
+            lines.append(f"{label:<10} {r['status'].upper():>10}  {r.get('error', '')}")
+            continue
+        lines.append(f"{label:<10} {r['median_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['params']['recall']:>8.1%}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recall y latencia del índice IVF de la galería")
+    parser.add_argument('--min-recall', type=float, default=MIN_RECALL)
+    parser.add_argument('--quick', action='store_true', help="Galería más pequeña")
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    results = [run_case(case, warmup=args.warmup, repeat=args.repeat) for case in collect(PROJECT_ROOT, args.quick)]
+    print(f"Galería de {results[0]['params']['samples']} muestras")
+    print(format_table(results))
+
+    best = recommend(results, args.min_recall)
+    if best is None:
+        print(f"⚠️ Ningún nprobe llega a un recall de {args.min_recall:.0%}")
+        return 1
+    print(f"✅ Recomendado: FACE_INDEX_NPROBE = {best['params']['nprobe']} "
+          f"({best['median_ms']:.2f} ms, recall {best['params']['recall']:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
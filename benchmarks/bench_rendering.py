@@ -0,0 +1,75 @@
+# ARCar_Showroom/benchmarks/bench_rendering.py
+"""
+Benchmarks de render: carga de los modelos de coche y render offscreen sobre
+un marcador. PYOPENGL_PLATFORM debe fijarse antes de importar este módulo
+(benchmarks/run.py lanza un proceso por plataforma).
+"""
+import os
+
+import numpy as np
+
+from ar_rendering.scene_renderer import PyrenderModelViewer, MARKER_SIZE_METERS
+from benchmarks.fixtures import marker_frame, camera_matrix_for
+from benchmarks.harness import Case, skipped
+from core.config import AVAILABLE_CARS, MODEL_MARKER_ID
+from vision_processing import marker_detection
+
+
+def _car_label(car):
+    return car['name'].replace(' ', '_')
+
+
+def _load_and_release(car):
+    viewer = PyrenderModelViewer()
+    if not viewer.load_car_model(car):
+        raise RuntimeError(f"No se pudo cargar {car['name']}")
+    viewer.cleanup()
+
+
+def _marker_pose(frame, camera_matrix, dist_coeffs):
+    """Pose real del marcador del modelo en el frame de prueba"""
+    _, ids, _, rvecs, tvecs = marker_detection.detect_and_estimate_pose(
+        frame, camera_matrix, dist_coeffs, MARKER_SIZE_METERS)
+    if ids is None or MODEL_MARKER_ID not in ids or rvecs is None:
+        raise RuntimeError("El marcador del modelo no se detecta en el frame de prueba")
+    index = list(ids.flatten()).index(MODEL_MARKER_ID)
+    return rvecs[index], tvecs[index]
+
+
+def collect(project_root_path, gl_platform):
+    """Casos de render; los coches cuyo modelo no está en assets/ se marcan como omitidos"""
+    # Las rutas de los modelos son relativas a la raíz del proyecto
+    os.chdir(project_root_path)
+    if not marker_detection.initialize_aruco_detector():
+        raise RuntimeError("No se pudo inicializar el detector ArUco")
+
+    frame = marker_frame((MODEL_MARKER_ID,))
+    camera_matrix = camera_matrix_for()
+    dist_coeffs = np.zeros((4, 1), dtype=np.float32)
+    rvec, tvec = _marker_pose(frame, camera_matrix, dist_coeffs)
+
+    cases = []
+    for car in AVAILABLE_CARS:
+        model_path = os.path.join(project_root_path, 'assets', '3d_models', car['model_path'])
+        if not os.path.exists(model_path):
+            cases.append(skipped(f"scene_renderer[{_car_label(car)}]", f"Modelo no encontrado: {model_path}",
+                                 {'model_path': car['model_path'], 'gl_platform': gl_platform}))
+            continue
+
+        cases.append(Case(
+            f"scene_renderer.load_car_model[{_car_label(car)}]",
+            lambda car=car: _load_and_release(car),
+            {'model_path': car['model_path']},
+            repeat=5, warmup=1,
+        ))
+
+        viewer = PyrenderModelViewer()
+        if not viewer.load_car_model(car):
+            raise RuntimeError(f"No se pudo cargar {car['name']}")
+        cases.append(Case(
+            f"scene_renderer.render_model_on_marker[{_car_label(car)},{gl_platform}]",
+            lambda viewer=viewer: viewer.render_model_on_marker(frame.copy(), rvec, tvec, camera_matrix, dist_coeffs),
+            {'model_path': car['model_path'], 'gl_platform': gl_platform,
+             'frame': f"{frame.shape[1]}x{frame.shape[0]}"},
+        ))
+    return cases
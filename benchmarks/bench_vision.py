@@ -0,0 +1,138 @@
+# ARCar_Showroom/benchmarks/bench_vision.py
+"""
+Benchmarks de visión: detección de caras, detección y pose de marcadores,
+filtro de calidad y normalización de las caras y predicción LBPH contra galerías de distinto
+tamaño.
+"""
+import itertools
+
+import cv2
+import numpy as np
+
+from benchmarks.fixtures import (
+    FRAME_SIZE, load_enrolled_faces, face_frame, marker_frame, camera_matrix_for, lbph_gallery, face_gallery
+)
+from benchmarks.harness import Case
+from core.config import FACE_DETECTION_MAX_WIDTH, MARKER_DETECTION_MAX_WIDTH, NUM_IMAGES_FOR_REGISTRATION
+from vision_processing import facial_auth, marker_detection
+from vision_processing.face_gallery import FACE_GALLERY_ENGINES
+from utils.image_utils import normalize_face
+from vision_processing.face_quality import assess_face
+from vision_processing.face_tracker import FaceTracker
+
+# Igual que ar_rendering.scene_renderer.MARKER_SIZE_METERS (no se importa para no
+# cargar OpenGL en esta suite; el render se mide en un proceso aparte)
+MARKER_SIZE_METERS = 0.05
+
+FRAME_SIZE_HD = (1920, 1080)
+
+LBPH_GALLERY_SIZES = (1, 10, 100, 1000)
+LBPH_GALLERY_SIZES_QUICK = (1, 10, 100)
+# Galería con miles de muestras: usuarios con todas las imágenes del registro
+LBPH_LARGE_GALLERY_USERS = 60
+
+
+def _cycle(items):
+    """Función sin argumentos que devuelve el siguiente elemento en cada llamada"""
+    iterator = itertools.cycle(items)
+    return lambda: next(iterator)
+
+
+def collect(project_root_path, quick=False):
+    if not facial_auth.load_cascade(project_root_path):
+        raise RuntimeError("No se pudo cargar el Haar Cascade")
+    if not marker_detection.initialize_aruco_detector():
+        raise RuntimeError("No se pudo inicializar el detector ArUco")
+
+    faces = load_enrolled_faces(project_root_path)
+    cases = []
+
+    # Detección de caras sobre frames 640x480 construidos con las caras registradas
+    next_face_frame = _cycle([face_frame(face) for face in faces])
+    cases.append(Case(
+        f"facial_auth.detect_faces[{FRAME_SIZE[0]}x{FRAME_SIZE[1]}]",
+        lambda: facial_auth.detect_faces(next_face_frame()),
+        {'frames': len(faces)},
+    ))
+
+    # Seguimiento: detección completa solo cada FACE_TRACKING_DETECT_INTERVAL frames (caso estable, una cara)
+    tracker = FaceTracker(max_gap_s=float('inf'))
+    tracked_frame = face_frame(faces[0])
+    cases.append(Case(
+        f"face_tracker.update[{FRAME_SIZE[0]}x{FRAME_SIZE[1]}]",
+        lambda: tracker.update(tracked_frame),
+        {'detect_interval': tracker.detect_interval},
+    ))
+
+    # 1080p: resolución completa frente a la analizada a FACE_DETECTION_MAX_WIDTH
+    next_hd_frame = _cycle([face_frame(face, FRAME_SIZE_HD, face_px=500) for face in faces[:10]])
+    for label, max_width in (('full', None), ('max_width', FACE_DETECTION_MAX_WIDTH)):
+        cases.append(Case(
+            f"facial_auth.detect_faces[{FRAME_SIZE_HD[0]}x{FRAME_SIZE_HD[1]},{label}]",
+            lambda max_width=max_width: facial_auth.detect_faces(next_hd_frame(), max_width=max_width),
+            {'frames': min(len(faces), 10), 'max_width': max_width},
+        ))
+
+    # Detección y pose: con los marcadores del menú y del modelo, y sin marcadores
+    camera_matrix = camera_matrix_for()
+    dist_coeffs = np.zeros((4, 1), dtype=np.float32)
+    for label, marker_ids in (('markers=23,24', (23, 24)), ('markers=none', ())):
+        frame = marker_frame(marker_ids)
+        cases.append(Case(
+            f"marker_detection.detect_and_estimate_pose[{label}]",
+            lambda frame=frame: marker_detection.detect_and_estimate_pose(
+                frame, camera_matrix, dist_coeffs, MARKER_SIZE_METERS),
+            {'marker_ids': list(marker_ids)},
+        ))
+
+    hd_frame = marker_frame((23, 24), FRAME_SIZE_HD, marker_px=300)
+    hd_camera_matrix = camera_matrix_for(FRAME_SIZE_HD)
+    for label, max_width in (('full', None), ('max_width', MARKER_DETECTION_MAX_WIDTH)):
+        cases.append(Case(
+            f"marker_detection.detect_and_estimate_pose[{FRAME_SIZE_HD[0]}x{FRAME_SIZE_HD[1]},{label}]",
+            lambda max_width=max_width: marker_detection.detect_and_estimate_pose(
+                hd_frame, hd_camera_matrix, dist_coeffs, MARKER_SIZE_METERS, max_width=max_width),
+            {'marker_ids': [23, 24], 'max_width': max_width},
+        ))
+
+    # Filtro de calidad que va antes de cada consulta a la galería
+    next_gray_face = _cycle([cv2.cvtColor(face, cv2.COLOR_BGR2GRAY) for face in faces])
+    cases.append(Case("face_quality.assess_face", lambda: assess_face(next_gray_face()), {'faces': len(faces)}))
+    # Normalización de cada cara antes de consultar la galería
+    cases.append(Case("image_utils.normalize_face", lambda: normalize_face(next_gray_face()), {'faces': len(faces)}))
+
+    # LBPH: STATE_LOGIN hace un solo predict contra la galería de todos los usuarios
+    # (con cada motor); lbph.predict mide el esquema anterior (un predict por usuario)
+    query = cv2.cvtColor(faces[0], cv2.COLOR_BGR2GRAY)
+    for num_users in (LBPH_GALLERY_SIZES_QUICK if quick else LBPH_GALLERY_SIZES):
+        for engine in FACE_GALLERY_ENGINES:
+            shared_gallery = face_gallery(faces, num_users, engine=engine)
+            cases.append(Case(
+                f"face_gallery.predict[{engine},users={num_users}]",
+                lambda shared_gallery=shared_gallery: shared_gallery.predict(query),
+                {'users': num_users, 'engine': engine},
+            ))
+
+        gallery = lbph_gallery(faces, num_users)
+
+        def predict_all(gallery=gallery):
+            best_user, best_confidence = None, float('inf')
+            for user_id, recognizer in gallery.items():
+                _, confidence = recognizer.predict(query)
+                if confidence < best_confidence:
+                    best_user, best_confidence = user_id, confidence
+            return best_user, best_confidence
+
+        cases.append(Case(f"lbph.predict[users={num_users}]", predict_all, {'users': num_users}))
+
+    if not quick:
+        samples = LBPH_LARGE_GALLERY_USERS * NUM_IMAGES_FOR_REGISTRATION
+        for engine in FACE_GALLERY_ENGINES:
+            large_gallery = face_gallery(faces, LBPH_LARGE_GALLERY_USERS, NUM_IMAGES_FOR_REGISTRATION, engine=engine)
+            cases.append(Case(
+                f"face_gallery.predict[{engine},samples={samples}]",
+                lambda large_gallery=large_gallery: large_gallery.predict(query),
+                {'users': LBPH_LARGE_GALLERY_USERS, 'samples': samples, 'engine': engine},
+            ))
+
+    return cases
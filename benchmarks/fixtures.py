@@ -0,0 +1,133 @@
+# ARCar_Showroom/benchmarks/fixtures.py
+"""
+Datos de entrada reproducibles para los benchmarks: caras registradas,
+frames con marcadores ArUco generados y galerías LBPH sintéticas.
+"""
+import os
+
+import cv2
+import numpy as np
+
+from core.config import USER_FACE_DATA_DIR_REL_TO_PROJECT_ROOT, MENU_MARKER_ID, MODEL_MARKER_ID, FACE_CANONICAL_SIZE
+from vision_processing.face_samples import FaceSampleArchive, samples_path
+
+SEED = 1234
+FRAME_SIZE = (640, 480)   # (ancho, alto), como la cámara por defecto
+FACE_SIZE = FACE_CANONICAL_SIZE  # Tamaño de las caras guardadas en el registro
+
+
+def load_enrolled_faces(project_root_path, limit=50):
+    """
+    Caras guardadas en el registro (BGR, ordenadas por usuario y nombre).
+    Si no hay ninguna se generan caras sintéticas para que la suite funcione,
+    aunque los tiempos de detección no serán representativos.
+    """
+    faces_dir = os.path.join(project_root_path, USER_FACE_DATA_DIR_REL_TO_PROJECT_ROOT)
+    faces = []
+    if os.path.isdir(faces_dir):
+        for user_id in sorted(os.listdir(faces_dir)):
+            user_dir = os.path.join(faces_dir, user_id)
+            if user_id == 'models' or not os.path.isdir(user_dir):
+                continue
+            # Usuarios migrados con pack-samples: caras en gris en samples.faces
+            archive = FaceSampleArchive(samples_path(user_dir))
+            if archive.exists():
+                for face in archive.read():
+                    faces.append(cv2.cvtColor(face, cv2.COLOR_GRAY2BGR))
+                    if len(faces) >= limit:
+                        return faces
+            for name in sorted(os.listdir(user_dir)):
+                if not name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                    continue
+                image = cv2.imread(os.path.join(user_dir, name))
+                if image is not None:
+                    faces.append(image)
+                if len(faces) >= limit:
+                    return faces
+    if not faces:
+        rng = np.random.default_rng(SEED)
+        faces = [rng.integers(0, 256, FACE_SIZE + (3,), dtype=np.uint8) for _ in range(min(limit, 10))]
+    return faces
+
+
+def face_frame(face_image, frame_size=FRAME_SIZE, face_px=200, background=96):
+    """Frame de cámara simulado: fondo liso con la cara escalada en el centro"""
+    width, height = frame_size
+    frame = np.full((height, width, 3), background, dtype=np.uint8)
+    face = cv2.resize(face_image, (face_px, face_px))
+    x, y = (width - face_px) // 2, (height - face_px) // 2
+    frame[y:y + face_px, x:x + face_px] = face
+    return frame
+
+
+def marker_frame(marker_ids=(MENU_MARKER_ID, MODEL_MARKER_ID), frame_size=FRAME_SIZE, marker_px=150, seed=SEED):
+    """
+    Frame con los marcadores DICT_6X6_250 indicados (con margen blanco) sobre
+    un fondo con ruido, en posiciones fijas por semilla.
+    """
+    width, height = frame_size
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(60, 200, (height, width), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (5, 5), 0)
+
+    dictionary = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_6X6_250)
+    margin = marker_px // 6
+    slot = marker_px + 2 * margin
+    for i, marker_id in enumerate(marker_ids):
+        marker = cv2.aruco.generateImageMarker(dictionary, int(marker_id), marker_px)
+        x = 40 + i * (slot + 40)
+        y = (height - slot) // 2
+        frame[y:y + slot, x:x + slot] = 255
+        frame[y + margin:y + margin + marker_px, x + margin:x + margin + marker_px] = marker
+    return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+
+def camera_matrix_for(frame_size=FRAME_SIZE):
+    """Matriz de cámara aproximada (la misma estimación que AppManager sin calibración)"""
+    width, height = frame_size
+    focal = 0.6 * width
+    return np.array([[focal, 0, width / 2.0], [0, focal, height / 2.0], [0, 0, 1]], dtype=np.float32)
+
+
+def augment_face(gray_face, rng):
+    """Variación aleatoria de una cara (desplazamiento, brillo y ruido)"""
+    dx, dy = rng.integers(-4, 5, size=2)
+    matrix = np.float32([[1, 0, dx], [0, 1, dy]])
+    shifted = cv2.warpAffine(gray_face, matrix, gray_face.shape[::-1], borderMode=cv2.BORDER_REFLECT)
+    noisy = shifted.astype(np.int16) + rng.integers(-12, 13, shifted.shape) + int(rng.integers(-20, 21))
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def synthetic_users(face_images, num_users, samples_per_user=1, seed=SEED):
+    """
+    Muestras de usuarios sintéticos: variaciones de las caras registradas.
+    Devuelve {numeric_id: [caras en gris]}.
+    """
+    rng = np.random.default_rng(seed)
+    grays = [cv2.resize(cv2.cvtColor(face, cv2.COLOR_BGR2GRAY), FACE_SIZE) for face in face_images]
+    users = {}
+    for user_index in range(num_users):
+        base = grays[user_index % len(grays)]
+        users[user_index] = [augment_face(base, rng) for _ in range(samples_per_user)]
+    return users
+
+
+def lbph_gallery(face_images, num_users, samples_per_user=1, seed=SEED):
+    """
+    Un reconocedor LBPH por usuario (el esquema anterior a FaceGallery, como
+    referencia). Devuelve {user_id: recognizer}.
+    """
+    gallery = {}
+    for user_index, samples in synthetic_users(face_images, num_users, samples_per_user, seed).items():
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.train(samples, np.full(len(samples), user_index, dtype=np.int32))
+        gallery[f"user_{user_index:04d}"] = recognizer
+    return gallery
+
+
+def face_gallery(face_images, num_users, samples_per_user=1, seed=SEED, engine='numpy'):
+    """FaceGallery (galería única, como AppManager) con los mismos usuarios sintéticos"""
+    from vision_processing.face_gallery import FaceGallery
+    gallery = FaceGallery(path=os.devnull, engine=engine)
+    gallery.rebuild(synthetic_users(face_images, num_users, samples_per_user, seed))
+    return gallery
@@ -0,0 +1,172 @@
+# ARCar_Showroom/benchmarks/harness.py
+"""
+Medición, formato JSON de resultados y comparación con una línea base.
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+RESULTS_VERSION = 1
+
+# name: identificador estable (la clave para comparar); func: callable sin
+# argumentos que ejecuta una iteración; params: datos informativos del caso;
+# repeat / warmup: valores propios para casos lentos (None = los de la suite)
+Case = namedtuple('Case', ['name', 'func', 'params', 'repeat', 'warmup'], defaults=(None, None))
+
+
+def time_case(func, warmup=3, repeat=30, min_time_s=0.0, max_time_s=30.0):
+    """
+    Ejecutar `func` `warmup` veces sin medir y luego al menos `repeat` veces
+    (o hasta cubrir `min_time_s`). Devuelve los tiempos en ms.
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    start = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+
+        elapsed = time.perf_counter() - start
+        if len(samples) >= repeat and elapsed >= min_time_s:
+            break
+        if elapsed >= max_time_s and len(samples) >= 3:
+            break
+    return samples
+
+
+def summarize(samples_ms):
+    values = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        'n': int(values.size),
+        'mean_ms': float(values.mean()),
+        'median_ms': float(np.median(values)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'min_ms': float(values.min()),
+        'max_ms': float(values.max()),
+        'stdev_ms': float(statistics.stdev(values)) if values.size > 1 else 0.0,
+    }
+
+
+def run_case(case, warmup=3, repeat=30, min_time_s=0.0):
+    """Medir un caso. Los errores se guardan en el resultado en lugar de abortar la suite."""
+    if case.warmup is not None:
+        warmup = case.warmup
+    if case.repeat is not None:
+        repeat = min(repeat, case.repeat)
+    try:
+        samples = time_case(case.func, warmup, repeat, min_time_s)
+    except Exception as e:
+        return {'name': case.name, 'params': case.params, 'status': 'error', 'error': repr(e)}
+    result = {'name': case.name, 'params': case.params, 'status': 'ok'}
+    result.update(summarize(samples))
+    return result
+
+
+def skipped(name, reason, params=None):
+    return {'name': name, 'params': params or {}, 'status': 'skipped', 'error': reason}
+
+
+def environment_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+        'numpy': np.__version__,
+    }
+
+
+def make_report(results, settings=None):
+    return {
+        'version': RESULTS_VERSION,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'environment': environment_info(),
+        'settings': settings or {},
+        'results': results,
+    }
+
+
+def write_report(report, path):
+    """Escribir el informe JSON ('-' = stdout)"""
+    if path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_report(path):
+    with open(path, 'r') as f:
+        report = json.load(f)
+    if report.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Versión de resultados no soportada en {path}: {report.get('version')}")
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.10, metric='median_ms'):
+    """
+    Comparar dos informes caso a caso por `metric`. Un caso es regresión si
+    empeora más de `threshold` (fracción) y mejora si baja más de `threshold`.
+    Devuelve una lista de filas ordenada por nombre.
+    """
+    base = {r['name']: r for r in baseline['results'] if r.get('status') == 'ok'}
+    curr = {r['name']: r for r in current['results'] if r.get('status') == 'ok'}
+
+    rows = []
+    for name in sorted(set(base) | set(curr)):
+        if name not in curr:
+            rows.append({'name': name, 'status': 'missing', 'baseline': base[name][metric], 'current': None, 'change': None})
+            continue
+        if name not in base:
+            rows.append({'name': name, 'status': 'new', 'baseline': None, 'current': curr[name][metric], 'change': None})
+            continue
+
+        before, after = base[name][metric], curr[name][metric]
+        change = (after - before) / before if before > 0 else 0.0
+        if change > threshold:
+            status = 'regression'
+        elif change < -threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'status': status, 'baseline': before, 'current': after, 'change': change})
+    return rows
+
+
+def format_results(results):
+    lines = [f"{'benchmark':<60} {'median':>10} {'p95':>10} {'n':>5}"]
+    for r in results:
+        if r['status'] != 'ok':
+            lines.append(f"{r['name']:<60} {r['status'].upper():>10}  {r.get('error', '')}")
+            continue
+        lines.append(f"{r['name']:<60} {r['median_ms']:>8.3f}ms {r['p95_ms']:>8.3f}ms {r['n']:>5}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    marks = {'regression': '❌', 'improvement': '✅', 'ok': '  ', 'new': '🆕', 'missing': '❔'}
+    lines = [f"   {'benchmark':<60} {'base':>10} {'actual':>10} {'cambio':>8}"]
+    for row in rows:
+        base = f"{row['baseline']:.3f}" if row['baseline'] is not None else '-'
+        curr = f"{row['current']:.3f}" if row['current'] is not None else '-'
+        change = f"{100 * row['change']:+.1f}%" if row['change'] is not None else '-'
+        lines.append(f"{marks[row['status']]} {row['name']:<60} {base:>10} {curr:>10} {change:>8}")
+    return "\n".join(lines)
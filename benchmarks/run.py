@@ -0,0 +1,156 @@
+# ARCar_Showroom/benchmarks/run.py
+"""
+Ejecutar la suite de benchmarks y, opcionalmente, compararla con una línea base.
+
+    python -m benchmarks.run [--suite vision|faces|rendering|all] [--quick]
+                             [--output RUTA.json] [--compare BASE.json [--threshold 0.10]]
+    python -m benchmarks.run --compare BASE.json --current OTRO.json   # solo comparar
+
+El render se mide en un proceso hijo por plataforma OpenGL (PYOPENGL_PLATFORM
+solo se puede fijar antes de importar OpenGL). Código de salida 1 si hay
+regresiones respecto a la línea base.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.harness import (
+    run_case, skipped, make_report, write_report, load_report,
+    compare_reports, format_results, format_comparison
+)
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'benchmarks', 'results', 'latest.json')
+GL_PLATFORMS = ('egl', 'osmesa')
+
+
+def run_cases(cases, args):
+    """Medir los casos (los elementos que ya son resultados, p. ej. omitidos, se copian)"""
+    results = []
+    for case in cases:
+        if isinstance(case, dict):
+            results.append(case)
+            continue
+        if args.filter and args.filter not in case.name:
+            continue
+        print(f"⏱️  {case.name}", file=sys.stderr)
+        results.append(run_case(case, warmup=args.warmup, repeat=args.repeat, min_time_s=args.min_time))
+    return results
+
+
+def run_vision(args):
+    from benchmarks import bench_vision
+    try:
+        cases = bench_vision.collect(PROJECT_ROOT, quick=args.quick)
+    except Exception as e:
+        return [skipped('vision', f"No se pudieron preparar los fixtures: {e!r}")]
+    return run_cases(cases, args)
+
+
+def run_faces(args):
+    from benchmarks import bench_face_detectors, bench_face_index
+    try:
+        cases = bench_face_detectors.collect(PROJECT_ROOT) + bench_face_index.collect(PROJECT_ROOT, quick=args.quick)
+    except Exception as e:
+        return [skipped('faces', f"No se pudieron preparar los fixtures: {e!r}")]
+    return run_cases(cases, args)
+
+
+def run_rendering_child(args):
+    """Proceso hijo: PYOPENGL_PLATFORM ya está fijado por el padre"""
+    try:
+        from benchmarks import bench_rendering
+        cases = bench_rendering.collect(PROJECT_ROOT, args.gl_platform)
+    except Exception as e:
+        return [skipped(f"rendering[{args.gl_platform}]", f"Render no disponible: {e!r}",
+                        {'gl_platform': args.gl_platform})]
+    return run_cases(cases, args)
+
+
+def run_rendering(args):
+    """Lanzar un proceso por plataforma OpenGL y juntar sus resultados"""
+    results = []
+    for gl_platform in args.gl_platforms.split(','):
+        env = dict(os.environ, PYOPENGL_PLATFORM=gl_platform)
+        command = [sys.executable, '-m', 'benchmarks.run', '--render-child', '--gl-platform', gl_platform,
+                   '--output', '-', '--warmup', str(args.warmup), '--repeat', str(args.repeat),
+                   '--min-time', str(args.min_time)]
+        if args.filter:
+            command += ['--filter', args.filter]
+        proc = subprocess.run(command, cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              text=True)
+        try:
+            report = json.loads(proc.stdout)
+        except ValueError:
+            error = proc.stderr.strip().splitlines()[-1:] or [f"código de salida {proc.returncode}"]
+            results.append(skipped(f"rendering[{gl_platform}]", error[0], {'gl_platform': gl_platform}))
+            continue
+        results.extend(report['results'])
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de ARCar Showroom")
+    parser.add_argument('--suite', choices=['vision', 'faces', 'rendering', 'all'], default='all')
+    parser.add_argument('--filter', default=None, help="Ejecutar solo los casos cuyo nombre contenga este texto")
+    parser.add_argument('--quick', action='store_true', help="Sin la galería LBPH de 1000 usuarios")
+    parser.add_argument('--warmup', type=int, default=3, help="Iteraciones sin medir por caso")
+    parser.add_argument('--repeat', type=int, default=30, help="Iteraciones medidas por caso (mínimo)")
+    parser.add_argument('--min-time', type=float, default=0.0, help="Tiempo mínimo de medida por caso (s)")
+    parser.add_argument('--gl-platforms', default=','.join(GL_PLATFORMS),
+                        help="Plataformas OpenGL para el render offscreen, separadas por comas")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Informe JSON ('-' = stdout)")
+    parser.add_argument('--compare', default=None, metavar='BASE.json', help="Comparar con esta línea base")
+    parser.add_argument('--current', default=None, metavar='ACTUAL.json',
+                        help="Con --compare: comparar este informe en lugar de ejecutar la suite")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Empeoramiento relativo de la mediana que cuenta como regresión")
+    parser.add_argument('--render-child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--gl-platform', default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    settings = {key: getattr(args, key) for key in ('suite', 'quick', 'warmup', 'repeat', 'min_time', 'gl_platforms')}
+
+    if args.render_child:
+        write_report(make_report(run_rendering_child(args), settings), '-')
+        return 0
+
+    if args.current:
+        if not args.compare:
+            sys.exit("❌ --current solo tiene sentido junto con --compare")
+        report = load_report(args.current)
+    else:
+        results = []
+        if args.suite in ('vision', 'all'):
+            results += run_vision(args)
+        if args.suite in ('faces', 'all'):
+            results += run_faces(args)
+        if args.suite in ('rendering', 'all'):
+            results += run_rendering(args)
+        report = make_report(results, settings)
+        write_report(report, args.output)
+        print(format_results(results), file=sys.stderr)
+        if args.output != '-':
+            print(f"💾 Resultados en {args.output}", file=sys.stderr)
+
+    if args.compare:
+        rows = compare_reports(load_report(args.compare), report, args.threshold)
+        print(format_comparison(rows), file=sys.stderr)
+        regressions = [row for row in rows if row['status'] == 'regression']
+        if regressions:
+            print(f"❌ {len(regressions)} regresiones (umbral {100 * args.threshold:.0f}%)", file=sys.stderr)
+            return 1
+        print("✅ Sin regresiones", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
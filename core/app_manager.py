@@ -4,6 +4,7 @@ import os
 import numpy as np
 import json
 import time
+import threading
 from PIL import Image # Asegúrate de tener Pillow: pip install Pillow
 
 from core.config import (
@@ -13,15 +14,26 @@ from core.config import (
     NUM_IMAGES_FOR_REGISTRATION, WINDOW_NAME,
     USER_FACE_DATA_DIR_REL_TO_PROJECT_ROOT,
     USER_ID_MAP_PATH_REL_TO_PROJECT_ROOT,
-    LBPH_MODELS_DIR_REL_TO_PROJECT_ROOT,
-    AVAILABLE_CARS, MODEL_MARKER_ID
+    LBPH_MODELS_DIR_REL_TO_PROJECT_ROOT, FACE_GALLERY_ENGINE, FACE_GALLERY_PATHS_REL_TO_PROJECT_ROOT,
+    AVAILABLE_CARS, MODEL_MARKER_ID, CAMERA_INDEX, FACE_VOTING_TOP_K, FACE_QUALITY_GATE
 )
 from vision_processing import facial_auth
+from vision_processing.face_tracker import FaceTracker
+from vision_processing.face_gallery import FaceGallery
+from core.enrollment_trainer import EnrollmentTrainer, EXTRACTING, SAVING
+from vision_processing.identity_voting import IdentityVoter, ACCEPTED, REJECTED
+from vision_processing.face_quality import assess_face, is_usable, QUALITY_HINTS
 from vision_processing import marker_detection  # Importar el nuevo módulo
 from ar_rendering import scene_renderer # Importar el renderizador de escena
 from ar_rendering.ar_menu import ARMenu
 from ar_rendering.scene_renderer import PyrenderModelViewer
 from audio_processing import get_voice_controller
+from utils.instrumentation import profiler
+from utils.app_logging import get_logger, every
+from ui.hud_layers import HudLayerCache, HudText, CENTER
+from utils.image_utils import crop_face, canonical_face, normalize_face
+
+logger = get_logger(__name__)
 
 # Umbral de confianza para LBPH. Valores MÁS BAJOS son MEJOR confianza.
 # Un valor de 0 es una coincidencia perfecta.
@@ -32,17 +44,24 @@ from audio_processing import get_voice_controller
 LBPH_CONFIDENCE_THRESHOLD = 50 # Ajusta esto según tus pruebas
 
 class AppManager:
-    def __init__(self, project_root_path):
+    def __init__(self, project_root_path, headless=False):
         self.project_root_path = project_root_path
+        # Sin ventana HighGUI: los frames los consume un sink (ver core/headless_runner.py)
+        self.headless = headless
         self.current_state = STATE_WELCOME # CAMBIAR ESTADO INICIAL
         self.user_id_for_registration = None
         self.captured_images_count = 0
         self.logged_in_user_str = None # Nueva variable para usuario logueado
         self.texture_path_test_rel = "assets/ui_elements/test_texture.png" # Ruta relativa
         self.camera_initialized_for_gl = False
-        
-        self.recognizer = cv2.face.LBPHFaceRecognizer_create() # Instancia principal
-        self.loaded_recognizers = {} # Para guardar modelos cargados: {"user_id_str": recognizer_instance}
+        # Protege el estado cuando el pipeline procesa frames en otro hilo
+        self.state_lock = threading.RLock()
+        # Textos del HUD rasterizados una vez por combinación de textos / tamaño de frame
+        self.hud = HudLayerCache()
+        
+        # Galería LBPH única con todos los usuarios (etiquetas = IDs numéricos de user_id_map.json)
+        self.face_gallery = FaceGallery(
+            os.path.join(self.project_root_path, FACE_GALLERY_PATHS_REL_TO_PROJECT_ROOT[FACE_GALLERY_ENGINE]))
         self.user_id_map_path = os.path.join(self.project_root_path, USER_ID_MAP_PATH_REL_TO_PROJECT_ROOT)
         self.user_id_map = self._load_user_id_map() # {"user_id_str": numeric_id}
         self.numeric_id_to_user_str_map = {v: k for k, v in self.user_id_map.items()} # Mapa inverso
@@ -53,47 +72,30 @@ class AppManager:
         os.makedirs(self.lbph_models_dir, exist_ok=True)
 
         # 🔧 CONFIGURACIÓN AUTOMÁTICA SEGÚN TIPO DE CÁMARA
-        camera_config = self._detect_camera_config()
-        
-        # Configurar matriz de cámara con parámetros específicos
-        frame_w_example = camera_config['width']
-        frame_h_example = camera_config['height']
-        focal_multiplier = camera_config['focal_multiplier']
-        
-        # Parámetros ajustados según el tipo de cámara
-        fx_est = frame_w_example * focal_multiplier
-        fy_est = frame_w_example * focal_multiplier
-        cx_est = frame_w_example / 2
-        cy_est = frame_h_example / 2
-
-        self.camera_matrix_cv = np.array([
-            [fx_est, 0, cx_est],
-            [0, fy_est, cy_est],
-            [0, 0, 1]
-        ], dtype=np.float32)
-        
-        # Coeficientes de distorsión (asumir cero para simplificar)
-        self.dist_coeffs_cv = np.zeros((4,1), dtype=np.float32)
-
-        # 🔧 INICIALIZAR UMBRAL DE CONFIANZA SEGÚN CÁMARA
-        self.lbph_confidence_threshold = camera_config['confidence_threshold']
-        
-        print(f"DEBUG_CAMERA: Tipo: {camera_config['type']}")
-        print(f"DEBUG_CAMERA: Resolución: {frame_w_example}x{frame_h_example}")
-        print(f"DEBUG_CAMERA: Focal multiplier: {focal_multiplier}")
-        print(f"DEBUG_CAMERA: Focal length: fx={fx_est:.1f}, fy={fy_est:.1f}")
-        print(f"DEBUG_CAMERA: Centro óptico: cx={cx_est:.1f}, cy={cy_est:.1f}")
-        print(f"DEBUG_CAMERA: Umbral de confianza: {self.lbph_confidence_threshold}")
-        
-        if not facial_auth.load_cascade(self.project_root_path):
-            print("ALERTA CRÍTICA en AppManager: Haar Cascade no pudo ser cargado.")
+        # (main.py la ajusta con configure_camera() al conocer la cámara y el modo negociado,
+        #  y process_frame la corrige si los frames llegan con otra resolución)
+        self.camera_index = CAMERA_INDEX
+        self.camera_resolution = None
+        self.configure_camera()
+        
+        if not facial_auth.load_face_detector(self.project_root_path):
+            logger.error("ALERTA CRÍTICA en AppManager: el detector de caras no pudo ser cargado.")
+        # LOGIN y REGISTRO: detección completa solo en fotogramas clave, seguimiento entre medias
+        self.face_tracker = FaceTracker()
+        # REGISTRO: (frame, caras) de la última detección, para capturar sin volver a detectar
+        self._registration_faces = None
+        # LOGIN: identidad acumulada por cara seguida (no se reconoce en todos los frames)
+        self.identity_voter = IdentityVoter()
         
         # Inicializar el detector ArUco
         if not marker_detection.initialize_aruco_detector():
-            print("ALERTA CRÍTICA en AppManager: Detector ArUco no pudo ser inicializado.")
+            logger.error("ALERTA CRÍTICA en AppManager: Detector ArUco no pudo ser inicializado.")
     
-        cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
-        self._load_all_trained_models() # Cargar modelos al inicio
+        if not self.headless:
+            cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+        self._load_face_gallery() # Cargar modelos al inicio
+        # Entrenamiento del registro en segundo plano (la cámara sigue en vivo mientras tanto)
+        self.enrollment_trainer = EnrollmentTrainer(self.face_gallery)
 
         # Importar la configuración
         from core.config import AVAILABLE_CARS
@@ -103,9 +105,9 @@ class AppManager:
         self.ar_menu.menu_items = AVAILABLE_CARS
         
         # 🔥 DEBUG CRÍTICO: Verificar que se cargan ambos coches
-        print(f"DEBUG_APP: Menu inicializado con {len(AVAILABLE_CARS)} coches:")
+        logger.info("Menu inicializado con %s coches:", len(AVAILABLE_CARS))
         for i, car in enumerate(AVAILABLE_CARS):
-            print(f"DEBUG_APP: {i+1}. {car['name']} - {car['model_path']} (escala: {car.get('scale', 0.05)})")
+            logger.info("%s. %s - %s (escala: %s)", i+1, car['name'], car['model_path'], car.get('scale', 0.05))
         
         self.model_viewer = PyrenderModelViewer()
         self.selected_car = None
@@ -113,14 +115,64 @@ class AppManager:
 
         # 🔧 AÑADIR CONTROLADOR DE VOZ
         self.voice_controller = get_voice_controller()
-        print("DEBUG_APP: Controlador de voz inicializado")
+        logger.info("Controlador de voz inicializado")
         
         # 🔧 AÑADIR DEBUG DETALLADO
-        print(f"DEBUG_VOICE: ¿Controlador creado? {self.voice_controller is not None}")
-        print(f"DEBUG_VOICE: ¿Micrófono disponible? {self.voice_controller.microphone is not None}")
-        print(f"DEBUG_VOICE: Estado inicial: {self.voice_controller.get_status_text()}")
+        logger.info("¿Controlador creado? %s", self.voice_controller is not None)
+        logger.info("¿Micrófono disponible? %s", self.voice_controller.microphone is not None)
+        logger.info("Estado inicial: %s", self.voice_controller.get_status_text())
+
+        logger.info("AppManager inicializado. Estado: %s", self.current_state)
+
+    def configure_camera(self, width=None, height=None, camera_index=None):
+        """
+        Calcular la matriz de cámara y el umbral de confianza para la cámara
+        en uso. `width`/`height` son la resolución real negociada; si no se
+        indican se usan los valores por defecto del tipo de cámara.
+        """
+        if camera_index is not None:
+            self.camera_index = camera_index
+        camera_config = self._detect_camera_config(self.camera_index)
+        
+        # Configurar matriz de cámara con parámetros específicos
+        frame_w_example = width or camera_config['width']
+        frame_h_example = height or camera_config['height']
+        focal_multiplier = camera_config['focal_multiplier']
+        
+        # Parámetros ajustados según el tipo de cámara
+        fx_est = frame_w_example * focal_multiplier
+        fy_est = frame_w_example * focal_multiplier
+        cx_est = frame_w_example / 2
+        cy_est = frame_h_example / 2
 
-        print(f"AppManager inicializado. Estado: {self.current_state}")
+        camera_matrix = np.array([
+            [fx_est, 0, cx_est],
+            [0, fy_est, cy_est],
+            [0, 0, 1]
+        ], dtype=np.float32)
+        
+        # Coeficientes de distorsión (asumir cero para simplificar)
+        dist_coeffs = np.zeros((4,1), dtype=np.float32)
+
+        # Todo a la vez: el hilo de análisis del pipeline lee la calibración con state_lock
+        with self.state_lock:
+            self.camera_matrix_cv = camera_matrix
+            self.dist_coeffs_cv = dist_coeffs
+            # 🔧 INICIALIZAR UMBRAL DE CONFIANZA SEGÚN CÁMARA
+            self.lbph_confidence_threshold = camera_config['confidence_threshold']
+            self.camera_resolution = (frame_w_example, frame_h_example)
+        
+        logger.info("Tipo: %s", camera_config['type'])
+        logger.info("Resolución: %sx%s", frame_w_example, frame_h_example)
+        logger.debug("Focal multiplier: %s", focal_multiplier)
+        logger.debug("Focal length: fx=%.1f, fy=%.1f", fx_est, fy_est)
+        logger.debug("Centro óptico: cx=%.1f, cy=%.1f", cx_est, cy_est)
+        logger.info("Umbral de confianza: %s", self.lbph_confidence_threshold)
+
+        # La escena de pyrender usa la matriz y el tamaño del frame: rehacerla con los nuevos
+        model_viewer = getattr(self, 'model_viewer', None)
+        if model_viewer is not None and getattr(model_viewer, 'initialized', False):
+            model_viewer.reset_scene()
 
     def _load_user_id_map(self):
         try:
@@ -131,7 +183,7 @@ class AppManager:
                     return {k: int(v) for k,v in data.items()} 
             return {}
         except Exception as e:
-            print(f"Error cargando user_id_map.json: {e}. Se usará un mapa vacío.")
+            logger.warning("Error cargando user_id_map.json: %s. Se usará un mapa vacío.", e)
             return {}
 
     def _save_user_id_map(self):
@@ -139,38 +191,63 @@ class AppManager:
             os.makedirs(os.path.dirname(self.user_id_map_path), exist_ok=True)
             with open(self.user_id_map_path, 'w') as f:
                 json.dump(self.user_id_map, f, indent=4)
-            print(f"Mapa de IDs de usuario guardado en {self.user_id_map_path}")
+            logger.info("Mapa de IDs de usuario guardado en %s", self.user_id_map_path)
         except Exception as e:
-            print(f"Error guardando user_id_map.json: {e}")
+            logger.warning("Error guardando user_id_map.json: %s", e)
             
-    def _load_all_trained_models(self):
-        """Carga todos los modelos .yml encontrados en el directorio de modelos."""
-        print("Cargando modelos LBPH entrenados...")
-        self.loaded_recognizers = {} # Limpiar modelos previos
-        if not os.path.exists(self.lbph_models_dir):
-            print(f"Directorio de modelos no encontrado: {self.lbph_models_dir}")
+    def _load_face_gallery(self):
+        """Carga la galería LBPH; si no existe (modelos antiguos por usuario) la construye desde las imágenes."""
+        logger.info("Cargando galería LBPH...")
+        # Actualizar el mapa inverso en caso de que el user_id_map se haya modificado externamente
+        self.numeric_id_to_user_str_map = {v: k for k, v in self.user_id_map.items()}
+        if self.face_gallery.load():
             return
 
-        for model_file in os.listdir(self.lbph_models_dir):
-            if model_file.endswith(".yml"):
-                user_id_str = model_file.replace(".yml", "")
-                model_path = os.path.join(self.lbph_models_dir, model_file)
-                try:
-                    recognizer_instance = cv2.face.LBPHFaceRecognizer_create()
-                    recognizer_instance.read(model_path) # Cargar el modelo entrenado
-                    self.loaded_recognizers[user_id_str] = recognizer_instance
-                    print(f"Modelo cargado para '{user_id_str}' desde {model_path}")
-                except Exception as e:
-                    print(f"Error al cargar el modelo para '{user_id_str}' desde {model_path}: {e}")
-        
-        if not self.loaded_recognizers:
-            print("No se cargaron modelos LBPH entrenados.")
-        else:
-            # Actualizar el mapa inverso en caso de que el user_id_map se haya modificado externamente
-            self.numeric_id_to_user_str_map = {v: k for k, v in self.user_id_map.items()}
-
-    def process_frame(self, frame):
-        """Procesar frame según el estado actual con control de voz"""
+        faces_dir = os.path.join(self.project_root_path, USER_FACE_DATA_DIR_REL_TO_PROJECT_ROOT)
+        self.face_gallery.rebuild_from_disk(faces_dir, self.user_id_map)
+        if len(self.face_gallery) == 0:
+            logger.info("No hay usuarios entrenados en la galería.")
+            return
+        self.face_gallery.save(self.user_id_map)
+
+    def analyze_frame(self, frame):
+        """
+        Ejecuta solo la parte de visión del estado actual (detección de caras o
+        de marcadores) sin dibujar HUD ni modificar el estado de la aplicación.
+        Lo usa el pipeline para analizar un frame mientras se renderiza el anterior.
+        """
+        # Estado y calibración del mismo instante (handle_input y configure_camera los
+        # cambian desde otro hilo); el análisis en sí va sin el lock
+        with self.state_lock:
+            state = self.current_state
+            camera_matrix, dist_coeffs = self.camera_matrix_cv, self.dist_coeffs_cv
+        analysis = {'state': state, 'camera_matrix': camera_matrix}
+
+        if state in (STATE_LOGIN, STATE_REGISTER_CAPTURE):
+            analysis['faces'] = self.face_tracker.detect_faces(frame)
+        elif state == STATE_MAIN_MENU_AR:
+            analysis['markers'] = marker_detection.detect_and_estimate_pose(
+                frame,
+                camera_matrix,
+                dist_coeffs,
+                scene_renderer.MARKER_SIZE_METERS
+            )
+        return analysis
+
+    def _precomputed(self, analysis, key):
+        """Devuelve un resultado de analyze_frame si sigue siendo válido para el estado y la calibración actuales"""
+        if (analysis is not None and analysis.get('state') == self.current_state
+                and analysis.get('camera_matrix') is self.camera_matrix_cv):
+            return analysis.get(key)
+        return None
+
+    def process_frame(self, frame, analysis=None):
+        """
+        Procesar frame según el estado actual con control de voz.
+        Si se pasa `analysis` (resultado de analyze_frame) se reutilizan sus
+        detecciones en lugar de volver a calcularlas.
+        """
+        profiler.set_state(self.current_state)
         display_frame = frame.copy()
         height, width = frame.shape[:2]
 
@@ -179,121 +256,159 @@ class AppManager:
             # Solo marcar como inicializado, sin mensaje confuso
             self.camera_initialized_for_gl = True
 
+        # La matriz de cámara debe corresponder a la resolución real de los frames
+        if (width, height) != self.camera_resolution:
+            logger.debug("Resolución real %sx%s distinta de la configurada %s", width, height, self.camera_resolution)
+            self.configure_camera(width, height)
+
         recognition_text_color = (0, 0, 255)  # Default rojo para desconocido
 
         if self.current_state == STATE_WELCOME:
             # Limpiar cualquier usuario logueado previamente si volvemos a este estado
             self.logged_in_user_str = None
 
-            cv2.putText(display_frame, "Bienvenido a ARCar Showroom", (50, 100),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (200, 200, 0), 2)
-            cv2.putText(display_frame, "Presiona 'L' para Iniciar Sesion", (50, 150),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(display_frame, "Presiona 'R' para Registrar Nuevo Usuario", (50, 200),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            cv2.putText(display_frame, "Presiona 'Q' para Salir", (50, 250),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (128, 128, 128), 2)
+            self.hud.draw(display_frame, (
+                HudText("Bienvenido a ARCar Showroom", (50, 100), 1, (200, 200, 0), 2),
+                HudText("Presiona 'L' para Iniciar Sesion", (50, 150), 0.7, (0, 255, 0), 2),
+                HudText("Presiona 'R' para Registrar Nuevo Usuario", (50, 200), 0.7, (0, 0, 255), 2),
+                HudText("Presiona 'Q' para Salir", (50, 250), 0.7, (128, 128, 128), 2),
+            ))
 
         elif self.current_state == STATE_LOGIN:
-            # Detectar caras primero
-            frame_with_rects, detected_faces_coords = facial_auth.detect_faces(display_frame)
+            # Detectar caras primero (o reutilizar la detección del pipeline)
+            face_detection = self._precomputed(analysis, 'faces')
+            if face_detection is None:
+                face_detection = self.face_tracker.detect_faces(display_frame)
+            frame_with_rects, detected_faces_coords, face_track_ids = face_detection
             display_frame = frame_with_rects # Usar el frame con rectángulos de detección
 
             # Si no hay un usuario pre-reconocido, intentamos reconocer
             if not self.logged_in_user_str:
-                if len(detected_faces_coords) > 0 and self.loaded_recognizers:
-                    for (x, y, w, h) in detected_faces_coords:
-                        face_roi = display_frame[y:y+h, x:x+w]
-                        gray_face_roi = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
-                        
-                        best_match_user_id_str = None
-                        lowest_confidence = float('inf')
-
-                        for user_id_str, recognizer_inst in self.loaded_recognizers.items():
+                self.identity_voter.prune(face_track_ids)
+                if len(detected_faces_coords) > 0 and len(self.face_gallery) > 0:
+                    # Solo se consultan las caras a las que les toca y con calidad suficiente;
+                    # las demás se reintentan en el siguiente frame. Todas en una búsqueda.
+                    pending = []
+                    low_quality = {}
+                    for track_id, box in zip(face_track_ids, detected_faces_coords):
+                        if not self.identity_voter.should_recognize(track_id):
+                            continue
+                        # Recorte del frame limpio: display_frame ya lleva los rectángulos dibujados
+                        gray_face = crop_face(frame, box)
+                        if gray_face is None:
+                            continue  # Caja recortada en el borde sin área: se reintenta
+                        quality = self._face_quality(gray_face)
+                        if quality is not None and not is_usable(quality):
+                            low_quality[track_id] = quality
+                            continue
+                        with profiler.stage('face_normalize'):
+                            pending.append((track_id, normalize_face(gray_face)))
+                    if pending:
+                        with profiler.stage('lbph_predict'):
                             try:
-                                _, confidence = recognizer_inst.predict(gray_face_roi)
-                                if confidence < lowest_confidence:
-                                    lowest_confidence = confidence
-                                    best_match_user_id_str = user_id_str
-                            except cv2.error as e:
-                                continue
-                        
-                        # Después de intentar encontrar el mejor match con todos los reconocedores
-                        if best_match_user_id_str:  # Si hubo algún intento de match
-                            print(f"DEBUG: Intento de match: {best_match_user_id_str}, Conf Raw: {lowest_confidence:.2f}, Umbral: {LBPH_CONFIDENCE_THRESHOLD}")
-                        
-                        # Si encontramos un match con suficiente confianza
-                        if best_match_user_id_str and lowest_confidence < self.lbph_confidence_threshold:
+                                results = self.face_gallery.search([face for _, face in pending], k=FACE_VOTING_TOP_K)
+                            except (cv2.error, ValueError):
+                                results = [[] for _ in pending]
+                        for (track_id, _), neighbours in zip(pending, results):
+                            self.identity_voter.add_observation(track_id, neighbours, self.lbph_confidence_threshold)
+
+                    for track_id, (x, y, w, h) in zip(face_track_ids, detected_faces_coords):
+                        identity = self.identity_voter.identity(track_id)
+                        best_match_user_id_str = self.numeric_id_to_user_str_map.get(identity.numeric_id)
+
+                        # Identidad aceptada tras varias consultas de la misma cara
+                        if identity.status == ACCEPTED and best_match_user_id_str:
                             self.logged_in_user_str = best_match_user_id_str  # Guardar para confirmación
                             recognition_text_color = (0, 255, 0)  # Verde para reconocido
-                            
+
                             # Dibujar nombre y confianza sobre el rectángulo de la cara
-                            text_to_display = f"{self.logged_in_user_str} ({lowest_confidence:.2f})"
-                            cv2.putText(display_frame, text_to_display, (x, y-10), 
+                            text_to_display = f"{self.logged_in_user_str} ({identity.distance:.2f})"
+                            cv2.putText(display_frame, text_to_display, (x, y-10),
                                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, recognition_text_color, 2)
-                            
-                            print(f"Usuario reconocido: {self.logged_in_user_str} con confianza: {lowest_confidence:.2f}")
-                            print("Esperando confirmación para iniciar sesión.")
+
+                            logger.info("Usuario reconocido: %s con confianza media: %.2f (%s/%s frames)",
+                                        self.logged_in_user_str, identity.distance, identity.votes, identity.samples)
+                            logger.info("Esperando confirmación para iniciar sesión.")
                             break  # Salir del bucle de caras
                         else:
-                            # No se reconoció con suficiente confianza
-                            if best_match_user_id_str:
-                                text_to_display = f"{best_match_user_id_str}? ({lowest_confidence:.2f})"
+                            # Aún sin decidir o descartada como desconocida
+                            if track_id in low_quality and not identity.samples:
+                                quality = low_quality[track_id]
+                                text_to_display = f"{QUALITY_HINTS[quality.reason]} ({quality.score:.2f})"
+                            elif identity.status == REJECTED or not best_match_user_id_str:
+                                text_to_display = "Desconocido" if identity.samples else "Identificando..."
                             else:
-                                text_to_display = "Desconocido"
-                            cv2.putText(display_frame, text_to_display, (x, y-10), 
+                                text_to_display = (f"{best_match_user_id_str}? ({identity.distance:.2f}) "
+                                                   f"[{identity.votes}/{identity.samples}]")
+                            cv2.putText(display_frame, text_to_display, (x, y-10),
                                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 165, 255), 1)
 
             # Textos generales del estado LOGIN
-            cv2.putText(display_frame, "Estado: LOGIN FACIAL", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            hud_items = [HudText("Estado: LOGIN FACIAL", (10, 30), 0.7, (0, 255, 0), 2)]
             
             # Si hay un usuario pre-reconocido
             if self.logged_in_user_str:
-                cv2.putText(display_frame, f"Bienvenido {self.logged_in_user_str}!", (10, 60),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(display_frame, "Presiona ENTER para continuar", (10, 90),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
-                cv2.putText(display_frame, "Presiona 'B' para Volver al Menu Inicial", (10, 120), # Opción para volver
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
-                
-                # Mensaje grande centrado
-                text_size = cv2.getTextSize(f"Bienvenido {self.logged_in_user_str}! Presiona ENTER", 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
-                text_x = (display_frame.shape[1] - text_size[0]) // 2
-                text_y = display_frame.shape[0] // 2
-                cv2.putText(display_frame, f"Bienvenido {self.logged_in_user_str}! Presiona ENTER", 
-                            (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                hud_items += [
+                    HudText(f"Bienvenido {self.logged_in_user_str}!", (10, 60), 0.7, (0, 255, 0), 2),
+                    HudText("Presiona ENTER para continuar", (10, 90), 0.5, (200, 200, 0), 1),
+                    HudText("Presiona 'B' para Volver al Menu Inicial", (10, 120), 0.5, (200, 200, 0), 1), # Opción para volver
+                    # Mensaje grande centrado
+                    HudText(f"Bienvenido {self.logged_in_user_str}! Presiona ENTER", (CENTER, CENTER), 0.8, (0, 255, 0), 2),
+                ]
             else:
-                cv2.putText(display_frame, "Coloca tu rostro para identificarte...", (10, 60),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 0), 2)
-                cv2.putText(display_frame, "Presiona 'B' para Volver al Menu Inicial", (10, 90),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
+                hud_items += [
+                    HudText("Coloca tu rostro para identificarte...", (10, 60), 0.7, (200, 200, 0), 2),
+                    HudText("Presiona 'B' para Volver al Menu Inicial", (10, 90), 0.5, (200, 200, 0), 1),
+                ]
+            self.hud.draw(display_frame, tuple(hud_items))
 
         elif self.current_state == STATE_REGISTER_CAPTURE:
-            display_frame, faces = facial_auth.detect_faces(display_frame)
+            face_detection = self._precomputed(analysis, 'faces')
+            if face_detection is None:
+                face_detection = self.face_tracker.detect_faces(display_frame)
+            display_frame, faces, _ = face_detection
+            self._registration_faces = (frame, faces)
             info_text = f"REGISTRO: {self.user_id_for_registration}"
-            cv2.putText(display_frame, info_text, (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            cv2.putText(display_frame, f"Capturadas: {self.captured_images_count}/{NUM_IMAGES_FOR_REGISTRATION}",
-                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
-            if len(faces) == 1:
-                cv2.putText(display_frame, "Mueve la cabeza. Presiona 'c' para Capturar", (10, 90),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            face_roi = crop_face(frame, faces[0]) if len(faces) == 1 else None
+            quality = self._face_quality(face_roi) if face_roi is not None else None
+            if quality is not None and not is_usable(quality):
+                face_hint = HudText(f"{QUALITY_HINTS[quality.reason]} (calidad {quality.score:.2f})",
+                                    (10, 90), 0.5, (0, 165, 255), 1)
+            elif len(faces) == 1:
+                face_hint = HudText("Mueve la cabeza. Presiona 'c' para Capturar", (10, 90), 0.5, (0, 255, 0), 1)
             elif len(faces) == 0:
-                cv2.putText(display_frame, "Muestra tu rostro a la camara", (10, 90),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 100, 0), 1)
+                face_hint = HudText("Muestra tu rostro a la camara", (10, 90), 0.5, (255, 100, 0), 1)
             else:
-                cv2.putText(display_frame, "Solo un rostro permitido para registro", (10, 90),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-            cv2.putText(display_frame, "Presiona 'ESC' para Cancelar Registro", (10, 120),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
+                face_hint = HudText("Solo un rostro permitido para registro", (10, 90), 0.5, (0, 0, 255), 1)
+            self.hud.draw(display_frame, (
+                HudText(info_text, (10, 30), 0.7, (0, 0, 255), 2),
+                HudText(f"Capturadas: {self.captured_images_count}/{NUM_IMAGES_FOR_REGISTRATION}",
+                        (10, 60), 0.5, (200, 200, 0), 1),
+                face_hint,
+                HudText("Presiona 'ESC' para Cancelar Registro", (10, 120), 0.5, (200, 200, 0), 1),
+            ))
+
+        elif self.current_state == STATE_REGISTER_PROMPT_ID:
+            self.hud.draw(display_frame, (
+                HudText("REGISTRO: Mira la terminal para introducir tu ID", (10, 30), 0.7, (0, 255, 255), 2),
+                HudText("Presiona 'ESC' para cancelar", (10, 60), 0.5, (255, 100, 100), 1),
+            ))
 
         elif self.current_state == STATE_REGISTER_TRAIN:
-            cv2.putText(display_frame, f"Entrenando modelo para: {self.user_id_for_registration}...", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-            cv2.putText(display_frame, "Esto puede tardar unos segundos.", (10, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            result = self.enrollment_trainer.poll_result()
+            if result is not None:
+                self._finish_training(result)
+            progress = self.enrollment_trainer.progress()
+            if progress is not None and progress.stage == EXTRACTING:
+                step = f"Procesando capturas {progress.done}/{progress.total}"
+            elif progress is not None and progress.stage == SAVING:
+                step = "Guardando galeria..."
+            else:
+                step = "Esto puede tardar unos segundos."
+            self.hud.draw(display_frame, (
+                HudText(f"Entrenando modelo para: {self.user_id_for_registration}...", (10, 30), 0.7, (0, 255, 255), 2),
+                HudText(step, (10, 60), 0.5, (0, 255, 255), 1),
+            ))
 
         elif self.current_state == STATE_MAIN_MENU_AR:
             # 🔧 MANEJAR COMANDOS DE VOZ PRIMERO
@@ -302,13 +417,17 @@ class AppManager:
                 self._handle_voice_command(voice_command)
             
             # Detectar marcador de menú (ID 23)
-            corners, ids, frame_with_aruco_markers, rvecs, tvecs = \
-                marker_detection.detect_and_estimate_pose(
+            marker_detection_result = self._precomputed(analysis, 'markers')
+            if marker_detection_result is None:
+                marker_detection_result = marker_detection.detect_and_estimate_pose(
                     display_frame, 
                     self.camera_matrix_cv,
                     self.dist_coeffs_cv,
                     scene_renderer.MARKER_SIZE_METERS
                 )
+            corners, ids, frame_with_aruco_markers, rvecs, tvecs = marker_detection_result
+            # Textos del estado: se componen de una vez al final de la rama
+            hud_items = []
             
             if ids is not None and 23 in ids:
                 marker_index = list(ids.flatten()).index(23)
@@ -316,12 +435,11 @@ class AppManager:
                 # Si NO hay coche seleccionado, mostrar menú
                 if not self.selected_car:
                     display_frame = self.ar_menu.draw_menu_overlay(frame_with_aruco_markers, corners)
-                    cv2.putText(display_frame, "1-2: Seleccionar | ESPACIO: Ver modelo 3D", (10, 120), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+                    hud_items.append(HudText("1-2: Seleccionar | ESPACIO: Ver modelo 3D", (10, 120), 0.5, (255, 255, 0), 1))
                 
                 # Si YA hay coche seleccionado, mostrar modelo 3D REAL
                 else:
-                    print(f"DEBUG_RENDER: Renderizando {self.selected_car['name']} REAL...")
+                    logger.debug("Renderizando %s REAL...", self.selected_car['name'])
                     
                     try:
                         display_frame = self.model_viewer.render_model_on_marker(
@@ -334,18 +452,15 @@ class AppManager:
                         
                         # 🔧 INFORMACIÓN MÁS LIMPIA Y COMPACTA
                         # Solo mostrar nombre del coche
-                        cv2.putText(display_frame, f"{self.selected_car['name']}", (10, 100), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                        hud_items.append(HudText(f"{self.selected_car['name']}", (10, 100), 0.8, (0, 255, 0), 2))
                         
                         # Instrucciones simplificadas
-                        cv2.putText(display_frame, "M: Menu | Q: Logout", (10, 130), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+                        hud_items.append(HudText("M: Menu | Q: Logout", (10, 130), 0.5, (255, 255, 0), 1))
                        
                     except Exception as e:
-                        print(f"ERROR_PYRENDER: {e}")
+                        logger.error("Error de pyrender: %s", e, extra=every())
                         display_frame = frame_with_aruco_markers
-                        cv2.putText(display_frame, f"Error: {self.selected_car['name']}", (10, 100), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                        hud_items.append(HudText(f"Error: {self.selected_car['name']}", (10, 100), 0.6, (0, 0, 255), 2))
 
             else:
                 # No hay marcador visible
@@ -353,18 +468,17 @@ class AppManager:
                 
                 if self.selected_car:
                     # Hay coche seleccionado pero no se ve el marcador
-                    cv2.putText(display_frame, f"Coche seleccionado: {self.selected_car['name']}", (10, 90), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                    cv2.putText(display_frame, "Muestra marcador ID 23 para ver modelo 3D", (10, 120), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
-                    cv2.putText(display_frame, "Presiona 'M' para volver al menu sin marcador", (10, 150), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 150, 0), 1)
+                    hud_items += [
+                        HudText(f"Coche seleccionado: {self.selected_car['name']}", (10, 90), 0.6, (0, 255, 0), 2),
+                        HudText("Muestra marcador ID 23 para ver modelo 3D", (10, 120), 0.5, (255, 255, 0), 1),
+                        HudText("Presiona 'M' para volver al menu sin marcador", (10, 150), 0.5, (255, 150, 0), 1),
+                    ]
                 else:
                     # No hay coche seleccionado
-                    cv2.putText(display_frame, "Muestra marcador ID 23 para abrir menu", (10, 90), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,150,0), 2)
-                    cv2.putText(display_frame, "Selecciona Ferrari F40 o Porsche 911", (10, 120), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    hud_items += [
+                        HudText("Muestra marcador ID 23 para abrir menu", (10, 90), 0.6, (255,150,0), 2),
+                        HudText("Selecciona Ferrari F40 o Porsche 911", (10, 120), 0.5, (255, 255, 255), 1),
+                    ]
 
             # 🔧 TÍTULO DINÁMICO LIMPIO (SIN SÍMBOLOS EXTRAÑOS)
             if self.selected_car:
@@ -374,45 +488,45 @@ class AppManager:
                 titulo = "Estado: CAR SHOWROOM - Selecciona tu coche"
                 color_titulo = (255, 0, 0)  # Rojo para menú
 
-            cv2.putText(display_frame, titulo, (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color_titulo, 2)  # ← Tamaño reducido de 0.8 a 0.7
+            hud_items.append(HudText(titulo, (10, 30), 0.7, color_titulo, 2))  # ← Tamaño reducido de 0.8 a 0.7
 
             # Mensaje de bienvenida más pequeño
             welcome_message = f"Bienvenido, {self.logged_in_user_str}!"
-            cv2.putText(display_frame, welcome_message, (10, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)  # ← Tamaño reducido de 0.7 a 0.6
+            hud_items.append(HudText(welcome_message, (10, 60), 0.6, (0,255,0), 2))  # ← Tamaño reducido de 0.7 a 0.6
+            self.hud.draw(display_frame, tuple(hud_items))
         
         else:  # Estado desconocido
-            cv2.putText(display_frame, f"Estado: {self.current_state}", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (128, 128, 128), 2)
-        
-        # 🔧 MOSTRAR ESTADO DEL CONTROL DE VOZ
-        voice_status = self.voice_controller.get_status_text()
-        cv2.putText(display_frame, voice_status, (display_frame.shape[1] - 120, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
-        
-        # Mostrar instrucciones de voz
-        if not self.selected_car:  # Solo en el menú
-            instructions = self.voice_controller.get_instructions_text()
-            cv2.putText(display_frame, instructions, (10, display_frame.shape[0] - 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
-        
-        # 🔧 MOSTRAR FEEDBACK DE COMANDO DE VOZ
-        if hasattr(self, '_voice_feedback_message') and hasattr(self, '_voice_feedback_timer'):
-            # Mostrar mensaje por 3 segundos
-            if time.time() - self._voice_feedback_timer < 3.0:
-                cv2.putText(display_frame, self._voice_feedback_message, (10, 200), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            else:
-                # Limpiar mensaje después de 3 segundos
-                delattr(self, '_voice_feedback_message')
-                delattr(self, '_voice_feedback_timer')
+            self.hud.draw(display_frame, (HudText(f"Estado: {self.current_state}", (10, 30), 0.7, (128, 128, 128), 2),))
         
+        with profiler.stage('hud'):
+            # 🔧 MOSTRAR ESTADO DEL CONTROL DE VOZ
+            voice_status = self.voice_controller.get_status_text()
+            hud_items = [HudText(voice_status, (display_frame.shape[1] - 120, 30), 0.5, (0, 255, 255), 2)]
+            
+            # Mostrar instrucciones de voz
+            if not self.selected_car:  # Solo en el menú
+                instructions = self.voice_controller.get_instructions_text()
+                hud_items.append(HudText(instructions, (10, display_frame.shape[0] - 30), 0.4, (255, 255, 0), 1))
+            
+            # 🔧 MOSTRAR FEEDBACK DE COMANDO DE VOZ
+            if hasattr(self, '_voice_feedback_message') and hasattr(self, '_voice_feedback_timer'):
+                # Mostrar mensaje por 3 segundos
+                if time.time() - self._voice_feedback_timer < 3.0:
+                    hud_items.append(HudText(self._voice_feedback_message, (10, 200), 0.7, (0, 255, 0), 2))
+                else:
+                    # Limpiar mensaje después de 3 segundos
+                    delattr(self, '_voice_feedback_message')
+                    delattr(self, '_voice_feedback_timer')
+            self.hud.draw(display_frame, tuple(hud_items))
+        
+        # Tiempos por etapa (solo si el profiling está activado)
+        profiler.frame_done()
+        profiler.draw_overlay(display_frame)
         return display_frame
 
     def _handle_voice_command(self, command):
         """Manejar comandos de voz"""
-        print(f"DEBUG_VOICE: 🎙️ Procesando comando: {command}")
+        logger.info("🎙️ Procesando comando: %s", command)
         
         if command['type'] == 'car_selection':
             car_name = command['car']
@@ -433,7 +547,7 @@ class AppManager:
                         break
             
             if target_car:
-                print(f"DEBUG_VOICE: 🚗 Cargando {target_car['name']} por comando de voz")
+                logger.info("🚗 Cargando %s por comando de voz", target_car['name'])
                 
                 # Seleccionar el coche automáticamente
                 self.selected_car = target_car
@@ -441,24 +555,24 @@ class AppManager:
                 # Cargar el modelo inmediatamente
                 success = self.model_viewer.load_car_model(target_car)
                 if success:
-                    print(f"DEBUG_VOICE: ✅ {target_car['name']} cargado por voz")
+                    logger.info("✅ %s cargado por voz", target_car['name'])
                     
                     # Mostrar mensaje visual
                     self._voice_feedback_message = f"🎙️ {target_car['name']} seleccionado por voz"
                     self._voice_feedback_timer = time.time()
                     
                 else:
-                    print(f"DEBUG_VOICE: ❌ Error cargando {target_car['name']} por voz")
+                    logger.warning("❌ Error cargando %s por voz", target_car['name'])
                     self.selected_car = None
             else:
-                print(f"DEBUG_VOICE: ❌ No se encontró coche para '{car_name}'")
+                logger.warning("❌ No se encontró coche para '%s'", car_name)
         
         elif command['type'] == 'navigation':
             action = command['action']
             
             if action == 'menu':
                 if self.selected_car:
-                    print(f"DEBUG_VOICE: 🔙 Volviendo al menú desde {self.selected_car['name']} por voz")
+                    logger.info("🔙 Volviendo al menú desde %s por voz", self.selected_car['name'])
                     self.selected_car = None
                     # Limpiar modelo cargado
                     self.model_viewer.cleanup()
@@ -468,10 +582,10 @@ class AppManager:
                     self._voice_feedback_message = "🎙️ Vuelto al menú por voz"
                     self._voice_feedback_timer = time.time()
                 else:
-                    print("DEBUG_VOICE: Ya estás en el menú principal")
+                    logger.info("Ya estás en el menú principal")
             
             elif action == 'logout':
-                print(f"DEBUG_VOICE: 🚪 Cerrando sesión por comando de voz")
+                logger.info("🚪 Cerrando sesión por comando de voz")
                 self.logged_in_user_str = None
                 self.selected_car = None
                 # Limpiar modelo
@@ -488,25 +602,25 @@ class AppManager:
         
         if self.current_state == STATE_WELCOME:
             if key == ord('l'): # 'L' para Login
-                print("Transicionando a STATE_LOGIN")
+                logger.info("Transicionando a STATE_LOGIN")
                 self.logged_in_user_str = None # Asegurar que empezamos el login limpios
                 self.current_state = STATE_LOGIN
             elif key == ord('r'): # 'R' para Registrar
-                print("Transicionando a STATE_REGISTER_PROMPT_ID")
+                logger.info("Transicionando a STATE_REGISTER_PROMPT_ID")
                 self.logged_in_user_str = None 
                 self.current_state = STATE_REGISTER_PROMPT_ID
             # La 'Q' para salir se maneja en main.py
 
         elif self.current_state == STATE_LOGIN:
             if key == ord('r'): # Si alguien está en Login y quiere registrarse (aunque ya tenemos opción en WELCOME)
-                print("Transicionando a STATE_REGISTER_PROMPT_ID desde LOGIN")
+                logger.info("Transicionando a STATE_REGISTER_PROMPT_ID desde LOGIN")
                 self.logged_in_user_str = None 
                 self.current_state = STATE_REGISTER_PROMPT_ID
             elif self.logged_in_user_str and key == 13: # Enter para confirmar login
-                print(f"Login confirmado para {self.logged_in_user_str}. Transicionando a {STATE_MAIN_MENU_AR}")
+                logger.info("Login confirmado para %s. Transicionando a %s", self.logged_in_user_str, STATE_MAIN_MENU_AR)
                 self.current_state = STATE_MAIN_MENU_AR
             elif key == ord('b'): # 'B' para Volver al menú de bienvenida
-                print("Volviendo al menú de bienvenida desde LOGIN.")
+                logger.info("Volviendo al menú de bienvenida desde LOGIN.")
                 self.logged_in_user_str = None
                 self.current_state = STATE_WELCOME
 
@@ -514,7 +628,7 @@ class AppManager:
             if key == ord('c'):
                 self._capture_image_for_registration(current_frame) 
             elif key == 27: # Tecla ESC
-                print("Registro cancelado. Volviendo al menú de bienvenida.") # Cambiado para ir a WELCOME
+                logger.info("Registro cancelado. Volviendo al menú de bienvenida.") # Cambiado para ir a WELCOME
                 self._reset_registration_vars()
                 self.logged_in_user_str = None
                 self.current_state = STATE_WELCOME # Volver a WELCOME en lugar de LOGIN directo
@@ -531,19 +645,19 @@ class AppManager:
             # 🔧 MANEJAR TECLA 'M' PARA VOLVER AL MENÚ (SIN NECESIDAD DE MARCADOR)
             if key == ord('m') or key == ord('M'):
                 if self.selected_car:
-                    print(f"Volviendo al menú desde {self.selected_car['name']}")
+                    logger.info("Volviendo al menú desde %s", self.selected_car['name'])
                     self.selected_car = None
                     # Limpiar modelo cargado
                     self.model_viewer.cleanup()
                     self.model_viewer.current_model = None
-                    print("Modelo limpiado. De vuelta al menú principal.")
+                    logger.info("Modelo limpiado. De vuelta al menú principal.")
                 else:
-                    print("Ya estás en el menú principal")
+                    logger.info("Ya estás en el menú principal")
                 return  # ← IMPORTANTE: return para no procesar más
             
             # 🔧 MANEJAR TECLA 'Q' PARA LOGOUT (SIN NECESIDAD DE MARCADOR)
             elif key == ord('q') or key == ord('Q'):
-                print(f"Cerrando sesión de {self.logged_in_user_str}. Volviendo al menú de bienvenida.")
+                logger.info("Cerrando sesión de %s. Volviendo al menú de bienvenida.", self.logged_in_user_str)
                 self.logged_in_user_str = None
                 self.selected_car = None
                 # Limpiar modelo
@@ -556,14 +670,14 @@ class AppManager:
             elif key == ord('v') or key == ord('V'):
                 if self.voice_controller.is_listening():
                     self.voice_controller.stop_listening()
-                    print("DEBUG_VOICE: 🔇 Control de voz DESACTIVADO")
+                    logger.info("🔇 Control de voz DESACTIVADO")
                 else:
                     success = self.voice_controller.start_listening()
                     if success:
-                        print("DEBUG_VOICE: 🎤 Control de voz ACTIVADO")
-                        print("DEBUG_VOICE: 🗣️ Di 'Ferrari', 'Porsche', 'Menú' o 'Salir'")
+                        logger.info("🎤 Control de voz ACTIVADO")
+                        logger.info("🗣️ Di 'Ferrari', 'Porsche', 'Menú' o 'Salir'")
                     else:
-                        print("DEBUG_VOICE: ❌ No se pudo activar control de voz")
+                        logger.warning("❌ No se pudo activar control de voz")
                 return  # ← IMPORTANTE: return para no procesar más
             
             # Si hay marcador ID 23 visible, permitir selección
@@ -572,7 +686,7 @@ class AppManager:
                 if selected_car:
                     # 🔧 MANEJAR OPCIÓN VOLVER
                     if selected_car == "VOLVER":
-                        print("Volviendo al LOGIN desde el menú")
+                        logger.info("Volviendo al LOGIN desde el menú")
                         self.logged_in_user_str = None
                         self.selected_car = None
                         # Limpiar modelo
@@ -582,19 +696,19 @@ class AppManager:
                         return
                     
                     # Coche seleccionado normal
-                    print(f"DEBUG_APP: 🏎️ === COCHE SELECCIONADO ===")
-                    print(f"DEBUG_APP: Nombre: {selected_car['name']}")
-                    print(f"DEBUG_APP: Ruta: {selected_car['model_path']}")
+                    logger.info("🏎️ === COCHE SELECCIONADO ===")
+                    logger.info("Nombre: %s", selected_car['name'])
+                    logger.info("Ruta: %s", selected_car['model_path'])
                     
                     self.selected_car = selected_car
                     
                     # 🔧 CARGAR EL MODELO INMEDIATAMENTE
-                    print(f"DEBUG_APP: 🚗 Cargando modelo {selected_car['name']}...")
+                    logger.info("🚗 Cargando modelo %s...", selected_car['name'])
                     success = self.model_viewer.load_car_model(selected_car)
                     if success:
-                        print(f"DEBUG_APP: ✅ Modelo {selected_car['name']} cargado exitosamente")
+                        logger.info("✅ Modelo %s cargado exitosamente", selected_car['name'])
                     else:
-                        print(f"DEBUG_APP: ❌ Error cargando modelo {selected_car['name']}")
+                        logger.warning("❌ Error cargando modelo %s", selected_car['name'])
                         self.selected_car = None  # Limpiar selección si falla
 
     # 🔧 AÑADIR ESTOS MÉTODOS AL FINAL DE LA CLASE:
@@ -604,11 +718,14 @@ class AppManager:
 
     def set_current_state(self, new_state):
         """Cambia el estado actual de la aplicación"""
-        print(f"DEBUG_APP: Cambiando estado de {self.current_state} a {new_state}")
+        logger.info("Cambiando estado de %s a %s", self.current_state, new_state)
         self.current_state = new_state
 
     def cleanup(self):
         """Limpiar recursos al cerrar la aplicación"""
+        # Un registro a medio entrenar se termina de guardar antes de salir
+        if hasattr(self, 'enrollment_trainer'):
+            self.enrollment_trainer.shutdown(wait=True)
         if hasattr(self, 'model_viewer') and self.model_viewer:
             self.model_viewer.cleanup()
         # 🔧 LIMPIAR CONTROL DE VOZ
@@ -619,7 +736,7 @@ class AppManager:
         from audio_processing import cleanup_voice_controller
         cleanup_voice_controller()
         
-        print("AppManager: Recursos limpiados incluyendo control de voz.")
+        logger.info("AppManager: Recursos limpiados incluyendo control de voz.")
 
     # AÑADIR debug en load_car_model() - Verificar carga exitosa:
 
@@ -628,13 +745,13 @@ class AppManager:
         from trimesh.transformations import rotation_matrix, translation_matrix
 
         # 🔥 DEBUG CRÍTICO: Verificar qué coche se está cargando
-        print(f"DEBUG_MODEL: 🏎️ === CARGANDO MODELO ===")
-        print(f"DEBUG_MODEL: Coche recibido: {car_dict}")
-        print(f"DEBUG_MODEL: Nombre: {car_dict.get('name', 'DESCONOCIDO')}")
-        print(f"DEBUG_MODEL: Ruta: {car_dict.get('model_path', 'SIN RUTA')}")
-        print(f"DEBUG_MODEL: Escala: {car_dict.get('scale', 0.05)}")
-        print(f"DEBUG_MODEL: Elevación: {car_dict.get('elevation', 0.01)}")
-        print(f"DEBUG_MODEL: ================================")
+        logger.info("🏎️ === CARGANDO MODELO ===")
+        logger.debug("Coche recibido: %s", car_dict)
+        logger.debug("Nombre: %s", car_dict.get('name', 'DESCONOCIDO'))
+        logger.debug("Ruta: %s", car_dict.get('model_path', 'SIN RUTA'))
+        logger.debug("Escala: %s", car_dict.get('scale', 0.05))
+        logger.debug("Elevación: %s", car_dict.get('elevation', 0.01))
+        logger.debug("================================")
 
         model_path = f"assets/3d_models/{car_dict['model_path']}"
         scale = car_dict.get('scale', 0.05)
@@ -643,24 +760,24 @@ class AppManager:
         # 🔧 GUARDAR NOMBRE DEL MODELO PARA LOGS
         self._current_model_name = car_dict.get('name', 'Modelo desconocido')
 
-        print(f"DEBUG_MODEL: Ruta completa: {model_path}")
-        print(f"DEBUG_MODEL: Ruta absoluta: {os.path.abspath(model_path)}")
-        print(f"DEBUG_MODEL: ¿Existe archivo? {os.path.exists(model_path)}")
+        logger.debug("Ruta completa: %s", model_path)
+        logger.debug("Ruta absoluta: %s", os.path.abspath(model_path))
+        logger.debug("¿Existe archivo? %s", os.path.exists(model_path))
 
         if not os.path.exists(model_path):
-            print(f"DEBUG_MODEL: ❌ Modelo no encontrado: {model_path}")
+            logger.warning("❌ Modelo no encontrado: %s", model_path)
             # 🔍 DEBUG: Listar qué hay en el directorio
             dir_path = os.path.dirname(model_path)
             if os.path.exists(dir_path):
-                print(f"DEBUG_MODEL: Contenido de {dir_path}:")
+                logger.info("Contenido de %s:", dir_path)
                 for item in os.listdir(dir_path):
-                    print(f"DEBUG_MODEL:   - {item}")
+                    logger.info("- %s", item)
             return False
 
         # ... resto del código sin cambios ...
 
-        print(f"DEBUG_MODEL: ✅ Modelo {self._current_model_name} cargado correctamente")
-        print(f"DEBUG_MODEL: Meshes creados: {len(self.current_model)}")
+        logger.info("✅ Modelo %s cargado correctamente", self._current_model_name)
+        logger.debug("Meshes creados: %s", len(self.current_model))
         return True
 
     def prompt_for_user_id(self):
@@ -674,171 +791,183 @@ class AppManager:
             
             # Solicitar ID si no se ha hecho aún
             if not self.user_id_for_registration:
-                user_id = input("Introduce tu nombre de usuario (sin espacios): ").strip()
-                
-                if not user_id:
-                    print("❌ El ID no puede estar vacío. Inténtalo de nuevo.")
-                    return
-                
-                if ' ' in user_id:
-                    print("❌ El ID no puede contener espacios. Inténtalo de nuevo.")
-                    return
-                
-                # Verificar que no existe ya
-                if user_id in self.user_id_map:
-                    print(f"❌ El usuario '{user_id}' ya existe. Elige otro nombre.")
-                    return
-                
-                # ID válido y único
-                self.user_id_for_registration = user_id
-                print(f"✅ ID '{user_id}' disponible. Transicionando a captura...")
-                
-                # Limpiar flag
-                if hasattr(self, '_user_id_input_started'):
-                    delattr(self, '_user_id_input_started')
-                
-                # Cambiar al estado de captura
-                self.current_state = STATE_REGISTER_CAPTURE
-                self.captured_images_count = 0
+                user_id = input("Introduce tu nombre de usuario (sin espacios): ")
+                self.submit_user_id(user_id)
                 
         except EOFError:
             print("\n❌ Entrada cancelada. Volviendo al menú principal.")
-            self._reset_registration_vars()
-            self.current_state = STATE_WELCOME
+            with self.state_lock:
+                self._reset_registration_vars()
+                self.current_state = STATE_WELCOME
         except KeyboardInterrupt:
             print("\n❌ Registro cancelado por el usuario.")
-            self._reset_registration_vars()
-            self.current_state = STATE_WELCOME
+            with self.state_lock:
+                self._reset_registration_vars()
+                self.current_state = STATE_WELCOME
+
+    def submit_user_id(self, user_id):
+        """
+        Validar el ID de un nuevo usuario y pasar a la captura de imágenes.
+        Lo usan prompt_for_user_id (terminal) y el modo headless (API / guion).
+        Devuelve True si el ID se aceptó. Toma state_lock (después del input():
+        el hilo de análisis del pipeline nunca ve un registro a medio empezar).
+        """
+        with self.state_lock:
+            return self._submit_user_id(user_id)
+
+    def _submit_user_id(self, user_id):
+        user_id = user_id.strip()
+        
+        if not user_id:
+            logger.warning("❌ El ID no puede estar vacío. Inténtalo de nuevo.")
+            return False
+        
+        if ' ' in user_id:
+            logger.warning("❌ El ID no puede contener espacios. Inténtalo de nuevo.")
+            return False
+        
+        # Verificar que no existe ya
+        if user_id in self.user_id_map:
+            logger.warning("❌ El usuario '%s' ya existe. Elige otro nombre.", user_id)
+            return False
+        
+        # Solo un registro a la vez: el anterior puede estar aún entrenándose
+        if self.enrollment_trainer.is_busy():
+            logger.warning("⏳ Hay un registro en curso. Espera a que termine e inténtalo de nuevo.")
+            return False
+        
+        # ID válido y único
+        self.user_id_for_registration = user_id
+        logger.info("✅ ID '%s' disponible. Transicionando a captura...", user_id)
+        
+        # Limpiar flag
+        if hasattr(self, '_user_id_input_started'):
+            delattr(self, '_user_id_input_started')
+        
+        # Cada captura se añade a la galería según llega (el ID numérico se reserva
+        # ahora y se guarda en user_id_map.json al terminar el registro)
+        user_dir = os.path.join(self.project_root_path, USER_FACE_DATA_DIR_REL_TO_PROJECT_ROOT, user_id)
+        self.enrollment_trainer.start_session(user_id, self.next_user_numeric_id, user_dir)
+        
+        # Cambiar al estado de captura
+        self.current_state = STATE_REGISTER_CAPTURE
+        self.captured_images_count = 0
+        return True
 
     def _reset_registration_vars(self):
         """Limpiar variables de registro"""
         self.user_id_for_registration = None
         self.captured_images_count = 0
+        self._registration_faces = None
+        self.enrollment_trainer.cancel_session()  # No hace nada si el registro ya se cerró
         if hasattr(self, '_user_id_input_started'):
             delattr(self, '_user_id_input_started')
-        print("DEBUG_REGISTER: Variables de registro limpiadas")
+        logger.debug("Variables de registro limpiadas")
+
+    def _face_quality(self, gray_face):
+        """FaceQuality de un recorte en gris (None si el filtro está desactivado)"""
+        if not FACE_QUALITY_GATE:
+            return None
+        with profiler.stage('face_quality'):
+            return assess_face(gray_face)
 
     def _capture_image_for_registration(self, frame):
         """Capturar imagen para entrenamiento del modelo facial"""
-        print(f"DEBUG_REGISTER: Intentando capturar imagen {self.captured_images_count + 1}")
-        
-        # Detectar caras en el frame actual
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        face_cascade_path = os.path.join(self.project_root_path, 
-                                        'assets/face_data/cascades/haarcascade_frontalface_default.xml')
+        logger.debug("Intentando capturar imagen %s", self.captured_images_count + 1)
         
-        if not os.path.exists(face_cascade_path):
-            print(f"❌ No se encuentra el archivo cascade: {face_cascade_path}")
+        if not facial_auth.is_ready():
+            logger.warning("❌ Detector de caras no cargado")
             return
-        
-        face_cascade = cv2.CascadeClassifier(face_cascade_path)
-        faces = face_cascade.detectMultiScale(gray_frame, 1.3, 5)
+        # Las caras que process_frame acaba de encontrar en este frame; si no, el
+        # tracker (nunca el detector directamente: el hilo de análisis lo está usando)
+        if self._registration_faces is not None and self._registration_faces[0] is frame:
+            faces = self._registration_faces[1]
+        else:
+            _, faces, _ = self.face_tracker.detect_faces(frame)
         
         if len(faces) != 1:
-            print(f"❌ Se necesita exactamente 1 cara, detectadas: {len(faces)}")
+            logger.warning("❌ Se necesita exactamente 1 cara, detectadas: %s", len(faces))
             return
         
         # Extraer la cara detectada
-        (x, y, w, h) = faces[0]
-        face_roi = gray_frame[y:y+h, x:x+w]
-        
-        # Crear directorio del usuario
-        user_dir = os.path.join(self.project_root_path, 
-                             USER_FACE_DATA_DIR_REL_TO_PROJECT_ROOT, 
-                             self.user_id_for_registration)
-        os.makedirs(user_dir, exist_ok=True)
-        
-        # Guardar imagen
-        img_filename = f"face_{self.captured_images_count:03d}.jpg"
-        img_path = os.path.join(user_dir, img_filename)
+        face_roi = crop_face(frame, faces[0])
+        if face_roi is None:
+            logger.warning("❌ La cara está fuera del frame")
+            return
+
+        # Las capturas borrosas, pequeñas, mal iluminadas o de perfil no entran en la galería
+        if FACE_QUALITY_GATE:
+            quality = assess_face(face_roi)
+            if not is_usable(quality):
+                logger.warning("❌ Captura descartada por calidad (%s, %.2f): %s",
+                               quality.reason, quality.score, QUALITY_HINTS[quality.reason])
+                return
         
-        # Redimensionar cara a tamaño estándar
-        face_resized = cv2.resize(face_roi, (100, 100))
-        cv2.imwrite(img_path, face_resized)
+        # Tamaño canónico (y alineada); enrollment_trainer iguala la iluminación, la
+        # añade a la galería y la guarda en embeddings/<user_id>/samples.faces en segundo plano
+        self.enrollment_trainer.add_image(canonical_face(face_roi))
         
         self.captured_images_count += 1
-        print(f"✅ Imagen {self.captured_images_count}/{NUM_IMAGES_FOR_REGISTRATION} capturada: {img_filename}")
+        logger.info("✅ Imagen %s/%s capturada", self.captured_images_count, NUM_IMAGES_FOR_REGISTRATION)
         
         # Si hemos capturado suficientes imágenes, entrenar modelo
         if self.captured_images_count >= NUM_IMAGES_FOR_REGISTRATION:
-            print(f"🎯 {NUM_IMAGES_FOR_REGISTRATION} imágenes capturadas. Iniciando entrenamiento...")
+            logger.info("🎯 %s imágenes capturadas. Iniciando entrenamiento...", NUM_IMAGES_FOR_REGISTRATION)
             self.current_state = STATE_REGISTER_TRAIN
             self._train_user_model()
 
     def _train_user_model(self):
-        """Entrenar modelo LBPH para el usuario registrado"""
-        print(f"🔧 Entrenando modelo para {self.user_id_for_registration}...")
+        """
+        Cerrar el registro en enrollment_trainer: las capturas ya están en su
+        galería de preparación, solo falta juntarla con la galería y guardarla.
+        process_frame recoge el resultado en STATE_REGISTER_TRAIN (_finish_training).
+        """
+        logger.info("🔧 Entrenando modelo para %s...", self.user_id_for_registration)
         
         try:
-            # Cargar imágenes del usuario
-            user_dir = os.path.join(self.project_root_path, 
-                                   USER_FACE_DATA_DIR_REL_TO_PROJECT_ROOT, 
-                                   self.user_id_for_registration)
-            
-            faces = []
-            labels = []
-            
-            # Asignar ID numérico al usuario
-            if self.user_id_for_registration not in self.user_id_map:
-                numeric_id = self.next_user_numeric_id
-                self.user_id_map[self.user_id_for_registration] = numeric_id
-                self.numeric_id_to_user_str_map[numeric_id] = self.user_id_for_registration
-                self.next_user_numeric_id += 1
-                self._save_user_id_map()
-                print(f"✅ ID numérico {numeric_id} asignado a '{self.user_id_for_registration}'")
-            
-            numeric_id = self.user_id_map[self.user_id_for_registration]
-            
-            # Cargar todas las imágenes
-            for img_file in os.listdir(user_dir):
-                if img_file.endswith('.jpg'):
-                    img_path = os.path.join(user_dir, img_file)
-                    face_img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
-                    if face_img is not None:
-                        faces.append(face_img)
-                        labels.append(numeric_id)
-            
-            if len(faces) == 0:
-                print("❌ No se encontraron imágenes válidas para entrenar")
-                self._reset_registration_vars()
-                self.current_state = STATE_WELCOME
-                return
-            
-            print(f"📚 Entrenando con {len(faces)} imágenes...")
-            
-            # Entrenar modelo LBPH
-            recognizer = cv2.face.LBPHFaceRecognizer_create()
-            recognizer.train(faces, np.array(labels))
-            
-            # Guardar modelo
-            model_filename = f"{self.user_id_for_registration}.yml"
-            model_path = os.path.join(self.lbph_models_dir, model_filename)
-            recognizer.write(model_path)
-            
-            # Cargar en memoria
-            self.loaded_recognizers[self.user_id_for_registration] = recognizer
-            
-            print(f"✅ Modelo entrenado y guardado: {model_path}")
-            print(f"🎉 Usuario '{self.user_id_for_registration}' registrado correctamente!")
-            
-            # Limpiar variables y volver a login
-            self._reset_registration_vars()
-            self.current_state = STATE_LOGIN
+            # La galería se guarda ya con el ID reservado al empezar la sesión;
+            # user_id_map.json solo se actualiza si el entrenamiento sale bien (_finish_training)
+            user_id_map = dict(self.user_id_map)
+            user_id_map[self.user_id_for_registration] = self.next_user_numeric_id
+            self.enrollment_trainer.finish_session(user_id_map)
             
         except Exception as e:
-            print(f"❌ Error durante el entrenamiento: {e}")
+            logger.error("❌ Error durante el entrenamiento: %s", e)
             import traceback
             traceback.print_exc()
             self._reset_registration_vars()
             self.current_state = STATE_WELCOME
 
+    def _finish_training(self, result):
+        """Aplicar el TrainingResult de enrollment_trainer (en el hilo que procesa los frames)"""
+        if not result.ok:
+            logger.warning("❌ No se pudo entrenar a '%s': %s", result.user_id, result.error)
+            self._reset_registration_vars()
+            self.current_state = STATE_WELCOME
+            return
+        
+        # Asignar ID numérico al usuario (el reservado al empezar la sesión)
+        self.user_id_map[result.user_id] = result.numeric_id
+        self.numeric_id_to_user_str_map[result.numeric_id] = result.user_id
+        self.next_user_numeric_id = max(self.next_user_numeric_id, result.numeric_id + 1)
+        self._save_user_id_map()
+        logger.info("✅ ID numérico %s asignado a '%s'", result.numeric_id, result.user_id)
+        
+        self.identity_voter.reset()  # Las identidades acumuladas eran de la galería anterior
+        logger.info("✅ Modelo entrenado con %s imágenes y guardado: %s", result.num_faces, self.face_gallery.path)
+        logger.info("🎉 Usuario '%s' registrado correctamente!", result.user_id)
+        
+        # Limpiar variables y volver a login
+        self._reset_registration_vars()
+        self.current_state = STATE_LOGIN
+
     # MODIFICAR core/app_manager.py - Umbral adaptativo según cámara:
 
-    def _detect_camera_config(self):
+    def _detect_camera_config(self, camera_index=None):
         """Detectar configuración óptima según tipo de cámara"""
-        # Obtener la cámara que se está usando desde config
-        from core.config import CAMERA_INDEX
-        camera_index = CAMERA_INDEX
+        # Sin índice explícito, usar la cámara de config
+        if camera_index is None:
+            camera_index = CAMERA_INDEX
         
         if camera_index == 2:
             # DroidCam detectado - parámetros conservadores
@@ -0,0 +1,161 @@
+# ARCar_Showroom/core/camera_capture.py
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+
+from core.config import CAPTURE_RING_BUFFER_SIZE, CAPTURE_READ_TIMEOUT_S
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Frame entregado por la captura: imagen + número de secuencia + instante de captura (time.monotonic)
+CapturedFrame = namedtuple('CapturedFrame', ['frame', 'seq', 'timestamp'])
+
+# Lecturas fallidas seguidas antes de dar el stream por terminado
+MAX_CONSECUTIVE_READ_FAILURES = 30
+
+
+class ThreadedCameraCapture:
+    """
+    Lee de un cv2.VideoCapture (o cualquier objeto con read/isOpened/release)
+    en un hilo propio y guarda los últimos frames en un buffer circular pequeño.
+    El consumidor siempre recibe el frame más reciente; los frames que nadie
+    llegó a consumir se cuentan como descartados.
+    """
+
+    def __init__(self, source, buffer_size=CAPTURE_RING_BUFFER_SIZE, read_timeout=CAPTURE_READ_TIMEOUT_S):
+        # Aceptar un índice de cámara o una fuente ya abierta
+        self.cap = cv2.VideoCapture(source) if isinstance(source, int) else source
+        self.read_timeout = read_timeout
+
+        self._buffer = deque(maxlen=max(1, buffer_size))
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.stream_ended = False
+
+        # Contadores
+        self._next_seq = 0
+        self._last_delivered_seq = -1
+        self.frames_captured = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+
+    def start(self):
+        """Arrancar el hilo de captura"""
+        if self._running:
+            return self
+        if not self.cap.isOpened():
+            logger.warning("❌ La fuente de vídeo no está abierta")
+            self.stream_ended = True
+            return self
+
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        logger.info("🎥 Captura en hilo iniciada (buffer: %s frames)", self._buffer.maxlen)
+        return self
+
+    def _capture_loop(self):
+        """Leer frames continuamente para que el driver nunca acumule frames viejos"""
+        consecutive_failures = 0
+
+        while self._running:
+            ret, frame = self.cap.read()
+            timestamp = time.monotonic()
+
+            if not ret or frame is None:
+                self.read_failures += 1
+                consecutive_failures += 1
+                if consecutive_failures >= MAX_CONSECUTIVE_READ_FAILURES:
+                    logger.warning("⚠️ Demasiadas lecturas fallidas, fin del stream")
+                    break
+                time.sleep(0.005)
+                continue
+            consecutive_failures = 0
+
+            with self._condition:
+                # Si el buffer está lleno, el frame más antiguo se pierde sin consumirse
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.frames_dropped += 1
+                self._buffer.append(CapturedFrame(frame, self._next_seq, timestamp))
+                self._next_seq += 1
+                self.frames_captured += 1
+                self._condition.notify_all()
+
+        with self._condition:
+            self._running = False
+            self.stream_ended = True
+            self._condition.notify_all()
+
+    def read_latest(self, timeout=None):
+        """
+        Devuelve el CapturedFrame más reciente que aún no se haya entregado.
+        Espera hasta `timeout` segundos; devuelve None si no llega ninguno
+        o si el stream ha terminado.
+        """
+        if timeout is None:
+            timeout = self.read_timeout
+        if self._thread is None:
+            self.start()
+
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not self._buffer:
+                if self.stream_ended:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+            latest = self._buffer[-1]
+            # Los frames intermedios que no se llegaron a entregar se descartan
+            self.frames_dropped += len(self._buffer) - 1
+            self._buffer.clear()
+
+            self._last_delivered_seq = latest.seq
+            self.frames_delivered += 1
+            return latest
+
+    def read(self):
+        """Interfaz compatible con cv2.VideoCapture.read()"""
+        captured = self.read_latest()
+        if captured is None:
+            return False, None
+        return True, captured.frame
+
+    def isOpened(self):
+        return self.cap.isOpened() and not self.stream_ended
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def get_stats(self):
+        """Contadores de captura para diagnóstico"""
+        return {
+            'captured': self.frames_captured,
+            'delivered': self.frames_delivered,
+            'dropped': self.frames_dropped,
+            'read_failures': self.read_failures,
+            'last_seq': self._last_delivered_seq,
+        }
+
+    def release(self):
+        """Detener el hilo y liberar la fuente"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.cap.release()
+        with self._condition:
+            self.stream_ended = True
+            self._buffer.clear()
+            self._condition.notify_all()
+        logger.info("🧹 Captura detenida. Estadísticas: %s", self.get_stats())
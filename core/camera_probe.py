@@ -0,0 +1,234 @@
+# ARCar_Showroom/core/camera_probe.py
+"""
+Búsqueda de cámaras en paralelo y perfil de cámara persistente.
+
+En arranque en frío se prueban todos los índices a la vez (cada uno con su
+timeout) y la cámara elegida se devuelve ya abierta, sin reabrirla. El
+resultado se guarda en un perfil JSON; en el siguiente arranque se valida
+(misma identidad de dispositivo y resolución) y se abre directamente.
+
+Cada sondeo va en un hilo daemon: si la apertura de un dispositivo se
+cuelga, su hilo se abandona (los de ThreadPoolExecutor se esperan al salir
+del intérprete y la aplicación no podría cerrarse).
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, wait
+
+import cv2
+
+from core.config import CAMERA_PROBE_ORDER, CAMERA_PROBE_TIMEOUT_S
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+CAMERA_PROFILE_VERSION = 1
+
+
+def get_device_identity(index):
+    """Nombre del dispositivo V4L2 (Linux). None si no se puede averiguar."""
+    name_path = f"/sys/class/video4linux/video{index}/name"
+    try:
+        with open(name_path, 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _backend_api(backend_name):
+    """'V4L2' -> cv2.CAP_V4L2 (cv2.CAP_ANY si no se conoce)"""
+    if not backend_name:
+        return cv2.CAP_ANY
+    return getattr(cv2, f"CAP_{backend_name.upper()}", cv2.CAP_ANY)
+
+
+def probe_camera(index, api_preference=cv2.CAP_ANY):
+    """
+    Abre la cámara `index` y lee un frame.
+    Devuelve un dict con la información y el VideoCapture abierto en 'cap',
+    o None si la cámara no está disponible.
+    """
+    cap = cv2.VideoCapture(index, api_preference)
+    if not cap.isOpened():
+        cap.release()
+        return None
+
+    ret, frame = cap.read()
+    if not ret or frame is None:
+        cap.release()
+        return None
+
+    height, width = frame.shape[:2]
+    try:
+        backend = cap.getBackendName()
+    except cv2.error:
+        backend = None
+
+    return {
+        'index': index,
+        'width': width,
+        'height': height,
+        'resolution': width * height,
+        'backend': backend,
+        'device': get_device_identity(index),
+        'cap': cap,
+    }
+
+
+def _probe_in_background(index):
+    """Future con el resultado de probe_camera(index), calculado en un hilo daemon"""
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(probe_camera(index))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f"camera-probe-{index}", daemon=True).start()
+    return future
+
+
+def _release_probe_result(future):
+    """Liberar cámaras cuyo sondeo terminó después del timeout o no fueron elegidas"""
+    try:
+        info = future.result()
+    except Exception:
+        return
+    if info is not None:
+        info['cap'].release()
+
+
+def probe_cameras(indices=CAMERA_PROBE_ORDER, timeout_s=CAMERA_PROBE_TIMEOUT_S):
+    """
+    Prueba todos los índices en paralelo. Devuelve {índice: info} con las
+    cámaras que respondieron antes del timeout (con su VideoCapture abierto).
+    """
+    futures = {_probe_in_background(index): index for index in indices}
+    done, not_done = wait(futures, timeout=timeout_s)
+
+    results = {}
+    for future in done:
+        try:
+            info = future.result()
+        except Exception as e:
+            logger.warning("⚠️ Error probando cámara %s: %s", futures[future], e)
+            continue
+        if info is not None:
+            results[info['index']] = info
+
+    for future in not_done:
+        logger.info("⏱️ Cámara %s no respondió en %ss", futures[future], timeout_s)
+        future.add_done_callback(_release_probe_result)
+
+    # No esperar a los sondeos colgados: sus cámaras se liberan si llegan a terminar
+    return results
+
+
+def load_camera_profile(profile_path):
+    """Cargar el perfil guardado (None si no existe o es inválido)"""
+    try:
+        with open(profile_path, 'r') as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if profile.get('version') != CAMERA_PROFILE_VERSION or 'index' not in profile:
+        return None
+    return profile
+
+
+def save_camera_profile(profile_path, info, **extra):
+    """Guardar la cámara elegida (sin el VideoCapture) junto con datos extra"""
+    profile = {
+        'version': CAMERA_PROFILE_VERSION,
+        'index': info['index'],
+        'width': info['width'],
+        'height': info['height'],
+        'backend': info.get('backend'),
+        'device': info.get('device'),
+        'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    profile.update(extra)
+    _write_camera_profile(profile_path, profile)
+    return profile
+
+
+def _write_camera_profile(profile_path, profile):
+    """Escritura atómica del perfil (fichero temporal + rename)"""
+    try:
+        os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+        tmp_path = profile_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(profile, f, indent=4)
+        os.replace(tmp_path, profile_path)
+        logger.info("💾 Perfil de cámara guardado en %s", profile_path)
+    except OSError as e:
+        logger.warning("⚠️ No se pudo guardar el perfil de cámara: %s", e)
+
+
+def update_camera_profile(profile_path, **fields):
+    """Añadir datos (p. ej. el modo de captura negociado) al perfil guardado"""
+    profile = load_camera_profile(profile_path)
+    if profile is None:
+        return None
+    profile.update(fields)
+    _write_camera_profile(profile_path, profile)
+    return profile
+
+
+def open_profiled_camera(profile):
+    """
+    Abrir directamente la cámara del perfil y comprobar que sigue siendo la
+    misma (identidad de dispositivo y resolución). Devuelve info o None.
+    """
+    index = profile['index']
+    device = get_device_identity(index)
+    if profile.get('device') and device and device != profile['device']:
+        logger.info("Perfil inválido: índice %s es ahora '%s' (antes '%s')", index, device, profile['device'])
+        return None
+
+    info = probe_camera(index, _backend_api(profile.get('backend')))
+    if info is None:
+        logger.info("Perfil inválido: la cámara %s no responde", index)
+        return None
+
+    if (info['width'], info['height']) != (profile.get('width'), profile.get('height')):
+        logger.info("Perfil inválido: resolución %sx%s distinta de la guardada %sx%s",
+                    info['width'], info['height'], profile.get('width'), profile.get('height'))
+        info['cap'].release()
+        return None
+    return info
+
+
+def open_best_camera(profile_path, indices=CAMERA_PROBE_ORDER, timeout_s=CAMERA_PROBE_TIMEOUT_S):
+    """
+    Devuelve la info de la mejor cámara con su VideoCapture ya abierto en
+    'cap' (None si no hay ninguna). Usa el perfil guardado si sigue siendo
+    válido; si no, prueba todas las cámaras en paralelo y guarda el perfil.
+    """
+    profile = load_camera_profile(profile_path)
+    if profile is not None:
+        info = open_profiled_camera(profile)
+        if info is not None:
+            logger.info("⚡ Arranque en caliente con el perfil guardado (cámara %s)", info['index'])
+            info['profile'] = profile
+            return info
+
+    start = time.perf_counter()
+    results = probe_cameras(indices, timeout_s)
+    logger.info("Sondeo paralelo completado en %.2fs", time.perf_counter() - start)
+    if not results:
+        return None
+
+    # Prioridad: el primer índice disponible según el orden configurado
+    best_index = next(index for index in indices if index in results)
+    best = results.pop(best_index)
+    for info in results.values():
+        info['cap'].release()
+
+    best['available'] = sorted([best_index] + list(results.keys()), key=indices.index)
+    best['profile'] = save_camera_profile(profile_path, best)
+    return best
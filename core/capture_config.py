@@ -0,0 +1,146 @@
+# ARCar_Showroom/core/capture_config.py
+"""
+Negociación del modo de captura de la cámara: formato de píxel (MJPG / YUYV),
+resolución, FPS y tamaño del buffer del driver.
+
+Cada modo candidato se aplica, se comprueba qué entrega realmente el driver y
+se mide la latencia de read() y el throughput. El modo elegido se guarda en
+el perfil de cámara para aplicarlo directamente en el siguiente arranque.
+"""
+import time
+
+import cv2
+
+from core.config import (
+    CAPTURE_MODE_CANDIDATES, CAPTURE_DRIVER_BUFFER_SIZE,
+    CAPTURE_NEGOTIATION_FRAMES, CAPTURE_MIN_ACCEPTABLE_FPS
+)
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+WARMUP_FRAMES = 3
+
+
+def _fourcc_to_str(value):
+    value = int(value)
+    if value <= 0:
+        return None
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def apply_capture_mode(cap, mode, buffer_size=CAPTURE_DRIVER_BUFFER_SIZE):
+    """
+    Pedir al driver un modo de captura. El driver puede ignorar parte de la
+    petición, así que se devuelve lo que realmente quedó configurado.
+    """
+    # El FOURCC debe fijarse antes que la resolución en muchos drivers V4L2
+    if mode.get('fourcc'):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode['fourcc']))
+    if mode.get('width') and mode.get('height'):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode['width'])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode['height'])
+    if mode.get('fps'):
+        cap.set(cv2.CAP_PROP_FPS, mode['fps'])
+    # Buffer mínimo en el driver: menos frames encolados = menos latencia
+    if buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+    return {
+        'fourcc': _fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC)) or mode.get('fourcc'),
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': cap.get(cv2.CAP_PROP_FPS),
+        'buffer_size': int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+
+
+def measure_capture(cap, num_frames=CAPTURE_NEGOTIATION_FRAMES):
+    """
+    Medir latencia media de read() y FPS reales. Devuelve también la
+    resolución del último frame (la fiable, más que CAP_PROP_FRAME_*).
+    None si la cámara deja de entregar frames.
+    """
+    for _ in range(WARMUP_FRAMES):
+        ret, _ = cap.read()
+        if not ret:
+            return None
+
+    read_times = []
+    frame = None
+    start = time.perf_counter()
+    for _ in range(num_frames):
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        read_times.append(time.perf_counter() - t0)
+        if not ret:
+            return None
+    elapsed = time.perf_counter() - start
+
+    height, width = frame.shape[:2]
+    read_times.sort()
+    return {
+        'width': width,
+        'height': height,
+        'measured_fps': num_frames / elapsed if elapsed > 0 else 0.0,
+        'read_ms_mean': 1000.0 * sum(read_times) / len(read_times),
+        'read_ms_p95': 1000.0 * read_times[int(0.95 * (len(read_times) - 1))],
+    }
+
+
+def negotiate_capture_mode(cap, candidates=CAPTURE_MODE_CANDIDATES, num_frames=CAPTURE_NEGOTIATION_FRAMES):
+    """
+    Probar los modos candidatos (en orden de preferencia) y dejar aplicado el
+    mejor: el primero que entrega la resolución pedida con al menos
+    CAPTURE_MIN_ACCEPTABLE_FPS; si ninguno lo consigue, el de más FPS.
+    Devuelve el modo elegido con sus medidas, o None si ninguno funciona.
+    """
+    results = []
+    for mode in candidates:
+        actual = apply_capture_mode(cap, mode)
+        measurement = measure_capture(cap, num_frames)
+        if measurement is None:
+            logger.warning("❌ Modo %s sin frames", mode)
+            continue
+
+        result = dict(actual)
+        result.update(measurement)
+        result['requested'] = dict(mode)
+        result['matches_request'] = (measurement['width'], measurement['height']) == (mode.get('width'), mode.get('height'))
+        results.append(result)
+        logger.info("Modo %s %sx%s@%s -> %sx%s %.1f FPS, read %.1f ms",
+                    mode.get('fourcc'), mode.get('width'), mode.get('height'), mode.get('fps'),
+                    measurement['width'], measurement['height'], measurement['measured_fps'],
+                    measurement['read_ms_mean'])
+
+        if result['matches_request'] and measurement['measured_fps'] >= CAPTURE_MIN_ACCEPTABLE_FPS:
+            # Preferencia cumplida: no hace falta probar el resto
+            return result
+
+    if not results:
+        return None
+
+    best = max(results, key=lambda r: r['measured_fps'])
+    apply_capture_mode(cap, best['requested'])
+    return best
+
+
+def configure_capture(cap, stored_mode=None):
+    """
+    Dejar la cámara en el modo guardado (arranque en caliente) o negociar uno
+    nuevo. Devuelve el modo con la resolución real que entrega la cámara.
+    """
+    if stored_mode:
+        apply_capture_mode(cap, stored_mode['requested'])
+        ret, frame = cap.read()
+        if ret and frame.shape[1] == stored_mode['width'] and frame.shape[0] == stored_mode['height']:
+            logger.info("⚡ Modo guardado aplicado: %s %sx%s",
+                        stored_mode['fourcc'], stored_mode['width'], stored_mode['height'])
+            return stored_mode
+        logger.info("Modo guardado no válido, renegociando...")
+
+    mode = negotiate_capture_mode(cap)
+    if mode is not None:
+        logger.info("✅ Modo negociado: %s %sx%s %.1f FPS (buffer driver: %s)",
+                    mode['fourcc'], mode['width'], mode['height'], mode['measured_fps'], mode['buffer_size'])
+    return mode
@@ -14,18 +14,170 @@ STATE_AR_MODEL_VIEWER = "STATE_AR_MODEL_VIEWER"
 # Configuraciones de Cámara y Ventana
 CAMERA_INDEX = 2  # ← CAMBIAR de 0 a 2 (DroidCam detectado)
 CAMERA_FALLBACK = 0  # ← AÑADIR fallback a cámara del PC
+CAMERA_PROBE_ORDER = [2, 0, 1, 3, 4, 5, 6, 7, 8, 9, 10]  # Prioridad: DroidCam, PC, resto
+CAMERA_PROBE_TIMEOUT_S = 3.0  # Máximo por índice (se prueban todos en paralelo)
+# Perfil de la última cámara buena (se valida y reutiliza en el siguiente arranque)
+CAMERA_PROFILE_PATH_REL_TO_PROJECT_ROOT = 'data_management/camera_profile.json'
 WINDOW_NAME = "ARCar Showroom"
 
+# Negociación del modo de captura (en orden de preferencia). MJPG reduce el ancho de
+# banda USB frente a YUYV; si ninguno alcanza los FPS mínimos se usa el más rápido.
+CAPTURE_MODE_CANDIDATES = [
+    {'fourcc': 'MJPG', 'width': 1280, 'height': 720, 'fps': 30},
+    {'fourcc': 'MJPG', 'width': 640, 'height': 480, 'fps': 30},
+    {'fourcc': 'YUYV', 'width': 640, 'height': 480, 'fps': 30},
+]
+CAPTURE_DRIVER_BUFFER_SIZE = 1  # Frames encolados en el driver (CAP_PROP_BUFFERSIZE)
+CAPTURE_NEGOTIATION_FRAMES = 15  # Frames medidos por modo candidato
+CAPTURE_MIN_ACCEPTABLE_FPS = 20
+
+# Captura en hilo propio (siempre se procesa el frame más reciente)
+CAPTURE_THREADED = True
+CAPTURE_RING_BUFFER_SIZE = 2  # Frames guardados como máximo; los más viejos se descartan
+CAPTURE_READ_TIMEOUT_S = 1.0  # Espera máxima por un frame nuevo antes de considerarlo error
+
+# Modo de procesamiento de frames:
+#   'sequential' -> todo en el hilo principal (útil para depurar)
+#   'pipelined'  -> análisis y render en hilos separados conectados por colas
+PIPELINE_MODE = 'sequential'
+PIPELINE_QUEUE_SIZE = 2  # Tamaño de las colas entre etapas (se descarta el más antiguo)
+
+# Instrumentación por etapas (utils/instrumentation.py). Desactivada cuesta casi nada.
+PROFILING_ENABLED = False
+PROFILING_OVERLAY = True        # Mostrar FPS y p50/p95 por etapa sobre el frame
+PROFILING_WINDOW_SIZE = 300     # Muestras por etapa para los percentiles
+PROFILING_DUMP_PATH = None      # Ruta del volcado JSON periódico (None = sin volcado)
+PROFILING_DUMP_INTERVAL_S = 5.0
+
+# Logging (utils/app_logging.py). Los mensajes por frame van a DEBUG y no se
+# formatean si el nivel del módulo no los deja pasar.
+LOG_LEVEL = 'INFO'
+LOG_MODULE_LEVELS = {}          # Nivel por módulo, p. ej. {'ar_rendering.scene_renderer': 'DEBUG'}
+LOG_FORMAT = 'text'             # 'text' o 'json' (una línea JSON por registro)
+LOG_FILE = None                 # Además de la consola, escribir en este fichero
+LOG_RATE_LIMIT_S = 1.0          # Intervalo mínimo de los mensajes marcados con every()
+LOG_RING_BUFFER_SIZE = 2000     # Últimos registros guardados en memoria para volcarlos tras un fallo
+LOG_CRASH_DUMP_PATH_REL_TO_PROJECT_ROOT = 'arcar_crash.log'
+
+# HUD: los textos fijos de cada estado se rasterizan una vez y se componen (ui/hud_layers.py)
+HUD_CACHE_ENABLED = True
+HUD_CACHE_MAX_LAYERS = 64       # Capas guardadas (LRU); cada combinación distinta de textos es una capa
+
+# Análisis multirresolución: cada detector trabaja sobre una copia reducida del
+# frame (ancho máximo en píxeles, None = resolución completa) y sus resultados
+# se reescalan al frame original. Permite cámaras 1080p sin perder FPS.
+FACE_DETECTION_MAX_WIDTH = 640
+FACE_DETECTION_MIN_SIZE = (30, 30)  # Tamaño mínimo de cara, en píxeles del frame original
+# Detección por ventanas: si había caras, buscar primero solo alrededor de ellas
+FACE_ROI_DETECTION = True
+FACE_ROI_MARGIN = 0.5               # Ampliación de la ventana por cada lado (fracción del tamaño de la cara)
+FACE_ROI_SIZE_TOLERANCE = 0.3       # Tamaño buscado: el de la cara anterior ±30%
+FACE_ROI_FULL_SCAN_INTERVAL = 10    # Barrido completo al menos cada N detecciones (caras nuevas)
+MARKER_DETECTION_MAX_WIDTH = 960
+# Refinar las esquinas de los marcadores con cornerSubPix a resolución completa
+# (solo si se detectó sobre una imagen reducida) para no perder precisión en la pose
+MARKER_CORNER_SUBPIX = True
+MARKER_CORNER_SUBPIX_WINDOW = 5     # Semiancho de la ventana de búsqueda (píxeles del frame original)
+MARKER_CORNER_SUBPIX_MAX_ITER = 30
+MARKER_CORNER_SUBPIX_EPSILON = 0.01
+
+# Seguimiento de caras en LOGIN y REGISTRO (vision_processing/face_tracker.py):
+# detección completa cada N frames o al perder una cara; entre medias, flujo óptico
+FACE_TRACKING_DETECT_INTERVAL = 5   # 1 = detección completa en todos los frames
+FACE_TRACKING_GRID_SIZE = 10        # Rejilla de GRID_SIZE x GRID_SIZE puntos por cara
+FACE_TRACKING_MIN_POINTS = 10       # Menos puntos fiables que esto = seguimiento perdido
+FACE_TRACKING_MAX_FB_ERROR = 1.0    # Error ida-vuelta máximo de un punto (píxeles de la imagen analizada)
+FACE_TRACKING_MATCH_IOU = 0.3       # Solape mínimo para que una detección conserve el id de una cara seguida
+FACE_TRACKING_MAX_GAP_S = 0.5       # Sin frames durante más tiempo, se descartan las caras seguidas
+
+# Modo headless (sin ventana): nombre del bloque de memoria compartida por defecto
+HEADLESS_SHM_NAME = 'arcar_frames'
+
 # Configuraciones de Reconocimiento Facial
 # (Mantenemos la ruta aquí, pero facial_auth.py la usará)
 HAAR_CASCADE_PATH_REL_TO_PROJECT_ROOT = 'assets/face_data/cascades/haarcascade_frontalface_default.xml'
+
+# Detector de caras (vision_processing/face_detectors.py). Una sola instancia
+# del perfil elegido sirve al login y al registro. Las rutas son relativas a la
+# raíz del proyecto (las cascadas también se buscan en cv2.data). Para elegir
+# perfil: python -m benchmarks.bench_face_detectors
+FACE_DETECTOR_PROFILE = 'haar'
+FACE_DETECTOR_FALLBACK_PROFILE = 'haar'  # Si el perfil elegido no está disponible
+FACE_DETECTOR_PROFILES = {
+    'haar': {'backend': 'cascade', 'model': HAAR_CASCADE_PATH_REL_TO_PROJECT_ROOT,
+             'scale_factor': 1.1, 'min_neighbors': 5},
+    'haar_fast': {'backend': 'cascade', 'model': HAAR_CASCADE_PATH_REL_TO_PROJECT_ROOT,
+                  'scale_factor': 1.3, 'min_neighbors': 5},
+    'haar_accurate': {'backend': 'cascade', 'model': HAAR_CASCADE_PATH_REL_TO_PROJECT_ROOT,
+                      'scale_factor': 1.05, 'min_neighbors': 6},
+    'haar_alt2': {'backend': 'cascade', 'model': 'assets/face_data/cascades/haarcascade_frontalface_alt2.xml',
+                  'scale_factor': 1.1, 'min_neighbors': 4},
+    'lbp': {'backend': 'cascade', 'model': 'assets/face_data/cascades/lbpcascade_frontalface_improved.xml',
+            'scale_factor': 1.1, 'min_neighbors': 5},
+    'dnn_yunet': {'backend': 'yunet', 'model': 'assets/face_data/dnn/face_detection_yunet_2023mar.onnx',
+                  'score_threshold': 0.7},
+    'dnn_ssd': {'backend': 'dnn_ssd', 'model': 'assets/face_data/dnn/res10_300x300_ssd_iter_140000.caffemodel',
+                'config': 'assets/face_data/dnn/deploy.prototxt', 'confidence': 0.5},
+}
 NUM_IMAGES_FOR_REGISTRATION = 50 # Según el PDF
+# Registro en streaming (core/enrollment_trainer.py): cada captura se convierte en
+# histogramas al momento en un hilo aparte; las imágenes se escriben a disco por lotes
+ENROLLMENT_WRITE_BATCH = 10
 
 # ⚠️ IMPORTANTE: Todas las imágenes van DIRECTAMENTE en embeddings/<user_id>/
 USER_FACE_DATA_DIR_REL_TO_PROJECT_ROOT = 'assets/face_data/embeddings'  # Sin /images/
 
 # Ruta donde se guardarán los modelos LBPH entrenados
 LBPH_MODELS_DIR_REL_TO_PROJECT_ROOT = 'assets/face_data/embeddings/models'
+# Galería LBPH única con todos los usuarios (vision_processing/face_gallery.py)
+# Motor: 'numpy' (vision_processing/lbp_features.py, galería en una matriz y
+# distancias por lotes) u 'opencv' (cv2.face.LBPHFaceRecognizer)
+FACE_GALLERY_ENGINE = 'numpy'
+# Patrones LBP del motor 'numpy': 'full' da las mismas distancias que OpenCV;
+# 'uniform' ocupa ~4 veces menos pero cambia la escala (recalibrar CONFIDENCE_THRESHOLDS)
+LBP_MAPPING = 'full'
+# Índice IVF del motor 'numpy' (vision_processing/face_index.py): con miles de muestras
+# solo se comparan las de las listas k-means más cercanas. Recall frente a la búsqueda
+# exacta: python -m benchmarks.bench_face_index
+FACE_INDEX_ENABLED = True
+FACE_INDEX_MIN_SAMPLES = 2000       # Con menos muestras se busca siempre de forma exacta
+FACE_INDEX_NLIST = None             # Listas (centroides); None = raíz cuadrada del nº de muestras
+FACE_INDEX_NPROBE = 8               # Listas revisadas por consulta: más recall, más lento
+FACE_INDEX_COARSE_POOL = 2          # Bloques de 2x2 celdas LBP para los vectores del cuantizador
+FACE_INDEX_KMEANS_ITERATIONS = 10
+FACE_INDEX_RETRAIN_GROWTH = 2.0     # Recalcular centroides cuando la galería crece este factor
+# El motor 'numpy' guarda la galería en binario (vision_processing/gallery_store.py) y la
+# abre con memmap: arranque casi inmediato y páginas compartidas entre procesos.
+# Modelos .yml antiguos: python data_management/user_manager.py convert-models
+FACE_GALLERY_MMAP = True
+# retrain-all de data_management/user_manager.py: procesos que leen y entrenan usuarios
+# en paralelo (None = uno por CPU). Guarda las huellas de cada usuario en <galería>.manifest.json
+RETRAIN_WORKERS = None
+FACE_GALLERY_PATHS_REL_TO_PROJECT_ROOT = {
+    'numpy': 'assets/face_data/embeddings/models/gallery.bin',
+    'opencv': 'assets/face_data/embeddings/models/gallery.yml',
+}
+# Normalización de las caras (utils/image_utils.py), igual en registro, reentrenamiento y login
+FACE_CANONICAL_SIZE = (100, 100)    # Tamaño de las caras guardadas y de las que se comparan
+FACE_CLAHE_CLIP_LIMIT = 2.0
+FACE_CLAHE_TILE_GRID = (2, 2)       # Bloques grandes: con 8x8 el ruido amplificado cambia los códigos LBP
+FACE_ALIGN_EYES = False             # Girar la cara según los ojos (Haar de ojos; más lento)
+FACE_ALIGN_MAX_ANGLE = 25.0         # Giros mayores se consideran detecciones erróneas
+# Calidad mínima de un recorte para reconocerlo o guardarlo en el registro
+# (vision_processing/face_quality.py). Los recortes que no llegan se descartan.
+FACE_QUALITY_GATE = True
+FACE_QUALITY_MIN_SHARPNESS = 80.0       # Varianza del laplaciano con la cara a 64x64
+FACE_QUALITY_MIN_SIZE = 60              # Lado menor del recorte, en píxeles del frame
+FACE_QUALITY_BRIGHTNESS_RANGE = (40, 220)
+FACE_QUALITY_MIN_CONTRAST = 20.0        # Desviación típica de los grises
+FACE_QUALITY_MIN_SYMMETRY = 0.7         # Equilibrio de bordes izquierda/derecha (1 = frontal)
+# Login por votación entre frames de la misma cara seguida (vision_processing/identity_voting.py)
+FACE_VOTING_TOP_K = 3               # Vecinos de la galería por consulta
+FACE_VOTING_FRAME_STRIDE = 2        # Consultar la galería cada N frames de la cara
+FACE_VOTING_MIN_FRAMES = 3          # Consultas mínimas antes de aceptar a alguien
+FACE_VOTING_MAX_FRAMES = 10         # Sin decidir tras N consultas = desconocido
+FACE_VOTING_MIN_AGREEMENT = 0.6     # Fracción de consultas en las que el usuario debe ser el más cercano
+FACE_VOTING_RETRY_FRAMES = 30       # Frames hasta volver a intentar una cara desconocida
 
 # Ruta para el archivo que mapea ID de usuario a ID numérico
 USER_ID_MAP_PATH_REL_TO_PROJECT_ROOT = 'data_management/user_id_map.json'
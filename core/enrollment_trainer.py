@@ -0,0 +1,212 @@
+# ARCar_Showroom/core/enrollment_trainer.py
+"""
+Entrenamiento del registro en segundo plano y en streaming.
+
+Al aceptar el ID, AppManager abre una sesión (start_session). Cada captura
+válida se pasa con add_image() y un hilo trabajador la normaliza y la añade
+al momento a una galería de preparación; las caras se añaden a disco por
+lotes de ENROLLMENT_WRITE_BATCH, en otro hilo, al archivo samples.faces del
+usuario (vision_processing/face_samples.py). Con la última captura,
+finish_session() solo tiene que juntar esa galería con la que está en uso
+(FaceGallery.adopt) y guardarla: no se vuelve a leer ninguna imagen.
+
+La galería de preparación depende del motor: con 'numpy' solo lleva las
+muestras del usuario nuevo y al terminar se añaden de una vez a una copia de
+la galería (FaceGallery.merge); con 'opencv', que no puede juntar galerías,
+es una copia de la galería en uso a la que se van añadiendo (update). En los
+dos casos el login sigue consultando la galería anterior hasta el final.
+
+Los hilos no tocan el estado de la aplicación: el hilo principal consulta
+progress() para el HUD y poll_result() para saber cuándo terminó.
+"""
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import ENROLLMENT_WRITE_BATCH
+from utils.app_logging import get_logger
+from utils.image_utils import normalize_face
+from vision_processing.face_gallery import FaceGallery
+from vision_processing.face_samples import FaceSampleArchive, FACE_IMAGE_EXTENSIONS, samples_path
+
+logger = get_logger(__name__)
+
+# Etapas de un registro
+EXTRACTING, SAVING, DONE, FAILED = 'extracting', 'saving', 'done', 'failed'
+
+# done / total: capturas ya añadidas a la galería / capturas recibidas
+TrainingProgress = namedtuple('TrainingProgress', ['user_id', 'stage', 'done', 'total'])
+TrainingResult = namedtuple('TrainingResult', ['user_id', 'numeric_id', 'ok', 'num_faces', 'error'])
+
+
+class _Session:
+    def __init__(self, user_id, numeric_id, user_dir):
+        self.user_id = user_id
+        self.numeric_id = numeric_id
+        self.user_dir = user_dir
+        self.staging = None     # Galería de preparación (la crea el hilo trabajador)
+        self.merge = False      # True: juntar staging con la galería en uso; False: sustituirla
+        self.received = 0
+        self.extracted = 0
+        self.pending_writes = []  # Caras aún sin mandar a disco
+        self.writes = []          # Futures de los lotes mandados a disco
+        self.error = None
+        self.cancelled = False
+
+
+class EnrollmentTrainer:
+    def __init__(self, gallery, write_batch=ENROLLMENT_WRITE_BATCH):
+        self.gallery = gallery
+        self.write_batch = max(1, write_batch)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="enrollment-trainer")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="enrollment-writer")
+        self._lock = threading.Lock()
+        self._session = None
+        self._progress = None
+        self._future = None
+
+    def start_session(self, user_id, numeric_id, user_dir):
+        """
+        Empezar el registro de un usuario nuevo; sus caras se guardarán en
+        `user_dir`, que se vacía antes de la primera
+        """
+        with self._lock:
+            if self._session is not None or self._future is not None:
+                raise RuntimeError("Ya hay un registro en curso")
+            session = _Session(user_id, numeric_id, user_dir)
+            self._session = session
+            self._progress = TrainingProgress(user_id, EXTRACTING, 0, 0)
+            # Lo que quede en disco de un registro anterior con este nombre que no se
+            # terminó. Va por el hilo de escritura: después de sus lotes pendientes
+            session.writes.append(self._writer.submit(self._discard_samples, user_dir))
+        self._executor.submit(self._open, session)
+
+    def add_image(self, face):
+        """Añadir una captura (cara en gris, tamaño canónico) a la sesión abierta"""
+        with self._lock:
+            session = self._session
+            if session is None:
+                raise RuntimeError("No hay ningún registro en curso")
+            session.received += 1
+            session.pending_writes.append(face)
+            if len(session.pending_writes) >= self.write_batch:
+                self._flush_writes(session)
+            self._progress = TrainingProgress(session.user_id, EXTRACTING, session.extracted, session.received)
+        self._executor.submit(self._extract, session, face)
+
+    def finish_session(self, user_id_map):
+        """
+        Cerrar la sesión: al terminar las capturas pendientes se sustituye la
+        galería en uso y se guarda con `user_id_map` (ya con el usuario nuevo)
+        """
+        with self._lock:
+            session, self._session = self._session, None
+            if session is None:
+                raise RuntimeError("No hay ningún registro en curso")
+            self._flush_writes(session)
+            self._future = self._executor.submit(self._finish, session, dict(user_id_map))
+
+    def cancel_session(self):
+        """Descartar el registro en curso (start_session borra lo que haya llegado a disco)"""
+        with self._lock:
+            session, self._session = self._session, None
+            if session is not None:
+                session.cancelled = True
+                self._progress = None
+
+    def in_session(self):
+        with self._lock:
+            return self._session is not None
+
+    def is_busy(self):
+        with self._lock:
+            return self._session is not None or self._future is not None
+
+    def progress(self):
+        """TrainingProgress del registro en curso o del último (None si no hubo ninguno)"""
+        with self._lock:
+            return self._progress
+
+    def poll_result(self):
+        """TrainingResult si el registro cerrado ya terminó (una sola vez); si no, None"""
+        with self._lock:
+            if self._future is None or not self._future.done():
+                return None
+            future, self._future = self._future, None
+        return future.result()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+        self._writer.shutdown(wait=wait)
+
+    def _set_progress(self, session, stage):
+        with self._lock:
+            self._progress = TrainingProgress(session.user_id, stage, session.extracted, session.received)
+
+    def _flush_writes(self, session):
+        """Mandar a disco el lote pendiente (con self._lock tomado)"""
+        if session.pending_writes:
+            batch, session.pending_writes = session.pending_writes, []
+            session.writes.append(self._writer.submit(self._write_batch, session.user_dir, batch))
+
+    @staticmethod
+    def _discard_samples(user_dir):
+        FaceSampleArchive(samples_path(user_dir)).reset()
+        if os.path.isdir(user_dir):
+            for name in os.listdir(user_dir):
+                if name.lower().endswith(FACE_IMAGE_EXTENSIONS):
+                    os.remove(os.path.join(user_dir, name))
+
+    @staticmethod
+    def _write_batch(user_dir, batch):
+        total = FaceSampleArchive(samples_path(user_dir)).append(batch)
+        logger.debug("💾 %s caras añadidas a %s (%s en total)", len(batch), user_dir, total)
+
+    def _open(self, session):
+        try:
+            if self.gallery.engine == 'numpy':
+                session.staging = FaceGallery(self.gallery.path, self.gallery.engine)
+                session.merge = True
+            else:
+                session.staging = self.gallery.copy()
+        except Exception as e:
+            logger.exception("❌ Error preparando el registro de %s", session.user_id)
+            session.error = e
+
+    def _extract(self, session, face):
+        if session.cancelled or session.error is not None:
+            return
+        try:
+            session.staging.add_user(session.numeric_id, [normalize_face(face, align=False)])
+            session.extracted += 1
+            self._set_progress(session, EXTRACTING)
+        except Exception as e:
+            logger.exception("❌ Error añadiendo una captura de %s", session.user_id)
+            session.error = e
+
+    def _finish(self, session, user_id_map):
+        try:
+            # Todas las caras tienen que estar en disco antes de dar el registro por bueno
+            for write in session.writes:
+                write.result()
+            if session.error is not None:
+                raise session.error
+            if session.extracted == 0:
+                self._set_progress(session, FAILED)
+                return TrainingResult(session.user_id, session.numeric_id, False, 0, "No hay capturas válidas")
+
+            self._set_progress(session, SAVING)
+            if session.merge:
+                candidate = self.gallery.copy()
+                candidate.merge(session.staging)
+            else:
+                candidate = session.staging
+            self.gallery.adopt(candidate)
+            self.gallery.save(user_id_map)
+            self._set_progress(session, DONE)
+            return TrainingResult(session.user_id, session.numeric_id, True, session.extracted, None)
+        except Exception as e:
+            logger.exception("❌ Error entrenando a %s", session.user_id)
+            self._set_progress(session, FAILED)
+            return TrainingResult(session.user_id, session.numeric_id, False, session.extracted, str(e))
@@ -0,0 +1,175 @@
+# ARCar_Showroom/core/frame_pipeline.py
+import threading
+import time
+from collections import deque, namedtuple
+
+from core.config import PIPELINE_QUEUE_SIZE
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Resultado que llega a la etapa de presentación
+PipelineResult = namedtuple('PipelineResult', ['seq', 'frame', 'display_frame', 'timings'])
+
+# Marca de fin de stream que se propaga entre etapas
+_END_OF_STREAM = object()
+
+
+class DropOldestQueue:
+    """
+    Cola acotada entre etapas del pipeline. Si está llena, el elemento más
+    antiguo se descarta para que la etapa siguiente trabaje siempre con
+    frames recientes en lugar de acumular retraso.
+    """
+
+    def __init__(self, maxsize=PIPELINE_QUEUE_SIZE):
+        self._items = deque()
+        self.maxsize = max(1, maxsize)
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Devuelve el elemento más antiguo o None si vence el timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._items:
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._condition.wait(remaining)
+            return self._items.popleft()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
+
+
+class FramePipeline:
+    """
+    Procesa frames en etapas concurrentes:
+        captura -> análisis (caras / marcadores) -> render (modelo 3D + HUD) -> presentación
+
+    La captura la hace la propia fuente (p. ej. ThreadedCameraCapture), el
+    análisis y el render corren en hilos propios y la presentación
+    (cv2.imshow / waitKey) se queda en el hilo principal llamando a get_result().
+    Así el rendimiento queda limitado por la etapa más lenta y no por la suma
+    de todas.
+
+    El render usa el RLock `state_lock` de AppManager, de modo que handle_input()
+    debe llamarse con ese mismo lock tomado.
+    """
+
+    def __init__(self, app_manager, capture, queue_size=PIPELINE_QUEUE_SIZE):
+        self.app_manager = app_manager
+        self.capture = capture
+
+        self.analysis_queue = DropOldestQueue(queue_size)
+        self.output_queue = DropOldestQueue(queue_size)
+
+        self._running = False
+        self._threads = []
+        self.stream_ended = False
+        self._last_rendered_seq = -1
+        self._seq = 0
+
+    def start(self):
+        """Arrancar los hilos de análisis y render"""
+        if self._running:
+            return self
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._analysis_worker, name="pipeline-analysis", daemon=True),
+            threading.Thread(target=self._render_worker, name="pipeline-render", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("🚀 Pipeline iniciado (%s hilos de trabajo)", len(self._threads))
+        return self
+
+    def _analysis_worker(self):
+        """Etapa de análisis: leer el frame más reciente y detectar caras/marcadores"""
+        while self._running:
+            ret, frame = self.capture.read()
+            if not ret:
+                logger.info("Fin del stream de captura")
+                self.analysis_queue.put(_END_OF_STREAM)
+                return
+
+            seq = self._seq
+            self._seq += 1
+
+            t_start = time.perf_counter()
+            try:
+                analysis = self.app_manager.analyze_frame(frame)
+            except Exception as e:
+                logger.warning("❌ Error en análisis: %s", e)
+                analysis = None
+            analysis_ms = (time.perf_counter() - t_start) * 1000.0
+
+            self.analysis_queue.put((seq, frame, analysis, {'analysis_ms': analysis_ms}))
+
+    def _render_worker(self):
+        """Etapa de render: componer modelo 3D y HUD con las detecciones ya calculadas"""
+        while self._running:
+            item = self.analysis_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            if item is _END_OF_STREAM:
+                self.output_queue.put(_END_OF_STREAM)
+                return
+
+            seq, frame, analysis, timings = item
+            # Nunca presentar un frame más viejo que el último renderizado
+            if seq <= self._last_rendered_seq:
+                continue
+
+            t_start = time.perf_counter()
+            try:
+                with self.app_manager.state_lock:
+                    display_frame = self.app_manager.process_frame(frame, analysis)
+            except Exception as e:
+                logger.warning("❌ Error en render: %s", e)
+                display_frame = frame
+            timings['render_ms'] = (time.perf_counter() - t_start) * 1000.0
+
+            self._last_rendered_seq = seq
+            self.output_queue.put(PipelineResult(seq, frame, display_frame, timings))
+
+    def get_result(self, timeout=1.0):
+        """
+        Etapa de presentación: devuelve el siguiente PipelineResult, o None si
+        no hay frame listo. Tras el fin del stream marca stream_ended.
+        """
+        if self.stream_ended:
+            return None
+        result = self.output_queue.get(timeout=timeout)
+        if result is _END_OF_STREAM:
+            self.stream_ended = True
+            return None
+        return result
+
+    def get_stats(self):
+        return {
+            'analysis_dropped': self.analysis_queue.dropped,
+            'output_dropped': self.output_queue.dropped,
+            'last_rendered_seq': self._last_rendered_seq,
+        }
+
+    def stop(self):
+        """Detener los hilos de trabajo"""
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        logger.info("🧹 Pipeline detenido. Estadísticas: %s", self.get_stats())
@@ -0,0 +1,340 @@
+# ARCar_Showroom/core/frame_sources.py
+"""
+Fuentes de frames alternativas a la cámara en vivo.
+
+Todas exponen la misma interfaz que cv2.VideoCapture (read / isOpened /
+release / get / set), así que main.py y AppManager pueden usarlas sin
+cambios. Las fuentes grabadas además ofrecen poll_key() para devolver las
+teclas guionizadas de una sesión.
+
+Especificaciones aceptadas por open_frame_source():
+    camera:2            -> cámara en vivo con índice 2
+    video:ruta.mp4      -> fichero de vídeo
+    images:directorio   -> directorio de imágenes (orden natural: 1.png, 2.png, 10.png)
+    replay:directorio   -> sesión grabada (session.json + frames)
+    ruta                -> se deduce el tipo a partir de la ruta
+"""
+import json
+import os
+import re
+import time
+
+import cv2
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+SESSION_MANIFEST_NAME = 'session.json'
+SOURCE_KINDS = ('camera', 'video', 'images', 'replay')
+DEFAULT_REPLAY_FPS = 30.0
+
+# Nombres de teclas especiales permitidos en los guiones de sesión
+KEY_NAMES = {
+    'ENTER': 13,
+    'ESC': 27,
+    'SPACE': ord(' '),
+}
+NO_KEY = 255  # Lo mismo que devuelve cv2.waitKey(1) & 0xFF sin pulsación
+
+
+def _natural_sort_key(name):
+    """'10.png' va después de '2.png'"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', name)]
+
+
+def parse_key(key):
+    """Convierte una tecla de guion ('l', 'ENTER', 13) en su código"""
+    if isinstance(key, int):
+        return key & 0xFF
+    if key.upper() in KEY_NAMES:
+        return KEY_NAMES[key.upper()]
+    if len(key) == 1:
+        return ord(key)
+    raise ValueError(f"Tecla no reconocida en el guion: {key!r}")
+
+
+class FrameSource:
+    """
+    Base de las fuentes grabadas. Las subclases implementan _read_frame();
+    esta clase se encarga del índice de frame y del ritmo de reproducción.
+
+    realtime=False entrega los frames tan rápido como se pidan (benchmarks);
+    realtime=True respeta los FPS originales.
+    """
+
+    def __init__(self, fps=DEFAULT_REPLAY_FPS, realtime=False):
+        self.fps = fps if fps and fps > 0 else DEFAULT_REPLAY_FPS
+        self.realtime = realtime
+        self.frame_index = -1  # Índice del último frame entregado
+        self._start_time = None
+        self._opened = True
+
+    def _read_frame(self):
+        raise NotImplementedError
+
+    def read(self):
+        if not self._opened:
+            return False, None
+
+        frame = self._read_frame()
+        if frame is None:
+            return False, None
+
+        self.frame_index += 1
+        if self.realtime:
+            self._pace()
+        return True, frame
+
+    def _pace(self):
+        """Esperar hasta el instante en que este frame se habría capturado"""
+        now = time.monotonic()
+        if self._start_time is None:
+            self._start_time = now
+            return
+        target = self._start_time + self.frame_index / self.fps
+        if target > now:
+            time.sleep(target - now)
+
+    def poll_key(self):
+        """Teclas guionizadas pendientes; las fuentes sin guion nunca pulsan nada"""
+        return NO_KEY
+
+    def isOpened(self):
+        return self._opened
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return self.frame_index + 1
+        return 0.0
+
+    def set(self, prop_id, value):
+        return False
+
+    def release(self):
+        self._opened = False
+
+
+class VideoFileSource(FrameSource):
+    """Reproduce un fichero de vídeo"""
+
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(fps=self.cap.get(cv2.CAP_PROP_FPS), realtime=realtime)
+        self._opened = self.cap.isOpened()
+        if not self._opened:
+            logger.warning("❌ No se pudo abrir el vídeo: %s", path)
+
+    def _read_frame(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def get(self, prop_id):
+        if prop_id in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FRAME_COUNT):
+            return self.cap.get(prop_id)
+        return super().get(prop_id)
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Reproduce las imágenes de un directorio en orden natural"""
+
+    def __init__(self, directory, fps=DEFAULT_REPLAY_FPS, realtime=False, loop=False):
+        super().__init__(fps=fps, realtime=realtime)
+        self.directory = directory
+        self.loop = loop
+        self.files = []
+        if os.path.isdir(directory):
+            self.files = sorted(
+                (f for f in os.listdir(directory) if f.lower().endswith(IMAGE_EXTENSIONS)),
+                key=_natural_sort_key
+            )
+        self._position = 0
+        self._opened = bool(self.files)
+        if not self._opened:
+            logger.warning("❌ No hay imágenes en %s", directory)
+
+    def _read_frame(self):
+        while self._position < len(self.files) or (self.loop and self.files):
+            if self._position >= len(self.files):
+                self._position = 0
+            path = os.path.join(self.directory, self.files[self._position])
+            self._position += 1
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is not None:
+                return frame
+            logger.warning("⚠️ Imagen ilegible, se omite: %s", path)
+        return None
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.files))
+        return super().get(prop_id)
+
+
+class SessionReplaySource(FrameSource):
+    """
+    Reproduce una sesión grabada: frames + teclas pulsadas en cada frame.
+
+    session.json:
+        {
+            "fps": 30,
+            "frames": "frames",            (directorio de imágenes)   o
+            "video": "session.mp4",        (fichero de vídeo)
+            "keys": [{"frame": 12, "key": "l"}, {"frame": 80, "key": "ENTER"},
+                     {"frame": 90, "user_id": "alice"}]     (ID para el registro)
+        }
+    """
+
+    def __init__(self, session_dir, realtime=False):
+        manifest_path = os.path.join(session_dir, SESSION_MANIFEST_NAME)
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        fps = manifest.get('fps', DEFAULT_REPLAY_FPS)
+        super().__init__(fps=fps, realtime=realtime)
+        self.session_dir = session_dir
+
+        if 'video' in manifest:
+            self._frames = VideoFileSource(os.path.join(session_dir, manifest['video']))
+        else:
+            self._frames = ImageDirectorySource(os.path.join(session_dir, manifest.get('frames', 'frames')))
+        self._opened = self._frames.isOpened()
+
+        # {índice_frame: [teclas]} y {índice_frame: [IDs de usuario para el registro]}
+        self.scripted_keys = {}
+        self.scripted_user_ids = {}
+        for entry in manifest.get('keys', []):
+            frame_index = int(entry['frame'])
+            if 'user_id' in entry:
+                self.scripted_user_ids.setdefault(frame_index, []).append(entry['user_id'])
+            else:
+                self.scripted_keys.setdefault(frame_index, []).append(parse_key(entry['key']))
+        self._pending_keys = []
+        self._pending_user_ids = []
+        self._next_key_frame = 0
+
+    def _read_frame(self):
+        ret, frame = self._frames.read()
+        return frame if ret else None
+
+    def poll_key(self):
+        """
+        Devuelve la siguiente tecla guionizada hasta el último frame leído
+        (una por llamada, en orden), o NO_KEY si no queda ninguna.
+        """
+        self._collect_scripted_events()
+        if self._pending_keys:
+            return self._pending_keys.pop(0)
+        return NO_KEY
+
+    def poll_user_id(self):
+        """ID de usuario guionizado para STATE_REGISTER_PROMPT_ID, o None"""
+        self._collect_scripted_events()
+        if self._pending_user_ids:
+            return self._pending_user_ids.pop(0)
+        return None
+
+    def _collect_scripted_events(self):
+        while self._next_key_frame <= self.frame_index:
+            self._pending_keys.extend(self.scripted_keys.get(self._next_key_frame, []))
+            self._pending_user_ids.extend(self.scripted_user_ids.get(self._next_key_frame, []))
+            self._next_key_frame += 1
+
+    def release(self):
+        super().release()
+        self._frames.release()
+
+
+class SessionRecorder:
+    """Graba frames y teclas en el formato que lee SessionReplaySource"""
+
+    def __init__(self, session_dir, fps=DEFAULT_REPLAY_FPS):
+        self.session_dir = session_dir
+        self.frames_dir = os.path.join(session_dir, 'frames')
+        os.makedirs(self.frames_dir, exist_ok=True)
+        self.fps = fps
+        self.frame_count = 0
+        self.keys = []
+
+    def add_frame(self, frame):
+        cv2.imwrite(os.path.join(self.frames_dir, f"{self.frame_count:06d}.png"), frame)
+        self.frame_count += 1
+
+    def add_key(self, key):
+        """Registrar una tecla pulsada sobre el último frame grabado"""
+        if key == NO_KEY or self.frame_count == 0:
+            return
+        self.keys.append({'frame': self.frame_count - 1, 'key': int(key)})
+
+    def close(self):
+        manifest = {'fps': self.fps, 'frames': 'frames', 'keys': self.keys}
+        with open(os.path.join(self.session_dir, SESSION_MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=4)
+        logger.info("💾 Sesión grabada en %s (%s frames, %s teclas)", self.session_dir, self.frame_count, len(self.keys))
+
+
+class RecordingSource:
+    """Envuelve otra fuente y graba en un SessionRecorder cada frame leído"""
+
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+
+    def read(self):
+        ret, frame = self.source.read()
+        if ret:
+            self.recorder.add_frame(frame)
+        return ret, frame
+
+    def record_key(self, key):
+        self.recorder.add_key(key)
+
+    def poll_key(self):
+        return self.source.poll_key() if hasattr(self.source, 'poll_key') else NO_KEY
+
+    def poll_user_id(self):
+        return self.source.poll_user_id() if hasattr(self.source, 'poll_user_id') else None
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def get(self, prop_id):
+        return self.source.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.source.set(prop_id, value)
+
+    def release(self):
+        self.source.release()
+        self.recorder.close()
+
+
+def open_frame_source(spec, realtime=False):
+    """Crea la fuente de frames descrita por `spec` (ver docstring del módulo)"""
+    kind, _, target = spec.partition(':')
+    if kind not in SOURCE_KINDS:
+        kind, target = '', spec
+
+    if kind == 'camera':
+        return cv2.VideoCapture(int(target))
+    if kind == 'video':
+        return VideoFileSource(target, realtime=realtime)
+    if kind == 'images':
+        return ImageDirectorySource(target, realtime=realtime)
+    if kind == 'replay':
+        return SessionReplaySource(target, realtime=realtime)
+    # Sin prefijo: deducir por la ruta
+    if target.isdigit():
+        return cv2.VideoCapture(int(target))
+    if os.path.isfile(os.path.join(target, SESSION_MANIFEST_NAME)):
+        return SessionReplaySource(target, realtime=realtime)
+    if os.path.isdir(target):
+        return ImageDirectorySource(target, realtime=realtime)
+    return VideoFileSource(target, realtime=realtime)
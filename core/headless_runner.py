@@ -0,0 +1,242 @@
+# ARCar_Showroom/core/headless_runner.py
+"""
+Ejecución de AppManager sin ventana HighGUI (servidores, procesos batch,
+benchmarks). Las entradas llegan por API (post_key / post_user_id) o por el
+guion de la fuente de frames, y los frames compuestos se entregan a un sink.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from core.config import (
+    STATE_WELCOME, STATE_LOGIN, STATE_REGISTER_PROMPT_ID,
+    HEADLESS_SHM_NAME
+)
+from core.frame_sources import NO_KEY
+from utils.app_logging import get_logger, every
+
+logger = get_logger(__name__)
+
+
+class CallbackFrameSink:
+    """Entrega cada frame compuesto a una función callback(seq, frame)"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, seq, frame):
+        self.callback(seq, frame)
+
+    def close(self):
+        pass
+
+
+class ImageFileSink:
+    """Guarda los frames como imágenes numeradas (uno de cada `every_n`)"""
+
+    def __init__(self, directory, every_n=1, extension='.jpg'):
+        self.directory = directory
+        self.every_n = max(1, every_n)
+        self.extension = extension
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, seq, frame):
+        if seq % self.every_n == 0:
+            cv2.imwrite(os.path.join(self.directory, f"{seq:06d}{self.extension}"), frame)
+
+    def close(self):
+        pass
+
+
+class VideoFileSink:
+    """Guarda los frames en un fichero de vídeo (se abre con el tamaño del primer frame)"""
+
+    def __init__(self, path, fps=30.0, fourcc='mp4v'):
+        self.path = path
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.writer = None
+
+    def write(self, seq, frame):
+        if self.writer is None:
+            height, width = frame.shape[:2]
+            self.writer = cv2.VideoWriter(self.path, self.fourcc, self.fps, (width, height))
+        self.writer.write(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class SharedMemoryFrameSink:
+    """
+    Publica el último frame en un bloque de memoria compartida para que otro
+    proceso lo lea sin copias por disco ni sockets.
+
+    Formato: cabecera int64 [seq, alto, ancho, canales] seguida de los píxeles
+    uint8. El bloque se crea con el tamaño del primer frame.
+    """
+    HEADER_FIELDS = 4
+
+    def __init__(self, name=HEADLESS_SHM_NAME):
+        self.name = name
+        self.shm = None
+        self._header = None
+        self._pixels = None
+
+    def _create(self, frame):
+        from multiprocessing import shared_memory
+        header_bytes = self.HEADER_FIELDS * np.dtype(np.int64).itemsize
+        self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=header_bytes + frame.nbytes)
+        self._header = np.ndarray((self.HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        self._pixels = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=header_bytes)
+        logger.info("🧠 Memoria compartida '%s' creada (%s bytes)", self.name, self.shm.size)
+
+    def write(self, seq, frame):
+        if self.shm is None:
+            self._create(frame)
+        if frame.shape != self._pixels.shape:
+            logger.warning("⚠️ Frame %s no cabe en memoria compartida %s", frame.shape, self._pixels.shape,
+                           extra=every())
+            return
+        # seq = -1 mientras se escribe para que el lector descarte frames a medias
+        self._header[0] = -1
+        self._pixels[...] = frame
+        self._header[1:] = frame.shape if frame.ndim == 3 else (*frame.shape, 1)
+        self._header[0] = seq
+
+    def close(self):
+        if self.shm is not None:
+            self._header = None
+            self._pixels = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class HeadlessRunner:
+    """
+    Bucle principal sin ventana. Equivale al bucle de main.py pero:
+      - no llama a cv2.imshow / cv2.waitKey (sin espera de 1 ms por frame)
+      - las teclas llegan por post_key() o por el guion de la fuente
+      - el ID de registro llega por post_user_id() o por el guion (nunca input())
+      - cada frame compuesto se entrega a `sink`
+    """
+
+    def __init__(self, app_manager, source, sink=None):
+        self.app_manager = app_manager
+        self.source = source
+        self.sink = sink
+        self._keys = deque()
+        self._user_ids = deque()
+        self._lock = threading.Lock()
+        self._stop_requested = False
+        self.frames_processed = 0
+
+    # --- API de entrada (se puede llamar desde otros hilos) ---
+    def post_key(self, key):
+        """Encolar una tecla (código entero o carácter)"""
+        with self._lock:
+            self._keys.append(ord(key) if isinstance(key, str) else key & 0xFF)
+
+    def post_user_id(self, user_id):
+        """Encolar el ID de usuario para el siguiente registro"""
+        with self._lock:
+            self._user_ids.append(user_id)
+
+    def stop(self):
+        self._stop_requested = True
+
+    def _next_key(self):
+        with self._lock:
+            if self._keys:
+                return self._keys.popleft()
+        if hasattr(self.source, 'poll_key'):
+            return self.source.poll_key()
+        return NO_KEY
+
+    def _next_user_id(self):
+        with self._lock:
+            if self._user_ids:
+                return self._user_ids.popleft()
+        if hasattr(self.source, 'poll_user_id'):
+            return self.source.poll_user_id()
+        return None
+
+    def run(self, max_frames=None):
+        """Procesar frames hasta fin de stream, 'q' o max_frames. Devuelve estadísticas"""
+        app_manager = self.app_manager
+        start_time = time.perf_counter()
+        self.frames_processed = 0
+
+        while not self._stop_requested:
+            if max_frames is not None and self.frames_processed >= max_frames:
+                break
+
+            ret, frame = self.source.read()
+            if not ret:
+                logger.info("Fin del stream de frames")
+                break
+
+            current_app_state = app_manager.get_current_state()
+            if current_app_state == STATE_REGISTER_PROMPT_ID:
+                user_id = self._next_user_id()
+                if user_id is not None:
+                    app_manager.submit_user_id(user_id)
+
+            display_frame = app_manager.process_frame(frame)
+            if self.sink is not None:
+                self.sink.write(self.frames_processed, display_frame)
+            self.frames_processed += 1
+
+            key = self._next_key()
+            while key != NO_KEY:
+                current_app_state = app_manager.get_current_state()
+                if key == 27 and current_app_state == STATE_REGISTER_PROMPT_ID:
+                    app_manager._reset_registration_vars()
+                    app_manager.current_state = STATE_WELCOME
+                else:
+                    app_manager.handle_input(key, frame)
+
+                if key == ord('q') and current_app_state in [STATE_WELCOME, STATE_LOGIN]:
+                    logger.info("Tecla 'q' en estado permitido. Terminando.")
+                    self._stop_requested = True
+                    break
+                key = self._next_key()
+
+        elapsed = time.perf_counter() - start_time
+        stats = {
+            'frames': self.frames_processed,
+            'elapsed_s': elapsed,
+            'fps': self.frames_processed / elapsed if elapsed > 0 else 0.0,
+            'final_state': app_manager.get_current_state(),
+        }
+        logger.info("📊 %s frames en %.2fs (%.1f FPS)", stats['frames'], elapsed, stats['fps'])
+        return stats
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+
+
+def create_frame_sink(spec, fps=30.0):
+    """
+    Crea un sink a partir de una especificación de línea de comandos:
+        None / ''          -> sin salida (solo benchmark)
+        shm[:NOMBRE]       -> memoria compartida
+        ruta.mp4 / .avi    -> fichero de vídeo
+        directorio         -> imágenes numeradas
+    """
+    if not spec:
+        return None
+    if spec == 'shm' or spec.startswith('shm:'):
+        _, _, name = spec.partition(':')
+        return SharedMemoryFrameSink(name or HEADLESS_SHM_NAME)
+    if spec.lower().endswith(('.mp4', '.avi', '.mkv')):
+        return VideoFileSink(spec, fps=fps)
+    return ImageFileSink(spec)
@@ -1,25 +1,60 @@
 # CREAR ARCHIVO: data_management/user_manager.py
 
 import os
+import sys
 import json
+import time
+import hashlib
 import shutil
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Permitir ejecutarlo como script (python data_management/user_manager.py)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 # Imports opcionales para evitar errores
 try:
     import cv2
+    from vision_processing.face_gallery import (
+        FaceGallery, create_recognizer, load_face_images, read_lbph_model, hash_face_images, gallery_build_signature
+    )
+    from utils.image_utils import canonical_face
     CV2_AVAILABLE = True
 except ImportError:
     print("⚠️ OpenCV no disponible. Algunas funciones estarán limitadas.")
     CV2_AVAILABLE = False
 
+from core.config import FACE_GALLERY_ENGINE, FACE_GALLERY_PATHS_REL_TO_PROJECT_ROOT, RETRAIN_WORKERS
+from vision_processing.face_samples import FaceSampleArchive, SAMPLES_FILE_NAME, FACE_IMAGE_EXTENSIONS, samples_path
+
+
+def _load_user_samples(user_id, user_dir, numeric_id, engine):
+    """
+    Trabajo de retrain-all para un usuario (en un proceso del pool): leer y
+    normalizar sus imágenes y, con el motor 'numpy', calcular sus histogramas.
+    Devuelve (user_id, nº de imágenes, LbpRecognizer o lista de caras, segundos).
+    """
+    start = time.perf_counter()
+    faces = load_face_images(user_dir)
+    samples = faces
+    if engine == 'numpy' and faces:
+        samples = create_recognizer(engine)
+        samples.train(faces, np.full(len(faces), numeric_id, dtype=np.int32))
+    return user_id, len(faces), samples, time.perf_counter() - start
+
+
 class UserManager:
     def __init__(self, project_root):
         self.project_root = Path(project_root)
         self.embeddings_dir = self.project_root / "assets/face_data/embeddings"
         self.models_dir = self.embeddings_dir / "models"
         self.user_map_file = self.project_root / "data_management/user_id_map.json"
+        self.gallery_file = self.project_root / FACE_GALLERY_PATHS_REL_TO_PROJECT_ROOT[FACE_GALLERY_ENGINE]
+        self.manifest_file = self.gallery_file.with_name(self.gallery_file.name + ".manifest.json")
+        self._gallery = None
         
         # Crear directorios si no existen
         self.embeddings_dir.mkdir(parents=True, exist_ok=True)
@@ -46,6 +81,28 @@ class UserManager:
         except Exception as e:
             print(f"❌ Error guardando user_id_map.json: {e}")
     
+    def get_gallery(self):
+        """Galería LBPH compartida (se construye desde las imágenes si aún no existe)"""
+        if self._gallery is None:
+            self._gallery = FaceGallery(str(self.gallery_file))
+            if not self._gallery.load():
+                self._gallery.rebuild_from_disk(str(self.embeddings_dir), self.load_user_map())
+                self._gallery.save(self.load_user_map())
+        return self._gallery
+
+    def count_user_images(self, user_id):
+        """Caras de un usuario: las de su archivo samples.faces más las imágenes aún sueltas"""
+        user_dir = self.embeddings_dir / user_id
+        if not user_dir.exists():
+            return 0
+        loose = sum(1 for f in user_dir.iterdir() if f.suffix.lower() in FACE_IMAGE_EXTENSIONS)
+        return len(FaceSampleArchive(samples_path(str(user_dir)))) + loose
+
+    def _user_in_gallery(self, numeric_id):
+        if not CV2_AVAILABLE:
+            return self.gallery_file.exists()
+        return self.get_gallery().has_user(numeric_id)
+
     def list_users(self):
         """Listar todos los usuarios registrados"""
         print("\n" + "="*50)
@@ -59,16 +116,11 @@ class UserManager:
             return
         
         for user_id, numeric_id in user_map.items():
-            user_dir = self.embeddings_dir / user_id
-            model_file = self.models_dir / f"{user_id}.yml"
-            
-            # Contar imágenes
-            images_count = 0
-            if user_dir.exists():
-                images_count = len([f for f in user_dir.glob("*.jpg")])
+            # Contar imágenes (el archivo de caras solo se abre para leer su cabecera)
+            images_count = self.count_user_images(user_id)
             
-            # Verificar modelo
-            model_exists = "✅" if model_file.exists() else "❌"
+            # Verificar que el usuario está en la galería
+            model_exists = "✅" if self._user_in_gallery(numeric_id) else "❌"
             
             print(f"👤 {user_id:<15} | ID: {numeric_id:<3} | Imágenes: {images_count:<3} | Modelo: {model_exists}")
     
@@ -81,20 +133,19 @@ class UserManager:
             return None
         
         user_dir = self.embeddings_dir / user_id
-        model_file = self.models_dir / f"{user_id}.yml"
         
         details = {
             'user_id': user_id,
             'numeric_id': user_map[user_id],
             'images_dir': user_dir,
-            'model_file': model_file,
+            'model_file': self.gallery_file,
             'images_count': 0,
-            'model_exists': model_file.exists(),
+            'model_exists': self._user_in_gallery(user_map[user_id]),
             'images_exist': user_dir.exists()
         }
         
         if user_dir.exists():
-            details['images_count'] = len([f for f in user_dir.glob("*.jpg")])
+            details['images_count'] = self.count_user_images(user_id)
         
         return details
     
@@ -121,16 +172,23 @@ class UserManager:
                 shutil.rmtree(user_dir)
                 print(f"✅ Directorio de imágenes eliminado: {user_dir}")
             
-            # Eliminar modelo
+            # Eliminar modelo antiguo por usuario, si quedaba alguno
             model_file = self.models_dir / f"{user_id}.yml"
             if model_file.exists():
                 model_file.unlink()
                 print(f"✅ Modelo eliminado: {model_file}")
             
             # Actualizar mapa de usuarios
-            del user_map[user_id]
+            numeric_id = user_map.pop(user_id)
             self.save_user_map(user_map)
             
+            # Quitarlo de la galería (y de su índice)
+            if CV2_AVAILABLE:
+                gallery = self.get_gallery()
+                gallery.remove_user(numeric_id, str(self.embeddings_dir), user_map)
+                gallery.save(user_map)
+                print("✅ Galería actualizada")
+            
             print(f"✅ Usuario '{user_id}' eliminado completamente")
             return True
             
@@ -194,6 +252,56 @@ class UserManager:
         
         print("✅ Estructura de directorios arreglada")
     
+    def pack_face_samples(self):
+        """
+        Migrar las imágenes sueltas de cada usuario (face_NNN.jpg y los PNG
+        antiguos) a su archivo samples.faces y borrarlas. Antes se arregla la
+        estructura de directorios (fix_directory_structure).
+        """
+        if not CV2_AVAILABLE:
+            print("❌ OpenCV no disponible. No se pueden empaquetar las imágenes.")
+            return False
+        
+        self.fix_directory_structure()
+        print("\n📦 EMPAQUETANDO IMÁGENES DE USUARIOS...")
+        
+        ok = True
+        for user_dir in sorted(self.embeddings_dir.iterdir()):
+            if not user_dir.is_dir() or user_dir == self.models_dir:
+                continue
+            image_files = sorted(f for f in user_dir.iterdir() if f.suffix.lower() in FACE_IMAGE_EXTENSIONS)
+            if not image_files:
+                continue
+            
+            faces = []
+            for img_file in image_files:
+                img = cv2.imread(str(img_file), cv2.IMREAD_GRAYSCALE)
+                if img is None:
+                    print(f"⚠️ No se pudo leer {img_file}")
+                    continue
+                # Las imágenes guardadas ya están alineadas: solo el tamaño canónico
+                faces.append(canonical_face(img, align=False))
+            
+            try:
+                archive = FaceSampleArchive(samples_path(str(user_dir)))
+                previous = len(archive)
+                if faces:
+                    archive.append(faces)
+                packed = archive.read(mmap=False)[previous:]
+                if len(packed) != len(faces) or not all(np.array_equal(a, b) for a, b in zip(packed, faces)):
+                    raise ValueError("el archivo no coincide con las imágenes")
+            except (OSError, ValueError) as e:
+                print(f"❌ {user_dir.name}: {e}. Se conservan las imágenes sueltas")
+                ok = False
+                continue
+            
+            for img_file in image_files:
+                img_file.unlink()
+            print(f"✅ {user_dir.name}: {len(faces)} imágenes en {SAMPLES_FILE_NAME}")
+        
+        print("✅ Imágenes empaquetadas" if ok else "⚠️ Algunos usuarios no se pudieron empaquetar")
+        return ok
+
     def retrain_user_model(self, user_id):
         """Reentrenar modelo de un usuario"""
         if not CV2_AVAILABLE:
@@ -212,18 +320,11 @@ class UserManager:
             return False
         
         try:
-            # Simular el proceso de entrenamiento
             user_dir = user_details['images_dir']
-            faces = []
-            labels = []
             numeric_id = user_details['numeric_id']
             
             # Cargar todas las imágenes
-            for img_file in user_dir.glob("*.jpg"):
-                face_img = cv2.imread(str(img_file), cv2.IMREAD_GRAYSCALE)
-                if face_img is not None:
-                    faces.append(face_img)
-                    labels.append(numeric_id)
+            faces = load_face_images(str(user_dir))
             
             if len(faces) == 0:
                 print("❌ No se encontraron imágenes válidas")
@@ -231,21 +332,173 @@ class UserManager:
             
             print(f"📚 Entrenando con {len(faces)} imágenes...")
             
-            # Entrenar modelo LBPH
-            recognizer = cv2.face.LBPHFaceRecognizer_create()
-            recognizer.train(faces, np.array(labels))
-            
-            # Guardar modelo
-            model_path = user_details['model_file']
-            recognizer.write(str(model_path))
+            # Añadir o reentrenar en la galería compartida
+            gallery = self.get_gallery()
+            user_map = self.load_user_map()
+            gallery.set_user(numeric_id, faces, str(self.embeddings_dir), user_map)
+            gallery.save(user_map)
             
-            print(f"✅ Modelo reentrenado: {model_path}")
+            print(f"✅ Modelo reentrenado: {gallery.path}")
             return True
             
         except Exception as e:
             print(f"❌ Error reentrenando modelo: {e}")
             return False
 
+    def _gallery_checksum(self):
+        """sha256 del fichero de la galería (None si no existe)"""
+        digest = hashlib.sha256()
+        try:
+            with open(self.gallery_file, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def _load_manifest(self):
+        """
+        Huellas de la última construcción de la galería ({} si no hay o si son
+        de otra galería: un corte entre los dos guardados, o un registro o
+        reentrenamiento posterior que no pasó por retrain_all)
+        """
+        try:
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('gallery_sha256') != self._gallery_checksum():
+            return {}
+        return manifest
+
+    def _save_manifest(self, manifest):
+        """Guardar las huellas junto con el checksum de la galería ya guardada"""
+        manifest = dict(manifest, gallery_sha256=self._gallery_checksum())
+        tmp_file = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_file, self.manifest_file)
+
+    def retrain_all(self, changed_only=False, workers=RETRAIN_WORKERS):
+        """
+        Reentrenar a todos los usuarios: la lectura de imágenes y los
+        histogramas de cada usuario van en un proceso del pool. La galería
+        nueva se monta en memoria y solo se guarda (junto con las huellas) si
+        todos los usuarios salieron bien. Con `changed_only` se reutilizan los
+        usuarios cuyas imágenes y parámetros no cambiaron desde la última vez;
+        las huellas solo valen si llevan el checksum de la galería guardada.
+        """
+        if not CV2_AVAILABLE:
+            print("❌ OpenCV no disponible. No se pueden reentrenar modelos.")
+            return False
+
+        print("\n🔧 REENTRENANDO TODOS LOS USUARIOS" + (" (solo cambios)" if changed_only else ""))
+        start = time.perf_counter()
+        user_map = self.load_user_map()
+        signature = gallery_build_signature(FACE_GALLERY_ENGINE)
+        hashes = {user_id: hash_face_images(str(self.embeddings_dir / user_id)) for user_id in user_map}
+        entries = {user_id: {'numeric_id': int(numeric_id), 'hash': hashes[user_id]}
+                   for user_id, numeric_id in user_map.items()}
+
+        gallery = FaceGallery(str(self.gallery_file))
+        todo = list(user_map)
+        manifest = self._load_manifest()
+        if changed_only and manifest.get('params') == signature and gallery.load():
+            built = manifest.get('users', {})
+            todo = [user_id for user_id in user_map if built.get(user_id) != entries[user_id]]
+            current_ids = {entry['numeric_id'] for entry in entries.values()}
+            stale = {numeric_id for numeric_id in gallery.labels if numeric_id not in current_ids}
+            if not todo and not stale:
+                print("✅ Nada que reentrenar: la galería está al día")
+                return True
+            if gallery.engine == 'numpy':
+                # Se quitan los usuarios cambiados o borrados y se conservan los demás
+                for numeric_id in stale | {entries[user_id]['numeric_id'] for user_id in todo}:
+                    gallery.remove_user(numeric_id, str(self.embeddings_dir), user_map)
+            else:
+                # LBPH de OpenCV no permite quitar muestras: se reconstruye entera
+                todo = list(user_map)
+                gallery = FaceGallery(str(self.gallery_file))
+        elif changed_only:
+            print("ℹ️ Sin galería o huellas compatibles: se reentrena a todos")
+
+        print(f"📚 {len(todo)} usuarios que reentrenar ({len(user_map) - len(todo)} sin cambios)")
+        results, failed = {}, []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_load_user_samples, user_id, str(self.embeddings_dir / user_id),
+                                   entries[user_id]['numeric_id'], gallery.engine): user_id
+                       for user_id in todo}
+            for future in as_completed(futures):
+                user_id = futures[future]
+                try:
+                    user_id, num_faces, samples, seconds = future.result()
+                except Exception as e:
+                    print(f"❌ {user_id:<15} | Error: {e}")
+                    failed.append(user_id)
+                    continue
+                print(f"👤 {user_id:<15} | Imágenes: {num_faces:<3} | {seconds * 1000:.0f} ms")
+                if num_faces:
+                    results[user_id] = samples
+
+        if failed:
+            print(f"❌ {len(failed)} usuarios con errores; la galería no se ha modificado")
+            return False
+
+        ordered = sorted(results, key=lambda user_id: entries[user_id]['numeric_id'])
+        if gallery.engine == 'numpy':
+            gallery.merge(*[FaceGallery.from_recognizer(gallery.path, results[user_id]) for user_id in ordered])
+        else:
+            gallery.rebuild({entries[user_id]['numeric_id']: results[user_id] for user_id in ordered})
+        gallery.save(user_map)
+        self._save_manifest({'params': signature, 'users': entries})
+        self._gallery = None  # get_gallery() vuelve a abrir la galería guardada
+
+        print(f"✅ {len(gallery)} usuarios en la galería ({time.perf_counter() - start:.2f} s): {gallery.path}")
+        return True
+
+    def convert_models(self):
+        """
+        Convertir los modelos .yml de models/ (<user_id>.yml por usuario o la
+        gallery.yml del motor 'opencv') a la galería binaria del motor
+        'numpy'. Si quedan las imágenes de un usuario se entrena con ellas (con
+        la normalización actual); si no, se copian sus histogramas.
+        """
+        if not CV2_AVAILABLE:
+            print("❌ OpenCV no disponible. No se pueden convertir modelos.")
+            return False
+
+        user_map = self.load_user_map()
+        histograms_by_id = {}
+        for model_file in sorted(self.models_dir.glob("*.yml")):
+            try:
+                histograms, labels = read_lbph_model(str(model_file))
+            except cv2.error as e:
+                print(f"⚠️ No se pudo leer {model_file.name}: {e}")
+                continue
+            # Los modelos por usuario se llaman <user_id>.yml: su etiqueta es la del mapa
+            if model_file.stem in user_map:
+                labels = np.full(len(labels), user_map[model_file.stem], dtype=np.int32)
+            for numeric_id in np.unique(labels):
+                histograms_by_id.setdefault(int(numeric_id), histograms[labels == numeric_id])
+            print(f"📦 {model_file.name}: {len(labels)} muestras")
+
+        gallery_file = self.project_root / FACE_GALLERY_PATHS_REL_TO_PROJECT_ROOT['numpy']
+        gallery = FaceGallery(str(gallery_file), engine='numpy')
+        numeric_to_user = {numeric_id: user_id for user_id, numeric_id in user_map.items()}
+        for numeric_id, histograms in sorted(histograms_by_id.items()):
+            user_id = numeric_to_user.get(numeric_id)
+            faces = load_face_images(str(self.embeddings_dir / user_id)) if user_id else []
+            if faces:
+                gallery.add_user(numeric_id, faces)
+            else:
+                print(f"⚠️ Sin imágenes para {user_id or numeric_id}: se copian sus histogramas "
+                      "(calculados sin la normalización actual)")
+                gallery.add_histograms(numeric_id, histograms)
+        gallery.save(user_map)
+        print(f"✅ {len(gallery)} usuarios convertidos: {gallery.path}")
+        return True
+
+
 def main():
     """Interfaz de línea de comandos para gestión de usuarios"""
     import sys
@@ -272,6 +525,9 @@ def main():
         print("  delete <user_id>        - Eliminar un usuario")
         print("  fix-structure          - Arreglar estructura de directorios")
         print("  retrain <user_id>      - Reentrenar modelo de usuario (requiere OpenCV)")
+        print("  retrain-all [--changed-only] - Reentrenar a todos los usuarios en paralelo")
+        print("  convert-models         - Convertir modelos .yml antiguos a la galería binaria")
+        print("  pack-samples           - Juntar las imágenes de cada usuario en un archivo samples.faces")
         print("\nEjemplos:")
         print("  python user_manager.py list")
         print("  python user_manager.py details marcos")
@@ -316,6 +572,15 @@ def main():
         user_id = sys.argv[2]
         manager.retrain_user_model(user_id)
     
+    elif command == "retrain-all":
+        manager.retrain_all(changed_only="--changed-only" in sys.argv[2:])
+    
+    elif command == "convert-models":
+        manager.convert_models()
+    
+    elif command == "pack-samples":
+        manager.pack_face_samples()
+    
     else:
         print(f"❌ Comando desconocido: {command}")
 
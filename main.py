@@ -1,49 +1,41 @@
 # ARCar_Showroom/main.py
 import cv2
 import sys
+import argparse
 import os # Para obtener la ruta del proyecto
 from core.app_manager import AppManager
+from core.camera_capture import ThreadedCameraCapture
+from core.camera_probe import open_best_camera, load_camera_profile, update_camera_profile
+from core.capture_config import configure_capture
+from core.frame_pipeline import FramePipeline
+from core.frame_sources import open_frame_source, RecordingSource, SessionRecorder, NO_KEY
+from core.headless_runner import HeadlessRunner, create_frame_sink
+from utils.instrumentation import profiler
+from utils.app_logging import setup_logging, dump_ring_buffer
 from core.config import (
-    CAMERA_INDEX, WINDOW_NAME, 
+    CAMERA_INDEX, WINDOW_NAME, CAMERA_PROFILE_PATH_REL_TO_PROJECT_ROOT, CAPTURE_THREADED, CAPTURE_READ_TIMEOUT_S, PIPELINE_MODE,
     STATE_REGISTER_PROMPT_ID, STATE_LOGIN, STATE_REGISTER_CAPTURE,
-    STATE_REGISTER_TRAIN,  # ← AÑADIDO
-    STATE_WELCOME # Importar el nuevo estado
+    STATE_WELCOME, # Importar el nuevo estado
+    LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_CRASH_DUMP_PATH_REL_TO_PROJECT_ROOT
 )
 
-def find_best_camera():
-    """Encontrar la mejor cámara disponible (priorizar cámara del PC primero)"""
+def find_best_camera(project_root_path):
+    """
+    Encontrar la mejor cámara disponible (priorizar DroidCam y cámara del PC).
+    Las cámaras se prueban en paralelo y la elegida se guarda en un perfil que
+    se reutiliza en el siguiente arranque. Devuelve (índice, VideoCapture ya
+    abierto) o (0, None) si no hay ninguna.
+    """
     print("🎥 Buscando cámaras disponibles...")
     
-    available_cameras = []
-    camera_info = {}
+    profile_path = os.path.join(project_root_path, CAMERA_PROFILE_PATH_REL_TO_PROJECT_ROOT)
+    best = open_best_camera(profile_path)
     
-    # 🔧 ORDEN OPTIMIZADO: Probar primero cámara 0, luego 2 (DroidCam), después resto
-    priority_order = [2,0, 1, 3, 4, 5, 6, 7, 8, 9, 10]
-    
-    for i in priority_order:
-        cap = cv2.VideoCapture(i)
-        if cap.isOpened():
-            ret, frame = cap.read()
-            if ret:
-                height, width = frame.shape[:2]
-                resolution = width * height
-                camera_info[i] = {
-                    'width': width,
-                    'height': height,
-                    'resolution': resolution
-                }
-                available_cameras.append(i)
-                print(f"📹 Cámara {i}: {width}x{height} ({resolution} píxeles)")
-            cap.release()
-        # No imprimir "NO DISPONIBLE" para evitar spam de logs
-    
-    if not available_cameras:
+    if best is None:
         print("❌ No se encontraron cámaras disponibles")
-        return 0
+        return 0, None
     
-    # 🎯 ESTRATEGIA DE SELECCIÓN SIMPLIFICADA
-    # Prioridad 1: Usar la primera cámara encontrada en el orden de prioridad
-    best_camera = available_cameras[0]  # Ya está ordenado por prioridad
+    best_camera = best['index']
     
     if best_camera == 0:
         reason = "cámara del PC (prioridad principal)"
@@ -52,43 +44,35 @@ def find_best_camera():
     else:
         reason = f"primera cámara disponible"
     
-    print(f"✅ Cámaras disponibles: {available_cameras}")
+    if 'available' in best:
+        print(f"✅ Cámaras disponibles: {best['available']}")
+    else:
+        reason += ", perfil guardado"
     print(f"🎯 Seleccionada: Cámara {best_camera} ({reason})")
+    print(f"📸 Resolución: {best['width']}x{best['height']}")
     
-    cam_info = camera_info[best_camera]
-    print(f"📸 Resolución: {cam_info['width']}x{cam_info['height']}")
-    
-    return best_camera
-
-def main():
-    # Obtener la ruta absoluta al directorio raíz del proyecto
-    project_root_path = os.path.dirname(os.path.abspath(__file__))
+    return best_camera, best['cap']
 
-    # Inicializar el gestor de la aplicación
-    app_manager = AppManager(project_root_path)
+def make_key_reader(cap):
+    """
+    Devuelve una función que lee la tecla pulsada en la ventana y, si no hay
+    ninguna, la siguiente tecla guionizada de la fuente (sesiones grabadas).
+    Si la fuente está grabando, la tecla se guarda en la sesión.
+    """
+    def read_key():
+        key = cv2.waitKey(1) & 0xFF
+        if key == NO_KEY and hasattr(cap, 'poll_key'):
+            key = cap.poll_key()
+        if hasattr(cap, 'record_key'):
+            cap.record_key(key)
+        return key
+    return read_key
 
-    # 🔧 AUTODETECTAR MEJOR CÁMARA (PRIORIZAR DROIDCAM)
-    camera_index = find_best_camera()
-    
-    # Inicializar la cámara con el índice detectado
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
-        print(f"❌ Error: No se pudo abrir la cámara {camera_index}.")
-        
-        # 🔄 FALLBACK: Probar cámara 0 si la seleccionada falla
-        if camera_index != 0:
-            print("🔄 Intentando fallback a cámara 0...")
-            cap = cv2.VideoCapture(0)
-            if cap.isOpened():
-                camera_index = 0
-                print("✅ Fallback exitoso a cámara 0")
-            else:
-                sys.exit("❌ Aplicación terminada: No se pudo iniciar ninguna cámara.")
-        else:
-            sys.exit("❌ Aplicación terminada: Falla al iniciar la cámara.")
-    
-    print(f"🚀 Cámara {camera_index} iniciada correctamente.")
-    
+def run_sequential(app_manager, cap, read_key, poll_user_id=None):
+    """
+    Bucle principal clásico: captura, análisis, render y presentación en el hilo principal.
+    Con `poll_user_id` (sesiones grabadas) el ID del registro sale del guion, no de la terminal.
+    """
     running = True
     while running:
         current_app_state = app_manager.get_current_state()
@@ -106,7 +90,7 @@ def main():
                 cv2.imshow(WINDOW_NAME, display_frame)
             
             # Manejar cancelación
-            key_prompt = cv2.waitKey(1) & 0xFF
+            key_prompt = read_key()
             if key_prompt == 27:  # ESC
                 print("❌ Registro cancelado. Volviendo al menú principal.")
                 app_manager._reset_registration_vars()
@@ -116,6 +100,16 @@ def main():
                 print("❌ Saliendo por tecla 'q'.")
                 running = False
                 break
+
+            if poll_user_id is not None:
+                # Sesión grabada: esperar al ID guionizado sin bloquear en la terminal
+                if not ret:
+                    print("Error: No se pudo leer el frame de la cámara. Fin del stream o error.")
+                    break
+                user_id = poll_user_id()
+                if user_id is not None:
+                    app_manager.submit_user_id(user_id)
+                continue
             
             # Solicitar ID (esto puede bloquear)
             try:
@@ -127,22 +121,8 @@ def main():
             
             continue  # Importante: continuar el bucle
 
-        # 🔧 MANEJO DEL ESTADO DE ENTRENAMIENTO
-        elif current_app_state == STATE_REGISTER_TRAIN:
-            # Mostrar frame de entrenamiento
-            ret, frame = cap.read()
-            if ret:
-                display_frame = frame.copy()
-                cv2.putText(display_frame, f"Entrenando modelo para: {app_manager.user_id_for_registration}", 
-                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                cv2.putText(display_frame, "Entrenamiento en progreso...", 
-                           (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
-                cv2.imshow(WINDOW_NAME, display_frame)
-            
-            cv2.waitKey(100)  # Pausa breve para mostrar el mensaje
-            continue
-
-        # Resto de estados normales
+        # Resto de estados (STATE_REGISTER_TRAIN incluido: el entrenamiento va en
+        # segundo plano y process_frame muestra su progreso sobre la cámara)
         ret, frame = cap.read()
         if not ret:
             print("Error: No se pudo leer el frame de la cámara. Fin del stream o error.")
@@ -152,7 +132,7 @@ def main():
         display_frame = app_manager.process_frame(frame)
         cv2.imshow(WINDOW_NAME, display_frame)
 
-        key = cv2.waitKey(1) & 0xFF
+        key = read_key()
 
         # 🔧 PERMITIR QUE APPMANAGER MANEJE TODAS LAS TECLAS PRIMERO
         if key != 255:
@@ -167,8 +147,197 @@ def main():
                 else:
                     print(f"Tecla 'q' manejada por AppManager en estado {current_app_state}")
                     # No cerrar la aplicación, dejar que AppManager la maneje
+
+def run_pipelined(app_manager, cap, read_key, poll_user_id=None):
+    """
+    Bucle principal en modo pipeline: el hilo principal solo presenta frames y atiende teclado.
+    Con `poll_user_id` (sesiones grabadas) el ID del registro sale del guion, no de la terminal.
+    """
+    pipeline = FramePipeline(app_manager, cap).start()
+    
+    running = True
+    while running:
+        result = pipeline.get_result(timeout=CAPTURE_READ_TIMEOUT_S)
+        if result is None:
+            if pipeline.stream_ended:
+                print("Error: No se pudo leer el frame de la cámara. Fin del stream o error.")
+                break
+            continue
+
+        cv2.imshow(WINDOW_NAME, result.display_frame)
+        key = read_key()
+        current_app_state = app_manager.get_current_state()
+
+        if current_app_state == STATE_REGISTER_PROMPT_ID:
+            if key == 27:  # ESC
+                print("❌ Registro cancelado. Volviendo al menú principal.")
+                with app_manager.state_lock:
+                    app_manager._reset_registration_vars()
+                    app_manager.current_state = STATE_WELCOME
+                continue
+            elif key == ord('q'):
+                print("❌ Saliendo por tecla 'q'.")
+                break
+
+            if poll_user_id is not None:
+                user_id = poll_user_id()
+                if user_id is not None:
+                    app_manager.submit_user_id(user_id)
+                continue
+
+            # Solicitar ID (bloquea el hilo principal; el pipeline sigue capturando)
+            try:
+                app_manager.prompt_for_user_id()
+            except KeyboardInterrupt:
+                print("\n❌ Registro cancelado.")
+                with app_manager.state_lock:
+                    app_manager._reset_registration_vars()
+                    app_manager.current_state = STATE_WELCOME
+            continue
+
+        if key != 255:
+            with app_manager.state_lock:
+                app_manager.handle_input(key, result.frame)
+
+            if key == ord('q') and current_app_state in [STATE_WELCOME, STATE_LOGIN]:
+                print("Tecla 'q' presionada en estado permitido. Cerrando aplicación...")
+                running = False
+
+    pipeline.stop()
+
+def parse_args():
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="ARCar Showroom")
+    parser.add_argument('--pipeline', choices=['sequential', 'pipelined'], default=PIPELINE_MODE,
+                        help="'sequential': todo en el hilo principal (depuración); "
+                             "'pipelined': análisis y render en hilos separados")
+    parser.add_argument('--source', default=None,
+                        help="Fuente de frames en lugar de la cámara: camera:N, video:RUTA, "
+                             "images:DIR o replay:DIR (sesión grabada con teclas)")
+    parser.add_argument('--realtime', action='store_true',
+                        help="Reproducir fuentes grabadas a su ritmo original (por defecto, lo más rápido posible)")
+    parser.add_argument('--record', default=None, metavar='DIR',
+                        help="Grabar frames y teclas de esta ejecución como sesión reproducible")
+    parser.add_argument('--headless', action='store_true',
+                        help="Ejecutar sin ventana: teclas desde el guion de la fuente, frames al sink de --output")
+    parser.add_argument('--output', default=None,
+                        help="Sink del modo headless: DIR (imágenes), ruta.mp4 (vídeo) o shm[:NOMBRE] (memoria compartida)")
+    parser.add_argument('--max-frames', type=int, default=None,
+                        help="Modo headless: número máximo de frames a procesar")
+    parser.add_argument('--profile', action='store_true',
+                        help="Medir tiempos por etapa (p50/p95 en pantalla)")
+    parser.add_argument('--profile-dump', default=None, metavar='RUTA',
+                        help="Volcar periódicamente los tiempos por etapa a un JSON (implica --profile)")
+    parser.add_argument('--log-level', default=LOG_LEVEL,
+                        help="Nivel de log global (DEBUG, INFO, WARNING, ERROR)")
+    parser.add_argument('--log-module', action='append', default=[], metavar='MODULO=NIVEL',
+                        help="Nivel para un módulo o paquete, p. ej. ar_rendering=DEBUG (repetible)")
+    parser.add_argument('--log-format', choices=['text', 'json'], default=LOG_FORMAT,
+                        help="Formato de los registros en consola / fichero")
+    parser.add_argument('--log-file', default=LOG_FILE, metavar='RUTA',
+                        help="Escribir también los registros en este fichero")
+    return parser.parse_args()
+
+def parse_module_levels(specs):
+    """['ar_rendering=DEBUG', ...] -> {'ar_rendering': 'DEBUG', ...}"""
+    levels = {}
+    for spec in specs:
+        name, sep, level = spec.partition('=')
+        if not sep or not name or not level:
+            sys.exit(f"❌ --log-module debe tener la forma MODULO=NIVEL: '{spec}'")
+        levels[name.strip()] = level.strip()
+    return levels
+
+def main():
+    args = parse_args()
+    setup_logging(level=args.log_level, module_levels=parse_module_levels(args.log_module),
+                  log_format=args.log_format, log_file=args.log_file)
+    if args.profile or args.profile_dump:
+        profiler.configure(enabled=True, dump_path=args.profile_dump)
+
+    # Obtener la ruta absoluta al directorio raíz del proyecto
+    project_root_path = os.path.dirname(os.path.abspath(__file__))
+
+    # Inicializar el gestor de la aplicación
+    app_manager = AppManager(project_root_path, headless=args.headless)
+
+    if args.source:
+        # 🎞️ FUENTE GRABADA (vídeo, imágenes o sesión) EN LUGAR DE LA CÁMARA
+        cap = open_frame_source(args.source, realtime=args.realtime)
+        if not cap.isOpened():
+            sys.exit(f"❌ Aplicación terminada: No se pudo abrir la fuente '{args.source}'.")
+        live_camera = isinstance(cap, cv2.VideoCapture)
+        print(f"🚀 Fuente '{args.source}' iniciada correctamente.")
+    else:
+        # 🔧 AUTODETECTAR MEJOR CÁMARA (PRIORIZAR DROIDCAM)
+        camera_index, cap = find_best_camera(project_root_path)
+    
+        # La cámara elegida ya viene abierta del sondeo; si no, abrirla con el índice
+        if cap is None:
+            cap = cv2.VideoCapture(camera_index)
+        if not cap.isOpened():
+            print(f"❌ Error: No se pudo abrir la cámara {camera_index}.")
+        
+            # 🔄 FALLBACK: Probar cámara 0 si la seleccionada falla
+            if camera_index != 0:
+                print("🔄 Intentando fallback a cámara 0...")
+                cap = cv2.VideoCapture(0)
+                if cap.isOpened():
+                    camera_index = 0
+                    print("✅ Fallback exitoso a cámara 0")
+                else:
+                    sys.exit("❌ Aplicación terminada: No se pudo iniciar ninguna cámara.")
+            else:
+                sys.exit("❌ Aplicación terminada: Falla al iniciar la cámara.")
     
+        print(f"🚀 Cámara {camera_index} iniciada correctamente.")
+        live_camera = True
+
+        # 🔧 NEGOCIAR FORMATO, RESOLUCIÓN, FPS Y BUFFER DEL DRIVER (o reutilizar el del perfil)
+        profile_path = os.path.join(project_root_path, CAMERA_PROFILE_PATH_REL_TO_PROJECT_ROOT)
+        profile = load_camera_profile(profile_path)
+        if profile is not None and profile.get('index') != camera_index:
+            profile = None
+        stored_mode = profile.get('capture_mode') if profile else None
+        capture_mode = configure_capture(cap, stored_mode)
+        if capture_mode is not None:
+            if profile is not None and capture_mode is not stored_mode:
+                update_camera_profile(profile_path, capture_mode=capture_mode)
+            # La matriz de cámara se calcula con la resolución que entrega realmente la cámara
+            app_manager.configure_camera(capture_mode['width'], capture_mode['height'], camera_index)
+        else:
+            app_manager.configure_camera(camera_index=camera_index)
+
+    # IDs de registro guionizados (solo las sesiones grabadas los tienen)
+    poll_user_id = getattr(cap, 'poll_user_id', None)
+
+    # 🔧 LEER LA CÁMARA EN UN HILO PROPIO: siempre procesamos el frame más reciente
+    # (las fuentes grabadas se leen frame a frame para que la reproducción sea determinista)
+    if CAPTURE_THREADED and live_camera:
+        cap = ThreadedCameraCapture(cap).start()
+
+    # La grabación va por fuera del hilo de captura: se guardan los frames que procesa
+    # el bucle (no los que descarta el buffer), con las teclas en sus mismos índices
+    if args.record:
+        cap = RecordingSource(cap, SessionRecorder(args.record))
+
+    # Teclas guionizadas / grabación
+    read_key = make_key_reader(cap)
+
+    if args.headless:
+        # 🖥️ SIN VENTANA: sin cv2.imshow ni cv2.waitKey
+        sink = create_frame_sink(args.output, fps=cap.get(cv2.CAP_PROP_FPS) or 30.0)
+        runner = HeadlessRunner(app_manager, cap, sink)
+        runner.run(max_frames=args.max_frames)
+        runner.close()
+    elif args.pipeline == 'pipelined':
+        run_pipelined(app_manager, cap, read_key, poll_user_id)
+    else:
+        run_sequential(app_manager, cap, read_key, poll_user_id)
+
     cap.release()
+    if profiler.enabled and profiler.dump_path:
+        profiler.dump_json(profiler.dump_path)
     app_manager.cleanup() 
     print("Aplicación cerrada correctamente.")
 
@@ -179,5 +348,12 @@ if __name__ == "__main__":
         print(f"ERROR INESPERADO EN MAIN: {e}")
         import traceback
         traceback.print_exc()
+        # Últimos registros en memoria (incluye los de nivel DEBUG si estaban activos)
+        crash_log_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), LOG_CRASH_DUMP_PATH_REL_TO_PROJECT_ROOT)
+        if dump_ring_buffer(crash_log_path):
+            print(f"📝 Últimos registros guardados en {crash_log_path}")
     finally:
-        cv2.destroyAllWindows()
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass  # Sin soporte de ventanas (modo headless / OpenCV headless)
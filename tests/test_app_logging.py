@@ -0,0 +1,51 @@
+import sys
+import io
+import logging
+import pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from utils.app_logging import get_logger, every, RingBufferHandler
+
+
+class CountingArg:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "arg"
+
+
+def make_logger(name):
+    logger = get_logger(name)
+    logger.propagate = False
+    logger.handlers = []
+    handler = RingBufferHandler(capacity=3)
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_disabled_level_skips_formatting():
+    logger, handler = make_logger('tests.lazy')
+    logger.setLevel(logging.INFO)
+    arg = CountingArg()
+    logger.debug("valor %s", arg)
+    assert arg.calls == 0
+    assert len(handler.records) == 0
+
+
+def test_rate_limited_messages_and_ring_buffer():
+    logger, handler = make_logger('tests.rate')
+    logger.setLevel(logging.DEBUG)
+    for i in range(5):
+        logger.warning("sin píxeles %s", i, extra=every(60.0))
+    assert [r.getMessage() for r in handler.records] == ["sin píxeles 0"]
+
+    for i in range(5):
+        logger.info("mensaje %s", i)
+    # El buffer circular solo guarda los últimos `capacity` registros
+    assert [r.getMessage() for r in handler.records] == ["mensaje 2", "mensaje 3", "mensaje 4"]
+
+    out = io.StringIO()
+    handler.dump(out)
+    assert out.getvalue().count("\n") == 3
@@ -0,0 +1,29 @@
+import sys
+import pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from benchmarks.harness import Case, run_case, compare_reports, make_report
+
+
+def report(**medians):
+    return make_report([{'name': name, 'status': 'ok', 'median_ms': value} for name, value in medians.items()])
+
+
+def test_compare_flags_regressions_and_improvements():
+    baseline = report(detect=10.0, predict=5.0, pose=2.0, removed=1.0)
+    current = report(detect=12.0, predict=4.0, pose=2.1, added=3.0)
+
+    rows = {row['name']: row['status'] for row in compare_reports(baseline, current, threshold=0.10)}
+    assert rows == {'detect': 'regression', 'predict': 'improvement', 'pose': 'ok',
+                    'removed': 'missing', 'added': 'new'}
+
+
+def test_run_case_records_errors_instead_of_raising():
+    def broken():
+        raise RuntimeError("sin modelo")
+
+    result = run_case(Case('broken', broken, {}), warmup=0, repeat=1)
+    assert result['status'] == 'error'
+
+    result = run_case(Case('noop', lambda: None, {}, repeat=4), warmup=0, repeat=30)
+    assert result['status'] == 'ok' and result['n'] == 4
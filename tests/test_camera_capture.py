@@ -0,0 +1,69 @@
+import sys
+import pathlib
+import threading
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from core.camera_capture import ThreadedCameraCapture
+
+
+class FakeSource:
+    """Fuente que entrega `total` frames numerados y luego falla"""
+    def __init__(self, total, gate=None):
+        self.total = total
+        self.index = 0
+        self.gate = gate
+        self.released = False
+
+    def isOpened(self):
+        return not self.released
+
+    def read(self):
+        if self.gate is not None:
+            self.gate.acquire()
+        if self.index >= self.total:
+            return False, None
+        frame = np.full((4, 4, 3), self.index, dtype=np.uint8)
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        self.released = True
+
+
+def test_latest_frame_and_dropped_counter():
+    gate = threading.Semaphore(0)
+    cap = ThreadedCameraCapture(FakeSource(10, gate), buffer_size=2).start()
+
+    # Dejar que se capturen 5 frames sin consumirlos
+    for _ in range(5):
+        gate.release()
+    captured = None
+    while captured is None or captured.seq < 4:
+        captured = cap.read_latest(timeout=1.0)
+
+    assert captured.seq == 4
+    assert int(captured.frame[0, 0, 0]) == 4
+    stats = cap.get_stats()
+    assert stats['captured'] == 5
+    assert stats['dropped'] == stats['captured'] - stats['delivered']
+
+    for _ in range(10):
+        gate.release()
+    cap.release()
+
+
+def test_read_returns_false_when_stream_ends():
+    cap = ThreadedCameraCapture(FakeSource(3), buffer_size=4).start()
+    seqs = []
+    while True:
+        captured = cap.read_latest(timeout=2.0)
+        if captured is None:
+            break
+        seqs.append(captured.seq)
+
+    assert seqs == sorted(seqs)
+    assert cap.read() == (False, None)
+    assert not cap.isOpened()
+    cap.release()
@@ -0,0 +1,47 @@
+import sys
+import pathlib
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from core.capture_config import negotiate_capture_mode, configure_capture
+
+
+class FakeCamera:
+    """Cámara que solo soporta 640x480; cualquier otra resolución se ignora"""
+    def __init__(self):
+        self.props = {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480,
+                      cv2.CAP_PROP_FPS: 30, cv2.CAP_PROP_BUFFERSIZE: 4, cv2.CAP_PROP_FOURCC: 0}
+
+    def set(self, prop, value):
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            return False
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0)
+
+    def read(self):
+        return True, np.zeros((480, 640, 3), dtype=np.uint8)
+
+
+def test_negotiation_uses_real_resolution():
+    candidates = [
+        {'fourcc': 'MJPG', 'width': 1280, 'height': 720, 'fps': 30},
+        {'fourcc': 'MJPG', 'width': 640, 'height': 480, 'fps': 30},
+    ]
+    camera = FakeCamera()
+    mode = negotiate_capture_mode(camera, candidates, num_frames=5)
+
+    assert (mode['width'], mode['height']) == (640, 480)
+    assert mode['requested'] == candidates[1]
+    assert mode['fourcc'] == 'MJPG'
+    assert camera.get(cv2.CAP_PROP_BUFFERSIZE) == 1
+
+
+def test_stored_mode_skips_negotiation():
+    stored = {'fourcc': 'MJPG', 'width': 640, 'height': 480,
+              'requested': {'fourcc': 'MJPG', 'width': 640, 'height': 480, 'fps': 30}}
+    assert configure_capture(FakeCamera(), stored) is stored
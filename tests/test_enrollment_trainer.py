@@ -0,0 +1,100 @@
+import sys
+import time
+import pathlib
+
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import load_enrolled_faces, synthetic_users
+from core.enrollment_trainer import EnrollmentTrainer, DONE, FAILED
+from utils.image_utils import canonical_face
+from vision_processing.face_gallery import FaceGallery, load_face_images
+from vision_processing.face_samples import FaceSampleArchive, samples_path
+
+
+def wait_result(trainer, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = trainer.poll_result()
+        if result is not None:
+            return result
+        time.sleep(0.01)
+    raise TimeoutError("El registro no terminó")
+
+
+@pytest.mark.parametrize('engine, file_name', [('numpy', 'gallery.bin'), ('opencv', 'gallery.yml')])
+def test_streamed_user_is_swapped_in_and_saved(tmp_path, engine, file_name):
+    users = synthetic_users(load_enrolled_faces(str(ROOT), limit=10), 2, samples_per_user=5)
+    gallery = FaceGallery(path=str(tmp_path / 'models' / file_name), engine=engine)
+    gallery.add_user(0, users[0])
+    recognizer_before = gallery.recognizer
+    user_dir = tmp_path / 'luis'
+
+    trainer = EnrollmentTrainer(gallery, write_batch=2)
+    trainer.start_session('luis', 1, str(user_dir))
+    with pytest.raises(RuntimeError):
+        trainer.start_session('otro', 2, str(tmp_path / 'otro'))
+    for face in users[1]:
+        trainer.add_image(canonical_face(face))
+    # Hasta cerrar la sesión el login sigue con la galería anterior
+    assert gallery.recognizer is recognizer_before and gallery.labels == {0}
+    trainer.finish_session({'ana': 0, 'luis': 1})
+    result = wait_result(trainer)
+    trainer.shutdown()
+
+    assert result.ok and result.num_faces == 5 and trainer.poll_result() is None
+    assert trainer.progress().stage == DONE and not trainer.is_busy()
+    assert gallery.labels == {0, 1} and gallery.predict(users[1][0])[0] == 1
+    assert len(load_face_images(str(user_dir))) == 5 and (user_dir / 'samples.faces').exists()
+    loaded = FaceGallery(path=gallery.path, engine=engine)
+    assert loaded.load() and loaded.labels == {0, 1}
+
+
+def test_cancelled_session_leaves_the_gallery_untouched(tmp_path):
+    users = synthetic_users(load_enrolled_faces(str(ROOT), limit=10), 2, samples_per_user=2)
+    gallery = FaceGallery(path=str(tmp_path / 'gallery.bin'), engine='numpy')
+    gallery.add_user(0, users[0])
+
+    trainer = EnrollmentTrainer(gallery)
+    trainer.start_session('luis', 1, str(tmp_path / 'luis'))
+    trainer.add_image(canonical_face(users[1][0]))
+    trainer.cancel_session()
+    assert not trainer.in_session()
+    with pytest.raises(RuntimeError):
+        trainer.add_image(canonical_face(users[1][1]))
+
+    trainer.start_session('eva', 2, str(tmp_path / 'eva'))
+    trainer.finish_session({'ana': 0, 'eva': 2})
+    result = wait_result(trainer)
+    trainer.shutdown()
+    assert not result.ok and trainer.progress().stage == FAILED
+    assert gallery.labels == {0}
+
+
+def test_register_again_after_cancel_drops_the_old_faces(tmp_path):
+    users = synthetic_users(load_enrolled_faces(str(ROOT), limit=10), 3, samples_per_user=3)
+    gallery = FaceGallery(path=str(tmp_path / 'gallery.bin'), engine='numpy')
+    gallery.add_user(0, users[0])
+    user_dir = tmp_path / 'luis'
+
+    trainer = EnrollmentTrainer(gallery, write_batch=1)
+    trainer.start_session('luis', 1, str(user_dir))
+    for face in users[1]:
+        trainer.add_image(canonical_face(face))
+    trainer.cancel_session()
+    user_dir.mkdir(exist_ok=True)
+    (user_dir / 'face_000.jpg').write_bytes(b'resto de un registro antiguo')
+
+    trainer.start_session('luis', 1, str(user_dir))
+    for face in users[2][:2]:
+        trainer.add_image(canonical_face(face))
+    trainer.finish_session({'ana': 0, 'luis': 1})
+    result = wait_result(trainer)
+    trainer.shutdown()
+
+    assert result.ok and result.num_faces == 2
+    assert [f.name for f in user_dir.iterdir()] == ['samples.faces']
+    assert np.array_equal(FaceSampleArchive(samples_path(str(user_dir))).read(),
+                          np.stack([canonical_face(face) for face in users[2][:2]]))
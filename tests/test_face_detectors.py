@@ -0,0 +1,56 @@
+import sys
+import pathlib
+
+import cv2
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks import bench_face_detectors
+from benchmarks.fixtures import load_enrolled_faces, face_frame
+from core.config import FACE_DETECTOR_PROFILES
+from vision_processing import facial_auth
+from vision_processing.face_detectors import (
+    CascadeFaceDetector, create_face_detector, available_face_detectors, resolve_model_path
+)
+
+
+def test_cascade_profiles_use_their_parameters():
+    fast = create_face_detector(str(ROOT), 'haar_fast')
+    assert isinstance(fast, CascadeFaceDetector)
+    assert (fast.scale_factor, fast.min_neighbors) == (1.3, 5)
+
+    # Las cascadas que no están en assets/ se buscan entre las de OpenCV
+    assert resolve_model_path(str(ROOT), FACE_DETECTOR_PROFILES['haar_alt2']['model']) is not None
+    assert create_face_detector(str(ROOT), 'haar_alt2') is not None
+
+
+def test_missing_model_or_unknown_profile_is_not_available():
+    profiles = {'missing': {'backend': 'yunet', 'model': 'assets/face_data/dnn/no_existe.onnx'}}
+    assert create_face_detector(str(ROOT), 'missing', profiles) is None
+    assert create_face_detector(str(ROOT), 'no_existe') is None
+    assert 'missing' not in available_face_detectors(str(ROOT), profiles)
+
+
+def test_shared_detector_falls_back_to_default_profile():
+    assert facial_auth.load_face_detector(str(ROOT), 'dnn_yunet_no_existe')
+    assert facial_auth.face_detector.name == 'haar'
+
+
+def test_detectors_find_enrolled_faces():
+    face = load_enrolled_faces(str(ROOT))[0]
+    gray = cv2.cvtColor(face_frame(face), cv2.COLOR_BGR2GRAY)
+    for name, detector in available_face_detectors(str(ROOT)).items():
+        stats = bench_face_detectors.evaluate(detector, [gray])
+        assert stats['recall'] == 1.0, name
+        assert detector.detect(gray).shape[1] == 4
+
+
+def test_recommend_picks_fastest_accurate_profile():
+    results = [
+        {'status': 'ok', 'median_ms': 10.0, 'params': {'profile': 'fast', 'recall': 0.80}},
+        {'status': 'ok', 'median_ms': 20.0, 'params': {'profile': 'good', 'recall': 0.97}},
+        {'status': 'ok', 'median_ms': 40.0, 'params': {'profile': 'slow', 'recall': 1.00}},
+        {'status': 'skipped', 'params': {'profile': 'dnn'}},
+    ]
+    assert bench_face_detectors.recommend(results, 0.95)['params']['profile'] == 'good'
+    assert bench_face_detectors.recommend(results, 1.01) is None
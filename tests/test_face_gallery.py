@@ -0,0 +1,138 @@
+import sys
+import json
+import pathlib
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import load_enrolled_faces, synthetic_users, lbph_gallery
+from data_management.user_manager import UserManager
+from vision_processing.face_gallery import FaceGallery, load_face_images
+
+
+def enrolled_faces():
+    return load_enrolled_faces(str(ROOT), limit=10)
+
+
+def write_user_images(faces_dir, user_id, faces):
+    user_dir = faces_dir / user_id
+    user_dir.mkdir(parents=True)
+    for i, face in enumerate(faces):
+        cv2.imwrite(str(user_dir / f"face_{i:03d}.jpg"), face)
+
+
+def test_single_predict_matches_best_of_per_user_models():
+    faces = enrolled_faces()
+    users = synthetic_users(faces, 12, samples_per_user=3)
+    gallery = FaceGallery(path=str(ROOT / 'unused.yml'))
+    gallery.rebuild(users)
+    per_user = lbph_gallery(faces, 12, samples_per_user=3)
+
+    for face in faces[:5]:
+        query = cv2.resize(cv2.cvtColor(face, cv2.COLOR_BGR2GRAY), (100, 100))
+        expected = min((recognizer.predict(query)[1], int(user_id.split('_')[1]))
+                       for user_id, recognizer in per_user.items())
+        numeric_id, distance = gallery.predict(query)
+        assert numeric_id == expected[1]
+        assert np.isclose(distance, expected[0])
+
+
+@pytest.mark.parametrize('engine, file_name', [('numpy', 'gallery.bin'), ('opencv', 'gallery.yml')])
+def test_add_user_save_and_load(tmp_path, engine, file_name):
+    users = synthetic_users(enrolled_faces(), 3, samples_per_user=2)
+    gallery = FaceGallery(path=str(tmp_path / 'models' / file_name), engine=engine)
+    assert gallery.predict(users[0][0]) == (None, float('inf'))
+
+    gallery.add_user(7, users[0])
+    gallery.add_user(9, users[1])
+    gallery.save()
+
+    loaded = FaceGallery(path=gallery.path, engine=engine)
+    assert loaded.load()
+    assert len(loaded) == 2 and loaded.has_user(7) and loaded.has_user(9)
+    assert loaded.predict(users[1][0])[0] == 9
+
+
+def test_set_user_existing_rebuilds_from_disk(tmp_path):
+    users = synthetic_users(enrolled_faces(), 2, samples_per_user=2)
+    write_user_images(tmp_path, 'ana', users[0])
+    write_user_images(tmp_path, 'luis', users[1])
+    user_id_map = {'ana': 0, 'luis': 1}
+
+    gallery = FaceGallery(path=str(tmp_path / 'gallery.yml'))
+    gallery.rebuild_from_disk(str(tmp_path), user_id_map)
+    assert len(gallery) == 2
+
+    # Reentrenar 'ana' con nuevas imágenes: se reconstruye y se conserva 'luis'
+    assert gallery.set_user(0, load_face_images(str(tmp_path / 'ana')), str(tmp_path), user_id_map)
+    assert len(gallery) == 2
+    assert gallery.predict(users[1][0])[0] == 1
+
+
+def test_user_manager_retrain_adds_to_gallery(tmp_path):
+    users = synthetic_users(enrolled_faces(), 2, samples_per_user=2)
+    manager = UserManager(tmp_path)
+    manager.save_user_map({'ana': 0, 'luis': 1})
+    write_user_images(manager.embeddings_dir, 'ana', users[0])
+
+    # 'luis' se registra después: retrain lo añade a la galería existente
+    assert manager.get_gallery().has_user(0) and not manager.get_gallery().has_user(1)
+    write_user_images(manager.embeddings_dir, 'luis', users[1])
+    assert manager.retrain_user_model('luis')
+
+    gallery = FaceGallery(path=str(manager.gallery_file))
+    assert gallery.load()
+    assert gallery.has_user(0) and gallery.has_user(1)
+    assert manager.get_user_details('luis')['model_exists']
+    assert json.loads(manager.user_map_file.read_text()) == {'ana': 0, 'luis': 1}
+
+
+def test_user_manager_retrain_all_changed_only(tmp_path, capsys):
+    users = synthetic_users(enrolled_faces(), 3, samples_per_user=2)
+    manager = UserManager(tmp_path)
+    manager.save_user_map({'ana': 0, 'luis': 1, 'eva': 2})
+    write_user_images(manager.embeddings_dir, 'ana', users[0])
+    write_user_images(manager.embeddings_dir, 'luis', users[1])
+    assert manager.retrain_all(workers=2)
+    assert manager.manifest_file.exists()
+
+    gallery = FaceGallery(path=str(manager.gallery_file))
+    assert gallery.load() and gallery.labels == {0, 1}
+
+    capsys.readouterr()
+    assert manager.retrain_all(changed_only=True, workers=2)
+    assert "Nada que reentrenar" in capsys.readouterr().out
+
+    # Solo 'eva' tiene imágenes nuevas; 'ana' y 'luis' se conservan sin releerlas
+    write_user_images(manager.embeddings_dir, 'eva', users[2])
+    assert manager.retrain_all(changed_only=True, workers=2)
+    out = capsys.readouterr().out
+    assert "1 usuarios que reentrenar" in out and "eva" in out and "luis " not in out
+    gallery = FaceGallery(path=str(manager.gallery_file))
+    assert gallery.load() and gallery.labels == {0, 1, 2}
+    assert gallery.predict(users[2][0])[0] == 2
+
+
+def test_retrain_all_ignores_the_manifest_of_another_gallery(tmp_path, capsys):
+    users = synthetic_users(enrolled_faces(), 2, samples_per_user=2)
+    manager = UserManager(tmp_path)
+    user_map = {'ana': 0, 'luis': 1}
+    manager.save_user_map(user_map)
+    write_user_images(manager.embeddings_dir, 'ana', users[0])
+    write_user_images(manager.embeddings_dir, 'luis', users[1])
+    assert manager.retrain_all(workers=2)
+
+    # Galería guardada sin que se actualizaran sus huellas (p. ej. un corte entre los dos)
+    gallery = FaceGallery(path=str(manager.gallery_file))
+    assert gallery.load()
+    gallery.remove_user(1, str(manager.embeddings_dir), user_map)
+    gallery.save(user_map)
+
+    capsys.readouterr()
+    assert manager.retrain_all(changed_only=True, workers=2)
+    assert "se reentrena a todos" in capsys.readouterr().out
+    gallery = FaceGallery(path=str(manager.gallery_file))
+    assert gallery.load() and gallery.labels == {0, 1}
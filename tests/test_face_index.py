@@ -0,0 +1,124 @@
+import sys
+import pathlib
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks import bench_face_index
+from benchmarks.fixtures import load_enrolled_faces, synthetic_users
+from data_management.user_manager import UserManager
+from vision_processing.face_gallery import FaceGallery
+from vision_processing.face_index import IvfIndex
+from vision_processing.lbp_features import LbpRecognizer
+
+
+def enrolled_faces():
+    return load_enrolled_faces(str(ROOT), limit=10)
+
+
+def indexed_recognizer(num_users=10, samples_per_user=4, **index_args):
+    index_args.setdefault('nlist', 4)
+    index_args.setdefault('min_samples', 0)
+    recognizer = LbpRecognizer(index=IvfIndex(**index_args))
+    users = synthetic_users(enrolled_faces(), num_users, samples_per_user)
+    recognizer.train([face for samples in users.values() for face in samples],
+                     [numeric_id for numeric_id, samples in users.items() for _ in samples])
+    return recognizer, users
+
+
+def test_all_lists_give_the_exact_result_and_samples_stay_grouped():
+    recognizer, _ = indexed_recognizer()
+    queries = bench_face_index.make_queries(enrolled_faces(), count=10)
+    assert recognizer.index.is_active()
+    assert np.all(np.diff(recognizer.index.assignments) >= 0)
+
+    exact_labels, exact_distances = recognizer.search(queries, k=3, exact=True)
+    labels, distances = recognizer.search(queries, k=3, nprobe=4)
+    assert np.array_equal(labels, exact_labels)
+    assert np.allclose(distances, exact_distances)
+
+    # Con una sola lista solo se miran sus muestras
+    _, one_list = recognizer.search(queries, k=1, nprobe=1)
+    assert np.all(one_list[:, 0] >= exact_distances[:, 0] - 1e-9)
+
+
+def test_insert_and_delete_keep_the_index_in_sync():
+    recognizer, users = indexed_recognizer()
+    extra = synthetic_users(enrolled_faces(), 1, samples_per_user=3, seed=99)[0]
+    recognizer.update(extra, [42] * len(extra))
+    assert len(recognizer.index.assignments) == len(recognizer)
+    assert recognizer.index.trained_size == 40  # Insertar no recalcula los centroides
+    assert recognizer.predict(extra[0]) == (42, pytest.approx(0.0, abs=1e-3))
+
+    recognizer.remove_labels([42, 0])
+    assert len(recognizer.index.assignments) == len(recognizer) == 36
+    assert 42 not in recognizer.labels and 0 not in recognizer.labels
+    assert np.all(np.diff(recognizer.index.assignments) >= 0)
+
+
+def test_training_starts_at_min_samples_and_repeats_on_growth():
+    recognizer, users = indexed_recognizer(num_users=5, samples_per_user=4, min_samples=30, retrain_growth=2.0)
+    assert not recognizer.index.is_trained and not recognizer.index.is_active()
+    assert np.all(recognizer.index.assignments == -1)
+
+    more = synthetic_users(enrolled_faces(), 3, samples_per_user=4, seed=7)
+    for numeric_id, samples in more.items():
+        recognizer.update(samples, [100 + numeric_id] * len(samples))
+    assert recognizer.index.is_trained and recognizer.index.trained_size == 32
+
+    recognizer.update(users[0] * 8, [200] * 32)
+    assert recognizer.index.trained_size == 64
+
+
+def test_index_is_saved_with_the_gallery(tmp_path):
+    recognizer, _ = indexed_recognizer()
+    path = str(tmp_path / 'gallery.bin')
+    recognizer.write(path)
+
+    loaded = LbpRecognizer(index=IvfIndex(nlist=4, min_samples=0))
+    loaded.read(path)
+    assert np.array_equal(loaded.index.centroids, recognizer.index.centroids)
+    assert np.array_equal(loaded.index.assignments, recognizer.index.assignments)
+    queries = bench_face_index.make_queries(enrolled_faces(), count=5)
+    assert np.array_equal(loaded.search(queries, nprobe=1)[0], recognizer.search(queries, nprobe=1)[0])
+
+    # Una galería guardada sin índice se indexa al cargarla
+    recognizer.index = None
+    recognizer.write(path)
+    reloaded = LbpRecognizer(index=IvfIndex(nlist=4, min_samples=0))
+    reloaded.read(path)
+    assert reloaded.index.is_trained and len(reloaded.index.assignments) == len(reloaded)
+
+
+@pytest.mark.parametrize('engine', ['numpy', 'opencv'])
+def test_user_manager_delete_removes_user_from_gallery(tmp_path, monkeypatch, engine):
+    monkeypatch.setattr('data_management.user_manager.FACE_GALLERY_ENGINE', engine)
+    monkeypatch.setattr('builtins.input', lambda prompt='': 'y')
+    users = synthetic_users(enrolled_faces(), 2, samples_per_user=2)
+    manager = UserManager(tmp_path)
+    manager.save_user_map({'ana': 0, 'luis': 1})
+    for user_id, numeric_id in (('ana', 0), ('luis', 1)):
+        user_dir = manager.embeddings_dir / user_id
+        user_dir.mkdir(parents=True)
+        for i, face in enumerate(users[numeric_id]):
+            cv2.imwrite(str(user_dir / f"face_{i:03d}.jpg"), face)
+    manager._gallery = FaceGallery(str(manager.gallery_file), engine=engine)
+    manager._gallery.rebuild_from_disk(str(manager.embeddings_dir), manager.load_user_map())
+
+    assert manager.delete_user('ana')
+    assert not manager.get_gallery().has_user(0) and manager.get_gallery().has_user(1)
+    assert manager.get_gallery().predict(users[0][0])[0] == 1
+
+
+def test_recommend_picks_fastest_nprobe_with_enough_recall():
+    results = [
+        {'status': 'ok', 'median_ms': 20.0, 'params': {'nprobe': None, 'recall': 1.0}},
+        {'status': 'ok', 'median_ms': 2.0, 'params': {'nprobe': 1, 'recall': 0.70}},
+        {'status': 'ok', 'median_ms': 6.0, 'params': {'nprobe': 8, 'recall': 0.98}},
+        {'status': 'ok', 'median_ms': 11.0, 'params': {'nprobe': 16, 'recall': 1.0}},
+    ]
+    assert bench_face_index.recommend(results, 0.95)['params']['nprobe'] == 8
+    assert bench_face_index.recommend(results, 1.01) is None
@@ -0,0 +1,83 @@
+import sys
+import json
+import pathlib
+
+import cv2
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import load_enrolled_faces, synthetic_users, face_frame
+from core.config import FACE_CANONICAL_SIZE
+from utils.image_utils import crop_face, eye_centers, align_face, canonical_face, normalize_face
+from vision_processing.face_gallery import FaceGallery, load_face_images
+
+
+def enrolled_grays():
+    return [cv2.cvtColor(face, cv2.COLOR_BGR2GRAY) for face in load_enrolled_faces(str(ROOT), limit=10)]
+
+
+def eye_angle(face):
+    (lx, ly), (rx, ry) = eye_centers(face)
+    return np.degrees(np.arctan2(ry - ly, rx - lx))
+
+
+def test_crop_face_is_gray_and_clips_to_bounds():
+    frame = face_frame(load_enrolled_faces(str(ROOT), limit=1)[0])
+    assert np.array_equal(crop_face(frame, (100, 100, 100, 100)),
+                          cv2.cvtColor(frame[100:200, 100:200], cv2.COLOR_BGR2GRAY))
+
+    height, width = frame.shape[:2]
+    assert crop_face(frame, (width - 30, -10, 60, 40)).shape == (30, 30)
+    # Cajas pegadas al borde que se quedan sin área
+    assert crop_face(frame, (width, 50, 40, 40)) is None
+    assert crop_face(frame, (10, -40, 40, 40)) is None
+
+
+def test_normalize_face_has_canonical_size_for_any_crop():
+    face = enrolled_grays()[0]
+    for size in (48, 100, 260):
+        normalized = normalize_face(cv2.resize(face, (size, size)))
+        assert normalized.shape == FACE_CANONICAL_SIZE[::-1] and normalized.dtype == np.uint8
+
+
+def test_align_face_levels_the_eyes():
+    face = enrolled_grays()[0]
+    center = (face.shape[1] / 2.0, face.shape[0] / 2.0)
+    tilted = cv2.warpAffine(face, cv2.getRotationMatrix2D(center, 12, 1.0), face.shape[::-1],
+                            borderMode=cv2.BORDER_REPLICATE)
+    assert abs(eye_angle(tilted)) > 5
+    assert abs(eye_angle(align_face(tilted))) < 3
+
+    # Sin ojos no se toca
+    blank = np.full((100, 100), 128, dtype=np.uint8)
+    assert align_face(blank) is blank
+    assert canonical_face(blank, align=True).shape == FACE_CANONICAL_SIZE[::-1]
+
+
+def test_training_images_are_normalized_like_login(tmp_path):
+    user_dir = tmp_path / 'ana'
+    user_dir.mkdir()
+    face = canonical_face(enrolled_grays()[0])
+    cv2.imwrite(str(user_dir / 'face_000.jpg'), face)
+    stored = cv2.imread(str(user_dir / 'face_000.jpg'), cv2.IMREAD_GRAYSCALE)
+    assert np.array_equal(load_face_images(str(user_dir))[0], normalize_face(stored, align=False))
+
+
+def test_gallery_with_other_normalization_is_not_loaded(tmp_path):
+    users = synthetic_users(load_enrolled_faces(str(ROOT), limit=10), 2, samples_per_user=2)
+    gallery = FaceGallery(path=str(tmp_path / 'gallery.bin'), engine='numpy')
+    gallery.rebuild({numeric_id: [normalize_face(face) for face in faces] for numeric_id, faces in users.items()})
+    gallery.save()
+    assert FaceGallery(path=gallery.path, engine='numpy').load()
+
+    with open(gallery.meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    meta['normalization']['clahe_clip_limit'] += 1.0
+    with open(gallery.meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    assert not FaceGallery(path=gallery.path, engine='numpy').load()
+
+    # Galerías de antes de la normalización (sin .json)
+    pathlib.Path(gallery.meta_path).unlink()
+    assert not FaceGallery(path=gallery.path, engine='numpy').load()
@@ -0,0 +1,48 @@
+import sys
+import pathlib
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import load_enrolled_faces
+from vision_processing.face_quality import assess_face, is_usable, QUALITY_HINTS
+
+
+def enrolled_grays():
+    return [cv2.cvtColor(face, cv2.COLOR_BGR2GRAY) for face in load_enrolled_faces(str(ROOT), limit=10)]
+
+
+def test_enrolled_faces_are_usable():
+    for face in enrolled_grays():
+        quality = assess_face(face)
+        assert is_usable(quality), quality
+        assert quality.reason is None
+
+
+@pytest.mark.parametrize('degrade, reason', [
+    (lambda face: cv2.GaussianBlur(face, (11, 11), 0), 'sharpness'),
+    (lambda face: cv2.resize(face, (40, 40), interpolation=cv2.INTER_AREA), 'size'),
+    (lambda face: cv2.convertScaleAbs(face, beta=120), 'brightness'),  # Sobreexpuesta
+    (lambda face: cv2.convertScaleAbs(face, alpha=0.2, beta=100), 'contrast'),
+])
+def test_bad_crops_are_rejected_with_a_reason(degrade, reason):
+    quality = assess_face(degrade(enrolled_grays()[0]))
+    assert not is_usable(quality)
+    assert quality.reason == reason and reason in QUALITY_HINTS
+
+
+def test_half_face_crop_fails_symmetry():
+    face = enrolled_grays()[0]
+    # La cara solo en la mitad izquierda del recorte, el resto fondo liso
+    crop = np.full((face.shape[0], face.shape[1] * 2), 200, dtype=np.uint8)
+    crop[:, :face.shape[1]] = face
+    quality = assess_face(crop)
+    assert quality.symmetry < 0.7 and quality.reason == 'symmetry'
+
+
+def test_empty_crop():
+    quality = assess_face(np.zeros((0, 10), dtype=np.uint8))
+    assert quality.reason == 'size' and not is_usable(quality)
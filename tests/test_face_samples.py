@@ -0,0 +1,108 @@
+import sys
+import pathlib
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import load_enrolled_faces, synthetic_users
+from data_management.user_manager import UserManager
+from utils.image_utils import canonical_face
+from vision_processing.face_gallery import hash_face_images, load_face_images
+from vision_processing.face_samples import FaceSampleArchive, samples_path
+
+
+def crops(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (100, 100), dtype=np.uint8) for _ in range(count)]
+
+
+def test_append_and_memory_mapped_read(tmp_path):
+    archive = FaceSampleArchive(samples_path(str(tmp_path / 'ana')))
+    assert not archive.exists() and len(archive) == 0
+
+    faces = crops(5)
+    assert archive.append(faces[:3]) == 3
+    assert archive.append(faces[3:]) == 5
+    assert len(archive) == 5 and archive.header() == (100, 100, 5)
+
+    mapped = archive.read()
+    assert isinstance(mapped, np.memmap) and not mapped.flags.writeable
+    assert np.array_equal(mapped, np.stack(faces))
+    assert np.array_equal(archive.read(mmap=False), np.stack(faces))
+    with pytest.raises(ValueError):
+        archive.append([np.zeros((50, 50), dtype=np.uint8)])
+
+
+def test_reset_discards_all_faces(tmp_path):
+    archive = FaceSampleArchive(str(tmp_path / 'samples.faces'))
+    archive.append(crops(3))
+    archive.reset()
+    assert not archive.exists() and len(archive) == 0
+    archive.reset()  # Sin archivo no hace nada
+    # Tras vaciarlo admite caras de otro tamaño
+    faces = [np.zeros((80, 80), dtype=np.uint8)]
+    assert archive.append(faces) == 1 and archive.header() == (80, 80, 1)
+
+
+def test_interrupted_append_keeps_previous_faces(tmp_path):
+    archive = FaceSampleArchive(str(tmp_path / 'samples.faces'))
+    faces = crops(3)
+    archive.append(faces[:2])
+    # Restos de una escritura cortada antes de actualizar la cabecera
+    with open(archive.path, 'ab') as f:
+        f.write(b'\xff' * 1234)
+    assert len(archive) == 2
+    archive.append(faces[2:])
+    assert np.array_equal(archive.read(), np.stack(faces))
+
+
+def test_gallery_reads_archive_and_loose_images(tmp_path):
+    faces = crops(4)
+    user_dir = tmp_path / 'ana'
+    FaceSampleArchive(samples_path(str(user_dir))).append(faces[:3])
+    before = hash_face_images(str(user_dir))
+    cv2.imwrite(str(user_dir / 'face_003.jpg'), faces[3])
+    assert len(load_face_images(str(user_dir))) == 4
+    assert hash_face_images(str(user_dir)) != before
+
+
+def test_loose_png_faces_count_before_packing(tmp_path):
+    faces = crops(3)
+    manager = UserManager(tmp_path)
+    user_dir = manager.embeddings_dir / 'test'
+    user_dir.mkdir(parents=True)
+    for i, face in enumerate(faces[:2]):
+        cv2.imwrite(str(user_dir / f"{i}.png"), face)
+    assert manager.count_user_images('test') == 2
+    assert len(load_face_images(str(user_dir))) == 2
+    before = hash_face_images(str(user_dir))
+    cv2.imwrite(str(user_dir / '2.png'), faces[2])
+    assert hash_face_images(str(user_dir)) != before
+
+
+def test_pack_samples_migrates_loose_images(tmp_path):
+    users = synthetic_users(load_enrolled_faces(str(ROOT), limit=10), 2, samples_per_user=3)
+    manager = UserManager(tmp_path)
+    manager.save_user_map({'ana': 0, 'luis': 1})
+    ana_dir = manager.embeddings_dir / 'ana'
+    ana_dir.mkdir()
+    for i, face in enumerate(users[0]):
+        cv2.imwrite(str(ana_dir / f"face_{i:03d}.jpg"), canonical_face(face, align=False))
+    # Estructura antigua: images/<user_id>/ con PNG
+    legacy_dir = manager.embeddings_dir / 'images' / 'luis'
+    legacy_dir.mkdir(parents=True)
+    for i, face in enumerate(users[1]):
+        cv2.imwrite(str(legacy_dir / f"{i}.png"), face)
+    jpeg_faces = load_face_images(str(ana_dir))
+
+    assert manager.pack_face_samples()
+    assert not (manager.embeddings_dir / 'images').exists()
+    for user_id in ('ana', 'luis'):
+        user_dir = manager.embeddings_dir / user_id
+        assert [f.name for f in user_dir.iterdir()] == ['samples.faces']
+        assert manager.count_user_images(user_id) == 3
+    # Las caras empaquetadas son las mismas que se leían de los JPEG
+    assert all(np.array_equal(a, b) for a, b in zip(load_face_images(str(ana_dir)), jpeg_faces))
@@ -0,0 +1,108 @@
+import sys
+import pathlib
+
+import cv2
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import load_enrolled_faces
+from vision_processing import facial_auth
+from vision_processing.face_tracker import FaceTracker, box_iou
+
+FACE_PX = 200
+
+
+def background(seed=0):
+    rng = np.random.default_rng(seed)
+    return cv2.GaussianBlur(rng.integers(60, 200, (480, 640, 3), dtype=np.uint8), (7, 7), 0)
+
+
+def scene(bg, faces_at):
+    """Frame con cada cara (imagen, x, y) pegada sobre el fondo"""
+    frame = bg.copy()
+    for face, x, y in faces_at:
+        frame[y:y + FACE_PX, x:x + FACE_PX] = cv2.resize(face, (FACE_PX, FACE_PX))
+    return frame
+
+
+def setup_module(module):
+    assert facial_auth.load_cascade(str(ROOT))
+    module.FACE = load_enrolled_faces(str(ROOT))[0]
+
+
+def test_detection_only_on_keyframes_with_stable_id():
+    bg = background()
+    tracker = FaceTracker(detect_interval=5, max_gap_s=60)
+    seen_ids = set()
+    for k in range(20):
+        frame = scene(bg, [(FACE, 120 + 4 * k, 140)])
+        faces = tracker.update(frame)
+        assert len(faces) == 1
+        seen_ids.add(faces[0].track_id)
+        # La caja seguida coincide con la detección completa de ese frame
+        _, detected = facial_auth.detect_faces(frame)
+        assert box_iou(faces[0].box, detected[0]) > 0.8
+
+    assert len(seen_ids) == 1
+    assert tracker.get_stats() == {'detections': 4, 'tracked_frames': 16, 'tracks': 1}
+
+
+def test_interval_one_detects_every_frame():
+    bg = background()
+    tracker = FaceTracker(detect_interval=1, max_gap_s=60)
+    ids = [tracker.update(scene(bg, [(FACE, 150 + 2 * k, 140)]))[0].track_id for k in range(4)]
+    assert len(set(ids)) == 1
+    assert tracker.get_stats()['detections'] == 4
+
+
+def test_lost_face_triggers_detection():
+    bg = background()
+    tracker = FaceTracker(detect_interval=10, max_gap_s=60)
+    assert len(tracker.update(scene(bg, [(FACE, 150, 140)]))) == 1
+    # La cara desaparece: el flujo óptico no la encuentra y se detecta en ese mismo frame
+    assert tracker.update(bg.copy()) == []
+    assert tracker.get_stats()['detections'] == 2
+
+    # Al volver es una cara nueva
+    faces = tracker.update(scene(bg, [(FACE, 150, 140)]))
+    assert faces[0].track_id == 2
+
+
+def test_detect_faces_matches_facial_auth_signature():
+    tracker = FaceTracker()
+    frame = scene(background(), [(FACE, 150, 140)])
+    frame_with_rects, boxes, track_ids = tracker.detect_faces(frame)
+    expected_frame, expected_boxes = facial_auth.detect_faces(frame)
+    assert np.array_equal(boxes, expected_boxes)
+    assert np.array_equal(frame_with_rects, expected_frame)
+    assert track_ids == [1]
+
+
+def test_roi_detection_follows_previous_box_and_falls_back_on_miss():
+    bg = background()
+    gray, scale = facial_auth.prepare_gray(scene(bg, [(FACE, 150, 140)]))
+    full = facial_auth.detect_face_boxes(gray, scale)
+    assert len(full) == 1
+
+    detector = facial_auth.RoiFaceDetector(full_scan_interval=100)
+    moved, _ = facial_auth.prepare_gray(scene(bg, [(FACE, 170, 150)]))
+    boxes = detector.detect(moved, scale, full)
+    assert len(boxes) == 1
+    assert box_iou(boxes[0], facial_auth.detect_face_boxes(moved, scale)[0]) > 0.8
+    assert detector.get_stats() == {'full_scans': 0, 'roi_scans': 1}
+
+    # Sin cara en la ventana: barrido completo en la misma llamada
+    empty, _ = facial_auth.prepare_gray(bg)
+    assert len(detector.detect(empty, scale, boxes)) == 0
+    assert detector.get_stats() == {'full_scans': 1, 'roi_scans': 1}
+
+
+def test_roi_detection_rescans_full_frame_periodically():
+    gray, scale = facial_auth.prepare_gray(scene(background(), [(FACE, 150, 140)]))
+    detector = facial_auth.RoiFaceDetector(full_scan_interval=3)
+    boxes = ()
+    for _ in range(6):
+        boxes = detector.detect(gray, scale, boxes)
+        assert len(boxes) == 1
+    assert detector.get_stats() == {'full_scans': 2, 'roi_scans': 4}
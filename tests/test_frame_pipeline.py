@@ -0,0 +1,58 @@
+import sys
+import pathlib
+import threading
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from core.frame_pipeline import DropOldestQueue, FramePipeline
+
+
+class FakeCapture:
+    def __init__(self, total):
+        self.total = total
+        self.index = 0
+
+    def read(self):
+        if self.index >= self.total:
+            return False, None
+        frame = np.full((2, 2, 3), self.index, dtype=np.uint8)
+        self.index += 1
+        return True, frame
+
+
+class FakeAppManager:
+    def __init__(self):
+        self.state_lock = threading.RLock()
+
+    def analyze_frame(self, frame):
+        return {'state': 'TEST', 'value': int(frame[0, 0, 0])}
+
+    def process_frame(self, frame, analysis=None):
+        return frame + 1
+
+
+def test_drop_oldest_queue():
+    q = DropOldestQueue(maxsize=2)
+    for i in range(5):
+        q.put(i)
+    assert q.dropped == 3
+    assert q.get(timeout=0.1) == 3
+    assert q.get(timeout=0.1) == 4
+    assert q.get(timeout=0.05) is None
+
+
+def test_pipeline_delivers_frames_in_order_until_end():
+    pipeline = FramePipeline(FakeAppManager(), FakeCapture(20), queue_size=2).start()
+    seqs = []
+    while True:
+        result = pipeline.get_result(timeout=2.0)
+        if result is None:
+            break
+        assert int(result.display_frame[0, 0, 0]) == int(result.frame[0, 0, 0]) + 1
+        assert 'analysis_ms' in result.timings and 'render_ms' in result.timings
+        seqs.append(result.seq)
+    pipeline.stop()
+
+    assert pipeline.stream_ended
+    assert seqs and seqs == sorted(seqs)
@@ -0,0 +1,66 @@
+import sys
+import pathlib
+import json
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from core.frame_sources import (
+    ImageDirectorySource, SessionReplaySource, SessionRecorder, RecordingSource,
+    open_frame_source, NO_KEY
+)
+
+
+def _write_frames(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for value, name in enumerate(names):
+        cv2.imwrite(str(directory / name), np.full((8, 8, 3), value * 10, dtype=np.uint8))
+
+
+def test_image_directory_natural_order(tmp_path):
+    _write_frames(tmp_path, ["1.png", "2.png", "10.png"])
+    source = open_frame_source(str(tmp_path))
+    assert isinstance(source, ImageDirectorySource)
+
+    values = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        values.append(int(frame[0, 0, 0]))
+    assert values == [0, 10, 20]
+
+
+def test_session_replay_scripted_keys(tmp_path):
+    _write_frames(tmp_path / "frames", [f"{i:03d}.png" for i in range(4)])
+    manifest = {"fps": 30, "frames": "frames",
+                "keys": [{"frame": 1, "key": "l"}, {"frame": 1, "key": "ENTER"}, {"frame": 3, "key": 27}]}
+    (tmp_path / "session.json").write_text(json.dumps(manifest))
+
+    source = open_frame_source(f"replay:{tmp_path}")
+    assert isinstance(source, SessionReplaySource)
+
+    keys = []
+    while source.read()[0]:
+        key = source.poll_key()
+        while key != NO_KEY:
+            keys.append((source.frame_index, key))
+            key = source.poll_key()
+    assert keys == [(1, ord('l')), (1, 13), (3, 27)]
+
+
+def test_recording_roundtrip(tmp_path):
+    _write_frames(tmp_path / "input", ["0.png", "1.png"])
+    recording = RecordingSource(ImageDirectorySource(str(tmp_path / "input")),
+                                SessionRecorder(str(tmp_path / "session")))
+    recording.read()
+    recording.record_key(ord('r'))
+    recording.read()
+    recording.release()
+
+    replay = SessionReplaySource(str(tmp_path / "session"))
+    assert replay.read()[0]
+    assert replay.poll_key() == ord('r')
+    assert replay.read()[0]
+    assert not replay.read()[0]
@@ -0,0 +1,71 @@
+import sys
+import pathlib
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import load_enrolled_faces, synthetic_users
+from vision_processing.face_gallery import FaceGallery, read_lbph_model
+from vision_processing.gallery_store import ALIGNMENT, read_store, write_store
+
+
+def test_arrays_are_aligned_and_memory_mapped(tmp_path):
+    arrays = {'a': np.arange(7, dtype=np.uint8), 'b': np.ones((3, 5), dtype=np.float32),
+              'empty': np.empty(0, dtype=np.int32)}
+    path = str(tmp_path / 'store.bin')
+    write_store(path, arrays, {'users': ['ana']})
+
+    loaded, meta = read_store(path)
+    assert meta == {'users': ['ana']}
+    assert isinstance(loaded['b'], np.memmap) and not loaded['b'].flags.writeable
+    assert loaded['b'].ctypes.data % ALIGNMENT == 0
+    for name, array in arrays.items():
+        assert np.array_equal(loaded[name], array) and loaded[name].dtype == array.dtype
+
+    in_memory, _ = read_store(path, mmap=False)
+    assert not isinstance(in_memory['b'], np.memmap)
+
+
+def test_not_a_store_raises(tmp_path):
+    path = tmp_path / 'gallery.npz'
+    path.write_bytes(b'PK\x03\x04' + b'\0' * 32)
+    with pytest.raises(ValueError):
+        read_store(str(path))
+
+
+def test_mapped_gallery_can_be_modified_and_saved_again(tmp_path):
+    users = synthetic_users(load_enrolled_faces(str(ROOT), limit=10), 3, samples_per_user=2)
+    gallery = FaceGallery(path=str(tmp_path / 'gallery.bin'), engine='numpy')
+    gallery.rebuild(dict(list(users.items())[:2]))
+    gallery.save({'ana': 0, 'luis': 1})
+
+    loaded = FaceGallery(path=gallery.path, engine='numpy')
+    assert loaded.load()
+    assert isinstance(loaded.recognizer.counts, np.memmap)
+    assert loaded.recognizer.getLabelInfo(1) == 'luis'
+
+    numeric_id, faces = list(users.items())[2]
+    loaded.add_user(numeric_id, faces)
+    loaded.save()
+    reloaded = FaceGallery(path=gallery.path, engine='numpy')
+    assert reloaded.load() and reloaded.labels == {0, 1, numeric_id}
+
+
+def test_opencv_histograms_convert_to_the_same_distances(tmp_path):
+    users = synthetic_users(load_enrolled_faces(str(ROOT), limit=10), 2, samples_per_user=2)
+    faces = [face for samples in users.values() for face in samples]
+    labels = np.array([numeric_id for numeric_id, samples in users.items() for _ in samples], dtype=np.int32)
+    opencv = cv2.face.LBPHFaceRecognizer_create()
+    opencv.train(faces, labels)
+    model_path = str(tmp_path / 'ana.yml')
+    opencv.write(model_path)
+
+    histograms, model_labels = read_lbph_model(model_path)
+    gallery = FaceGallery(path=str(tmp_path / 'gallery.bin'), engine='numpy')
+    for numeric_id in np.unique(model_labels):
+        gallery.add_histograms(numeric_id, histograms[model_labels == numeric_id])
+    label, distance = gallery.recognizer.predict(faces[0])
+    assert label == labels[0] and np.isclose(distance, opencv.predict(faces[0])[1])
@@ -0,0 +1,66 @@
+import sys
+import pathlib
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from core.config import STATE_WELCOME, STATE_REGISTER_PROMPT_ID
+from core.headless_runner import HeadlessRunner, CallbackFrameSink
+
+
+class FakeSource:
+    def __init__(self, total):
+        self.total = total
+        self.index = 0
+
+    def read(self):
+        if self.index >= self.total:
+            return False, None
+        self.index += 1
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+class FakeAppManager:
+    def __init__(self):
+        self.current_state = STATE_REGISTER_PROMPT_ID
+        self.keys = []
+        self.user_ids = []
+
+    def get_current_state(self):
+        return self.current_state
+
+    def submit_user_id(self, user_id):
+        self.user_ids.append(user_id)
+        self.current_state = STATE_WELCOME
+        return True
+
+    def process_frame(self, frame, analysis=None):
+        return frame + 1
+
+    def handle_input(self, key, frame):
+        self.keys.append(key)
+
+
+def test_headless_runner_routes_inputs_and_frames():
+    app_manager = FakeAppManager()
+    received = []
+    runner = HeadlessRunner(app_manager, FakeSource(5), CallbackFrameSink(lambda seq, f: received.append(seq)))
+    runner.post_user_id("alice")
+    runner.post_key('l')
+
+    stats = runner.run()
+
+    assert stats['frames'] == 5
+    assert received == [0, 1, 2, 3, 4]
+    assert app_manager.user_ids == ["alice"]
+    assert app_manager.keys == [ord('l')]
+
+
+def test_headless_runner_stops_on_q_in_welcome():
+    app_manager = FakeAppManager()
+    app_manager.current_state = STATE_WELCOME
+    runner = HeadlessRunner(app_manager, FakeSource(100))
+    runner.post_key('q')
+
+    stats = runner.run()
+    assert stats['frames'] == 1
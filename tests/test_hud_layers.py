@@ -0,0 +1,46 @@
+import sys
+import pathlib
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from ui.hud_layers import HudLayerCache, HudText, CENTER, draw_texts
+
+
+ITEMS = (
+    HudText("Estado: LOGIN FACIAL", (10, 30), 0.7, (0, 255, 0), 2),
+    HudText("Presiona 'B' para Volver al Menu Inicial", (10, 90), 0.5, (200, 200, 0), 1),
+    HudText("Bienvenido! Presiona ENTER", (CENTER, CENTER), 0.8, (0, 255, 0), 2),
+)
+
+
+def random_frame(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+
+
+def test_cached_layer_matches_direct_puttext():
+    frame = random_frame()
+    expected = draw_texts(frame.copy(), ITEMS)
+
+    cache = HudLayerCache()
+    for _ in range(3):
+        result = cache.draw(frame.copy(), ITEMS)
+        assert np.array_equal(result, expected)
+    assert cache.get_stats() == {'layers': 1, 'hits': 2, 'misses': 1}
+
+    # Cambiar un texto crea otra capa en lugar de reutilizar la anterior
+    changed = ITEMS[:1] + (HudText("Coloca tu rostro...", (10, 90), 0.5, (200, 200, 0), 1),)
+    assert np.array_equal(cache.draw(frame.copy(), changed), draw_texts(frame.copy(), changed))
+    assert cache.get_stats()['misses'] == 2
+
+
+def test_layer_with_origin_is_clipped_to_frame():
+    frame = random_frame(1)
+    items = (HudText("=== CAR SHOWROOM ===", (50, 50), 0.8, (255, 255, 255), 2),)
+    cache = HudLayerCache()
+
+    expected = frame.copy()
+    cv2.putText(expected, items[0].text, (590 + 50, 400 + 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    result = cache.draw(frame.copy(), items, origin=(590, 400), canvas_size=(500, 350))
+    assert np.array_equal(result, expected)
@@ -0,0 +1,56 @@
+import sys
+import pathlib
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from vision_processing.identity_voting import IdentityVoter, PENDING, ACCEPTED, REJECTED
+
+THRESHOLD = 50
+
+
+def run_frames(voter, track_id, observations):
+    """Un frame por observación; solo se añaden las de los frames que tocan"""
+    queried = 0
+    for neighbours in observations:
+        if voter.should_recognize(track_id):
+            voter.add_observation(track_id, neighbours, THRESHOLD)
+            queried += 1
+    return queried
+
+
+def test_single_good_frame_is_not_enough():
+    voter = IdentityVoter(min_frames=3, max_frames=6, frame_stride=1, min_agreement=0.6)
+    identity = voter.add_observation(1, [(7, 20.0)], THRESHOLD)
+    assert identity.status == PENDING and identity.numeric_id == 7
+
+    run_frames(voter, 1, [[(7, 30.0), (2, 60.0)], [(7, 40.0), (2, 45.0)]])
+    identity = voter.identity(1)
+    assert identity.status == ACCEPTED and identity.numeric_id == 7
+    assert identity.votes == 3 and identity.distance == (20.0 + 30.0 + 40.0) / 3
+
+
+def test_accepted_identity_is_cached_for_the_track():
+    voter = IdentityVoter(min_frames=2, max_frames=4, frame_stride=2)
+    queried = run_frames(voter, 5, [[(1, 10.0)]] * 20)
+    assert queried == 2 and voter.queries == 2
+    assert voter.identity(5).status == ACCEPTED
+
+    voter.prune([6])
+    assert voter.identity(5).status == PENDING and voter.identity(5).samples == 0
+
+
+def test_one_frame_false_accept_is_outvoted():
+    voter = IdentityVoter(min_frames=3, max_frames=5, frame_stride=1, min_agreement=0.6)
+    # Un frame muy parecido a otro usuario, el resto por encima del umbral
+    run_frames(voter, 1, [[(3, 30.0), (4, 70.0)]] + [[(4, 65.0), (3, 80.0)]] * 4)
+    identity = voter.identity(1)
+    assert identity.status == REJECTED and identity.samples == 5
+
+
+def test_rejected_track_is_retried_later():
+    voter = IdentityVoter(min_frames=1, max_frames=2, frame_stride=1, retry_frames=5)
+    run_frames(voter, 1, [[]] * 2)
+    assert voter.identity(1).status == REJECTED
+    assert run_frames(voter, 1, [[(2, 10.0)]] * 4) == 0
+    assert run_frames(voter, 1, [[(2, 10.0)]]) == 1
+    assert voter.identity(1).status == ACCEPTED and voter.identity(1).numeric_id == 2
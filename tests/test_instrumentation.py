@@ -0,0 +1,34 @@
+import sys
+import json
+import pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from utils.instrumentation import StageProfiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = StageProfiler(enabled=False)
+    with profiler.stage('face_detect'):
+        pass
+    profiler.frame_done()
+    assert profiler.summary() == {}
+
+
+def test_summary_percentiles_per_state(tmp_path):
+    profiler = StageProfiler(enabled=True, window_size=100)
+    profiler.set_state('LOGIN')
+    for ms in range(1, 101):
+        profiler.record('lbph_predict', float(ms))
+    profiler.set_state('MAIN_MENU_AR')
+    profiler.record('pose_estimate', 2.0)
+
+    summary = profiler.summary()
+    stats = summary['LOGIN']['stages']['lbph_predict']
+    assert stats['count'] == 100
+    assert abs(stats['p50'] - 50.5) < 1e-6
+    assert stats['p95'] > stats['p50']
+    assert 'lbph_predict' not in summary['MAIN_MENU_AR']['stages']
+
+    path = tmp_path / 'profile.json'
+    profiler.dump_json(str(path))
+    assert json.loads(path.read_text())['states']['MAIN_MENU_AR']['stages']['pose_estimate']['count'] == 1
@@ -0,0 +1,113 @@
+import sys
+import pathlib
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import load_enrolled_faces, synthetic_users
+from vision_processing.face_gallery import FaceGallery
+from vision_processing.lbp_features import LbpExtractor, LbpRecognizer, chi_square, uniform_lut
+
+
+def gallery_samples(num_users=8, samples_per_user=3):
+    users = synthetic_users(load_enrolled_faces(str(ROOT), limit=10), num_users, samples_per_user)
+    faces = [face for samples in users.values() for face in samples]
+    labels = np.array([numeric_id for numeric_id, samples in users.items() for _ in samples], dtype=np.int32)
+    return faces, labels
+
+
+def queries():
+    faces = load_enrolled_faces(str(ROOT), limit=10)
+    # Tamaños distintos de los de la galería, como los recortes del login
+    return [cv2.resize(cv2.cvtColor(face, cv2.COLOR_BGR2GRAY), (size, size))
+            for face, size in zip(faces[:4], (100, 87, 130, 164))]
+
+
+def test_histograms_match_opencv_lbph():
+    faces, labels = gallery_samples()
+    opencv = cv2.face.LBPHFaceRecognizer_create()
+    opencv.train(faces, labels)
+    expected = np.array(opencv.getHistograms()).reshape(len(faces), -1)
+    assert np.allclose(LbpExtractor().histograms(np.stack(faces)), expected, atol=1e-6)
+
+
+def test_predict_matches_opencv_lbph():
+    faces, labels = gallery_samples()
+    opencv = cv2.face.LBPHFaceRecognizer_create()
+    opencv.train(faces, labels)
+    recognizer = LbpRecognizer()
+    recognizer.train(faces, labels)
+
+    for query in queries():
+        expected_label, expected_distance = opencv.predict(query)
+        label, distance = recognizer.predict(query)
+        assert label == expected_label
+        assert np.isclose(distance, expected_distance, rtol=1e-4)
+
+
+@pytest.mark.parametrize('mapping', ['full', 'uniform'])
+def test_batched_search_matches_brute_force(mapping):
+    faces, labels = gallery_samples()
+    recognizer = LbpRecognizer(mapping=mapping)
+    recognizer.train(faces[:10], labels[:10])
+    recognizer.update(faces[10:], labels[10:])
+    gallery = recognizer.extractor.histograms(faces)
+
+    found_labels, found_distances = recognizer.search(queries(), k=3)
+    for query_histogram, row_labels, row_distances in zip(recognizer.extractor.histograms(queries()),
+                                                          found_labels, found_distances):
+        expected = chi_square(gallery, query_histogram)
+        nearest = np.argsort(expected)[:3]
+        assert np.allclose(row_distances, expected[nearest], rtol=1e-4)
+        assert list(row_labels) == list(labels[nearest])
+
+
+def test_uniform_mapping_has_59_bins():
+    lut = uniform_lut(8)
+    assert lut.max() + 1 == 59
+    assert lut[0b00001111] != lut[0b00000000] and lut[0b01010101] == 58
+    assert LbpExtractor(mapping='uniform').dim == 8 * 8 * 59
+
+
+def test_remove_labels_write_and_read(tmp_path):
+    faces, labels = gallery_samples(num_users=3)
+    recognizer = LbpRecognizer()
+    recognizer.train(faces, labels)
+    recognizer.remove_labels([1])
+    assert 1 not in recognizer.getLabels() and len(recognizer) == len(faces) - 3
+
+    path = str(tmp_path / 'gallery.bin')
+    recognizer.write(path)
+    loaded = LbpRecognizer()
+    loaded.read(path)
+    assert np.array_equal(loaded.labels, recognizer.labels)
+    assert loaded.predict(queries()[0]) == recognizer.predict(queries()[0])
+    with pytest.raises(ValueError):
+        LbpRecognizer(mapping='uniform').read(path)
+
+
+def test_gallery_search_returns_top_k_per_face():
+    faces, labels = gallery_samples()
+    gallery = FaceGallery(path=str(ROOT / 'unused.bin'), engine='numpy')
+    gallery.rebuild({int(label): [face for face, l in zip(faces, labels) if l == label] for label in set(labels)})
+
+    results = gallery.search(queries(), k=4)
+    assert len(results) == len(queries())
+    for query, neighbours in zip(queries(), results):
+        assert len(neighbours) == 4
+        assert [distance for _, distance in neighbours] == sorted(distance for _, distance in neighbours)
+        assert neighbours[0] == pytest.approx(gallery.predict(query))
+
+
+def test_distance_of_a_sample_to_itself_is_zero():
+    faces, labels = gallery_samples(num_users=2)
+    recognizer = LbpRecognizer()
+    recognizer.train(faces, labels)
+    histograms = recognizer.extractor.histograms(np.stack(faces))
+    for column, histogram in enumerate(histograms):
+        distances = recognizer.distances(histogram)
+        assert abs(distances[column]) < 1e-9
+        assert np.allclose(distances, chi_square(histograms, histogram), rtol=1e-5, atol=1e-6)
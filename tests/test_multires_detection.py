@@ -0,0 +1,72 @@
+import sys
+import pathlib
+
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.fixtures import marker_frame, face_frame, load_enrolled_faces, camera_matrix_for
+from utils.image_utils import downscale_for_analysis, upscale_points
+from vision_processing import facial_auth, marker_detection
+
+FRAME_1080P = (1920, 1080)
+MARKER_PX = 300
+
+
+def marker_ground_truth(frame_size=FRAME_1080P, marker_px=MARKER_PX):
+    """Esquinas reales del primer marcador de marker_frame (centros de píxel)"""
+    margin = marker_px // 6
+    slot = marker_px + 2 * margin
+    x0 = 40 + margin - 0.5
+    y0 = (frame_size[1] - slot) // 2 + margin - 0.5
+    return np.array([[x0, y0], [x0 + marker_px, y0], [x0 + marker_px, y0 + marker_px], [x0, y0 + marker_px]])
+
+
+def test_downscale_and_upscale_roundtrip():
+    image = np.zeros((1080, 1920), dtype=np.uint8)
+    small, scale = downscale_for_analysis(image, 960)
+    assert small.shape == (540, 960) and scale == 0.5
+    assert downscale_for_analysis(image, None) == (image, 1.0)
+    assert downscale_for_analysis(image, 4000)[1] == 1.0
+
+    # El centro del píxel 0 reducido cubre los píxeles 0 y 1 originales
+    assert np.allclose(upscale_points(np.array([[0.0, 0.0]]), scale), [[0.5, 0.5]])
+
+
+def test_downscaled_marker_corners_are_refined_at_full_resolution():
+    assert marker_detection.initialize_aruco_detector()
+    frame = marker_frame((24,), frame_size=FRAME_1080P, marker_px=MARKER_PX)
+    truth = marker_ground_truth()
+
+    corners, ids, _, _ = marker_detection.detect_markers(frame, max_width=960, subpix=False)
+    assert list(ids.flatten()) == [24]
+    coarse_error = np.abs(corners[0].reshape(4, 2) - truth).max()
+
+    corners, ids, _, _ = marker_detection.detect_markers(frame, max_width=960, subpix=True)
+    refined_error = np.abs(corners[0].reshape(4, 2) - truth).max()
+    assert refined_error < 0.25
+    assert refined_error < coarse_error
+
+
+def test_downscaled_pose_matches_full_resolution():
+    assert marker_detection.initialize_aruco_detector()
+    frame = marker_frame((24,), frame_size=FRAME_1080P, marker_px=MARKER_PX)
+    camera_matrix = camera_matrix_for(FRAME_1080P)
+    dist_coeffs = np.zeros((4, 1), dtype=np.float32)
+
+    _, _, _, _, tvecs_full = marker_detection.detect_and_estimate_pose(
+        frame, camera_matrix, dist_coeffs, max_width=None)
+    _, ids, _, _, tvecs = marker_detection.detect_and_estimate_pose(
+        frame, camera_matrix, dist_coeffs, max_width=960)
+    assert list(ids.flatten()) == [24]
+    assert np.allclose(tvecs, tvecs_full, rtol=0.01)
+
+
+def test_downscaled_face_boxes_are_in_full_resolution_pixels():
+    assert facial_auth.load_cascade(str(ROOT))
+    frame = face_frame(load_enrolled_faces(str(ROOT))[0], frame_size=FRAME_1080P, face_px=500)
+
+    _, faces_full = facial_auth.detect_faces(frame, max_width=None)
+    _, faces = facial_auth.detect_faces(frame, max_width=640)
+    assert len(faces_full) == 1 and len(faces) == 1
+    assert np.abs(np.asarray(faces[0]) - np.asarray(faces_full[0])).max() <= 8
@@ -2,6 +2,7 @@ import sys
 import pathlib
 import types
 import json
+import threading
 
 # Ensure project root is on sys.path
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
@@ -16,6 +17,9 @@ sys.modules['ar_rendering.ar_menu'].ARMenu = type('ARMenu', (), {})
 sys.modules['ar_rendering.scene_renderer'].PyrenderModelViewer = type('PyrenderModelViewer', (), {})
 
 from core.app_manager import AppManager
+from core.config import STATE_REGISTER_CAPTURE, STATE_REGISTER_PROMPT_ID
+from core.enrollment_trainer import EnrollmentTrainer
+from vision_processing.face_gallery import FaceGallery
 
 
 def test_load_user_id_map(tmp_path):
@@ -30,3 +34,24 @@ def test_load_user_id_map(tmp_path):
 
     assert result == {"alice": 1, "bob": 2}
     assert all(isinstance(v, int) for v in result.values())
+
+
+def test_second_submit_while_registering_is_rejected(tmp_path):
+    am = object.__new__(AppManager)
+    am.state_lock = threading.RLock()
+    am.project_root_path = str(tmp_path)
+    am.user_id_map = {"alice": 0}
+    am.next_user_numeric_id = 1
+    am.user_id_for_registration = None
+    am.current_state = STATE_REGISTER_PROMPT_ID
+    am.enrollment_trainer = EnrollmentTrainer(FaceGallery(str(tmp_path / "gallery.bin"), engine='numpy'))
+
+    assert am.submit_user_id("bob")
+    assert am.current_state == STATE_REGISTER_CAPTURE
+    # Un segundo ID (p. ej. de un guion headless) con la sesión de 'bob' abierta
+    am.current_state = STATE_REGISTER_PROMPT_ID
+    assert not am.submit_user_id("carol")
+    am.enrollment_trainer.shutdown()
+
+    assert am.current_state == STATE_REGISTER_PROMPT_ID
+    assert am.user_id_for_registration == "bob"
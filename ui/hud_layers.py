@@ -0,0 +1,140 @@
+# ARCar_Showroom/ui/hud_layers.py
+"""
+Capas de HUD cacheadas.
+
+Los textos del HUD casi nunca cambian entre frames, pero cv2.putText los
+rasteriza cada vez. Aquí cada conjunto de textos se rasteriza una sola vez
+en una capa (overlay + máscara recortados a su rectángulo) y en cada frame
+se compone con un único cv2.copyTo. La capa se vuelve a rasterizar solo si
+cambia algún texto, color o posición, o el tamaño del frame.
+
+Como putText se usa sin antialiasing (LINE_8), el resultado es idéntico
+píxel a píxel a dibujar los textos directamente.
+"""
+from collections import OrderedDict, namedtuple
+
+import cv2
+import numpy as np
+
+from core.config import HUD_CACHE_ENABLED, HUD_CACHE_MAX_LAYERS
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Usar CENTER como coordenada x y/o y de `org` para centrar el texto en el lienzo
+CENTER = 'center'
+
+HudText = namedtuple('HudText', ['text', 'org', 'scale', 'color', 'thickness'], defaults=(1,))
+
+
+def _resolve_org(item, canvas_size):
+    """Convertir CENTER en coordenadas reales (getTextSize solo al rasterizar)"""
+    x, y = item.org
+    if x == CENTER or y == CENTER:
+        (text_w, _), _ = cv2.getTextSize(item.text, FONT, item.scale, item.thickness)
+        width, height = canvas_size
+        if x == CENTER:
+            x = (width - text_w) // 2
+        if y == CENTER:
+            y = height // 2
+    return int(x), int(y)
+
+
+def draw_texts(frame, items):
+    """Dibujar los textos directamente (sin caché)"""
+    canvas_size = (frame.shape[1], frame.shape[0])
+    for item in items:
+        cv2.putText(frame, item.text, _resolve_org(item, canvas_size), FONT, item.scale, item.color, item.thickness)
+    return frame
+
+
+class HudLayer:
+    """Textos ya rasterizados: recorte del overlay, su máscara y su posición en el lienzo"""
+    __slots__ = ('x', 'y', 'overlay', 'mask')
+
+    def __init__(self, canvas_size, items):
+        width, height = canvas_size
+        overlay = np.zeros((height, width, 3), dtype=np.uint8)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        for item in items:
+            org = _resolve_org(item, canvas_size)
+            cv2.putText(overlay, item.text, org, FONT, item.scale, item.color, item.thickness)
+            cv2.putText(mask, item.text, org, FONT, item.scale, 255, item.thickness)
+
+        points = cv2.findNonZero(mask)
+        if points is None:
+            self.x = self.y = 0
+            self.overlay = self.mask = None
+            return
+        x, y, w, h = cv2.boundingRect(points)
+        self.x, self.y = x, y
+        self.overlay = np.ascontiguousarray(overlay[y:y + h, x:x + w])
+        self.mask = np.ascontiguousarray(mask[y:y + h, x:x + w])
+
+    def apply(self, frame, origin=(0, 0)):
+        """Componer la capa sobre `frame` con su esquina del lienzo en `origin`"""
+        if self.overlay is None:
+            return frame
+        h, w = self.mask.shape
+        x0, y0 = origin[0] + self.x, origin[1] + self.y
+        # Recortar a los límites del frame
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x0 + w, frame.shape[1]), min(y0 + h, frame.shape[0])
+        if fx0 >= fx1 or fy0 >= fy1:
+            return frame
+        lx0, ly0 = fx0 - x0, fy0 - y0
+        lx1, ly1 = lx0 + (fx1 - fx0), ly0 + (fy1 - fy0)
+        cv2.copyTo(self.overlay[ly0:ly1, lx0:lx1], self.mask[ly0:ly1, lx0:lx1], frame[fy0:fy1, fx0:fx1])
+        return frame
+
+
+class HudLayerCache:
+    """
+    Caché LRU de capas indexada por (tamaño del lienzo, textos). Cualquier
+    cambio en los textos produce otra clave, así que nunca se usa una capa
+    desactualizada; las que dejan de usarse salen por LRU.
+    """
+
+    def __init__(self, max_layers=HUD_CACHE_MAX_LAYERS, enabled=HUD_CACHE_ENABLED):
+        self.max_layers = max_layers
+        self.enabled = enabled
+        self._layers = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_layer(self, canvas_size, items):
+        key = (canvas_size, items)
+        layer = self._layers.get(key)
+        if layer is not None:
+            self._layers.move_to_end(key)
+            self.hits += 1
+            return layer
+
+        self.misses += 1
+        layer = HudLayer(canvas_size, items)
+        self._layers[key] = layer
+        if len(self._layers) > self.max_layers:
+            self._layers.popitem(last=False)
+        return layer
+
+    def draw(self, frame, items, origin=(0, 0), canvas_size=None):
+        """
+        Dibujar `items` (tupla de HudText) sobre `frame`. Las coordenadas son
+        relativas a `origin`; `canvas_size` (ancho, alto) es el área que
+        ocupan (por defecto, el frame completo).
+        """
+        if not items:
+            return frame
+        if canvas_size is None:
+            canvas_size = (frame.shape[1], frame.shape[0])
+        if not self.enabled:
+            if origin == (0, 0) and canvas_size == (frame.shape[1], frame.shape[0]):
+                return draw_texts(frame, items)
+            # Mismo resultado que la capa: rasterizar y componer sin guardarla
+            return HudLayer(canvas_size, tuple(items)).apply(frame, origin)
+        return self.get_layer(canvas_size, tuple(items)).apply(frame, origin)
+
+    def clear(self):
+        self._layers.clear()
+
+    def get_stats(self):
+        return {'layers': len(self._layers), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,173 @@
+# ARCar_Showroom/utils/app_logging.py
+"""
+Logging de la aplicación sobre el módulo estándar `logging`.
+
+Uso:
+    from utils.app_logging import get_logger, every
+    logger = get_logger(__name__)
+
+    logger.debug("Posición marcador: %s", T)                 # formateo diferido
+    logger.warning("Sin píxeles visibles", extra=every(2.0))  # como mucho 1 cada 2 s
+
+- Nivel por módulo: los loggers se llaman como el módulo ('core.app_manager',
+  'ar_rendering.scene_renderer'...), así que un nivel puesto en 'ar_rendering'
+  se aplica a todo el paquete.
+- Los mensajes por debajo del nivel se descartan antes de formatearlos: un
+  logger.debug() desactivado cuesta una comparación de enteros.
+- Los registros que pasan el nivel se guardan también en un buffer circular en
+  memoria que se puede volcar a disco cuando algo va mal (dump_ring_buffer).
+"""
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+from core.config import (
+    LOG_LEVEL, LOG_MODULE_LEVELS, LOG_FORMAT, LOG_FILE,
+    LOG_RATE_LIMIT_S, LOG_RING_BUFFER_SIZE
+)
+
+TEXT_FORMAT = "%(asctime)s.%(msecs)03d %(levelname)-7s %(name)s: %(message)s"
+DATE_FORMAT = "%H:%M:%S"
+
+# Atributos estándar de LogRecord (el resto son campos de `extra`)
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def every(seconds=LOG_RATE_LIMIT_S):
+    """`extra` para limitar un mensaje repetitivo a uno cada `seconds` segundos"""
+    return {'rate_limit_s': seconds}
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Deja pasar como mucho un registro cada `rate_limit_s` segundos por punto de
+    llamada (logger + plantilla del mensaje). Solo afecta a los registros que
+    llevan extra=every(...). Al volver a emitir se indica cuántos se omitieron.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._last_emit = {}   # {(logger, plantilla): (instante, omitidos)}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        interval = getattr(record, 'rate_limit_s', None)
+        if not interval:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._last_emit.get(key, (None, 0))
+            if last is not None and now - last < interval:
+                self._last_emit[key] = (last, suppressed + 1)
+                return False
+            self._last_emit[key] = (now, 0)
+
+        record.suppressed = suppressed
+        if suppressed:
+            record.msg = f"{record.msg} (+{suppressed} omitidos)"
+        return True
+
+
+class RingBufferHandler(logging.Handler):
+    """Guarda los últimos `capacity` registros en memoria"""
+
+    def __init__(self, capacity=LOG_RING_BUFFER_SIZE):
+        super().__init__(level=logging.NOTSET)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        # Los argumentos se formatean aquí para no retener objetos grandes (frames)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        self.records.append(record)
+
+    def dump(self, stream, formatter=None):
+        formatter = formatter or self.formatter or logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+        for record in list(self.records):
+            stream.write(formatter.format(record) + "\n")
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos de `extra` incluidos"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value if isinstance(value, (int, float, str, bool, type(None))) else repr(value)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+_rate_limiter = RateLimitFilter()
+ring_buffer = RingBufferHandler()
+_configured = False
+
+
+def get_logger(name):
+    """Logger del módulo `name` con el limitador de frecuencia instalado"""
+    logger = logging.getLogger(name)
+    if _rate_limiter not in logger.filters:
+        logger.addFilter(_rate_limiter)
+    return logger
+
+
+def _parse_level(level):
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Nivel de log desconocido: {level}")
+    return value
+
+
+def setup_logging(level=LOG_LEVEL, module_levels=None, log_format=LOG_FORMAT, log_file=LOG_FILE):
+    """
+    Configurar los handlers (consola, fichero opcional y buffer circular) y
+    los niveles. `module_levels` se combina con LOG_MODULE_LEVELS.
+    Se puede llamar más de una vez: los handlers anteriores se sustituyen.
+    """
+    global _configured
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if _configured or isinstance(handler, RingBufferHandler):
+            root.removeHandler(handler)
+
+    formatter = JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout), ring_buffer]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+
+    root.setLevel(_parse_level(level))
+    levels = dict(LOG_MODULE_LEVELS)
+    levels.update(module_levels or {})
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(_parse_level(module_level))
+
+    _configured = True
+
+
+def dump_ring_buffer(path):
+    """Volcar los últimos registros guardados en memoria a `path`"""
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            ring_buffer.dump(f)
+    except OSError as e:
+        logging.getLogger(__name__).error("No se pudo volcar el buffer de log a %s: %s", path, e)
+        return False
+    return True
@@ -1 +1,154 @@
+# ARCar_Showroom/utils/image_utils.py
+"""
+Utilidades de imagen compartidas por los módulos de visión.
+"""
+import os
 
+import cv2
+import numpy as np
+
+from core.config import (
+    FACE_CANONICAL_SIZE, FACE_CLAHE_CLIP_LIMIT, FACE_CLAHE_TILE_GRID, FACE_ALIGN_EYES, FACE_ALIGN_MAX_ANGLE
+)
+
+
+def downscale_for_analysis(image, max_width):
+    """
+    Reducir `image` para que su ancho no pase de `max_width` (INTER_AREA).
+    Devuelve (imagen_reducida, escala); escala = ancho_reducido / ancho_original.
+    Si `max_width` es None/0 o la imagen ya es más estrecha, se devuelve tal cual con escala 1.0.
+    """
+    width = image.shape[1]
+    if not max_width or width <= max_width:
+        return image, 1.0
+    scale = max_width / float(width)
+    height = max(1, int(round(image.shape[0] * scale)))
+    return cv2.resize(image, (int(max_width), height), interpolation=cv2.INTER_AREA), scale
+
+
+def upscale_points(points, scale):
+    """
+    Llevar puntos (x, y) de la imagen reducida a la original. Se usan centros
+    de píxel, igual que cv2.resize: x_orig = (x + 0.5) / escala - 0.5.
+    """
+    if scale == 1.0:
+        return points
+    return (points + 0.5) / scale - 0.5
+
+
+def box_iou(a, b):
+    """Intersección sobre unión de dos rectángulos (x, y, w, h)"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+# --- Normalización de caras (registro, reentrenamiento y login) ---
+
+_clahe = None
+_eye_detector = None
+
+
+def crop_face(frame, box):
+    """
+    Recorte en gris de `box` (x, y, w, h) del frame limpio (sin rectángulos
+    dibujados), limitado al frame. None si no queda nada (caja fuera del frame
+    o recortada en el borde hasta ancho/alto 0).
+    """
+    x, y, w, h = (int(v) for v in box)
+    height, width = frame.shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + w), min(height, y + h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    roi = frame[y0:y1, x0:x1]
+    if roi.ndim == 3:
+        roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    return roi
+
+
+def _get_eye_detector():
+    """Haar de ojos que trae OpenCV (False si no está disponible)"""
+    global _eye_detector
+    if _eye_detector is None:
+        path = os.path.join(cv2.data.haarcascades, 'haarcascade_eye.xml') if hasattr(cv2, 'data') else ''
+        detector = cv2.CascadeClassifier(path) if os.path.exists(path) else None
+        _eye_detector = detector if detector is not None and not detector.empty() else False
+    return _eye_detector
+
+
+def eye_centers(face):
+    """
+    Centros (izquierdo, derecho) de los ojos en una cara ya recortada, o None.
+    Se buscan en la mitad superior; se queda el ojo más grande de cada lado.
+    """
+    detector = _get_eye_detector()
+    if not detector:
+        return None
+    height, width = face.shape[:2]
+    upper = face[:height // 2 + height // 10]
+    eyes = detector.detectMultiScale(upper, scaleFactor=1.1, minNeighbors=4,
+                                     minSize=(max(1, width // 8), max(1, width // 8)))
+    left, right = None, None
+    for (x, y, w, h) in eyes:
+        center = (x + w / 2.0, y + h / 2.0, w * h)
+        if center[0] < width / 2.0:
+            if left is None or center[2] > left[2]:
+                left = center
+        elif right is None or center[2] > right[2]:
+            right = center
+    if left is None or right is None:
+        return None
+    return left[:2], right[:2]
+
+
+def align_face(face, max_angle=FACE_ALIGN_MAX_ANGLE):
+    """Girar la cara para dejar los ojos en horizontal (sin cambios si no se encuentran o el giro es excesivo)"""
+    eyes = eye_centers(face)
+    if eyes is None:
+        return face
+    (lx, ly), (rx, ry) = eyes
+    angle = np.degrees(np.arctan2(ry - ly, rx - lx))
+    if abs(angle) > max_angle:
+        return face
+    matrix = cv2.getRotationMatrix2D(((lx + rx) / 2.0, (ly + ry) / 2.0), angle, 1.0)
+    return cv2.warpAffine(face, matrix, face.shape[1::-1], flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def canonical_face(gray_face, size=FACE_CANONICAL_SIZE, align=FACE_ALIGN_EYES):
+    """Tamaño canónico (y ojos en horizontal si `align`). Es lo que se guarda en el registro."""
+    interpolation = cv2.INTER_AREA if gray_face.shape[1] > size[0] else cv2.INTER_LINEAR
+    face = cv2.resize(gray_face, size, interpolation=interpolation)
+    return align_face(face) if align else face
+
+
+def equalize_face(face):
+    """Igualar la iluminación con CLAHE (histograma por bloques con límite de contraste)"""
+    global _clahe
+    if _clahe is None:
+        _clahe = cv2.createCLAHE(clipLimit=FACE_CLAHE_CLIP_LIMIT, tileGridSize=FACE_CLAHE_TILE_GRID)
+    return _clahe.apply(face)
+
+
+def normalize_face(gray_face, align=FACE_ALIGN_EYES):
+    """
+    Cara lista para LBPH: tamaño canónico (y alineada) + CLAHE. La usan el
+    login y el entrenamiento, así que el coste por cara está acotado y las
+    características son comparables.
+    """
+    return equalize_face(canonical_face(gray_face, align=align))
+
+
+def face_normalization_signature():
+    """Parámetros de la normalización (si cambian, las galerías guardadas no sirven)"""
+    return {
+        'size': list(FACE_CANONICAL_SIZE),
+        'clahe_clip_limit': FACE_CLAHE_CLIP_LIMIT,
+        'clahe_tile_grid': list(FACE_CLAHE_TILE_GRID),
+        'align_eyes': FACE_ALIGN_EYES,
+    }
@@ -0,0 +1,197 @@
+# ARCar_Showroom/utils/instrumentation.py
+"""
+Medición de tiempos por etapa del camino caliente (detección, reconocimiento,
+pose, render, HUD...).
+
+Uso:
+    from utils.instrumentation import profiler
+
+    with profiler.stage('face_detect'):
+        faces = face_cascade.detectMultiScale(...)
+
+Con el profiler desactivado, stage() devuelve siempre el mismo contexto
+vacío, así que el coste es una comprobación de atributo por llamada.
+Cada muestra se guarda en una ventana deslizante por (estado, etapa) y se
+calculan p50/p95/p99 bajo demanda; los FPS se miden por estado de AppManager.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from core.config import (
+    PROFILING_ENABLED, PROFILING_OVERLAY, PROFILING_WINDOW_SIZE,
+    PROFILING_DUMP_PATH, PROFILING_DUMP_INTERVAL_S
+)
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class _NullStage:
+    """Contexto vacío para cuando el profiler está desactivado"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _StageTimer:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+
+class StageProfiler:
+    """Tiempos por etapa con percentiles en ventana deslizante y FPS por estado"""
+
+    def __init__(self, enabled=PROFILING_ENABLED, window_size=PROFILING_WINDOW_SIZE,
+                 overlay=PROFILING_OVERLAY, dump_path=PROFILING_DUMP_PATH,
+                 dump_interval_s=PROFILING_DUMP_INTERVAL_S):
+        self.enabled = enabled
+        self.window_size = window_size
+        self.overlay = overlay
+        self.dump_path = dump_path
+        self.dump_interval_s = dump_interval_s
+
+        self.current_state = None
+        self._samples = {}        # {(estado, etapa): deque[ms]}
+        self._frame_times = {}    # {estado: deque[instante fin de frame]}
+        self._lock = threading.Lock()
+        self._last_dump = time.monotonic()
+
+    def configure(self, enabled=None, overlay=None, dump_path=None, dump_interval_s=None):
+        """Cambiar la configuración en caliente (p. ej. desde argumentos de main.py)"""
+        if enabled is not None:
+            self.enabled = enabled
+        if overlay is not None:
+            self.overlay = overlay
+        if dump_path is not None:
+            self.dump_path = dump_path
+        if dump_interval_s is not None:
+            self.dump_interval_s = dump_interval_s
+
+    def stage(self, name):
+        """Contexto que mide la duración de la etapa `name`"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self, name)
+
+    def record(self, name, elapsed_ms):
+        """Registrar una muestra (ms) para la etapa `name` en el estado actual"""
+        key = (self.current_state, name)
+        samples = self._samples.get(key)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(key, deque(maxlen=self.window_size))
+        samples.append(elapsed_ms)
+
+    def set_state(self, state):
+        self.current_state = state
+
+    def frame_done(self):
+        """Marcar el final de un frame del estado actual (para los FPS y el volcado periódico)"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        times = self._frame_times.get(self.current_state)
+        if times is None:
+            with self._lock:
+                times = self._frame_times.setdefault(self.current_state, deque(maxlen=self.window_size))
+        times.append(now)
+
+        if self.dump_path and now - self._last_dump >= self.dump_interval_s:
+            self._last_dump = now
+            self.dump_json(self.dump_path)
+
+    def _fps(self, state):
+        times = self._frame_times.get(state)
+        if not times or len(times) < 2:
+            return 0.0
+        elapsed = times[-1] - times[0]
+        return (len(times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """{estado: {'fps': x, 'stages': {etapa: {'count', 'mean', 'p50', 'p95', 'p99'}}}}"""
+        with self._lock:
+            items = [(key, list(samples)) for key, samples in self._samples.items()]
+            states = set(self._frame_times.keys())
+
+        result = {}
+        for state in states:
+            result[str(state)] = {'fps': self._fps(state), 'stages': {}}
+        for (state, name), values in items:
+            if not values:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            entry = result.setdefault(str(state), {'fps': self._fps(state), 'stages': {}})
+            entry['stages'][name] = {
+                'count': len(values),
+                'mean': float(np.mean(values)),
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99),
+            }
+        return result
+
+    def dump_json(self, path):
+        """Escribir el resumen como JSON (escritura atómica)"""
+        data = {'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'), 'states': self.summary()}
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("⚠️ No se pudo escribir %s: %s", path, e)
+
+    def draw_overlay(self, frame):
+        """Dibujar FPS y p50/p95 de cada etapa del estado actual en la esquina inferior derecha"""
+        if not (self.enabled and self.overlay):
+            return frame
+        stats = self.summary().get(str(self.current_state))
+        if not stats:
+            return frame
+
+        lines = [f"FPS {stats['fps']:.1f}"]
+        for name, values in sorted(stats['stages'].items()):
+            lines.append(f"{name}: {values['p50']:.1f}/{values['p95']:.1f} ms")
+
+        x = frame.shape[1] - 230
+        y = frame.shape[0] - 15 * len(lines) - 50
+        for i, line in enumerate(lines):
+            cv2.putText(frame, line, (x, y + 15 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
+        return frame
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._frame_times.clear()
+
+
+# Instancia global compartida por todos los módulos
+profiler = StageProfiler()
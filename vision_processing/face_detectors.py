@@ -0,0 +1,173 @@
+# ARCar_Showroom/vision_processing/face_detectors.py
+"""
+Backends intercambiables de detección de caras.
+
+Todos reciben una imagen en gris y devuelven un array (N, 4) int32 de
+rectángulos (x, y, w, h) en píxeles de esa imagen, como detectMultiScale.
+Los perfiles disponibles están en core.config.FACE_DETECTOR_PROFILES:
+    'cascade' -> cv2.CascadeClassifier (Haar o LBP) con sus parámetros
+    'yunet'   -> cv2.FaceDetectorYN con un modelo ONNX local
+    'dnn_ssd' -> red SSD de OpenCV (Caffe) con su prototxt local
+Los backends DNN solo se crean si el fichero del modelo existe.
+"""
+import os
+
+import cv2
+import numpy as np
+
+from core.config import FACE_DETECTOR_PROFILES
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+NO_FACES = np.empty((0, 4), dtype=np.int32)
+
+
+def resolve_model_path(project_root_path, path):
+    """
+    Ruta absoluta de un modelo: tal cual si es absoluta, relativa a la raíz del
+    proyecto, o entre las cascadas que trae OpenCV (cv2.data). None si no existe.
+    """
+    if not path:
+        return None
+    candidates = [path] if os.path.isabs(path) else [os.path.join(project_root_path, path)]
+    if hasattr(cv2, 'data'):
+        candidates.append(os.path.join(cv2.data.haarcascades, os.path.basename(path)))
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _filter_by_size(boxes, min_size=None, max_size=None):
+    """Aplicar min/max size a backends que no los admiten de forma nativa"""
+    if len(boxes) == 0:
+        return NO_FACES
+    keep = np.ones(len(boxes), dtype=bool)
+    if min_size is not None:
+        keep &= (boxes[:, 2] >= min_size[0]) & (boxes[:, 3] >= min_size[1])
+    if max_size is not None:
+        keep &= (boxes[:, 2] <= max_size[0]) & (boxes[:, 3] <= max_size[1])
+    return boxes[keep]
+
+
+class FaceDetector:
+    """Interfaz común de los backends"""
+    name = 'base'
+
+    def detect(self, gray, min_size=None, max_size=None):
+        raise NotImplementedError
+
+
+class CascadeFaceDetector(FaceDetector):
+    """Haar o LBP con los parámetros de detectMultiScale del perfil"""
+
+    def __init__(self, name, model_path, scale_factor=1.1, min_neighbors=5):
+        self.name = name
+        self.model_path = model_path
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.cascade = cv2.CascadeClassifier(model_path)
+        if self.cascade.empty():
+            raise ValueError(f"No se pudo cargar la cascada {model_path}")
+
+    def detect(self, gray, min_size=None, max_size=None):
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=tuple(min_size) if min_size is not None else (0, 0),
+            maxSize=tuple(max_size) if max_size is not None else (0, 0)
+        )
+        return np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+
+
+class YuNetFaceDetector(FaceDetector):
+    """cv2.FaceDetectorYN (ONNX). Trabaja en color: el gris se replica a 3 canales."""
+
+    def __init__(self, name, model_path, score_threshold=0.7, nms_threshold=0.3):
+        self.name = name
+        self.model_path = model_path
+        self.detector = cv2.FaceDetectorYN.create(model_path, "", (320, 320), score_threshold, nms_threshold)
+        self.input_size = None
+
+    def detect(self, gray, min_size=None, max_size=None):
+        height, width = gray.shape[:2]
+        if self.input_size != (width, height):
+            self.detector.setInputSize((width, height))
+            self.input_size = (width, height)
+        _, faces = self.detector.detect(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+        if faces is None:
+            return NO_FACES
+        return _filter_by_size(np.round(faces[:, :4]).astype(np.int32), min_size, max_size)
+
+
+class SsdFaceDetector(FaceDetector):
+    """Detector SSD ResNet-10 de OpenCV (res10_300x300) con cv2.dnn"""
+
+    def __init__(self, name, model_path, config_path, confidence=0.5, input_size=(300, 300)):
+        self.name = name
+        self.model_path = model_path
+        self.net = cv2.dnn.readNet(model_path, config_path)
+        self.confidence = confidence
+        self.input_size = tuple(input_size)
+
+    def detect(self, gray, min_size=None, max_size=None):
+        height, width = gray.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), 1.0, self.input_size,
+                                     (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward().reshape(-1, 7)
+        detections = detections[detections[:, 2] >= self.confidence]
+        if len(detections) == 0:
+            return NO_FACES
+        corners = np.clip(detections[:, 3:7], 0.0, 1.0) * np.array([width, height, width, height])
+        boxes = np.column_stack([corners[:, :2], corners[:, 2:] - corners[:, :2]])
+        return _filter_by_size(np.round(boxes).astype(np.int32), min_size, max_size)
+
+
+def create_face_detector(project_root_path, profile_name, profiles=FACE_DETECTOR_PROFILES):
+    """
+    Crear el detector del perfil `profile_name`. Devuelve None (con aviso en el
+    log) si el perfil no existe o falta su modelo.
+    """
+    profile = profiles.get(profile_name)
+    if profile is None:
+        logger.error("Perfil de detector de caras desconocido: %s", profile_name)
+        return None
+
+    model_path = resolve_model_path(project_root_path, profile.get('model'))
+    if model_path is None:
+        logger.warning("Detector '%s' no disponible: no se encontró el modelo %s", profile_name, profile.get('model'))
+        return None
+
+    backend = profile['backend']
+    try:
+        if backend == 'cascade':
+            return CascadeFaceDetector(profile_name, model_path, profile.get('scale_factor', 1.1),
+                                       profile.get('min_neighbors', 5))
+        if backend == 'yunet':
+            return YuNetFaceDetector(profile_name, model_path, profile.get('score_threshold', 0.7),
+                                     profile.get('nms_threshold', 0.3))
+        if backend == 'dnn_ssd':
+            config_path = resolve_model_path(project_root_path, profile.get('config'))
+            if config_path is None:
+                logger.warning("Detector '%s' no disponible: no se encontró %s", profile_name, profile.get('config'))
+                return None
+            return SsdFaceDetector(profile_name, model_path, config_path, profile.get('confidence', 0.5))
+    except (cv2.error, ValueError, AttributeError) as e:
+        logger.error("No se pudo crear el detector '%s': %s", profile_name, e)
+        return None
+
+    logger.error("Backend de detector de caras desconocido: %s", backend)
+    return None
+
+
+def available_face_detectors(project_root_path, profiles=FACE_DETECTOR_PROFILES):
+    """Detectores de todos los perfiles cuyo modelo está disponible: {nombre: detector}"""
+    detectors = {}
+    for profile_name in profiles:
+        detector = create_face_detector(project_root_path, profile_name, profiles)
+        if detector is not None:
+            detectors[profile_name] = detector
+    return detectors
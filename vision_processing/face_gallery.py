@@ -0,0 +1,337 @@
+# ARCar_Showroom/vision_processing/face_gallery.py
+"""
+Galería LBPH única con todos los usuarios registrados.
+
+Un solo reconocedor guarda los histogramas de todas las caras etiquetados con
+el ID numérico de user_id_map.json. predict() calcula el histograma de la cara
+una sola vez y devuelve el usuario más cercano y su distancia, lo mismo que
+quedarse con el mínimo de un predict por usuario pero sin repetir el trabajo.
+
+El motor ('numpy' o 'opencv', FACE_GALLERY_ENGINE) decide quién guarda los
+histogramas: LbpRecognizer (vision_processing/lbp_features.py, una matriz y
+distancias por lotes, fichero .bin) o cv2.face.LBPHFaceRecognizer (.yml).
+Los dos dan las mismas distancias con LBP_MAPPING='full'. Con el motor
+'numpy' y galerías grandes la búsqueda pasa por un índice IVF
+(vision_processing/face_index.py), que se guarda en el mismo fichero; ese
+fichero es binario y se abre con memmap (vision_processing/gallery_store.py).
+
+Las caras de cada usuario se leen de su archivo samples.faces
+(vision_processing/face_samples.py) o, si no se ha migrado, de sus JPEG.
+Las caras que entran o se consultan pasan antes por utils.image_utils
+(normalize_face). Junto a la galería se guarda <fichero>.json con los
+parámetros de esa normalización: si cambian, la galería no se carga y se
+reconstruye desde las imágenes.
+
+Para entrenar sin parar el login, se modifica una copy() de la galería (o se
+le juntan, con merge, las muestras de otra) y la galería en uso la adopta
+(adopt) al terminar.
+
+El reconocedor de OpenCV permite añadir muestras (update) pero no quitarlas:
+al reentrenar o borrar un usuario la galería se reconstruye desde las
+imágenes en disco. El motor 'numpy' quita directamente sus muestras.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+from core.config import (
+    FACE_GALLERY_ENGINE, FACE_GALLERY_MMAP, LBP_MAPPING,
+    FACE_INDEX_ENABLED, FACE_INDEX_MIN_SAMPLES, FACE_INDEX_NLIST, FACE_INDEX_NPROBE,
+    FACE_INDEX_COARSE_POOL, FACE_INDEX_KMEANS_ITERATIONS, FACE_INDEX_RETRAIN_GROWTH
+)
+from utils.app_logging import get_logger
+from utils.image_utils import normalize_face, face_normalization_signature
+from vision_processing.face_index import IvfIndex
+from vision_processing.face_samples import FaceSampleArchive, SAMPLES_FILE_NAME, FACE_IMAGE_EXTENSIONS, samples_path
+from vision_processing.lbp_features import LbpRecognizer
+
+logger = get_logger(__name__)
+
+FACE_GALLERY_ENGINES = ('numpy', 'opencv')
+
+
+def load_face_images(user_dir):
+    """
+    Caras guardadas de un usuario, normalizadas como en el login (ya están
+    recortadas y alineadas): las de su archivo samples.faces (memmap, sin
+    decodificar) y, si aún no se migraron, las imágenes sueltas por nombre.
+    """
+    faces = []
+    if not os.path.isdir(user_dir):
+        return faces
+    archive = FaceSampleArchive(samples_path(user_dir))
+    if archive.exists():
+        faces.extend(normalize_face(face, align=False) for face in archive.read())
+    for name in sorted(os.listdir(user_dir)):
+        if name.lower().endswith(FACE_IMAGE_EXTENSIONS):
+            face = cv2.imread(os.path.join(user_dir, name), cv2.IMREAD_GRAYSCALE)
+            if face is not None:
+                faces.append(normalize_face(face, align=False))
+    return faces
+
+
+def hash_face_images(user_dir):
+    """Huella (sha256) de las caras de un usuario: nombres y contenido de sus ficheros, en orden"""
+    digest = hashlib.sha256()
+    if os.path.isdir(user_dir):
+        for name in sorted(os.listdir(user_dir)):
+            if name.lower().endswith(FACE_IMAGE_EXTENSIONS) or name == SAMPLES_FILE_NAME:
+                digest.update(name.encode('utf-8'))
+                with open(os.path.join(user_dir, name), 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def gallery_build_signature(engine=FACE_GALLERY_ENGINE):
+    """Parámetros con los que se construye la galería (si cambian, hay que reentrenar a todos)"""
+    return {'engine': engine, 'lbp_mapping': LBP_MAPPING, 'normalization': face_normalization_signature()}
+
+
+def read_lbph_model(path):
+    """(histogramas (N, dim), etiquetas (N,)) de un modelo cv2.face.LBPHFaceRecognizer guardado (.yml)"""
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(path)
+    labels = np.asarray(recognizer.getLabels(), dtype=np.int32).ravel()
+    histograms = np.asarray(recognizer.getHistograms(), dtype=np.float32).reshape(len(labels), -1)
+    return histograms, labels
+
+
+def create_index():
+    if not FACE_INDEX_ENABLED:
+        return None
+    return IvfIndex(nlist=FACE_INDEX_NLIST, nprobe=FACE_INDEX_NPROBE, min_samples=FACE_INDEX_MIN_SAMPLES,
+                    iterations=FACE_INDEX_KMEANS_ITERATIONS, retrain_growth=FACE_INDEX_RETRAIN_GROWTH)
+
+
+def create_recognizer(engine=FACE_GALLERY_ENGINE):
+    if engine == 'numpy':
+        return LbpRecognizer(mapping=LBP_MAPPING, index=create_index(), index_pool=FACE_INDEX_COARSE_POOL)
+    if engine == 'opencv':
+        return cv2.face.LBPHFaceRecognizer_create()
+    raise ValueError(f"Motor de galería desconocido: {engine}")
+
+
+class FaceGallery:
+    def __init__(self, path, engine=FACE_GALLERY_ENGINE):
+        self.path = path
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.recognizer = create_recognizer(engine)
+        self.labels = set()
+
+    def __len__(self):
+        """Número de usuarios en la galería"""
+        return len(self.labels)
+
+    def has_user(self, numeric_id):
+        return int(numeric_id) in self.labels
+
+    @property
+    def meta_path(self):
+        return self.path + '.json'
+
+    def load(self):
+        """Cargar la galería guardada. False si no existe, no se puede leer o usa otra normalización."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                normalization = json.load(f).get('normalization')
+        except (OSError, ValueError):
+            normalization = None
+        if normalization != face_normalization_signature():
+            logger.warning("La galería %s no es de la normalización de caras actual; hay que reconstruirla", self.path)
+            return False
+        try:
+            recognizer = create_recognizer(self.engine)
+            if isinstance(recognizer, LbpRecognizer):
+                recognizer.read(self.path, mmap=FACE_GALLERY_MMAP)
+            else:
+                recognizer.read(self.path)
+        except (cv2.error, ValueError, KeyError, OSError) as e:
+            logger.warning("No se pudo leer la galería %s: %s", self.path, e)
+            return False
+        with self.lock:
+            self.recognizer = recognizer
+            self.labels = set(int(label) for label in np.asarray(recognizer.getLabels()).ravel())
+        logger.info("Galería LBPH cargada: %s usuarios (%s)", len(self.labels), self.path)
+        return True
+
+    def copy(self):
+        """
+        Galería independiente con las mismas muestras, para modificarla sin
+        bloquear a quien consulta esta (ver adopt). Con el motor 'numpy' las
+        matrices se comparten hasta que una de las dos cambia.
+        """
+        clone = FaceGallery(self.path, self.engine)
+        with self.lock:
+            if isinstance(self.recognizer, LbpRecognizer):
+                clone.recognizer = self.recognizer.copy()
+            elif self.labels:
+                # LBPHFaceRecognizer no se puede copiar: pasar por un fichero temporal
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    tmp_path = os.path.join(tmp_dir, 'gallery.yml')
+                    self.recognizer.write(tmp_path)
+                    clone.recognizer.read(tmp_path)
+            clone.labels = set(self.labels)
+        return clone
+
+    def adopt(self, other):
+        """Pasar a usar las muestras de `other` (normalmente una copy() ya modificada)"""
+        with other.lock:
+            recognizer, labels = other.recognizer, set(other.labels)
+        with self.lock:
+            self.recognizer, self.labels = recognizer, labels
+
+    def save(self, user_id_map=None):
+        """Guardar la galería; con `user_id_map` se guarda también el user_id de cada etiqueta"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.lock:
+            if not self.labels:
+                for path in (self.path, self.meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return
+            for user_id, numeric_id in (user_id_map or {}).items():
+                if int(numeric_id) in self.labels:
+                    self.recognizer.setLabelInfo(int(numeric_id), user_id)
+            root, ext = os.path.splitext(self.path)
+            tmp_path = root + '.tmp' + ext
+            self.recognizer.write(tmp_path)
+            if isinstance(self.recognizer, LbpRecognizer):
+                # Windows no deja sustituir un fichero abierto con memmap
+                self.recognizer.release_mapping()
+            os.replace(tmp_path, self.path)
+            with open(self.meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'normalization': face_normalization_signature()}, f)
+        logger.info("Galería LBPH guardada en %s", self.path)
+
+    def add_user(self, numeric_id, faces):
+        """Añadir las caras de un usuario nuevo sin reentrenar al resto"""
+        if not faces:
+            return False
+        labels = np.full(len(faces), int(numeric_id), dtype=np.int32)
+        with self.lock:
+            if self.labels:
+                self.recognizer.update(faces, labels)
+            else:
+                self.recognizer.train(faces, labels)
+            self.labels.add(int(numeric_id))
+        return True
+
+    def add_histograms(self, numeric_id, histograms):
+        """Añadir un usuario a partir de histogramas LBPH ya calculados (solo motor 'numpy')"""
+        if not self._can_remove():
+            raise ValueError("Solo la galería del motor 'numpy' admite histogramas")
+        if len(histograms) == 0:
+            return False
+        with self.lock:
+            self.recognizer.add_histograms(histograms, np.full(len(histograms), int(numeric_id), dtype=np.int32))
+            self.labels.add(int(numeric_id))
+        return True
+
+    @classmethod
+    def from_recognizer(cls, path, recognizer):
+        """Galería con un reconocedor ya entrenado (p. ej. el de un proceso de retrain-all)"""
+        gallery = cls(path, 'numpy' if isinstance(recognizer, LbpRecognizer) else 'opencv')
+        gallery.recognizer = recognizer
+        gallery.labels = set(int(label) for label in np.asarray(recognizer.getLabels()).ravel())
+        return gallery
+
+    def merge(self, *others):
+        """Añadir todas las muestras de otras galerías del motor 'numpy' (sin recalcular histogramas)"""
+        if not self._can_remove():
+            raise ValueError("Solo la galería del motor 'numpy' puede juntar galerías")
+        recognizers, labels = [], set()
+        for other in others:
+            with other.lock:
+                recognizers.append(other.recognizer)
+                labels |= other.labels
+        if not labels:
+            return False
+        with self.lock:
+            self.recognizer.merge(*recognizers)
+            self.labels |= labels
+        return True
+
+    def rebuild(self, faces_by_id):
+        """Reentrenar la galería completa a partir de {numeric_id: [caras]}"""
+        faces, labels = [], []
+        for numeric_id, user_faces in faces_by_id.items():
+            faces.extend(user_faces)
+            labels.extend([int(numeric_id)] * len(user_faces))
+
+        recognizer = create_recognizer(self.engine)
+        if faces:
+            recognizer.train(faces, np.array(labels, dtype=np.int32))
+        with self.lock:
+            self.recognizer = recognizer
+            self.labels = set(labels)
+        logger.info("Galería LBPH reconstruida: %s usuarios, %s imágenes", len(self.labels), len(faces))
+
+    def rebuild_from_disk(self, faces_dir, user_id_map):
+        """Reconstruir con las imágenes de embeddings/<user_id>/ de cada usuario del mapa"""
+        faces_by_id = {}
+        for user_id, numeric_id in user_id_map.items():
+            user_faces = load_face_images(os.path.join(faces_dir, user_id))
+            if user_faces:
+                faces_by_id[int(numeric_id)] = user_faces
+        self.rebuild(faces_by_id)
+
+    def _can_remove(self):
+        return isinstance(self.recognizer, LbpRecognizer)
+
+    def remove_user(self, numeric_id, faces_dir, user_id_map):
+        """Quitar un usuario (con el motor 'opencv', reconstruyendo desde disco con `user_id_map` sin él)"""
+        if not self._can_remove():
+            self.rebuild_from_disk(faces_dir, user_id_map)
+            return
+        with self.lock:
+            self.recognizer.remove_labels([int(numeric_id)])
+            self.labels.discard(int(numeric_id))
+
+    def set_user(self, numeric_id, faces, faces_dir, user_id_map):
+        """
+        Registrar o reentrenar un usuario: si es nuevo se añade; si ya estaba,
+        se sustituyen sus muestras (con el motor 'opencv', reconstruyendo la
+        galería desde disco porque LBPH no permite quitar muestras).
+        """
+        if not self.has_user(numeric_id):
+            return self.add_user(numeric_id, faces)
+        if not self._can_remove():
+            self.rebuild_from_disk(faces_dir, user_id_map)
+            return self.has_user(numeric_id)
+        self.remove_user(numeric_id, faces_dir, user_id_map)
+        return self.add_user(numeric_id, faces)
+
+    def predict(self, gray_face):
+        """(numeric_id, distancia) del usuario más cercano; (None, inf) si la galería está vacía"""
+        with self.lock:
+            if not self.labels:
+                return None, float('inf')
+            label, distance = self.recognizer.predict(gray_face)
+        return int(label), float(distance)
+
+    def search(self, gray_faces, k=1):
+        """
+        Los k vecinos más cercanos de cada cara: [[(numeric_id, distancia), ...], ...].
+        Con el motor 'numpy' se buscan todas las caras en una llamada; el motor
+        'opencv' solo da el más cercano.
+        """
+        with self.lock:
+            if not self.labels:
+                return [[] for _ in gray_faces]
+            if isinstance(self.recognizer, LbpRecognizer):
+                labels, distances = self.recognizer.search(gray_faces, k)
+            else:
+                predictions = [self.recognizer.predict(face) for face in gray_faces]
+                labels = [[label] for label, _ in predictions]
+                distances = [[distance] for _, distance in predictions]
+        return [[(int(label), float(distance)) for label, distance in zip(row_labels, row_distances) if label >= 0]
+                for row_labels, row_distances in zip(labels, distances)]
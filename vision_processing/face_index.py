@@ -0,0 +1,140 @@
+# ARCar_Showroom/vision_processing/face_index.py
+"""
+Índice IVF (listas invertidas sobre k-means) para galerías de caras grandes.
+
+Cada muestra de la galería se asigna al centroide más cercano. Al consultar,
+solo se comparan con chi-cuadrado las muestras de las `nprobe` listas cuyos
+centroides están más cerca de la cara, en vez de toda la galería. Es una
+búsqueda aproximada: bench_face_index mide el recall frente a la exacta.
+
+Los vectores del cuantizador son la raíz cuadrada de los histogramas LBP
+agrupando celdas vecinas (LbpExtractor.pool_cells). Con raíces, la distancia
+euclídea es la de Hellinger, que ordena los histogramas casi como la
+chi-cuadrado y permite usar k-means normal.
+
+La galería (LbpRecognizer) guarda sus muestras agrupadas por lista, así que
+cada lista es un rango contiguo de columnas y se recorre sin copiarla.
+
+Las muestras nuevas se asignan a los centroides existentes; los centroides se
+recalculan cuando la galería crece un factor `retrain_growth` desde el último
+entrenamiento. Con menos de `min_samples` muestras no se usa el índice: la
+búsqueda exacta ya es rápida.
+"""
+import numpy as np
+
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+UNASSIGNED = -1
+
+
+class IvfIndex:
+    def __init__(self, nlist=None, nprobe=8, min_samples=2000, iterations=10, retrain_growth=2.0, seed=0):
+        self.nlist = nlist  # None = sqrt(muestras) al entrenar
+        self.nprobe = nprobe
+        self.min_samples = min_samples
+        self.iterations = iterations
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+        self.centroids = None
+        self.assignments = np.empty(0, dtype=np.int32)  # Lista de cada muestra (paralelo a la galería)
+        self.trained_size = 0
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def is_active(self):
+        """Usar el índice en las búsquedas (si no, búsqueda exacta)"""
+        return self.is_trained and len(self.assignments) >= self.min_samples
+
+    def needs_training(self):
+        samples = len(self.assignments)
+        if samples < self.min_samples:
+            return False
+        return not self.is_trained or samples >= self.retrain_growth * self.trained_size
+
+    def train(self, vectors):
+        """k-means sobre todos los vectores de la galería y reasignación de todas las muestras"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        nlist = min(self.nlist or max(1, int(np.sqrt(len(vectors)))), len(vectors))
+        rng = np.random.default_rng(self.seed)
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignments = self._nearest(vectors, centroids)
+            members = np.zeros((nlist, len(vectors)), dtype=np.float32)
+            members[assignments, np.arange(len(vectors))] = 1.0
+            sums = members @ vectors
+            sizes = np.bincount(assignments, minlength=nlist)
+            # Un centroide sin muestras se queda donde estaba
+            filled = sizes > 0
+            centroids[filled] = sums[filled] / sizes[filled, np.newaxis]
+        self.centroids = centroids
+        self.assignments = self._nearest(vectors, centroids)
+        self.trained_size = len(vectors)
+        logger.info("Índice IVF entrenado: %s listas, %s muestras", nlist, len(vectors))
+
+    def add(self, vectors):
+        """Asignar muestras nuevas (vectores, o solo su número si el índice no está entrenado)"""
+        if not self.is_trained:
+            count = vectors if isinstance(vectors, int) else len(vectors)
+            new = np.full(count, UNASSIGNED, dtype=np.int32)
+        else:
+            new = self._nearest(np.asarray(vectors, dtype=np.float32), self.centroids)
+        self.assignments = np.concatenate([self.assignments, new])
+
+    def keep(self, mask):
+        """Quitar las muestras borradas de la galería (mask = muestras que se quedan)"""
+        self.assignments = self.assignments[mask]
+
+    def reset(self):
+        self.centroids = None
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.trained_size = 0
+
+    def grouping_order(self):
+        """Permutación que deja las muestras agrupadas por lista (se aplica con apply_order)"""
+        return np.argsort(self.assignments, kind='stable')
+
+    def apply_order(self, order):
+        self.assignments = self.assignments[order]
+
+    def candidate_ranges(self, vector, nprobe=None):
+        """
+        Rangos de muestras (slices) de las `nprobe` listas más cercanas a `vector`.
+        Requiere las muestras agrupadas por lista (grouping_order).
+        """
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        distances = self._sq_distances(np.asarray(vector, dtype=np.float32)[np.newaxis], self.centroids)[0]
+        lists = np.sort(np.argpartition(distances, nprobe - 1)[:nprobe])
+        starts = np.searchsorted(self.assignments, lists, side='left')
+        ends = np.searchsorted(self.assignments, lists, side='right')
+        return [slice(int(start), int(end)) for start, end in zip(starts, ends) if end > start]
+
+    def state(self):
+        """Arrays para guardar el índice junto a la galería ({} si no está entrenado)"""
+        if not self.is_trained:
+            return {}
+        return {'ivf_centroids': self.centroids, 'ivf_assignments': self.assignments,
+                'ivf_trained_size': np.array(self.trained_size)}
+
+    def load_state(self, data, samples, dim):
+        """Restaurar state(); si no estaba guardado (o no encaja), las muestras quedan sin asignar"""
+        if ('ivf_centroids' in data and len(data['ivf_assignments']) == samples
+                and data['ivf_centroids'].shape[1] == dim):
+            self.centroids = np.asarray(data['ivf_centroids'], dtype=np.float32)
+            self.assignments = np.asarray(data['ivf_assignments'], dtype=np.int32)
+            self.trained_size = int(data['ivf_trained_size'])
+        else:
+            self.reset()
+            self.add(samples)
+
+    @staticmethod
+    def _sq_distances(vectors, centroids):
+        return ((vectors * vectors).sum(axis=1)[:, np.newaxis] - 2.0 * vectors @ centroids.T
+                + (centroids * centroids).sum(axis=1)[np.newaxis, :])
+
+    @classmethod
+    def _nearest(cls, vectors, centroids):
+        return cls._sq_distances(vectors, centroids).argmin(axis=1).astype(np.int32)
@@ -0,0 +1,79 @@
+# ARCar_Showroom/vision_processing/face_quality.py
+"""
+Calidad de un recorte de cara antes de reconocerlo o guardarlo en el registro.
+
+Medidas baratas sobre la cara reducida a QUALITY_SIZE (coste fijo por cara):
+
+- nitidez: varianza del laplaciano (baja con desenfoque de movimiento)
+- tamaño: lado menor del recorte original, en píxeles
+- brillo y contraste: media y desviación típica de los grises
+- simetría: equilibrio de bordes entre la mitad izquierda y la derecha
+  (1 = iguales). Baja en caras de perfil o recortes medio fuera de la cara.
+
+`score` es el margen sobre el umbral más justo: valor / umbral del criterio
+que peor sale (en el brillo, la distancia a los extremos del rango). Un
+recorte es utilizable con score >= 1; entre varios utilizables, más es mejor.
+"""
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from core.config import (
+    FACE_QUALITY_MIN_SHARPNESS, FACE_QUALITY_MIN_SIZE, FACE_QUALITY_BRIGHTNESS_RANGE,
+    FACE_QUALITY_MIN_CONTRAST, FACE_QUALITY_MIN_SYMMETRY
+)
+
+QUALITY_SIZE = 64
+
+# Indicaciones para el HUD según el criterio que falla
+QUALITY_HINTS = {
+    'sharpness': "Imagen movida: quedate quieto",
+    'size': "Acercate a la camara",
+    'brightness': "Mejora la iluminacion",
+    'contrast': "Mejora la iluminacion",
+    'symmetry': "Mira de frente a la camara",
+}
+
+FaceQuality = namedtuple('FaceQuality', ['score', 'reason', 'sharpness', 'size', 'brightness', 'contrast', 'symmetry'])
+
+
+def _symmetry(face):
+    gx = cv2.Sobel(face, cv2.CV_32F, 1, 0)
+    gy = cv2.Sobel(face, cv2.CV_32F, 0, 1)
+    edges = np.abs(gx) + np.abs(gy)
+    half = face.shape[1] // 2
+    left, right = float(edges[:, :half].sum()), float(edges[:, -half:].sum())
+    if left + right == 0:
+        return 0.0
+    return 1.0 - abs(left - right) / (left + right)
+
+
+def assess_face(gray_face, min_sharpness=FACE_QUALITY_MIN_SHARPNESS, min_size=FACE_QUALITY_MIN_SIZE,
+                brightness_range=FACE_QUALITY_BRIGHTNESS_RANGE, min_contrast=FACE_QUALITY_MIN_CONTRAST,
+                min_symmetry=FACE_QUALITY_MIN_SYMMETRY):
+    """FaceQuality de un recorte en gris; reason = criterio que falla (None si es utilizable)"""
+    size = min(gray_face.shape[:2])
+    if size == 0:
+        return FaceQuality(0.0, 'size', 0.0, 0, 0.0, 0.0, 0.0)
+    face = cv2.resize(gray_face, (QUALITY_SIZE, QUALITY_SIZE), interpolation=cv2.INTER_AREA)
+    sharpness = float(cv2.Laplacian(face, cv2.CV_32F).var())
+    brightness, contrast = (float(v[0][0]) for v in cv2.meanStdDev(face))
+    symmetry = _symmetry(face)
+
+    low, high = brightness_range
+    margins = {
+        'sharpness': sharpness / min_sharpness,
+        'size': size / float(min_size),
+        'brightness': min(brightness / low, (255.0 - brightness) / (255.0 - high)),
+        'contrast': contrast / min_contrast,
+        'symmetry': symmetry / min_symmetry,
+    }
+    reason = min(margins, key=margins.get)
+    score = margins[reason]
+    return FaceQuality(score, reason if score < 1.0 else None, sharpness, size, brightness, contrast, symmetry)
+
+
+def is_usable(quality):
+    return quality.score >= 1.0
+
@@ -0,0 +1,99 @@
+# ARCar_Showroom/vision_processing/face_samples.py
+"""
+Archivo de caras de un usuario: embeddings/<user_id>/samples.faces.
+
+Sustituye a las 50 face_NNN.jpg sueltas por un solo fichero:
+
+    cabecera: MAGIC (8 bytes) | alto | ancho | nº de caras (uint32 LE)
+    datos:    nº de caras x alto x ancho bytes (uint8, en gris, seguidas)
+
+Las caras son las del registro (canonical_face: tamaño canónico y alineadas,
+sin igualar la iluminación), sin pérdidas de JPEG. La cabecera hace de
+índice: contar las caras de un usuario es leer 20 bytes, y leerlas para
+entrenar es un np.memmap de los datos sin decodificar nada.
+
+append() escribe primero las caras al final y después actualiza el número
+en la cabecera: si se corta a medias, el archivo sigue teniendo las caras
+anteriores y la siguiente escritura pisa los restos. reset() lo vacía: las
+caras de un registro que no se terminó no deben mezclarse con las del
+siguiente registro con ese nombre.
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'ARFSMP01'
+SAMPLES_FILE_NAME = 'samples.faces'
+# Caras sueltas de antes del archivo (face_NNN.jpg y los PNG antiguos): se
+# cuentan, se entrenan y se empaquetan igual que las del archivo
+FACE_IMAGE_EXTENSIONS = ('.jpg', '.png')
+_HEADER = struct.Struct('<8sIII')
+
+
+def samples_path(user_dir):
+    return os.path.join(user_dir, SAMPLES_FILE_NAME)
+
+
+class FaceSampleArchive:
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def header(self):
+        """(alto, ancho, nº de caras); (0, 0, 0) si el archivo no existe"""
+        if not self.exists():
+            return 0, 0, 0
+        with open(self.path, 'rb') as f:
+            return self._read_header(f)
+
+    def _read_header(self, f):
+        data = f.read(_HEADER.size)
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{self.path} está truncado")
+        magic, height, width, count = _HEADER.unpack(data)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} no es un archivo de caras")
+        return height, width, count
+
+    def __len__(self):
+        return self.header()[2]
+
+    def reset(self):
+        """Vaciar el archivo (p. ej. para descartar las caras de un registro abandonado)"""
+        if self.exists():
+            os.remove(self.path)
+
+    def append(self, faces):
+        """Añadir caras (arrays uint8 en gris, todas del tamaño del archivo)"""
+        faces = np.ascontiguousarray(np.stack([np.asarray(face, dtype=np.uint8) for face in faces]))
+        if faces.ndim != 3:
+            raise ValueError("Las caras del archivo van en gris (alto x ancho)")
+        if not self.exists():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, faces.shape[1], faces.shape[2], 0))
+
+        with open(self.path, 'r+b') as f:
+            height, width, count = self._read_header(f)
+            if faces.shape[1:] != (height, width):
+                raise ValueError(f"Caras de {faces.shape[1:]}; el archivo guarda caras de {(height, width)}")
+            f.seek(_HEADER.size + count * height * width)
+            f.write(faces.tobytes())
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, height, width, count + len(faces)))
+        return count + len(faces)
+
+    def read(self, mmap=True):
+        """Caras (nº x alto x ancho, uint8); con mmap=True, np.memmap de solo lectura"""
+        with open(self.path, 'rb') as f:
+            height, width, count = self._read_header(f)
+            if not mmap or count == 0:
+                data = np.fromfile(f, dtype=np.uint8, count=count * height * width)
+                return data.reshape(count, height, width)
+        return np.memmap(self.path, dtype=np.uint8, mode='r', offset=_HEADER.size, shape=(count, height, width))
@@ -0,0 +1,209 @@
+# ARCar_Showroom/vision_processing/face_tracker.py
+"""
+Seguimiento de caras entre detecciones.
+
+La detección completa solo se ejecuta en los fotogramas clave: cada
+FACE_TRACKING_DETECT_INTERVAL frames, cuando no hay ninguna cara seguida o
+cuando se pierde alguna. Entre medias cada cara se propaga con flujo óptico
+Lucas-Kanade sobre una rejilla de puntos de su rectángulo (mediana del
+desplazamiento y de la escala, descartando los puntos con error ida-vuelta
+alto). Cada cara conserva su identificador de seguimiento mientras no se
+pierde, para que las etapas siguientes puedan asociarle resultados.
+"""
+import itertools
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from core.config import (
+    FACE_DETECTION_MAX_WIDTH, FACE_TRACKING_DETECT_INTERVAL, FACE_TRACKING_GRID_SIZE,
+    FACE_TRACKING_MIN_POINTS, FACE_TRACKING_MAX_FB_ERROR, FACE_TRACKING_MATCH_IOU, FACE_TRACKING_MAX_GAP_S,
+    FACE_ROI_DETECTION
+)
+from vision_processing import facial_auth
+from utils.image_utils import box_iou
+from utils.instrumentation import profiler
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+)
+
+# Cara seguida: identificador estable y rectángulo (x, y, w, h) en píxeles del frame original
+TrackedFace = namedtuple('TrackedFace', ['track_id', 'box'])
+
+
+def _grid_points(box, grid_size):
+    """Rejilla de puntos en la zona central del rectángulo (evita el fondo de los bordes)"""
+    x, y, w, h = box
+    xs = np.linspace(x + 0.15 * w, x + 0.85 * w, grid_size)
+    ys = np.linspace(y + 0.15 * h, y + 0.85 * h, grid_size)
+    grid = np.stack(np.meshgrid(xs, ys), axis=-1)
+    return grid.reshape(-1, 1, 2).astype(np.float32)
+
+
+def propagate_box(prev_gray, gray, box, grid_size=FACE_TRACKING_GRID_SIZE,
+                  min_points=FACE_TRACKING_MIN_POINTS, max_fb_error=FACE_TRACKING_MAX_FB_ERROR):
+    """
+    Rectángulo de `prev_gray` propagado a `gray` con flujo óptico ida y vuelta.
+    Devuelve None si quedan menos de `min_points` puntos fiables (seguimiento perdido).
+    """
+    points = _grid_points(box, grid_size)
+    forward, status_fwd, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, **LK_PARAMS)
+    backward, status_bwd, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, forward, None, **LK_PARAMS)
+
+    fb_error = np.linalg.norm((points - backward).reshape(-1, 2), axis=1)
+    good = (status_fwd.ravel() == 1) & (status_bwd.ravel() == 1) & (fb_error < max_fb_error)
+    if np.count_nonzero(good) < min_points:
+        return None
+
+    p0 = points.reshape(-1, 2)[good]
+    p1 = forward.reshape(-1, 2)[good]
+    dx, dy = np.median(p1 - p0, axis=0)
+
+    # Escala: mediana del cociente de distancias entre pares de puntos
+    i, j = np.triu_indices(len(p0), k=1)
+    d0 = np.linalg.norm(p0[i] - p0[j], axis=1)
+    d1 = np.linalg.norm(p1[i] - p1[j], axis=1)
+    valid = d0 > 1e-3
+    scale = float(np.median(d1[valid] / d0[valid])) if np.any(valid) else 1.0
+
+    x, y, w, h = box
+    cx, cy = x + w / 2.0 + dx, y + h / 2.0 + dy
+    w, h = w * scale, h * scale
+    height, width = gray.shape[:2]
+    if not (0 <= cx < width and 0 <= cy < height) or w < 1 or h < 1:
+        return None
+    return np.array([cx - w / 2.0, cy - h / 2.0, w, h], dtype=np.float32)
+
+
+class _Track:
+    __slots__ = ('track_id', 'box')
+
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = np.asarray(box, dtype=np.float32)  # En píxeles de la imagen de análisis
+
+
+class FaceTracker:
+    """
+    Detección por fotogramas clave + seguimiento entre ellos. Un mismo
+    tracker puede usarse desde el hilo de análisis del pipeline y desde el
+    principal (las llamadas se serializan).
+    """
+
+    def __init__(self, detect_interval=FACE_TRACKING_DETECT_INTERVAL, max_width=FACE_DETECTION_MAX_WIDTH,
+                 match_iou=FACE_TRACKING_MATCH_IOU, max_gap_s=FACE_TRACKING_MAX_GAP_S, roi_detection=FACE_ROI_DETECTION):
+        self.detect_interval = max(1, int(detect_interval))
+        self.max_width = max_width
+        self.match_iou = match_iou
+        self.max_gap_s = max_gap_s
+        # Los fotogramas clave buscan primero alrededor de las caras seguidas
+        self.roi_detector = facial_auth.RoiFaceDetector() if roi_detection else None
+        self.lock = threading.Lock()
+        self._next_id = itertools.count(1)
+        self.detections = 0
+        self.tracked_frames = 0
+        self.reset()
+
+    def reset(self):
+        """Olvidar las caras seguidas (la próxima llamada hará una detección completa)"""
+        self.tracks = []
+        self.prev_gray = None
+        self.frames_since_detection = 0
+        self.last_update = None
+
+    def update(self, frame):
+        """Procesar un frame y devolver las caras como lista de TrackedFace"""
+        if not facial_auth.is_ready():
+            return []
+
+        with self.lock:
+            gray, scale = facial_auth.prepare_gray(frame, self.max_width)
+            now = time.monotonic()
+            # Tras una pausa (otro estado de la app) o un cambio de resolución el frame anterior no sirve
+            if (self.prev_gray is None or self.prev_gray.shape != gray.shape
+                    or now - self.last_update > self.max_gap_s):
+                self.tracks = []
+
+            tracked = None
+            if self.tracks and self.frames_since_detection + 1 < self.detect_interval:
+                tracked = self._propagate(gray)
+
+            if tracked is None:
+                self._detect(gray, scale)
+            else:
+                self.tracks = tracked
+                self.frames_since_detection += 1
+                self.tracked_frames += 1
+
+            self.prev_gray = gray
+            self.last_update = now
+            height, width = frame.shape[:2]
+            return [TrackedFace(track.track_id, self._to_frame_box(track.box, scale, width, height))
+                    for track in self.tracks]
+
+    def detect_faces(self, frame):
+        """
+        Igual que facial_auth.detect_faces pero con seguimiento.
+        Devuelve (frame con rectángulos, rectángulos, ids de seguimiento).
+        """
+        faces = self.update(frame)
+        boxes = np.array([face.box for face in faces], dtype=np.int32).reshape(-1, 4)
+        return facial_auth.draw_faces(frame, boxes), boxes, [face.track_id for face in faces]
+
+    def get_stats(self):
+        return {'detections': self.detections, 'tracked_frames': self.tracked_frames, 'tracks': len(self.tracks)}
+
+    def _propagate(self, gray):
+        """Propagar todas las caras; None si se pierde alguna (hay que detectar)"""
+        with profiler.stage('face_track'):
+            tracked = []
+            for track in self.tracks:
+                box = propagate_box(self.prev_gray, gray, track.box)
+                if box is None:
+                    logger.debug("Seguimiento perdido para la cara %s", track.track_id)
+                    return None
+                tracked.append(_Track(track.track_id, box))
+            return tracked
+
+    def _detect(self, gray, scale):
+        """Detección (por ventanas si se puede); las caras que solapan con una seguida conservan su id"""
+        if self.roi_detector is not None:
+            boxes = self.roi_detector.detect(gray, scale, [track.box for track in self.tracks])
+        else:
+            boxes = facial_auth.detect_face_boxes(gray, scale)
+        self.detections += 1
+        self.frames_since_detection = 0
+
+        candidates = sorted(
+            ((box_iou(box, track.box), d, t) for d, box in enumerate(boxes) for t, track in enumerate(self.tracks)),
+            key=lambda item: item[0], reverse=True
+        )
+        matched = {}
+        used_tracks = set()
+        for iou, d, t in candidates:
+            if iou < self.match_iou:
+                break
+            if d in matched or t in used_tracks:
+                continue
+            matched[d] = self.tracks[t].track_id
+            used_tracks.add(t)
+
+        self.tracks = [_Track(matched[d] if d in matched else next(self._next_id), box)
+                       for d, box in enumerate(boxes)]
+
+    @staticmethod
+    def _to_frame_box(box, scale, width, height):
+        """Rectángulo de la imagen de análisis -> enteros en el frame original, recortado a sus límites"""
+        x, y, w, h = np.round(np.asarray(box) / scale).astype(int)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, width), min(y + h, height)
+        return (int(x0), int(y0), int(max(x1 - x0, 0)), int(max(y1 - y0, 0)))
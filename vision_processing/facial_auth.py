@@ -1,58 +1,142 @@
 # ARCar_Showroom/vision_processing/facial_auth.py
 import cv2
-import os
-# Importar la constante de la ruta del cascade desde config
-from core.config import HAAR_CASCADE_PATH_REL_TO_PROJECT_ROOT
-
-face_cascade = None
-
-# MODIFICADO: load_cascade ahora toma project_root_path
-def load_cascade(project_root_path):
-    """Carga el clasificador Haar Cascade para detección de rostros."""
-    global face_cascade
-    
-    # Construir la ruta absoluta al archivo cascade
-    cascade_full_path = os.path.join(project_root_path, HAAR_CASCADE_PATH_REL_TO_PROJECT_ROOT)
-
-    if not os.path.exists(cascade_full_path):
-        print(f"Error en facial_auth: No se encontró el archivo Haar Cascade en {cascade_full_path}")
-        print("Asegúrate de que el archivo exista y la ruta en core/config.py sea correcta.")
-        return False
-    
-    face_cascade = cv2.CascadeClassifier(cascade_full_path)
-    if face_cascade.empty():
-        print(f"Error en facial_auth: No se pudo cargar el clasificador Haar Cascade desde {cascade_full_path}")
+import numpy as np
+from core.config import (
+    FACE_DETECTOR_PROFILE, FACE_DETECTOR_FALLBACK_PROFILE, FACE_DETECTION_MAX_WIDTH, FACE_DETECTION_MIN_SIZE,
+    FACE_ROI_MARGIN, FACE_ROI_SIZE_TOLERANCE, FACE_ROI_FULL_SCAN_INTERVAL
+)
+from vision_processing.face_detectors import create_face_detector
+from utils.image_utils import downscale_for_analysis, box_iou
+from utils.instrumentation import profiler
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Detector compartido por login, registro y seguimiento (ver face_detectors.py)
+face_detector = None
+
+def load_face_detector(project_root_path, profile_name=FACE_DETECTOR_PROFILE):
+    """Crea el detector de caras del perfil indicado (o el de reserva si no está disponible)."""
+    global face_detector
+
+    detector = create_face_detector(project_root_path, profile_name)
+    if detector is None and profile_name != FACE_DETECTOR_FALLBACK_PROFILE:
+        logger.warning("Usando el detector de reserva '%s'", FACE_DETECTOR_FALLBACK_PROFILE)
+        detector = create_face_detector(project_root_path, FACE_DETECTOR_FALLBACK_PROFILE)
+    if detector is None:
+        logger.error("Error en facial_auth: No se pudo cargar ningún detector de caras.")
+        logger.error("Asegúrate de que los modelos existan y las rutas en core/config.py sean correctas.")
         return False
-    print("Clasificador Haar Cascade cargado exitosamente (por facial_auth).")
+
+    face_detector = detector
+    logger.info("Detector de caras '%s' cargado exitosamente (por facial_auth).", detector.name)
     return True
 
-def detect_faces(frame):
+# Nombre histórico, lo siguen usando los benchmarks y los tests
+load_cascade = load_face_detector
+
+def is_ready():
+    return face_detector is not None
+
+def prepare_gray(frame, max_width=FACE_DETECTION_MAX_WIDTH):
+    """Gris del frame reducido a `max_width` de ancho. Devuelve (gris, escala)."""
+    with profiler.stage('face_gray'):
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return downscale_for_analysis(gray_frame, max_width)
+
+def _min_size(scale):
+    """FACE_DETECTION_MIN_SIZE en píxeles de la imagen reducida con `scale`"""
+    min_w, min_h = FACE_DETECTION_MIN_SIZE
+    return (max(1, int(round(min_w * scale))), max(1, int(round(min_h * scale))))
+
+def detect_face_boxes(gray, scale=1.0):
     """
-    Detecta rostros en un frame dado.
-    Devuelve el frame con rectángulos dibujados y las coordenadas de los rostros.
+    Ejecuta el detector sobre `gray` (ya reducido con `scale`) y devuelve
+    los rectángulos (x, y, w, h) en píxeles de `gray`.
     """
-    if face_cascade is None or face_cascade.empty():
-        # print("Advertencia: Clasificador Haar no cargado. No se detectarán rostros.")
-        return frame, [] # Devuelve el frame original y una lista vacía de rostros
+    with profiler.stage('face_detect'):
+        return face_detector.detect(gray, min_size=_min_size(scale))
 
-    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(
-        gray_frame, 
-        scaleFactor=1.1, 
-        minNeighbors=5, 
-        minSize=(30, 30) 
-    )
-
-    # Dibujar rectángulos SOLO si se va a mostrar (lo hacemos en AppManager ahora)
-    # for (x, y, w, h) in faces:
-    #     cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2) 
-    # La función ahora solo devuelve las coordenadas y el frame original (o una copia)
-    # El dibujo lo hará el AppManager según el contexto.
-    # No, es mejor que facial_auth siga dibujando si se le pide, o que AppManager lo haga.
-    # Por ahora, facial_auth dibuja, AppManager solo añade texto. Mantenemos el dibujo aquí.
-    
+class RoiFaceDetector:
+    """
+    Detección restringida a ventanas alrededor de las caras anteriores.
+    Cada ventana amplía la caja previa en FACE_ROI_MARGIN de su tamaño por
+    cada lado y solo se buscan caras de tamaño parecido (±FACE_ROI_SIZE_TOLERANCE).
+    Se vuelve al barrido completo si no hay caras previas, si alguna ventana
+    no encuentra su cara o cada FACE_ROI_FULL_SCAN_INTERVAL detecciones (para
+    ver caras nuevas). Los rectángulos se devuelven en píxeles de `gray`.
+    """
+
+    def __init__(self, margin=FACE_ROI_MARGIN, size_tolerance=FACE_ROI_SIZE_TOLERANCE,
+                 full_scan_interval=FACE_ROI_FULL_SCAN_INTERVAL):
+        self.margin = margin
+        self.size_tolerance = size_tolerance
+        self.full_scan_interval = max(1, int(full_scan_interval))
+        self.scans_since_full = 0
+        self.full_scans = 0
+        self.roi_scans = 0
+
+    def detect(self, gray, scale=1.0, previous_boxes=()):
+        if len(previous_boxes) > 0 and self.scans_since_full + 1 < self.full_scan_interval:
+            boxes = self._detect_in_windows(gray, scale, previous_boxes)
+            if boxes is not None:
+                self.scans_since_full += 1
+                self.roi_scans += 1
+                return boxes
+        self.scans_since_full = 0
+        self.full_scans += 1
+        return detect_face_boxes(gray, scale)
+
+    def get_stats(self):
+        return {'full_scans': self.full_scans, 'roi_scans': self.roi_scans}
+
+    def _detect_in_windows(self, gray, scale, previous_boxes):
+        """Caras encontradas en las ventanas; None si alguna ventana no encuentra la suya"""
+        height, width = gray.shape[:2]
+        found = []
+        with profiler.stage('face_detect'):
+            for (x, y, w, h) in previous_boxes:
+                x0, y0 = max(int(x - self.margin * w), 0), max(int(y - self.margin * h), 0)
+                x1 = min(int(np.ceil(x + w + self.margin * w)), width)
+                y1 = min(int(np.ceil(y + h + self.margin * h)), height)
+                min_size = _min_size(scale)
+                min_size = (max(min_size[0], int(w * (1 - self.size_tolerance))),
+                            max(min_size[1], int(h * (1 - self.size_tolerance))))
+                max_size = (int(np.ceil(w * (1 + self.size_tolerance))), int(np.ceil(h * (1 + self.size_tolerance))))
+                if x1 - x0 < min_size[0] or y1 - y0 < min_size[1]:
+                    return None
+                faces = face_detector.detect(gray[y0:y1, x0:x1], min_size=min_size, max_size=max_size)
+                if len(faces) == 0:
+                    return None
+                for (fx, fy, fw, fh) in faces:
+                    box = (fx + x0, fy + y0, fw, fh)
+                    # Ventanas solapadas pueden encontrar la misma cara
+                    if all(box_iou(box, other) < 0.5 for other in found):
+                        found.append(box)
+        return np.array(found, dtype=np.int32).reshape(-1, 4)
+
+def draw_faces(frame, faces):
+    """Copia de `frame` con un rectángulo azul por cara"""
     frame_with_rects = frame.copy() # Dibujar sobre una copia para no afectar el original si no se desea
     for (x, y, w, h) in faces:
         cv2.rectangle(frame_with_rects, (x, y), (x+w, y+h), (255, 0, 0), 2) # Dibuja un rectángulo azul
+    return frame_with_rects
+
+def detect_faces(frame, max_width=FACE_DETECTION_MAX_WIDTH):
+    """
+    Detecta rostros en un frame dado.
+    La detección se hace sobre una copia reducida a `max_width` de ancho (None =
+    resolución completa) y las coordenadas se devuelven en píxeles del frame original.
+    Devuelve el frame con rectángulos dibujados y las coordenadas de los rostros.
+    """
+    if face_detector is None:
+        # print("Advertencia: Detector no cargado. No se detectarán rostros.")
+        return frame, [] # Devuelve el frame original y una lista vacía de rostros
+
+    gray_small, scale = prepare_gray(frame, max_width)
+    faces = detect_face_boxes(gray_small, scale)
+    if scale != 1.0 and len(faces) > 0:
+        faces = np.round(faces / scale).astype(np.int32)
 
-    return frame_with_rects, faces # Devolvemos el frame con rectángulos y las coordenadas
+    # Por ahora, facial_auth dibuja, AppManager solo añade texto. Mantenemos el dibujo aquí.
+    return draw_faces(frame, faces), faces # Devolvemos el frame con rectángulos y las coordenadas
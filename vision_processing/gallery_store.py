@@ -0,0 +1,74 @@
+# ARCar_Showroom/vision_processing/gallery_store.py
+"""
+Formato binario de la galería del motor 'numpy' (LbpRecognizer.write/read).
+
+    MAGIC (8 bytes) | longitud de la cabecera (uint64 LE) | cabecera JSON | arrays
+
+La cabecera guarda los metadatos (parámetros LBP, tabla de usuarios...) y,
+por cada array, su dtype, forma y posición en el fichero. Los arrays van
+seguidos, en orden C y alineados a ALIGNMENT bytes, así que se abren con
+np.memmap sin leerlos ni copiarlos: arrancar cuesta lo mismo con 10 usuarios
+que con miles, y varios procesos que abren la misma galería comparten sus
+páginas (solo lectura) a través de la caché del sistema.
+"""
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'ARFGAL01'
+ALIGNMENT = 64
+_LENGTH = struct.Struct('<Q')
+
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+
+def write_store(path, arrays, meta=None):
+    """Guardar {nombre: array} y los metadatos (serializables a JSON)"""
+    arrays = {name: np.asarray(array, order='C') for name, array in arrays.items()}
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset += _padding(offset)
+        entries[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = json.dumps({'meta': meta or {}, 'arrays': entries}).encode('utf-8')
+    # Los datos empiezan alineados tras la cabecera; las posiciones son relativas a ese inicio
+    prefix = len(MAGIC) + _LENGTH.size + len(header)
+    header += b' ' * _padding(prefix)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header)))
+        f.write(header)
+        position = 0
+        for name, array in arrays.items():
+            f.write(b'\0' * (entries[name]['offset'] - position))
+            f.write(array.tobytes())
+            position = entries[name]['offset'] + array.nbytes
+
+
+def read_store(path, mmap=True):
+    """
+    (arrays, meta) de un fichero guardado con write_store. Con mmap=True los
+    arrays son np.memmap de solo lectura; si no, se leen a memoria.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} no es una galería binaria")
+        (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+        header = json.loads(f.read(length).decode('utf-8'))
+        start = len(MAGIC) + _LENGTH.size + length
+
+        arrays = {}
+        for name, entry in header['arrays'].items():
+            dtype, shape = np.dtype(entry['dtype']), tuple(entry['shape'])
+            if mmap and shape and int(np.prod(shape)) > 0:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=start + entry['offset'], shape=shape)
+            else:
+                f.seek(start + entry['offset'])
+                count = int(np.prod(shape))
+                arrays[name] = np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+    return arrays, header['meta']
@@ -0,0 +1,145 @@
+# ARCar_Showroom/vision_processing/identity_voting.py
+"""
+Identificación por votación temporal sobre las caras seguidas (FaceTracker).
+
+En vez de reconocer cada cara en todos los frames y aceptar al primer frame
+por debajo del umbral, cada id de seguimiento acumula observaciones:
+
+- Solo se consulta la galería cada `frame_stride` frames de la cara.
+- Cada consulta da los `top_k` vecinos; por usuario se guarda su mejor
+  distancia en ese frame y el más cercano recibe un voto.
+- Desde `min_frames` consultas, el usuario con más votos se acepta si los
+  tiene en al menos `min_agreement` de ellas y su distancia media está por
+  debajo del umbral. Si en `max_frames` consultas no se decide, la cara se
+  marca como desconocida y se vuelve a intentar pasados `retry_frames` frames.
+- Una cara aceptada guarda su identidad mientras dure su seguimiento: no se
+  vuelve a consultar la galería.
+
+Un solo frame parecido a otro usuario ya no basta para iniciar sesión.
+"""
+from collections import Counter, namedtuple
+
+from core.config import (
+    FACE_VOTING_MIN_FRAMES, FACE_VOTING_MAX_FRAMES, FACE_VOTING_FRAME_STRIDE,
+    FACE_VOTING_MIN_AGREEMENT, FACE_VOTING_RETRY_FRAMES
+)
+from utils.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+PENDING = 'pending'
+ACCEPTED = 'accepted'
+REJECTED = 'rejected'
+
+# Estado de una cara: numeric_id/distance = candidato actual (None si aún no hay consultas)
+TrackIdentity = namedtuple('TrackIdentity', ['status', 'numeric_id', 'distance', 'votes', 'samples'])
+
+_NO_IDENTITY = TrackIdentity(PENDING, None, float('inf'), 0, 0)
+
+
+class _TrackEvidence:
+    def __init__(self):
+        self.frames = 0              # Frames vistos de la cara
+        self.last_sample_frame = None
+        self.samples = 0             # Consultas a la galería
+        self.votes = Counter()       # numeric_id -> frames en los que fue el más cercano
+        self.distance_sums = Counter()
+        self.distance_counts = Counter()
+        self.identity = _NO_IDENTITY
+        self.decided_frame = None
+
+
+class IdentityVoter:
+    def __init__(self, min_frames=FACE_VOTING_MIN_FRAMES, max_frames=FACE_VOTING_MAX_FRAMES,
+                 frame_stride=FACE_VOTING_FRAME_STRIDE, min_agreement=FACE_VOTING_MIN_AGREEMENT,
+                 retry_frames=FACE_VOTING_RETRY_FRAMES):
+        self.min_frames = max(1, int(min_frames))
+        self.max_frames = max(self.min_frames, int(max_frames))
+        self.frame_stride = max(1, int(frame_stride))
+        self.min_agreement = min_agreement
+        self.retry_frames = retry_frames
+        self.tracks = {}
+        self.queries = 0
+
+    def reset(self):
+        """Olvidar todas las caras (p. ej. si cambia la galería)"""
+        self.tracks = {}
+
+    def prune(self, track_ids):
+        """Descartar las caras que ya no se siguen"""
+        active = set(track_ids)
+        for track_id in [t for t in self.tracks if t not in active]:
+            del self.tracks[track_id]
+
+    def should_recognize(self, track_id):
+        """
+        Avanzar un frame de la cara y decir si toca consultar la galería.
+        Llamar una vez por cara y frame.
+        """
+        evidence = self.tracks.setdefault(track_id, _TrackEvidence())
+        evidence.frames += 1
+        status = evidence.identity.status
+        if status == ACCEPTED:
+            return False
+        if status == REJECTED:
+            if evidence.frames - evidence.decided_frame < self.retry_frames:
+                return False
+            # Reintento desde cero (puede que la cara se vea mejor ahora)
+            frames = evidence.frames
+            evidence = self.tracks[track_id] = _TrackEvidence()
+            evidence.frames = frames
+        return (evidence.last_sample_frame is None
+                or evidence.frames - evidence.last_sample_frame >= self.frame_stride)
+
+    def add_observation(self, track_id, neighbours, threshold):
+        """
+        Añadir una consulta: `neighbours` = [(numeric_id, distancia), ...] de
+        FaceGallery.search. Devuelve el TrackIdentity actualizado.
+        """
+        evidence = self.tracks.setdefault(track_id, _TrackEvidence())
+        evidence.last_sample_frame = evidence.frames
+        evidence.samples += 1
+        self.queries += 1
+
+        best = {}
+        for numeric_id, distance in neighbours:
+            if distance < best.get(numeric_id, float('inf')):
+                best[numeric_id] = distance
+        for numeric_id, distance in best.items():
+            evidence.distance_sums[numeric_id] += distance
+            evidence.distance_counts[numeric_id] += 1
+        if best:
+            evidence.votes[min(best, key=best.get)] += 1
+
+        evidence.identity = self._decide(evidence, threshold)
+        if evidence.identity.status != PENDING:
+            evidence.decided_frame = evidence.frames
+            logger.debug("Cara %s: %s %s (%.2f, %s/%s votos)", track_id, evidence.identity.status,
+                         evidence.identity.numeric_id, evidence.identity.distance,
+                         evidence.identity.votes, evidence.identity.samples)
+        return evidence.identity
+
+    def identity(self, track_id):
+        evidence = self.tracks.get(track_id)
+        return evidence.identity if evidence is not None else _NO_IDENTITY
+
+    def _decide(self, evidence, threshold):
+        if not evidence.votes:
+            status = REJECTED if evidence.samples >= self.max_frames else PENDING
+            return TrackIdentity(status, None, float('inf'), 0, evidence.samples)
+
+        # Más votos; a igualdad, menor distancia media
+        def mean_distance(numeric_id):
+            return evidence.distance_sums[numeric_id] / evidence.distance_counts[numeric_id]
+
+        leader = min(evidence.votes, key=lambda numeric_id: (-evidence.votes[numeric_id], mean_distance(numeric_id)))
+        votes = evidence.votes[leader]
+        distance = mean_distance(leader)
+
+        status = PENDING
+        if (evidence.samples >= self.min_frames and votes >= self.min_agreement * evidence.samples
+                and distance < threshold):
+            status = ACCEPTED
+        elif evidence.samples >= self.max_frames:
+            status = REJECTED
+        return TrackIdentity(status, leader, distance, votes, evidence.samples)
@@ -0,0 +1,429 @@
+# ARCar_Showroom/vision_processing/lbp_features.py
+"""
+Motor LBP nativo en NumPy: histogramas LBP por rejilla de muchas caras a la vez
+y distancias chi-cuadrado contra toda la galería en una sola llamada.
+
+LbpExtractor calcula los códigos LBP circulares con interpolación bilineal
+(como cv2.face.LBPHFaceRecognizer) y el histograma normalizado de cada celda.
+Con mapping='full' (256 patrones) los histogramas y las distancias coinciden
+con los de OpenCV, así que los umbrales de confianza siguen valiendo;
+mapping='uniform' (59 patrones, los no uniformes en un solo bin) ocupa ~4
+veces menos y es más rápido, pero cambia la escala de distancias (hay que
+recalibrar CONFIDENCE_THRESHOLDS).
+
+LbpRecognizer se usa como el reconocedor LBPH de OpenCV (train, update,
+predict, read, write, getLabels) pero guarda la galería en una sola matriz
+contigua de conteos, una columna por muestra, y opcionalmente un índice IVF
+(vision_processing/face_index.py) para no recorrerla entera. La chi-cuadrado de OpenCV
+(HISTCMP_CHISQR_ALT) se separa en
+    2 * sum((a-q)^2 / (a+q)) = 2 * (sum_{q>0} (a-q)^2 / (a+q) + sum_{q=0} a)
+donde el primer sumatorio solo recorre los bins con q > 0 (~1/4 de la
+matriz con 'full'), por bloques que caben en caché, y el segundo es la suma
+de la muestra menos sus conteos en esos bins. Los dos términos son positivos:
+no hay restas de números grandes que se coman la precisión de float32.
+
+write() guarda la galería en el formato binario de gallery_store.py y read()
+la abre con memmap (sin copiarla) salvo que se modifique.
+"""
+import copy
+
+import numpy as np
+
+from vision_processing import gallery_store
+
+LBP_MAPPINGS = ('full', 'uniform')
+DISTANCE_CHUNK_ELEMENTS = 1 << 16  # Bloque de distances() (bins x muestras) que cabe en caché
+DISTANCE_CHUNK_MAX_ROWS = 128       # Y como mucho estos bins: la suma en float32 de cada bloque no pierde precisión
+COARSE_CHUNK_SAMPLES = 256          # Muestras por bloque al calcular los vectores del índice
+
+
+def _sample_offsets(radius, neighbors):
+    """Coordenadas (x, y) de los vecinos, redondeadas a float32 como en OpenCV"""
+    n = np.arange(neighbors, dtype=np.float64)
+    x = (radius * np.cos(2.0 * np.pi * n / np.float32(neighbors))).astype(np.float32)
+    y = (-radius * np.sin(2.0 * np.pi * n / np.float32(neighbors))).astype(np.float32)
+    return x, y
+
+
+def uniform_lut(neighbors):
+    """
+    Tabla código -> bin para LBP uniforme: cada patrón con como mucho dos
+    transiciones 0/1 (circulares) tiene su bin; el resto comparten el último.
+    """
+    codes = np.arange(2 ** neighbors)
+    rotated = (codes >> 1) | ((codes & 1) << (neighbors - 1))
+    transitions = np.array([bin(v).count('1') for v in (codes ^ rotated)])
+    uniform = transitions <= 2
+    lut = np.full(2 ** neighbors, np.count_nonzero(uniform), dtype=np.int64)
+    lut[uniform] = np.arange(np.count_nonzero(uniform))
+    return lut
+
+
+def chi_square(histograms, query):
+    """Chi-cuadrado (HISTCMP_CHISQR_ALT de OpenCV) de cada fila de `histograms` contra `query`"""
+    histograms = np.atleast_2d(histograms)
+    diff = histograms - query
+    total = histograms + query
+    terms = np.divide(diff * diff, total, out=np.zeros_like(total), where=total > 0)
+    return 2.0 * terms.sum(axis=1, dtype=np.float64)
+
+
+def _owned(array):
+    """El array con memoria propia (copia si es una vista, p. ej. de un memmap)"""
+    return array if array.flags.owndata else array.copy()
+
+
+class LbpExtractor:
+    def __init__(self, radius=1, neighbors=8, grid=(8, 8), mapping='full'):
+        if mapping not in LBP_MAPPINGS:
+            raise ValueError(f"Mapeo LBP desconocido: {mapping} (opciones: {LBP_MAPPINGS})")
+        self.radius = radius
+        self.neighbors = neighbors
+        self.grid_x, self.grid_y = grid
+        self.mapping = mapping
+        self.lut = uniform_lut(neighbors) if mapping == 'uniform' else None
+        self.num_bins = int(self.lut.max()) + 1 if self.lut is not None else 2 ** neighbors
+        self.dim = self.grid_x * self.grid_y * self.num_bins
+
+        # Por vecino: las 4 posiciones que se interpolan y sus pesos
+        self._samples = []
+        for sx, sy in zip(*_sample_offsets(radius, neighbors)):
+            fx, fy = int(np.floor(sx)), int(np.floor(sy))
+            cx, cy = int(np.ceil(sx)), int(np.ceil(sy))
+            tx, ty = np.float32(sx - fx), np.float32(sy - fy)
+            weights = ((1 - tx) * (1 - ty), tx * (1 - ty), (1 - tx) * ty, tx * ty)
+            positions = ((fy, fx), (fy, cx), (cy, fx), (cy, cx))
+            # Los vecinos sobre el eje caen en un píxel exacto: sin pesos nulos
+            self._samples.append([(p, w) for p, w in zip(positions, weights) if w != 0])
+
+    def codes(self, images):
+        """Códigos LBP de un lote (N, H, W) de caras en gris: (N, H-2r, W-2r)"""
+        images = np.asarray(images)
+        if images.ndim == 2:
+            images = images[np.newaxis]
+        src = images.astype(np.float32)
+        r = self.radius
+        height, width = src.shape[1] - 2 * r, src.shape[2] - 2 * r
+        center = src[:, r:r + height, r:r + width]
+        eps = np.finfo(np.float32).eps
+        code_type = np.uint8 if self.neighbors <= 8 else np.uint32
+        codes = np.zeros((src.shape[0], height, width), dtype=code_type)
+
+        for n, terms in enumerate(self._samples):
+            t = sum(w * src[:, r + dy:r + dy + height, r + dx:r + dx + width] for (dy, dx), w in terms)
+            bit = (t > center) | (np.abs(t - center) < eps)
+            codes |= bit.astype(code_type) << code_type(n)
+        return codes
+
+    def histogram_counts(self, images):
+        """
+        Conteos por celda (N, dim) y píxeles por celda (N,) de un lote de caras.
+        `images` puede ser un array (N, H, W) o una lista de caras de distintos tamaños.
+        """
+        if isinstance(images, np.ndarray) and images.ndim in (2, 3):
+            return self._counts_same_size(images)
+        images = list(images)
+        counts = np.empty((len(images), self.dim), dtype=np.int64)
+        cell_pixels = np.empty(len(images), dtype=np.int64)
+        by_shape = {}
+        for i, image in enumerate(images):
+            by_shape.setdefault(image.shape, []).append(i)
+        for indices in by_shape.values():
+            counts[indices], cell_pixels[indices] = self._counts_same_size(np.stack([images[i] for i in indices]))
+        return counts, cell_pixels
+
+    def histograms(self, images):
+        """Histogramas (N, dim) float32 con cada celda normalizada a suma 1"""
+        counts, cell_pixels = self.histogram_counts(images)
+        return (counts / cell_pixels[:, None]).astype(np.float32)
+
+    def pool_cells(self, histograms, pool):
+        """
+        Vectores para el índice IVF: raíz cuadrada del histograma medio de cada
+        bloque de pool x pool celdas, (N, dim / pool^2)
+        """
+        histograms = np.asarray(histograms, dtype=np.float32).reshape(
+            -1, self.grid_y // pool, pool, self.grid_x // pool, pool, self.num_bins)
+        return np.sqrt(histograms.mean(axis=(2, 4)).reshape(len(histograms), -1))
+
+    def _counts_same_size(self, images):
+        codes = self.codes(images)
+        count = codes.shape[0]
+        cell_h, cell_w = codes.shape[1] // self.grid_y, codes.shape[2] // self.grid_x
+        if cell_h == 0 or cell_w == 0:
+            raise ValueError(f"Cara demasiado pequeña para una rejilla {self.grid_x}x{self.grid_y}: {codes.shape[1:]}")
+        # Igual que OpenCV: los píxeles que sobran a la derecha y abajo no cuentan
+        codes = codes[:, :cell_h * self.grid_y, :cell_w * self.grid_x].astype(np.int64)
+        if self.lut is not None:
+            codes = self.lut[codes]
+
+        # Índice global de celda de cada píxel (imagen, fila y columna de la rejilla)
+        cells = self.grid_x * self.grid_y
+        cell_rows = np.repeat(np.arange(self.grid_y), cell_h)[:, None] * self.grid_x
+        cell_cols = np.repeat(np.arange(self.grid_x), cell_w)[None, :]
+        cell_index = (cell_rows + cell_cols)[None] + (np.arange(count) * cells)[:, None, None]
+
+        counts = np.bincount((cell_index * self.num_bins + codes).ravel(), minlength=count * self.dim)
+        return counts.reshape(count, self.dim), np.full(count, cell_h * cell_w, dtype=np.int64)
+
+
+class LbpRecognizer:
+    """Reconocedor LBPH con la galería en una matriz NumPy (interfaz de cv2.face.LBPHFaceRecognizer)"""
+
+    def __init__(self, radius=1, neighbors=8, grid=(8, 8), mapping='full', index=None, index_pool=2):
+        self.extractor = LbpExtractor(radius, neighbors, grid, mapping)
+        self.index = index  # IvfIndex opcional
+        self.index_pool = index_pool
+        self.label_info = {}  # etiqueta -> texto (setLabelInfo), se guarda con la galería
+        self._clear()
+
+    def _clear(self):
+        dim = self.extractor.dim
+        self.counts = np.empty((dim, 0), dtype=np.uint8)   # Una columna por muestra
+        self.scales = np.empty(0, dtype=np.float32)         # 1 / píxeles por celda de cada muestra
+        self.row_sums = np.empty(0, dtype=np.float32)       # Suma del histograma normalizado
+        self.labels = np.empty(0, dtype=np.int32)
+        if self.index is not None:
+            self.index.reset()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def getLabels(self):
+        return self.labels.reshape(-1, 1)
+
+    def setLabelInfo(self, label, info):
+        self.label_info[int(label)] = str(info)
+
+    def getLabelInfo(self, label):
+        return self.label_info.get(int(label), '')
+
+    def train(self, faces, labels):
+        self._clear()
+        self.update(faces, labels)
+
+    def update(self, faces, labels):
+        counts, cell_pixels = self.extractor.histogram_counts(faces)
+        # uint8 mientras las celdas no pasen de 255 píxeles (caras de 100x100: 144)
+        dtype = np.uint8 if cell_pixels.max(initial=0) <= np.iinfo(np.uint8).max else np.uint16
+        if cell_pixels.max(initial=0) > np.iinfo(np.uint16).max:
+            raise ValueError("Cara demasiado grande para la galería: reducirla antes de añadirla")
+        self._append(counts.T.astype(dtype), (1.0 / cell_pixels).astype(np.float32),
+                     np.asarray(labels, dtype=np.int32).ravel())
+
+    def add_histograms(self, histograms, labels):
+        """
+        Añadir histogramas ya normalizados (p. ej. getHistograms() de un modelo
+        LBPH de OpenCV). Los conteos se recuperan con los píxeles por celda,
+        que son la inversa del menor valor no nulo de cada histograma.
+        """
+        histograms = np.asarray(histograms, dtype=np.float32).reshape(len(labels), -1)
+        if histograms.shape[1] != self.extractor.dim:
+            raise ValueError(f"Histogramas de {histograms.shape[1]} bins; la galería usa {self.extractor.dim}")
+        smallest = np.where(histograms > 0, histograms, np.inf).min(axis=1)
+        cell_pixels = np.rint(1.0 / smallest)
+        counts = np.rint(histograms * cell_pixels[:, np.newaxis])
+        if not np.allclose(counts / cell_pixels[:, np.newaxis], histograms, atol=1e-5):
+            raise ValueError("Los histogramas no son conteos por celda normalizados (¿otro tipo de modelo?)")
+        dtype = np.uint8 if cell_pixels.max(initial=0) <= np.iinfo(np.uint8).max else np.uint16
+        self._append(counts.T.astype(dtype), (1.0 / cell_pixels).astype(np.float32),
+                     np.asarray(labels, dtype=np.int32).ravel())
+
+    def merge(self, *others):
+        """Añadir las muestras de otros LbpRecognizer con los mismos parámetros LBP (en una sola copia)"""
+        for other in others:
+            extractor = other.extractor
+            self._check_params((extractor.radius, extractor.neighbors, extractor.grid_x, extractor.grid_y),
+                               extractor.mapping)
+        others = [other for other in others if len(other)]
+        if not others:
+            return
+        for other in others:
+            self.label_info.update(other.label_info)
+        self._append(np.hstack([other.counts for other in others]),
+                     np.concatenate([other.scales for other in others]),
+                     np.concatenate([other.labels for other in others]))
+
+    def _append(self, counts, scales, labels, index_state=None):
+        first = len(self)
+        self.counts = np.ascontiguousarray(np.hstack([self.counts, counts]))
+        self.scales = np.concatenate([self.scales, scales])
+        self.row_sums = np.concatenate([self.row_sums, counts.sum(axis=0, dtype=np.float32) * scales])
+        self.labels = np.concatenate([self.labels, labels])
+        if self.index is None:
+            return
+        if index_state is not None:
+            self.index.load_state(index_state, len(self), self.extractor.dim // self.index_pool ** 2)
+        elif self.index.is_trained:
+            self.index.add(self._coarse_vectors(np.arange(first, len(self))))
+        else:
+            self.index.add(len(self) - first)
+        if self.index.needs_training():
+            self.train_index()
+        else:
+            self._group_by_list()
+
+    def train_index(self):
+        """Recalcular los centroides del índice IVF con toda la galería"""
+        if self.index is not None and len(self):
+            self.index.train(self._coarse_vectors(np.arange(len(self))))
+            self._group_by_list()
+
+    def _group_by_list(self):
+        """Reordenar las muestras para que cada lista del índice sea un rango contiguo de columnas"""
+        order = self.index.grouping_order()
+        if np.array_equal(order, np.arange(len(order))):
+            return
+        self.counts = np.ascontiguousarray(self.counts[:, order])
+        self.scales = self.scales[order]
+        self.row_sums = self.row_sums[order]
+        self.labels = self.labels[order]
+        self.index.apply_order(order)
+
+    def _coarse_vectors(self, columns):
+        vectors = []
+        for start in range(0, len(columns), COARSE_CHUNK_SAMPLES):
+            chunk = columns[start:start + COARSE_CHUNK_SAMPLES]
+            histograms = self.counts[:, chunk].T * self.scales[chunk, np.newaxis]
+            vectors.append(self.extractor.pool_cells(histograms, self.index_pool))
+        return np.vstack(vectors)
+
+    def remove_labels(self, labels):
+        """Quitar todas las muestras de esas etiquetas (OpenCV no lo permite)"""
+        keep = ~np.isin(self.labels, np.asarray(list(labels), dtype=np.int32))
+        for label in labels:
+            self.label_info.pop(int(label), None)
+        self.counts = np.ascontiguousarray(self.counts[:, keep])
+        self.scales = self.scales[keep]
+        self.row_sums = self.row_sums[keep]
+        self.labels = self.labels[keep]
+        if self.index is not None:
+            self.index.keep(keep)
+
+    def distances(self, histogram, ranges=None):
+        """
+        Chi-cuadrado de un histograma normalizado contra todas las muestras de la
+        galería, o solo contra las de `ranges` (lista de slices de columnas)
+        """
+        histogram = np.asarray(histogram, dtype=np.float32)
+        support = np.flatnonzero(histogram)
+        if ranges is None:
+            counts, scales, row_sums = self.counts, self.scales, self.row_sums
+        else:
+            # Solo los bins del soporte de las columnas candidatas, en una matriz compacta
+            counts = np.hstack([self.counts[support, r] for r in ranges])
+            scales = np.concatenate([self.scales[r] for r in ranges])
+            row_sums = np.concatenate([self.row_sums[r] for r in ranges])
+        samples = len(scales)
+        rows = int(np.clip(DISTANCE_CHUNK_ELEMENTS // max(samples, 1), 8, DISTANCE_CHUNK_MAX_ROWS))
+        acc = np.zeros(samples)
+        support_counts = np.zeros(samples)  # Conteos de cada muestra en los bins del soporte
+        block = np.empty((rows, samples), dtype=np.float32)
+        total = np.empty((rows, samples), dtype=np.float32)
+        for start in range(0, len(support), rows):
+            chunk = slice(start, start + rows)
+            bins = support[chunk]
+            a, a_plus_q = block[:len(bins)], total[:len(bins)]
+            q = histogram[bins, np.newaxis]
+            chunk_counts = counts[bins] if ranges is None else counts[chunk]
+            support_counts += chunk_counts.sum(axis=0, dtype=np.float64)
+            np.multiply(chunk_counts, scales, out=a)
+            np.add(a, q, out=a_plus_q)
+            np.subtract(a, q, out=a)
+            np.multiply(a, a, out=a)
+            np.divide(a, a_plus_q, out=a)
+            acc += a.sum(axis=0, dtype=np.float64)
+        # Fuera del soporte cada bin aporta (a - 0)^2 / a = a: lo que queda de la muestra.
+        # Con conteos enteros la resta es exacta (una muestra contra sí misma da 0)
+        row_counts = np.rint(row_sums.astype(np.float64) / scales)
+        return 2.0 * (acc + (row_counts - support_counts) * scales)
+
+    def search(self, faces, k=1, exact=False, nprobe=None):
+        """
+        Las k muestras más cercanas a cada cara del lote.
+        Devuelve (etiquetas, distancias) de forma (M, k), ordenadas de menor a
+        mayor distancia; si hay menos de k candidatas sobran -1 / inf.
+        Con el índice IVF activo solo se miran las muestras de sus listas más
+        cercanas, salvo con exact=True.
+        """
+        histograms = self.extractor.histograms(faces)
+        labels = np.full((len(histograms), k), -1, dtype=np.int32)
+        distances = np.full((len(histograms), k), np.inf)
+        if len(self) == 0:
+            return labels, distances
+        use_index = not exact and self.index is not None and self.index.is_active()
+        coarse = self.extractor.pool_cells(histograms, self.index_pool) if use_index else None
+        for m, histogram in enumerate(histograms):
+            # Si las listas más cercanas se han quedado vacías (usuarios borrados), búsqueda exacta
+            ranges = self.index.candidate_ranges(coarse[m], nprobe) if use_index else None
+            if ranges:
+                columns = np.concatenate([np.arange(r.start, r.stop) for r in ranges])
+                dist = self.distances(histogram, ranges)
+            else:
+                columns = np.arange(len(self))
+                dist = self.distances(histogram)
+            top_k = min(k, len(dist))
+            nearest = np.argpartition(dist, top_k - 1)[:top_k]
+            nearest = nearest[np.argsort(dist[nearest], kind='stable')]
+            labels[m, :top_k] = self.labels[columns[nearest]]
+            distances[m, :top_k] = dist[nearest]
+        return labels, distances
+
+    def predict(self, face):
+        """(etiqueta, distancia) de la muestra más cercana, como LBPHFaceRecognizer.predict"""
+        labels, distances = self.search([face], k=1)
+        return int(labels[0, 0]), float(distances[0, 0])
+
+    def write(self, path):
+        extractor = self.extractor
+        arrays = {'counts': self.counts, 'scales': self.scales, 'row_sums': self.row_sums, 'labels': self.labels}
+        if self.index is not None:
+            arrays.update(self.index.state())
+        meta = {'params': [extractor.radius, extractor.neighbors, extractor.grid_x, extractor.grid_y],
+                'mapping': extractor.mapping,
+                'label_info': {str(label): info for label, info in self.label_info.items()}}
+        gallery_store.write_store(path, arrays, meta)
+
+    def read(self, path, mmap=True):
+        """
+        Cargar una galería guardada con write(); ValueError si se creó con otros
+        parámetros LBP. Con mmap=True las matrices se quedan en el fichero (solo
+        lectura) hasta que la galería se modifica.
+        """
+        arrays, meta = gallery_store.read_store(path, mmap)
+        self._check_params(tuple(meta['params']), meta['mapping'])
+        self._clear()
+        self.counts, self.scales, self.row_sums, self.labels = (
+            arrays['counts'], arrays['scales'], arrays['row_sums'], arrays['labels'])
+        self.label_info = {int(label): info for label, info in meta.get('label_info', {}).items()}
+        if self.index is not None:
+            index_state = {key: value for key, value in arrays.items() if key.startswith('ivf_')}
+            self.index.load_state(index_state, len(self), self.extractor.dim // self.index_pool ** 2)
+            if self.index.needs_training():
+                self.train_index()
+            else:
+                self._group_by_list()
+
+    def copy(self):
+        """
+        Reconocedor con las mismas muestras. Las matrices se comparten: ningún
+        método las modifica en su sitio, las sustituye por otras nuevas.
+        """
+        clone = copy.copy(self)
+        clone.label_info = dict(self.label_info)
+        clone.index = copy.copy(self.index)
+        return clone
+
+    def release_mapping(self):
+        """Pasar a memoria las matrices abiertas con memmap (para poder sustituir el fichero)"""
+        for name in ('counts', 'scales', 'row_sums', 'labels'):
+            setattr(self, name, _owned(getattr(self, name)))
+        if self.index is not None and self.index.is_trained:
+            self.index.centroids = _owned(self.index.centroids)
+            self.index.assignments = _owned(self.index.assignments)
+
+    def _check_params(self, params, mapping):
+        extractor = self.extractor
+        if params != (extractor.radius, extractor.neighbors, extractor.grid_x, extractor.grid_y) \
+                or mapping != extractor.mapping:
+            raise ValueError(f"Galería creada con otros parámetros LBP: {params} {mapping}")
@@ -2,11 +2,22 @@
 import cv2
 import numpy as np
 
+from core.config import (
+    MARKER_DETECTION_MAX_WIDTH, MARKER_CORNER_SUBPIX, MARKER_CORNER_SUBPIX_WINDOW,
+    MARKER_CORNER_SUBPIX_MAX_ITER, MARKER_CORNER_SUBPIX_EPSILON
+)
+from utils.image_utils import downscale_for_analysis, upscale_points
+from utils.instrumentation import profiler
+from utils.app_logging import get_logger, every
+
+logger = get_logger(__name__)
+
 # Diccionario ArUco que vamos a usar
 # ARUCO_DICT = cv2.aruco.DICT_6X6_250 # Ejemplo
 ARUCO_DICT_NAME = "DICT_6X6_250" # Guardamos el nombre para cargarlo dinámicamente
 ARUCO_DICT = None 
 ARUCO_PARAMETERS = None
+ARUCO_DETECTOR = None
 
 # Definir camera_matrix y dist_coeffs (idealmente de calibración)
 # Si no, podemos estimar una matriz de cámara simple o pasar None
@@ -26,27 +37,60 @@ DIST_COEFFS_FOR_POSE = None
 
 def initialize_aruco_detector():
     """Inicializa el diccionario y los parámetros del detector ArUco."""
-    global ARUCO_DICT, ARUCO_PARAMETERS
+    global ARUCO_DICT, ARUCO_PARAMETERS, ARUCO_DETECTOR
     try:
         # Cargar el diccionario ArUco dinámicamente por su nombre
         if hasattr(cv2.aruco, ARUCO_DICT_NAME):
             aruco_dictionary_id = getattr(cv2.aruco, ARUCO_DICT_NAME)
             ARUCO_DICT = cv2.aruco.getPredefinedDictionary(aruco_dictionary_id)
             ARUCO_PARAMETERS = cv2.aruco.DetectorParameters()
+            ARUCO_DETECTOR = cv2.aruco.ArucoDetector(ARUCO_DICT, ARUCO_PARAMETERS)
             # ARUCO_PARAMETERS = cv2.aruco.DetectorParameters_create() # Para versiones más antiguas de OpenCV
-            print(f"Detector ArUco inicializado con diccionario: {ARUCO_DICT_NAME}")
+            logger.info("Detector ArUco inicializado con diccionario: %s", ARUCO_DICT_NAME)
             return True
         else:
-            print(f"Error: Diccionario ArUco '{ARUCO_DICT_NAME}' no encontrado en cv2.aruco.")
+            logger.warning("Error: Diccionario ArUco '%s' no encontrado en cv2.aruco.", ARUCO_DICT_NAME)
             return False
     except Exception as e:
-        print(f"Excepción al inicializar el detector ArUco: {e}")
+        logger.error("Excepción al inicializar el detector ArUco: %s", e)
         return False
 
 
-def detect_markers(frame):
+def refine_corners(gray, corners, window=MARKER_CORNER_SUBPIX_WINDOW):
+    """Esquinas (lista de arrays 1x4x2) refinadas con cornerSubPix sobre `gray`"""
+    if not corners:
+        return corners
+    points = np.concatenate([c.reshape(-1, 2) for c in corners]).astype(np.float32)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER,
+                MARKER_CORNER_SUBPIX_MAX_ITER, MARKER_CORNER_SUBPIX_EPSILON)
+    cv2.cornerSubPix(gray, points.reshape(-1, 1, 2), (window, window), (-1, -1), criteria)
+    return tuple(points[4 * i:4 * i + 4].reshape(1, 4, 2) for i in range(len(corners)))
+
+
+def _detect(gray, max_width, subpix):
+    """
+    Detectar sobre `gray` reducido a `max_width` y devolver las esquinas en
+    píxeles de `gray` (refinadas con cornerSubPix si se redujo y `subpix`).
+    """
+    with profiler.stage('marker_detect'):
+        gray_small, scale = downscale_for_analysis(gray, max_width)
+        corners, ids, rejected_img_points = ARUCO_DETECTOR.detectMarkers(gray_small)
+    if scale == 1.0:
+        return corners, ids, rejected_img_points
+
+    corners = tuple(upscale_points(c, scale).astype(np.float32) for c in corners)
+    rejected_img_points = tuple(upscale_points(c, scale).astype(np.float32) for c in rejected_img_points)
+    if subpix and ids is not None and len(ids) > 0:
+        with profiler.stage('marker_refine'):
+            corners = refine_corners(gray, corners)
+    return corners, ids, rejected_img_points
+
+
+def detect_markers(frame, max_width=MARKER_DETECTION_MAX_WIDTH, subpix=MARKER_CORNER_SUBPIX):
     """
     Detecta marcadores ArUco en un frame.
+    La detección se hace sobre una copia reducida a `max_width` de ancho (None =
+    resolución completa); las esquinas se devuelven en píxeles del frame original.
     Devuelve:
         - corners: Lista de esquinas de los marcadores detectados.
         - ids: Lista de IDs de los marcadores detectados.
@@ -57,11 +101,9 @@ def detect_markers(frame):
         # print("Advertencia: Detector ArUco no inicializado.")
         return [], None, [], frame # Devuelve el frame original si no está inicializado
 
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    
-    # Crear el detector usando los parámetros
-    detector = cv2.aruco.ArucoDetector(ARUCO_DICT, ARUCO_PARAMETERS)
-    corners, ids, rejected_img_points = detector.detectMarkers(gray)
+    with profiler.stage('marker_gray'):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    corners, ids, rejected_img_points = _detect(gray, max_width, subpix)
     
     # corners, ids, rejected_img_points = cv2.aruco.detectMarkers(
     #     gray, ARUCO_DICT, parameters=ARUCO_PARAMETERS
@@ -74,9 +116,12 @@ def detect_markers(frame):
     
     return corners, ids, rejected_img_points, frame_with_markers
 
-def detect_and_estimate_pose(frame, camera_matrix=None, dist_coeffs=None, marker_size_meters=0.05):
+def detect_and_estimate_pose(frame, camera_matrix=None, dist_coeffs=None, marker_size_meters=0.05,
+                             max_width=MARKER_DETECTION_MAX_WIDTH, subpix=MARKER_CORNER_SUBPIX):
     """
     Detecta marcadores y estima su pose.
+    Igual que detect_markers, la detección usa una copia reducida a `max_width`;
+    la pose se estima con las esquinas a resolución completa.
     Devuelve:
         - corners, ids, frame_with_markers
         - rvecs, tvecs: Vectores de rotación y traslación. None si no se detectan marcadores
@@ -97,14 +142,14 @@ def detect_and_estimate_pose(frame, camera_matrix=None, dist_coeffs=None, marker
         fx = fy = w  # Una aproximación simple
         cx, cy = w/2, h/2
         camera_matrix = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]], dtype=np.float32)
-        print("Usando matriz de cámara estimada basada en dimensiones del frame")
+        logger.debug("Usando matriz de cámara estimada basada en dimensiones del frame")
         
     if dist_coeffs is None:
         dist_coeffs = np.zeros((4,1), dtype=np.float32)  # Sin distorsión
 
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    detector = cv2.aruco.ArucoDetector(ARUCO_DICT, ARUCO_PARAMETERS)
-    corners, ids, _ = detector.detectMarkers(gray)
+    with profiler.stage('marker_gray'):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    corners, ids, _ = _detect(gray, max_width, subpix)
     
     frame_with_markers = frame.copy()
     rvecs, tvecs = None, None
@@ -113,30 +158,32 @@ def detect_and_estimate_pose(frame, camera_matrix=None, dist_coeffs=None, marker
         cv2.aruco.drawDetectedMarkers(frame_with_markers, corners, ids)
         
         # Estimar la pose si tenemos los parámetros de la cámara
-        try:
-            rvecs_list = []
-            tvecs_list = []
-            for i in range(len(ids)):
-                try:
-                    # La forma estándar con ArUco para estimación de pose:
-                    rvec, tvec, _objPoints = cv2.aruco.estimatePoseSingleMarkers(
-                        corners[i], marker_size_meters, camera_matrix, dist_coeffs
-                    )
-                    rvecs_list.append(rvec)
-                    tvecs_list.append(tvec)
+        with profiler.stage('pose_estimate'):
+            try:
+                rvecs_list = []
+                tvecs_list = []
+                for i in range(len(ids)):
+                    try:
+                        # La forma estándar con ArUco para estimación de pose:
+                        rvec, tvec, _objPoints = cv2.aruco.estimatePoseSingleMarkers(
+                            corners[i], marker_size_meters, camera_matrix, dist_coeffs
+                        )
+                        rvecs_list.append(rvec)
+                        tvecs_list.append(tvec)
                     
-                    # Dibujar el eje del marcador para verificar la pose
-                    cv2.drawFrameAxes(frame_with_markers, camera_matrix, dist_coeffs, 
-                                     rvec, tvec, marker_size_meters * 0.5)
+                        # Dibujar el eje del marcador para verificar la pose
+                        cv2.drawFrameAxes(frame_with_markers, camera_matrix, dist_coeffs, 
+                                         rvec, tvec, marker_size_meters * 0.5)
 
-                except cv2.error as e:
-                    print(f"Error en estimatePoseSingleMarkers para marcador {ids[i]}: {e}")
-                    # Esto puede pasar si los puntos del marcador no son válidos o la matriz de cámara es incorrecta.
+                    except cv2.error as e:
+                        logger.warning("Error en estimatePoseSingleMarkers para marcador %s: %s", ids[i], e,
+                                       extra=every())
+                        # Esto puede pasar si los puntos del marcador no son válidos o la matriz de cámara es incorrecta.
             
-            if rvecs_list:
-                rvecs = np.array(rvecs_list)
-                tvecs = np.array(tvecs_list)
-        except Exception as e:
-            print(f"Error general al estimar pose: {e}")
+                if rvecs_list:
+                    rvecs = np.array(rvecs_list)
+                    tvecs = np.array(tvecs_list)
+            except Exception as e:
+                logger.warning("Error general al estimar pose: %s", e, extra=every())
             
     return corners, ids, frame_with_markers, rvecs, tvecs